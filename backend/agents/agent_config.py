@@ -13,6 +13,8 @@ AGENT_CONFIGS = {
         "temperature": 0.7,
         "max_tokens": 4096,
         "prompt_file": "config_agents/BASE.md",
+        # Vérifications de complétude et rapports de code : prompts déterministes, réponses réutilisables
+        "response_cache": True,
     },
     "CODEUR": {
         "name": "CODEUR",
@@ -52,6 +52,7 @@ def get_agent(agent_name: str) -> BaseAgent:
             temperature=config.get("temperature", 0.7),
             max_tokens=config.get("max_tokens", 4096),
             prompt_file=config.get("prompt_file"),
+            response_cache=config.get("response_cache", False),
         )
 
     # Mettre en cache
@@ -1,9 +1,13 @@
 import json
 import logging
+from collections.abc import AsyncIterator
 from datetime import datetime
 from pathlib import Path
 
 from backend.ia.providers.provider_factory import ProviderFactory
+from backend.ia.rate_limiter import rate_limit_scope
+from backend.ia.response_cache import get_response_cache
+from backend.ia.token_accounting import token_ledger, usage_from_response
 
 LOG_MAX_BYTES = 5 * 1024 * 1024
 
@@ -35,6 +39,7 @@ class BaseAgent:
         temperature: float | None = None,
         max_tokens: int | None = None,
         prompt_file: str | None = None,
+        response_cache: bool = False,
     ):
         self.id = agent_id
         self.name = name
@@ -46,6 +51,8 @@ class BaseAgent:
         self.state = "idle"
 
         self.provider = ProviderFactory.create(agent_name=name)
+        if response_cache:
+            self.provider.response_cache = get_response_cache()
         self.log_file = Path("backend/logs/jarvis_audit.log")
         
         # Charger le system_prompt depuis le fichier si fourni
@@ -119,6 +126,47 @@ class BaseAgent:
         except Exception as e:
             print(f"Erreur lors de l'écriture du log: {e}")
 
+    @staticmethod
+    def _validate_messages(messages: list[dict]) -> list[dict]:
+        """
+        Valide les messages runtime et les normalise en {role, content}.
+
+        Raises:
+            InvalidRuntimeMessageError: Si un message est mal formé
+        """
+        if not isinstance(messages, list):
+            raise InvalidRuntimeMessageError("messages must be a list")
+
+        validated_messages: list[dict] = []
+        for idx, msg in enumerate(messages):
+            if not isinstance(msg, dict):
+                raise InvalidRuntimeMessageError(f"messages[{idx}] must be an object")
+
+            role = msg.get("role")
+            content = msg.get("content")
+
+            if role not in ("user", "assistant", "tool", "system"):
+                raise InvalidRuntimeMessageError(
+                    f"messages[{idx}].role must be 'user', 'assistant', 'tool', or 'system'"
+                )
+            
+            # Permettre content vide pour assistant (Gemini peut retourner "" avec tool_calls)
+            # Mais exiger content non vide pour user, system, tool
+            if role in ("user", "system", "tool"):
+                if not isinstance(content, str) or not content.strip():
+                    raise InvalidRuntimeMessageError(
+                        f"messages[{idx}].content must be a non-empty string"
+                    )
+            else:  # role == "assistant"
+                if not isinstance(content, str):
+                    raise InvalidRuntimeMessageError(
+                        f"messages[{idx}].content must be a string"
+                    )
+
+            validated_messages.append({"role": role, "content": content})
+
+        return validated_messages
+
     async def handle(
         self, messages: list[dict], session_id: str | None = None, function_executor=None
     ) -> str:
@@ -133,36 +181,57 @@ class BaseAgent:
         self.state = "working"
 
         try:
-            if not isinstance(messages, list):
-                raise InvalidRuntimeMessageError("messages must be a list")
+            validated_messages = self._validate_messages(messages)
 
-            validated_messages: list[dict] = []
-            for idx, msg in enumerate(messages):
-                if not isinstance(msg, dict):
-                    raise InvalidRuntimeMessageError(f"messages[{idx}] must be an object")
+            self.log(
+                action="handle_request",
+                details={
+                    "message_count": len(messages),
+                    "last_user_message": messages[-1].get("content", "")[:100] if messages else "",
+                    "function_calling_enabled": function_executor is not None,
+                },
+                session_id=session_id,
+            )
 
-                role = msg.get("role")
-                content = msg.get("content")
+            # Appels LLM rattachés à la conversation pour l'équité du limiteur de débit
+            with rate_limit_scope(session_id):
+                response_text = await self._handle_with_function_calling(
+                    validated_messages, function_executor, session_id=session_id
+                )
 
-                if role not in ("user", "assistant", "tool", "system"):
-                    raise InvalidRuntimeMessageError(
-                        f"messages[{idx}].role must be 'user', 'assistant', 'tool', or 'system'"
-                    )
-                
-                # Permettre content vide pour assistant (Gemini peut retourner "" avec tool_calls)
-                # Mais exiger content non vide pour user, system, tool
-                if role in ("user", "system", "tool"):
-                    if not isinstance(content, str) or not content.strip():
-                        raise InvalidRuntimeMessageError(
-                            f"messages[{idx}].content must be a non-empty string"
-                        )
-                else:  # role == "assistant"
-                    if not isinstance(content, str):
-                        raise InvalidRuntimeMessageError(
-                            f"messages[{idx}].content must be a string"
-                        )
-
-                validated_messages.append({"role": role, "content": content})
+            self.log(
+                action="handle_response",
+                details={"response_length": len(response_text)},
+                session_id=session_id,
+            )
+
+            self.state = "idle"
+            return response_text
+
+        except Exception as e:
+            self.state = "error"
+            self.log(action="handle_error", details={"error": str(e)}, session_id=session_id)
+            raise
+
+    async def handle_stream(
+        self,
+        messages: list[dict],
+        session_id: str | None = None,
+        function_executor=None,
+        max_iterations: int = 3,
+    ) -> AsyncIterator[dict]:
+        """
+        Variante streaming de handle() : produit des événements au fil de la génération.
+
+        Yields:
+            {"type": "token", "content": str} — fragment de texte
+            {"type": "tool_call", "name": str} — fonction exécutée entre deux générations
+            {"type": "done", "content": str} — réponse finale complète (dernier événement)
+        """
+        self.state = "working"
+
+        try:
+            validated_messages = self._validate_messages(messages)
 
             self.log(
                 action="handle_request",
@@ -170,30 +239,111 @@ class BaseAgent:
                     "message_count": len(messages),
                     "last_user_message": messages[-1].get("content", "")[:100] if messages else "",
                     "function_calling_enabled": function_executor is not None,
+                    "stream": True,
                 },
                 session_id=session_id,
             )
 
-            response_text = await self._handle_with_function_calling(
-                validated_messages, function_executor
-            )
+            conversation_messages = self._prepare_conversation(validated_messages)
+            functions = function_executor.get_available_functions() if function_executor else None
+            content = ""
+
+            # Le générateur est consommé dans une seule tâche : la portée couvre les yields
+            with rate_limit_scope(session_id):
+                for _ in range(max_iterations):
+                    content = ""
+                    tool_calls = []
+                    usage = None
+
+                    await token_ledger.check_budget(session_id)
+                    async for chunk in self.provider.stream_message(
+                        messages=conversation_messages,
+                        functions=functions,
+                        temperature=self.temperature,
+                        max_tokens=self.max_tokens,
+                    ):
+                        if chunk.get("content"):
+                            content += chunk["content"]
+                            yield {"type": "token", "content": chunk["content"]}
+                        tool_calls.extend(chunk.get("tool_calls", []))
+                        usage = usage_from_response(chunk) or usage
+                    await self._record_usage(session_id, usage)
+
+                    if not tool_calls or not function_executor:
+                        break
+
+                    logger.info(f"Agent {self.name} - {len(tool_calls)} tool call(s) detected (stream)")
+                    for tool_call in tool_calls:
+                        yield {"type": "tool_call", "name": tool_call["name"]}
+                    await self._execute_tool_calls(
+                        tool_calls, content, conversation_messages, function_executor
+                    )
+                else:
+                    logger.warning(f"Agent {self.name} - Max iterations ({max_iterations}) reached")
 
             self.log(
                 action="handle_response",
-                details={"response_length": len(response_text)},
+                details={"response_length": len(content), "stream": True},
                 session_id=session_id,
             )
 
             self.state = "idle"
-            return response_text
+            yield {"type": "done", "content": content}
 
         except Exception as e:
             self.state = "error"
             self.log(action="handle_error", details={"error": str(e)}, session_id=session_id)
             raise
 
+    def _prepare_conversation(self, messages: list[dict]) -> list[dict]:
+        conversation_messages = messages.copy()
+        
+        # Injecter le system_prompt au début si défini
+        if self.system_prompt and (not conversation_messages or conversation_messages[0].get("role") != "system"):
+            conversation_messages.insert(0, {"role": "system", "content": self.system_prompt})
+
+        return conversation_messages
+
+    async def _execute_tool_calls(
+        self, tool_calls: list[dict], content: str, conversation_messages: list[dict], function_executor
+    ) -> None:
+        """Exécute les tool calls et ajoute leurs résultats à la conversation."""
+        # Ajouter message assistant avec tool_calls
+        conversation_messages.append({
+            "role": "assistant",
+            "content": content or "",
+        })
+
+        # Exécuter chaque tool call
+        for tool_call in tool_calls:
+            function_name = tool_call["name"]
+            arguments = tool_call["arguments"]
+            tool_call_id = tool_call["id"]
+
+            logger.info(f"Executing function: {function_name}")
+
+            try:
+                result = await function_executor.execute(function_name, arguments)
+                logger.info(f"Function {function_name} executed successfully")
+            except Exception as e:
+                logger.error(f"Function {function_name} failed: {str(e)}")
+                result = {"success": False, "error": str(e)}
+
+            # Ajouter résultat au format provider
+            tool_result_msg = self.provider.format_tool_result(
+                tool_call_id, function_name, result
+            )
+            conversation_messages.append(tool_result_msg)
+
+    async def _record_usage(self, session_id: str | None, usage: dict | None) -> None:
+        await token_ledger.record(session_id, self.name, getattr(self.provider, "model", None), usage)
+
     async def _handle_with_function_calling(
-        self, messages: list[dict], function_executor=None, max_iterations: int = 3
+        self,
+        messages: list[dict],
+        function_executor=None,
+        max_iterations: int = 3,
+        session_id: str | None = None,
     ) -> str:
         """
         Gère l'envoi de messages avec support du function calling.
@@ -202,16 +352,12 @@ class BaseAgent:
             messages: Messages validés
             function_executor: Exécuteur de fonctions
             max_iterations: Nombre maximum d'itérations pour function calling
+            session_id: Conversation à laquelle imputer les tokens (budget)
 
         Returns:
             Réponse finale de l'agent
         """
-        conversation_messages = messages.copy()
-        
-        # Injecter le system_prompt au début si défini
-        if self.system_prompt and (not conversation_messages or conversation_messages[0].get("role") != "system"):
-            conversation_messages.insert(0, {"role": "system", "content": self.system_prompt})
-        
+        conversation_messages = self._prepare_conversation(messages)
         iteration = 0
 
         # Récupérer les fonctions disponibles si function_executor fourni
@@ -225,6 +371,9 @@ class BaseAgent:
                 f"messages={len(conversation_messages)}"
             )
 
+            # Budget de la conversation vérifié avant chaque appel (boucles tool calling)
+            await token_ledger.check_budget(session_id)
+
             # Envoyer message au provider
             response = await self.provider.send_message(
                 messages=conversation_messages,
@@ -232,6 +381,7 @@ class BaseAgent:
                 temperature=self.temperature,
                 max_tokens=self.max_tokens,
             )
+            await self._record_usage(session_id, usage_from_response(response))
 
             content = response.get("content", "")
             tool_calls = response.get("tool_calls", [])
@@ -245,32 +395,9 @@ class BaseAgent:
             # Tool calls détectés
             logger.info(f"Agent {self.name} - {len(tool_calls)} tool call(s) detected")
 
-            # Ajouter message assistant avec tool_calls
-            conversation_messages.append({
-                "role": "assistant",
-                "content": content or "",
-            })
-
-            # Exécuter chaque tool call
-            for tool_call in tool_calls:
-                function_name = tool_call["name"]
-                arguments = tool_call["arguments"]
-                tool_call_id = tool_call["id"]
-
-                logger.info(f"Executing function: {function_name}")
-
-                try:
-                    result = await function_executor.execute(function_name, arguments)
-                    logger.info(f"Function {function_name} executed successfully")
-                except Exception as e:
-                    logger.error(f"Function {function_name} failed: {str(e)}")
-                    result = {"success": False, "error": str(e)}
-
-                # Ajouter résultat au format provider
-                tool_result_msg = self.provider.format_tool_result(
-                    tool_call_id, function_name, result
-                )
-                conversation_messages.append(tool_result_msg)
+            await self._execute_tool_calls(
+                tool_calls, content, conversation_messages, function_executor
+            )
 
             iteration += 1
 
@@ -1,12 +1,20 @@
+import asyncio
+import json
 import logging
+from datetime import datetime
 from pathlib import Path
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 
 from backend.agents.agent_config import list_agents_detailed, list_available_agents
 from backend.agents.agent_factory import get_agent
 from backend.agents.base_agent import InvalidRuntimeMessageError
 from backend.db.database import db_instance
+from backend.ia.rate_limiter import rate_limiters
+from backend.ia.resilience import circuit_breaker_stats
+from backend.ia.response_cache import response_cache_stats
+from backend.ia.token_accounting import TokenBudgetExceededError, token_ledger
 from backend.models import (
     ChatMessage,
     Conversation,
@@ -14,6 +22,7 @@ from backend.models import (
     DirectoryListing,
     FileContent,
     FileInfo,
+    GrepResult,
     LibraryDocument,
     LibraryDocumentCreate,
     LibraryDocumentUpdate,
@@ -22,15 +31,21 @@ from backend.models import (
     ProjectCreate,
     ProjectUpdate,
 )
-from backend.models.session_state import ProjectState, SessionState
+from backend.models.session_state import SessionState
 from backend.services import (
     FileService,
     FunctionExecutor,
     SimpleOrchestrator,
     build_chat_simple_context,
-    file_tree_cache,
+    cached_project_view,
+    invalidate_project,
+    project_cache,
 )
+from backend.services.file_index import forget_file_index
+from backend.services.grep_engine import forget_grep_index, grep_project
+from backend.services.io_executor import ClientDisconnectedError, io_executor
 from backend.services.project_service import ProjectService
+from backend.services.symbol_index import forget_symbol_index
 
 logger = logging.getLogger(__name__)
 orchestrator = SimpleOrchestrator()
@@ -45,6 +60,26 @@ from backend.services.file_service import (
 
 router = APIRouter()
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _set_next_cursor(response: Response, page: dict) -> list[dict]:
+    """Expose next_cursor dans l'en-tête X-Next-Cursor et retourne les éléments de la page."""
+    if page["next_cursor"]:
+        response.headers[NEXT_CURSOR_HEADER] = page["next_cursor"]
+    return page["items"]
+
+
+async def _run_io(request: Request | None, project_path: str | None, func, *args):
+    """
+    Exécute un appel disque bloquant dans le pool d'E/S (limite par projet) ;
+    client déconnecté → 499.
+    """
+    try:
+        return await io_executor.run(project_path, func, *args, request=request)
+    except ClientDisconnectedError:
+        raise HTTPException(status_code=499, detail="Client disconnected")
+
 
 @router.post("/api/projects", response_model=Project)
 async def create_project(project: ProjectCreate):
@@ -107,11 +142,16 @@ async def update_project(project_id: str, update: ProjectUpdate):
 @router.delete("/api/projects/{project_id}")
 async def delete_project(project_id: str):
     try:
+        project = await db_instance.get_project(project_id)
         success = await db_instance.delete_project(project_id)
         if not success:
             raise HTTPException(status_code=404, detail="Project not found")
 
-        file_tree_cache.invalidate(project_id)
+        if project:
+            invalidate_project(project["path"])
+            forget_file_index(project["path"])
+            forget_grep_index(project["path"])
+            forget_symbol_index(project["path"])
         return {"message": "Project deleted successfully"}
     except HTTPException:
         raise
@@ -134,13 +174,20 @@ async def create_standalone_conversation(conv: ConversationCreate):
 
 
 @router.get("/api/conversations", response_model=list[Conversation])
-async def list_standalone_conversations():
+async def list_standalone_conversations(
+    response: Response, limit: int | None = None, cursor: str | None = None
+):
     """
-    Liste toutes les conversations standalone (sans projet).
+    Liste les conversations standalone (sans projet).
+    Pagination optionnelle : `limit` + `cursor` (page suivante dans l'en-tête X-Next-Cursor).
     """
     try:
-        conversations = await db_instance.list_conversations(project_id=None)
-        return conversations
+        page = await db_instance.list_conversations_page(
+            project_id=None, limit=limit, cursor=cursor
+        )
+        return _set_next_cursor(response, page)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -163,10 +210,14 @@ async def create_conversation(project_id: str, conv: ConversationCreate):
 
 
 @router.get("/api/projects/{project_id}/conversations", response_model=list[Conversation])
-async def list_conversations(project_id: str):
+async def list_conversations(
+    project_id: str, response: Response, limit: int | None = None, cursor: str | None = None
+):
     try:
-        conversations = await db_instance.list_conversations(project_id)
-        return conversations
+        page = await db_instance.list_conversations_page(project_id, limit=limit, cursor=cursor)
+        return _set_next_cursor(response, page)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -198,106 +249,191 @@ async def delete_conversation(conversation_id: str):
 
 
 @router.get("/api/conversations/{conversation_id}/messages", response_model=list[Message])
-async def get_messages(conversation_id: str, limit: int = 100):
+async def get_messages(
+    conversation_id: str, response: Response, limit: int = 100, cursor: str | None = None
+):
     try:
-        messages = await db_instance.get_messages(conversation_id, limit)
-        return messages
+        page = await db_instance.get_messages_page(conversation_id, limit, cursor)
+        return _set_next_cursor(response, page)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/api/conversations/{conversation_id}/messages")
-async def send_message(conversation_id: str, msg: ChatMessage):
+@router.get("/api/conversations/{conversation_id}/tokens")
+async def get_conversation_tokens(conversation_id: str):
+    """
+    Tokens consommés par la conversation (par agent et par délégation) et budget restant.
+    """
     try:
         conversation = await db_instance.get_conversation(conversation_id)
         if not conversation:
             raise HTTPException(status_code=404, detail="Conversation not found")
+        usage = await db_instance.get_token_usage(conversation_id)
+        budget = token_ledger.budget
+        usage["budget"] = budget or None
+        usage["remaining"] = max(budget - usage["total_tokens"], 0) if budget else None
+        return usage
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # Créer SessionState depuis conversation
-        session_state = SessionState.from_conversation(conversation)
 
-        messages = await db_instance.get_conversation_history(conversation_id)
+async def _prepare_chat_turn(
+    conversation: dict, msg: ChatMessage, request: Request | None = None
+) -> dict:
+    """
+    Prépare un tour de conversation : historique, contexte injecté au 1er message,
+    FunctionExecutor et SessionState. Les analyses disque passent par le pool d'E/S.
 
-        # Injecter contexte selon le mode (projet ou chat simple) au 1er message
-        context_injected = False
-        original_content = msg.content
+    Returns:
+        Dict {session_state, messages_for_api, original_content, user_timestamp,
+              function_executor, project_path}
+    """
+    conversation_id = conversation["id"]
 
-        if len(messages) == 0:
-            if conversation["project_id"]:
-                project = await db_instance.get_project(conversation["project_id"])
-                # Si projet supprimé, utiliser contexte minimal
-                if not project:
-                    logger.warning(f"Project {conversation['project_id']} not found, using minimal context")
-                    msg.content = f"MODE PROJET: Méthodologie obligatoire\nÉTAT: Projet non trouvé\n\n---\n\n{msg.content}"
-                    context_injected = True
-                else:
-                    file_tree = file_tree_cache.get(project["id"])
-                    if not file_tree:
-                        try:
-                            file_tree = FileService.get_file_tree(project["path"], max_depth=2)
-                            file_tree_cache.set(project["id"], file_tree)
-                        except Exception:
-                            file_tree = {"name": "project", "type": "directory", "items": []}
-
-                    # Analyser état projet et dette technique
-                    project_state = ProjectService.analyze_project_state(project["path"])
-                    session_state.set_project_state(project_state)
-
-                    debt_report = None
-                    if project_state == ProjectState.DEBT:
-                        debt_report = ProjectService.analyze_debt(project["path"])
-
-                    # Contexte enrichi avec état projet et dette
-                    context_content = ProjectService.build_enriched_context(
-                        project, file_tree, project_state, debt_report
-                    )
-                    msg.content = f"{context_content}\n\n---\n\n{msg.content}"
-                    context_injected = True
-            else:
-                # Mode chat simple — contexte léger
-                context_content = build_chat_simple_context()
-                msg.content = f"{context_content}\n\n---\n\n{msg.content}"
-                context_injected = True
+    # Créer SessionState depuis conversation
+    session_state = SessionState.from_conversation(conversation)
 
-        # Créer une copie pour l'API avec contexte (si 1er message)
-        messages_for_api = messages.copy()
-        messages_for_api.append({"role": "user", "content": msg.content})
+    messages = await db_instance.get_conversation_history(conversation_id)
 
-        # Sauvegarder en DB SANS le contexte pour éviter croissance historique
-        await db_instance.add_message(conversation_id, "user", original_content)
+    # Injecter contexte selon le mode (projet ou chat simple) au 1er message
+    original_content = msg.content
+    content = msg.content
 
-        # Créer FunctionExecutor avec contexte projet si disponible
-        function_executor = None
+    project = None
+    if conversation["project_id"]:
+        project = await db_instance.get_project(conversation["project_id"])
+
+    if len(messages) == 0:
         if conversation["project_id"]:
-            project = await db_instance.get_project(conversation["project_id"])
-            function_executor = FunctionExecutor(
-                db_instance=db_instance, project_path=project["path"] if project else None
-            )
+            # Si projet supprimé, utiliser contexte minimal
+            if not project:
+                logger.warning(f"Project {conversation['project_id']} not found, using minimal context")
+                content = f"MODE PROJET: Méthodologie obligatoire\nÉTAT: Projet non trouvé\n\n---\n\n{content}"
+            else:
+                try:
+                    file_tree = await _run_io(
+                        request,
+                        project["path"],
+                        cached_project_view,
+                        project["path"],
+                        "tree",
+                        lambda: FileService.get_file_tree(project["path"], max_depth=2),
+                        2,
+                    )
+                except HTTPException:
+                    raise
+                except Exception:
+                    file_tree = {"name": "project", "type": "directory", "items": []}
+
+                # Analyser état projet et dette technique (un seul audit)
+                project_state, debt_report = await _run_io(
+                    request,
+                    project["path"],
+                    cached_project_view,
+                    project["path"],
+                    "state",
+                    lambda: ProjectService.analyze_project(project["path"]),
+                )
+                session_state.set_project_state(project_state)
+
+                # Contexte enrichi avec état projet et dette
+                context_content = ProjectService.build_enriched_context(
+                    project, file_tree, project_state, debt_report
+                )
+                content = f"{context_content}\n\n---\n\n{content}"
         else:
-            # Chat simple : KB seulement (pas de project_path)
-            function_executor = FunctionExecutor(db_instance=db_instance)
+            # Mode chat simple — contexte léger
+            context_content = build_chat_simple_context()
+            content = f"{context_content}\n\n---\n\n{content}"
+
+    # Créer une copie pour l'API avec contexte (si 1er message)
+    messages_for_api = messages.copy()
+    messages_for_api.append({"role": "user", "content": content})
+
+    # Créer FunctionExecutor avec contexte projet si disponible
+    project_path = project["path"] if project else None
+    if conversation["project_id"]:
+        function_executor = FunctionExecutor(db_instance=db_instance, project_path=project_path)
+    else:
+        # Chat simple : KB seulement (pas de project_path)
+        function_executor = FunctionExecutor(db_instance=db_instance)
+
+    return {
+        "session_state": session_state,
+        "messages_for_api": messages_for_api,
+        # Sauvegardé en DB SANS le contexte pour éviter croissance historique
+        "original_content": original_content,
+        # Horodatage figé à la réception ; persistance faite avec la réponse
+        "user_timestamp": datetime.now().isoformat(),
+        "function_executor": function_executor,
+        "project_path": project_path,
+    }
+
+
+def _uses_orchestration(conversation: dict) -> bool:
+    # Orchestration : uniquement en mode projet avec Jarvis_maitre
+    return bool(conversation["project_id"]) and conversation["agent_id"] == "JARVIS_Maître"
+
+
+async def _persist_exchange(conversation_id: str, turn: dict, response: str) -> None:
+    # Échange persisté en une seule transaction (messages + updated_at)
+    async with db_instance.transaction() as tx:
+        await tx.add_message(
+            conversation_id, "user", turn["original_content"], timestamp=turn["user_timestamp"]
+        )
+        await tx.add_message(conversation_id, "assistant", response)
+
+
+def _delegations_summary(delegation_results: list[dict]) -> list[dict] | None:
+    if not delegation_results:
+        return None
+    return [
+        {
+            "agent": r["agent_name"],
+            "success": r["success"],
+            "passes_used": r.get("passes_used", 0),
+            "stagnation": r.get("stagnation", False),
+            "budget_exceeded": r.get("budget_exceeded", False),
+            "files_written": [
+                f["path"] for f in r.get("files_written", []) if f.get("status") == "written"
+            ],
+        }
+        for r in delegation_results
+    ]
 
+
+@router.post("/api/conversations/{conversation_id}/messages")
+async def send_message(conversation_id: str, msg: ChatMessage, request: Request):
+    try:
+        conversation = await db_instance.get_conversation(conversation_id)
+        if not conversation:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+
+        turn = await _prepare_chat_turn(conversation, msg, request)
         agent = get_agent(conversation["agent_id"])
 
         try:
             # Utiliser messages_for_api (avec contexte au 1er message) au lieu de messages
             response = await agent.handle(
-                messages_for_api, session_id=conversation_id, function_executor=function_executor
+                turn["messages_for_api"],
+                session_id=conversation_id,
+                function_executor=turn["function_executor"],
             )
 
-            # Orchestration : uniquement en mode projet avec Jarvis_maitre
             delegation_results = []
-            if conversation["project_id"] and conversation["agent_id"] == "JARVIS_Maître":
-                project = await db_instance.get_project(conversation["project_id"])
-                project_path = project["path"] if project else None
+            if _uses_orchestration(conversation):
                 # Passer messages_for_api pour l'orchestration (avec contexte si nécessaire)
                 response, delegation_results = await orchestrator.process_response(
                     response=response,
-                    conversation_history=messages_for_api,
+                    conversation_history=turn["messages_for_api"],
                     session_id=conversation_id,
-                    project_path=project_path,
-                    function_executor=function_executor,
-                    session_state=session_state,
+                    project_path=turn["project_path"],
+                    function_executor=turn["function_executor"],
+                    session_state=turn["session_state"],
                 )
                 if delegation_results:
                     logger.info(
@@ -306,8 +442,10 @@ async def send_message(conversation_id: str, msg: ChatMessage):
                         conversation_id,
                     )
 
-            await db_instance.add_message(conversation_id, "assistant", response)
+            await _persist_exchange(conversation_id, turn, response)
 
+        except TokenBudgetExceededError as e:
+            raise HTTPException(status_code=429, detail=str(e))
         except Exception as e:
             logger.exception(
                 f"Error in agent handling or orchestration for conversation {conversation_id}: {str(e)}"
@@ -320,22 +458,7 @@ async def send_message(conversation_id: str, msg: ChatMessage):
             "response": response,
             "conversation_id": conversation_id,
             "agent_id": conversation["agent_id"],
-            "delegations": [
-                {
-                    "agent": r["agent_name"],
-                    "success": r["success"],
-                    "passes_used": r.get("passes_used", 0),
-                    "stagnation": r.get("stagnation", False),
-                    "files_written": [
-                        f["path"]
-                        for f in r.get("files_written", [])
-                        if f.get("status") == "written"
-                    ],
-                }
-                for r in delegation_results
-            ]
-            if delegation_results
-            else None,
+            "delegations": _delegations_summary(delegation_results),
         }
     except InvalidRuntimeMessageError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -346,6 +469,103 @@ async def send_message(conversation_id: str, msg: ChatMessage):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/api/conversations/{conversation_id}/messages/stream")
+async def stream_message(conversation_id: str, msg: ChatMessage, request: Request):
+    """
+    Variante streaming (Server-Sent Events) de l'envoi de message.
+
+    Événements émis :
+    - token : fragment de la réponse de l'agent ({"content": ...})
+    - tool_call : fonction exécutée par l'agent ({"name": ...})
+    - progress : étape d'orchestration (delegation_started, fan_out, pass, file_written,
+      prevalidation, validation, delegation_finished, code_report, synthesis)
+    - message : réponse finale, remplace le texte streamé si l'orchestration l'a modifié
+    - done : échange persisté ({conversation_id, agent_id, delegations})
+    - error : échec ; rien n'est persisté
+    """
+    conversation = await db_instance.get_conversation(conversation_id)
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+
+    try:
+        turn = await _prepare_chat_turn(conversation, msg, request)
+        agent = get_agent(conversation["agent_id"])
+        # Valider avant d'ouvrir le flux pour répondre 400 plutôt qu'un événement error
+        agent._validate_messages(turn["messages_for_api"])
+    except InvalidRuntimeMessageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def event_stream():
+        try:
+            response = ""
+            async for event in agent.handle_stream(
+                turn["messages_for_api"],
+                session_id=conversation_id,
+                function_executor=turn["function_executor"],
+            ):
+                if event["type"] == "done":
+                    response = event["content"]
+                else:
+                    yield _sse(event["type"], {k: v for k, v in event.items() if k != "type"})
+
+            delegation_results = []
+            if _uses_orchestration(conversation):
+                progress: asyncio.Queue = asyncio.Queue()
+
+                async def on_event(event: dict) -> None:
+                    await progress.put(event)
+
+                task = asyncio.create_task(
+                    orchestrator.process_response(
+                        response=response,
+                        conversation_history=turn["messages_for_api"],
+                        session_id=conversation_id,
+                        project_path=turn["project_path"],
+                        function_executor=turn["function_executor"],
+                        session_state=turn["session_state"],
+                        on_event=on_event,
+                    )
+                )
+                try:
+                    # Relayer les événements de progression tant que l'orchestration tourne
+                    while not task.done() or not progress.empty():
+                        getter = asyncio.ensure_future(progress.get())
+                        await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+                        if getter.done():
+                            yield _sse("progress", getter.result())
+                        else:
+                            getter.cancel()
+                    response, delegation_results = task.result()
+                finally:
+                    # Client déconnecté : ne pas laisser l'orchestration tourner en arrière-plan
+                    if not task.done():
+                        task.cancel()
+
+            yield _sse("message", {"content": response})
+            await _persist_exchange(conversation_id, turn, response)
+            yield _sse(
+                "done",
+                {
+                    "conversation_id": conversation_id,
+                    "agent_id": conversation["agent_id"],
+                    "delegations": _delegations_summary(delegation_results),
+                },
+            )
+        except Exception as e:
+            logger.exception(f"Erreur streaming pour conversation {conversation_id}")
+            yield _sse("error", {"detail": f"{type(e).__name__} - {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/api/conversations/{conversation_id}/confirm-action")
 async def confirm_action(conversation_id: str):
     """
@@ -412,13 +632,21 @@ async def confirm_action(conversation_id: str):
 
 
 @router.get("/api/projects/{project_id}/files/tree")
-async def get_file_tree(project_id: str, max_depth: int = 3):
+async def get_file_tree(project_id: str, request: Request, max_depth: int = 3):
     try:
         project = await db_instance.get_project(project_id)
         if not project:
             raise HTTPException(status_code=404, detail="Project not found")
 
-        tree = FileService.get_file_tree(project["path"], max_depth)
+        tree = await _run_io(
+            request,
+            project["path"],
+            cached_project_view,
+            project["path"],
+            "tree",
+            lambda: FileService.get_file_tree(project["path"], max_depth),
+            max_depth,
+        )
         return tree
     except FileServiceError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -429,13 +657,21 @@ async def get_file_tree(project_id: str, max_depth: int = 3):
 
 
 @router.get("/api/projects/{project_id}/files/list", response_model=DirectoryListing)
-async def list_files(project_id: str, path: str = ""):
+async def list_files(project_id: str, request: Request, path: str = ""):
     try:
         project = await db_instance.get_project(project_id)
         if not project:
             raise HTTPException(status_code=404, detail="Project not found")
 
-        listing = FileService.list_directory(project["path"], path)
+        listing = await _run_io(
+            request,
+            project["path"],
+            cached_project_view,
+            project["path"],
+            "listing",
+            lambda: FileService.list_directory(project["path"], path),
+            path,
+        )
         return listing
     except PathTraversalError:
         raise HTTPException(status_code=403, detail="Access denied: path outside project")
@@ -448,13 +684,13 @@ async def list_files(project_id: str, path: str = ""):
 
 
 @router.get("/api/projects/{project_id}/files/read", response_model=FileContent)
-async def read_file(project_id: str, path: str):
+async def read_file(project_id: str, path: str, request: Request):
     try:
         project = await db_instance.get_project(project_id)
         if not project:
             raise HTTPException(status_code=404, detail="Project not found")
 
-        content = FileService.read_file(project["path"], path)
+        content = await _run_io(request, project["path"], FileService.read_file, project["path"], path)
         return content
     except PathTraversalError:
         raise HTTPException(status_code=403, detail="Access denied: path outside project")
@@ -475,13 +711,15 @@ async def read_file(project_id: str, path: str):
 
 
 @router.get("/api/projects/{project_id}/files/search", response_model=list[FileInfo])
-async def search_files(project_id: str, pattern: str, max_results: int = 50):
+async def search_files(project_id: str, pattern: str, request: Request, max_results: int = 50):
     try:
         project = await db_instance.get_project(project_id)
         if not project:
             raise HTTPException(status_code=404, detail="Project not found")
 
-        results = FileService.search_files(project["path"], pattern, max_results)
+        results = await _run_io(
+            request, project["path"], FileService.search_files, project["path"], pattern, max_results
+        )
         return results
     except FileServiceError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -491,6 +729,49 @@ async def search_files(project_id: str, pattern: str, max_results: int = 50):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/api/projects/{project_id}/files/grep", response_model=GrepResult)
+async def grep_files(
+    project_id: str,
+    pattern: str,
+    request: Request,
+    regex: bool = False,
+    case_sensitive: bool = False,
+    include: str | None = None,
+    exclude: str | None = None,
+    max_results: int = 100,
+    context: int = 0,
+):
+    """
+    Recherche dans le contenu des fichiers du projet (include/exclude : globs séparés par des virgules).
+    """
+    try:
+        project = await db_instance.get_project(project_id)
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+
+        result = await _run_io(
+            request,
+            project["path"],
+            lambda: grep_project(
+                project["path"],
+                pattern,
+                regex=regex,
+                case_sensitive=case_sensitive,
+                include=include,
+                exclude=exclude,
+                max_results=max_results,
+                context=context,
+            ),
+        )
+        return result
+    except FileServiceError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/agents")
 def get_agents():
     """
@@ -514,18 +795,92 @@ def get_agents_detailed():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/api/rate-limits")
+def get_rate_limits():
+    """
+    Métriques des limiteurs de débit LLM par modèle : file d'attente, temps d'attente,
+    requêtes et tokens consommés, quotas configurés.
+    """
+    return {"models": rate_limiters.stats()}
+
+
+@router.get("/api/circuit-breakers")
+def get_circuit_breakers():
+    """
+    État des disjoncteurs LLM par modèle (closed / open / half_open).
+    """
+    return {"models": circuit_breaker_stats()}
+
+
+@router.get("/api/llm-cache")
+def get_llm_cache_stats():
+    """
+    Compteurs du cache de réponses LLM (hits mémoire/disque, misses, évictions).
+    """
+    return response_cache_stats()
+
+
+@router.get("/api/project-cache")
+def get_project_cache_stats():
+    """
+    Compteurs du cache des vues de projet (arborescences, listings, rapports de dette).
+    """
+    return project_cache.stats()
+
+
+@router.get("/api/tokens")
+def get_token_stats():
+    """
+    Consommation de tokens par agent depuis le démarrage et coût mesuré d'un fichier CODEUR.
+    """
+    return token_ledger.stats()
+
+
 @router.get("/api/library", response_model=list[LibraryDocument])
 async def list_library_documents(
-    category: str = None, agent: str = None, tag: str = None, search: str = None
+    response: Response,
+    category: str = None,
+    agent: str = None,
+    tag: str = None,
+    search: str = None,
+    limit: int | None = None,
+    cursor: str | None = None,
 ):
     """
-    Liste tous les documents de la Knowledge Base avec filtres optionnels.
+    Liste les documents de la Knowledge Base avec filtres optionnels.
+    Pagination optionnelle : `limit` + `cursor` (page suivante dans l'en-tête X-Next-Cursor).
     """
     try:
-        documents = await db_instance.list_library_documents(
-            category=category, agent=agent, tag=tag, search=search
+        page = await db_instance.list_library_documents_page(
+            category=category, agent=agent, tag=tag, search=search, limit=limit, cursor=cursor
         )
-        return documents
+        return _set_next_cursor(response, page)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/api/library/facets")
+async def get_library_facets():
+    """
+    Compte les documents de la Knowledge Base par catégorie, tag et agent.
+    """
+    try:
+        return await db_instance.get_library_facets()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/api/library/import")
+async def import_library_documents(docs: list[LibraryDocumentCreate]):
+    """
+    Importe un lot de documents dans la Knowledge Base en une seule transaction.
+    Tout ou rien : une erreur annule l'ensemble de l'import.
+    """
+    try:
+        imported = await db_instance.import_library_documents(doc.model_dump() for doc in docs)
+        return {"imported": imported}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -14,7 +14,11 @@ from starlette.middleware.base import BaseHTTPMiddleware
 
 from backend.api import router
 from backend.db.database import db_instance
+from backend.ia.response_cache import close_response_cache
+from backend.ia.token_accounting import token_ledger
 from backend.logging_config import setup_logging
+from backend.services.file_index import close_file_indexes
+from backend.services.prevalidation import shutdown_prevalidation_pool
 from backend.ia.providers.provider_factory import ProviderFactory
 
 # Configuration du logging au démarrage
@@ -42,7 +46,12 @@ async def lifespan(app: FastAPI):
     
     await db_instance.initialize()
     await db_instance.seed_library_if_empty()
+    token_ledger.bind(db_instance)
     yield
+    await close_response_cache()
+    close_file_indexes()
+    shutdown_prevalidation_pool()
+    await db_instance.close()
 
 
 app = FastAPI(
@@ -64,6 +73,7 @@ app.add_middleware(
     ],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.include_router(router)
@@ -0,0 +1,108 @@
+"""
+Import en masse — JARVIS 2.0
+Lecture JSON en flux et préparation des lignes pour les insertions executemany
+(seed de la Library, import /api/library/import, migration d'historiques).
+"""
+
+import json
+import uuid
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from typing import IO
+
+_WHITESPACE = " \t\n\r"
+
+
+class BulkImportError(ValueError):
+    pass
+
+
+def iter_json_array(fp: IO[str], chunk_size: int = 64 * 1024) -> Iterator:
+    """
+    Itère sur les éléments d'un tableau JSON sans charger tout le fichier en mémoire.
+    Seul l'élément en cours de décodage est conservé dans le tampon.
+
+    Raises:
+        BulkImportError: Si le document n'est pas un tableau JSON valide
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buffer, pos, eof
+        if eof:
+            return False
+        chunk = fp.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    def skip_whitespace() -> str:
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            if not fill():
+                return ""
+
+    if skip_whitespace() != "[":
+        raise BulkImportError("Le document JSON doit être un tableau")
+    pos += 1
+
+    if skip_whitespace() == "]":
+        return
+
+    while True:
+        if not skip_whitespace():
+            raise BulkImportError("Tableau JSON tronqué")
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as e:
+            if fill():
+                continue
+            raise BulkImportError(f"JSON invalide : {e.msg}") from None
+        # Un nombre en fin de tampon peut se poursuivre dans le bloc suivant
+        if end == len(buffer) and fill():
+            continue
+        pos = end
+        yield item
+
+        separator = skip_whitespace()
+        if separator == ",":
+            pos += 1
+        elif separator == "]":
+            return
+        else:
+            raise BulkImportError("Séparateur attendu entre les éléments du tableau JSON")
+
+
+def iter_batches(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def library_document_row(item: dict, timestamp: str) -> tuple:
+    """Ligne library_documents prête pour executemany (ordre des colonnes d'INSERT)."""
+    try:
+        return (
+            str(uuid.uuid4()),
+            item["category"],
+            item["name"],
+            item.get("icon", ""),
+            item["description"],
+            item["content"],
+            json.dumps(item.get("tags", [])),
+            json.dumps(item.get("agents", [])),
+            timestamp,
+            timestamp,
+        )
+    except KeyError as e:
+        raise BulkImportError(f"Champ obligatoire manquant : {e.args[0]}") from None
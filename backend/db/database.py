@@ -1,36 +1,214 @@
+import base64
+import json
+import re
 import uuid
+from collections.abc import Iterable
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
 
 import aiosqlite
 
+from backend.db.bulk_import import iter_batches, iter_json_array, library_document_row
+from backend.db.pool import ConnectionPool
 
-class _ForeignKeyConnection:
-    """Context manager qui ouvre une connexion aiosqlite avec PRAGMA foreign_keys = ON."""
 
-    def __init__(self, db_path: str):
-        self.db_path = db_path
-        self._conn = None
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(sort_value, row_id) -> str:
+    """Encode la position (clé de tri, id) du dernier élément d'une page en jeton opaque."""
+    raw = json.dumps([sort_value, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple:
+    """Décode un jeton produit par encode_cursor. Lève InvalidCursorError si invalide."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return sort_value, row_id
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError(f"Curseur invalide : {token}") from e
+
+
+_FTS_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# Poids BM25 des colonnes FTS (name, description, content)
+_FTS_WEIGHTS = "10.0, 4.0, 1.0"
+
+
+def build_fts_query(search: str) -> str:
+    """
+    Convertit une saisie libre en requête FTS5 sûre : chaque mot devient un terme
+    préfixe entre guillemets ("fast"* "api"*), combinés en ET.
+    Retourne une chaîne vide si la saisie ne contient aucun mot.
+    """
+    return " ".join(f'"{token}"*' for token in _FTS_TOKEN.findall(search))
+
+
+def _check_limit(limit: int | None) -> None:
+    if limit is not None and limit < 1:
+        raise ValueError(f"limit doit être >= 1 (reçu : {limit})")
+
+
+def _page(items: list[dict], limit: int | None, sort_key: str) -> dict:
+    """Tronque à `limit` (la requête en lit limit + 1) et calcule next_cursor."""
+    if limit is None or len(items) <= limit:
+        return {"items": items, "next_cursor": None}
+    items = items[:limit]
+    last = items[-1]
+    return {"items": items, "next_cursor": encode_cursor(last[sort_key], last["id"])}
+
+
+class UnitOfWork:
+    """
+    Regroupe plusieurs écritures sur une même connexion, validées en un seul commit.
+    Les mises à jour de conversations.updated_at sont différées et appliquées une fois
+    par conversation juste avant le commit.
+    Obtenu via `async with db.transaction() as tx:`.
+    """
+
+    def __init__(self, conn: aiosqlite.Connection):
+        self.conn = conn
+        self._touched_conversations: dict[str, str] = {}
+
+    async def add_message(
+        self, conversation_id: str, role: str, content: str, timestamp: str | None = None
+    ) -> dict:
+        timestamp = timestamp or datetime.now().isoformat()
+        cursor = await self.conn.execute(
+            "INSERT INTO messages (conversation_id, role, content, timestamp) VALUES (?, ?, ?, ?)",
+            (conversation_id, role, content, timestamp),
+        )
+        self.touch_conversation(conversation_id)
+        return {
+            "id": cursor.lastrowid,
+            "conversation_id": conversation_id,
+            "role": role,
+            "content": content,
+            "timestamp": timestamp,
+        }
+
+    async def add_messages(self, messages: Iterable[dict]) -> int:
+        """
+        Insertion en masse (executemany). Chaque message : {conversation_id, role,
+        content, timestamp?}.
 
-    async def __aenter__(self):
-        self._conn = await aiosqlite.connect(self.db_path)
-        await self._conn.execute("PRAGMA foreign_keys = ON")
-        return self._conn
+        Returns:
+            Nombre de messages insérés
+        """
+        now = datetime.now().isoformat()
+        rows = [
+            (msg["conversation_id"], msg["role"], msg["content"], msg.get("timestamp") or now)
+            for msg in messages
+        ]
+        await self.conn.executemany(
+            "INSERT INTO messages (conversation_id, role, content, timestamp) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+        for conversation_id, *_ in rows:
+            self.touch_conversation(conversation_id)
+        return len(rows)
+
+    async def create_conversation(
+        self, agent_id: str, project_id: str | None = None, title: str | None = None
+    ) -> dict:
+        conversation_id = str(uuid.uuid4())
+        created_at = datetime.now().isoformat()
 
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self._conn:
-            await self._conn.close()
-        return False
+        if title is None:
+            if project_id:
+                title = f"Conversation {datetime.now().strftime('%d/%m %H:%M')}"
+            else:
+                title = f"Chat {datetime.now().strftime('%d/%m %H:%M')}"
+
+        await self.conn.execute(
+            "INSERT INTO conversations (id, project_id, agent_id, title, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (conversation_id, project_id, agent_id, title, created_at, created_at),
+        )
+        return {
+            "id": conversation_id,
+            "project_id": project_id,
+            "agent_id": agent_id,
+            "title": title,
+            "created_at": created_at,
+            "updated_at": created_at,
+            "message_count": 0,
+        }
+
+    async def add_library_documents(self, items: Iterable[dict], batch_size: int = 500) -> int:
+        """
+        Insertion en masse de documents Knowledge Base, par lots executemany.
+        `items` peut être un itérateur (ex. iter_json_array) : seul le lot courant est en mémoire.
+
+        Returns:
+            Nombre de documents insérés
+        """
+        now = datetime.now().isoformat()
+        total = 0
+        for batch in iter_batches(items, batch_size):
+            await self.conn.executemany(
+                """INSERT INTO library_documents
+                (id, category, name, icon, description, content, tags, agents, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                [library_document_row(item, now) for item in batch],
+            )
+            total += len(batch)
+        return total
+
+    def touch_conversation(self, conversation_id: str) -> None:
+        self._touched_conversations[conversation_id] = datetime.now().isoformat()
+
+    async def flush(self) -> None:
+        if self._touched_conversations:
+            await self.conn.executemany(
+                "UPDATE conversations SET updated_at = ? WHERE id = ?",
+                [(updated_at, cid) for cid, updated_at in self._touched_conversations.items()],
+            )
+            self._touched_conversations.clear()
 
 
 class Database:
-    def __init__(self, db_path: str = "jarvis_data.db"):
+    def __init__(self, db_path: str = "jarvis_data.db", pool_size: int = 4):
         self.db_path = db_path
         self._initialized = False
+        self._pool = ConnectionPool(db_path, max_readers=pool_size)
+
+    @asynccontextmanager
+    async def _connect(self):
+        """Connexion d'écriture du pool (WAL, foreign_keys activé)."""
+        await self.initialize()
+        async with self._pool.write() as db:
+            yield db
+
+    @asynccontextmanager
+    async def _read(self):
+        """Connexion de lecture du pool (concurrente avec l'écriture en WAL)."""
+        await self.initialize()
+        async with self._pool.read() as db:
+            yield db
+
+    @asynccontextmanager
+    async def transaction(self):
+        """
+        Unité de travail : toutes les écritures faites via le UnitOfWork retourné sont
+        validées en un seul commit, ou annulées ensemble en cas d'exception.
+        """
+        async with self._connect() as db:
+            tx = UnitOfWork(db)
+            yield tx
+            await tx.flush()
+            await db.commit()
+        # Sur exception : le pool annule la transaction ouverte au retour de la connexion
+
+    async def close(self):
+        """Ferme les connexions du pool (arrêt de l'application)."""
+        await self._pool.close()
 
-    def _connect(self):
-        """Ouvre une connexion SQLite avec foreign_keys activé."""
-        return _ForeignKeyConnection(self.db_path)
+    def pool_stats(self) -> dict:
+        return self._pool.stats()
 
     async def initialize(self):
         if self._initialized:
@@ -39,8 +217,18 @@ class Database:
         schema_path = Path(__file__).parent / "schema.sql"
         schema_sql = schema_path.read_text(encoding="utf-8")
 
-        async with self._connect() as db:
+        from backend.db.migrations import (
+            migrate_denormalized_counters,
+            migrate_library_associations,
+            migrate_library_fts,
+        )
+
+        # Schéma et migrations appliqués au premier accès si initialize() n'a pas été appelé
+        async with self._pool.write() as db:
             await db.executescript(schema_sql)
+            await migrate_denormalized_counters(db)
+            await migrate_library_associations(db)
+            await migrate_library_fts(db)
             await db.commit()
 
         self._initialized = True
@@ -65,53 +253,31 @@ class Database:
         }
 
     async def get_project(self, project_id: str) -> dict | None:
-        async with self._connect() as db:
+        async with self._read() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("SELECT * FROM projects WHERE id = ?", (project_id,)) as cursor:
                 row = await cursor.fetchone()
                 if row:
-                    async with db.execute(
-                        "SELECT COUNT(*) as count FROM conversations WHERE project_id = ?",
-                        (project_id,),
-                    ) as count_cursor:
-                        count_row = await count_cursor.fetchone()
-                        conversation_count = count_row[0] if count_row else 0
-
-                    return {
-                        "id": row["id"],
-                        "name": row["name"],
-                        "path": row["path"],
-                        "description": row["description"],
-                        "created_at": row["created_at"],
-                        "conversation_count": conversation_count,
-                    }
+                    return self._project_from_row(row)
                 return None
 
     async def list_projects(self) -> list[dict]:
-        async with self._connect() as db:
+        async with self._read() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("SELECT * FROM projects ORDER BY created_at DESC") as cursor:
                 rows = await cursor.fetchall()
-                projects = []
-                for row in rows:
-                    async with db.execute(
-                        "SELECT COUNT(*) as count FROM conversations WHERE project_id = ?",
-                        (row["id"],),
-                    ) as count_cursor:
-                        count_row = await count_cursor.fetchone()
-                        conversation_count = count_row[0] if count_row else 0
-
-                    projects.append(
-                        {
-                            "id": row["id"],
-                            "name": row["name"],
-                            "path": row["path"],
-                            "description": row["description"],
-                            "created_at": row["created_at"],
-                            "conversation_count": conversation_count,
-                        }
-                    )
-                return projects
+                return [self._project_from_row(row) for row in rows]
+
+    @staticmethod
+    def _project_from_row(row) -> dict:
+        return {
+            "id": row["id"],
+            "name": row["name"],
+            "path": row["path"],
+            "description": row["description"],
+            "created_at": row["created_at"],
+            "conversation_count": row["conversation_count"],
+        }
 
     async def update_project(
         self, project_id: str, name: str | None = None, description: str | None = None
@@ -146,93 +312,69 @@ class Database:
     async def create_conversation(
         self, agent_id: str, project_id: str | None = None, title: str | None = None
     ) -> dict:
-        conversation_id = str(uuid.uuid4())
-        created_at = datetime.now().isoformat()
-
-        if title is None:
-            if project_id:
-                title = f"Conversation {datetime.now().strftime('%d/%m %H:%M')}"
-            else:
-                title = f"Chat {datetime.now().strftime('%d/%m %H:%M')}"
-
-        async with self._connect() as db:
-            await db.execute(
-                "INSERT INTO conversations (id, project_id, agent_id, title, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
-                (conversation_id, project_id, agent_id, title, created_at, created_at),
-            )
-            await db.commit()
-
-        return {
-            "id": conversation_id,
-            "project_id": project_id,
-            "agent_id": agent_id,
-            "title": title,
-            "created_at": created_at,
-            "updated_at": created_at,
-            "message_count": 0,
-        }
+        async with self.transaction() as tx:
+            return await tx.create_conversation(agent_id, project_id=project_id, title=title)
 
     async def get_conversation(self, conversation_id: str) -> dict | None:
-        async with self._connect() as db:
+        async with self._read() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute(
                 "SELECT * FROM conversations WHERE id = ?", (conversation_id,)
             ) as cursor:
                 row = await cursor.fetchone()
                 if row:
-                    async with db.execute(
-                        "SELECT COUNT(*) as count FROM messages WHERE conversation_id = ?",
-                        (conversation_id,),
-                    ) as count_cursor:
-                        count_row = await count_cursor.fetchone()
-                        message_count = count_row[0] if count_row else 0
-
-                    return {
-                        "id": row["id"],
-                        "project_id": row["project_id"],
-                        "agent_id": row["agent_id"],
-                        "title": row["title"],
-                        "created_at": row["created_at"],
-                        "updated_at": row["updated_at"],
-                        "message_count": message_count,
-                    }
+                    return self._conversation_from_row(row)
                 return None
 
     async def list_conversations(self, project_id: str | None = None) -> list[dict]:
-        async with self._connect() as db:
+        page = await self.list_conversations_page(project_id)
+        return page["items"]
+
+    async def list_conversations_page(
+        self, project_id: str | None = None, limit: int | None = None, cursor: str | None = None
+    ) -> dict:
+        """
+        Liste paginée (keyset sur updated_at DESC, id DESC).
+
+        Returns:
+            Dict {items, next_cursor} — next_cursor vaut None sur la dernière page
+        """
+        _check_limit(limit)
+        if project_id is None:
+            sql = "SELECT * FROM conversations WHERE project_id IS NULL"
+            params = []
+        else:
+            sql = "SELECT * FROM conversations WHERE project_id = ?"
+            params = [project_id]
+
+        if cursor:
+            updated_at, conv_id = decode_cursor(cursor)
+            sql += " AND (updated_at, id) < (?, ?)"
+            params.extend([updated_at, conv_id])
+
+        sql += " ORDER BY updated_at DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+
+        async with self._read() as db:
             db.row_factory = aiosqlite.Row
-            if project_id is None:
-                sql = (
-                    "SELECT * FROM conversations WHERE project_id IS NULL ORDER BY updated_at DESC"
-                )
-                params = ()
-            else:
-                sql = "SELECT * FROM conversations WHERE project_id = ? ORDER BY updated_at DESC"
-                params = (project_id,)
+            async with db.execute(sql, params) as db_cursor:
+                rows = await db_cursor.fetchall()
+                items = [self._conversation_from_row(row) for row in rows]
+        return _page(items, limit, "updated_at")
 
-            async with db.execute(sql, params) as cursor:
-                rows = await cursor.fetchall()
-                conversations = []
-                for row in rows:
-                    async with db.execute(
-                        "SELECT COUNT(*) as count FROM messages WHERE conversation_id = ?",
-                        (row["id"],),
-                    ) as count_cursor:
-                        count_row = await count_cursor.fetchone()
-                        message_count = count_row[0] if count_row else 0
-
-                    conversations.append(
-                        {
-                            "id": row["id"],
-                            "project_id": row["project_id"],
-                            "agent_id": row["agent_id"],
-                            "title": row["title"],
-                            "created_at": row["created_at"],
-                            "updated_at": row["updated_at"],
-                            "message_count": message_count,
-                        }
-                    )
-                return conversations
+    @staticmethod
+    def _conversation_from_row(row) -> dict:
+        return {
+            "id": row["id"],
+            "project_id": row["project_id"],
+            "agent_id": row["agent_id"],
+            "title": row["title"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+            "message_count": row["message_count"],
+        }
 
     async def delete_conversation(self, conversation_id: str) -> bool:
         async with self._connect() as db:
@@ -256,36 +398,132 @@ class Database:
             )
             await db.commit()
 
-    async def add_message(self, conversation_id: str, role: str, content: str) -> dict:
-        timestamp = datetime.now().isoformat()
+    async def record_token_usage(self, rows: Iterable[dict]) -> int:
+        """
+        Enregistre des consommations de tokens.
+
+        Args:
+            rows: Dicts {conversation_id, delegation_id, agent, model,
+                  prompt_tokens, completion_tokens, created_at}
 
+        Returns:
+            Nombre d'enregistrements insérés
+        """
+        params = [
+            (
+                r["conversation_id"],
+                r.get("delegation_id"),
+                r["agent"],
+                r.get("model"),
+                r.get("prompt_tokens", 0),
+                r.get("completion_tokens", 0),
+                r.get("created_at") or datetime.now().isoformat(),
+            )
+            for r in rows
+        ]
+        if not params:
+            return 0
         async with self._connect() as db:
-            cursor = await db.execute(
-                "INSERT INTO messages (conversation_id, role, content, timestamp) VALUES (?, ?, ?, ?)",
-                (conversation_id, role, content, timestamp),
+            await db.executemany(
+                """INSERT INTO token_usage
+                (conversation_id, delegation_id, agent, model, prompt_tokens, completion_tokens, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                params,
             )
             await db.commit()
-            message_id = cursor.lastrowid
+        return len(params)
 
-        await self.update_conversation_timestamp(conversation_id)
+    async def get_token_usage(self, conversation_id: str) -> dict:
+        """
+        Consommation de tokens d'une conversation, agrégée par agent et par délégation.
 
+        Returns:
+            Dict {conversation_id, prompt_tokens, completion_tokens, total_tokens,
+                  calls, by_agent, by_delegation}
+        """
+        by_agent = {}
+        by_delegation = {}
+        async with self._read() as db:
+            async with db.execute(
+                """SELECT agent, COUNT(*), SUM(prompt_tokens), SUM(completion_tokens)
+                FROM token_usage WHERE conversation_id = ? GROUP BY agent""",
+                (conversation_id,),
+            ) as cursor:
+                async for agent, calls, prompt, completion in cursor:
+                    by_agent[agent] = {
+                        "calls": calls,
+                        "prompt_tokens": prompt,
+                        "completion_tokens": completion,
+                    }
+            async with db.execute(
+                """SELECT delegation_id, agent, SUM(prompt_tokens) + SUM(completion_tokens)
+                FROM token_usage WHERE conversation_id = ? AND delegation_id IS NOT NULL
+                GROUP BY delegation_id, agent""",
+                (conversation_id,),
+            ) as cursor:
+                async for delegation_id, agent, total in cursor:
+                    by_delegation.setdefault(delegation_id, {})[agent] = total
+
+        prompt_tokens = sum(a["prompt_tokens"] for a in by_agent.values())
+        completion_tokens = sum(a["completion_tokens"] for a in by_agent.values())
         return {
-            "id": message_id,
             "conversation_id": conversation_id,
-            "role": role,
-            "content": content,
-            "timestamp": timestamp,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "calls": sum(a["calls"] for a in by_agent.values()),
+            "by_agent": by_agent,
+            "by_delegation": by_delegation,
         }
 
+    async def add_message(self, conversation_id: str, role: str, content: str) -> dict:
+        async with self.transaction() as tx:
+            return await tx.add_message(conversation_id, role, content)
+
+    async def add_messages(self, messages: Iterable[dict]) -> int:
+        """
+        Insère plusieurs messages en une transaction (migrations, imports).
+
+        Args:
+            messages: Liste de dicts {conversation_id, role, content, timestamp?}
+
+        Returns:
+            Nombre de messages insérés
+        """
+        async with self.transaction() as tx:
+            return await tx.add_messages(messages)
+
     async def get_messages(self, conversation_id: str, limit: int = 100) -> list[dict]:
-        async with self._connect() as db:
+        page = await self.get_messages_page(conversation_id, limit)
+        return page["items"]
+
+    async def get_messages_page(
+        self, conversation_id: str, limit: int = 100, cursor: str | None = None
+    ) -> dict:
+        """
+        Messages paginés par ordre chronologique (keyset sur timestamp ASC, id ASC).
+        Coût O(page) grâce à l'index (conversation_id, timestamp, id), sans OFFSET.
+
+        Returns:
+            Dict {items, next_cursor} — next_cursor vaut None sur la dernière page
+        """
+        _check_limit(limit)
+        sql = "SELECT * FROM messages WHERE conversation_id = ?"
+        params = [conversation_id]
+
+        if cursor:
+            timestamp, message_id = decode_cursor(cursor)
+            sql += " AND (timestamp, id) > (?, ?)"
+            params.extend([timestamp, message_id])
+
+        sql += " ORDER BY timestamp ASC, id ASC LIMIT ?"
+        params.append(limit + 1)
+
+        async with self._read() as db:
             db.row_factory = aiosqlite.Row
-            async with db.execute(
-                "SELECT * FROM messages WHERE conversation_id = ? ORDER BY timestamp ASC LIMIT ?",
-                (conversation_id, limit),
-            ) as cursor:
-                rows = await cursor.fetchall()
-                return [
+            async with db.execute(sql, params) as db_cursor:
+                rows = await db_cursor.fetchall()
+                items = [
                     {
                         "id": row["id"],
                         "conversation_id": row["conversation_id"],
@@ -295,10 +533,18 @@ class Database:
                     }
                     for row in rows
                 ]
+        return _page(items, limit, "timestamp")
 
     async def get_conversation_history(self, conversation_id: str) -> list[dict]:
-        messages = await self.get_messages(conversation_id)
-        return [{"role": msg["role"], "content": msg["content"]} for msg in messages]
+        """Historique complet (toutes les pages) au format {role, content}."""
+        history = []
+        cursor = None
+        while True:
+            page = await self.get_messages_page(conversation_id, limit=500, cursor=cursor)
+            history.extend({"role": msg["role"], "content": msg["content"]} for msg in page["items"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                return history
 
     async def create_library_document(
         self,
@@ -310,8 +556,6 @@ class Database:
         agents: list[str],
         icon: str | None = None,
     ) -> dict:
-        import json
-
         doc_id = str(uuid.uuid4())
         created_at = datetime.now().isoformat()
 
@@ -349,27 +593,14 @@ class Database:
         }
 
     async def get_library_document(self, doc_id: str) -> dict | None:
-        import json
-
-        async with self._connect() as db:
+        async with self._read() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute(
                 "SELECT * FROM library_documents WHERE id = ?", (doc_id,)
             ) as cursor:
                 row = await cursor.fetchone()
                 if row:
-                    return {
-                        "id": row["id"],
-                        "category": row["category"],
-                        "name": row["name"],
-                        "icon": row["icon"],
-                        "description": row["description"],
-                        "content": row["content"],
-                        "tags": json.loads(row["tags"]) if row["tags"] else [],
-                        "agents": json.loads(row["agents"]) if row["agents"] else [],
-                        "created_at": row["created_at"],
-                        "updated_at": row["updated_at"],
-                    }
+                    return self._library_document_from_row(row)
                 return None
 
     async def list_library_documents(
@@ -379,49 +610,135 @@ class Database:
         tag: str | None = None,
         search: str | None = None,
     ) -> list[dict]:
-        import json
+        page = await self.list_library_documents_page(
+            category=category, agent=agent, tag=tag, search=search
+        )
+        return page["items"]
+
+    async def list_library_documents_page(
+        self,
+        category: str | None = None,
+        agent: str | None = None,
+        tag: str | None = None,
+        search: str | None = None,
+        limit: int | None = None,
+        cursor: str | None = None,
+    ) -> dict:
+        """
+        Liste paginée de la Knowledge Base.
+        Sans recherche : keyset sur updated_at DESC, id DESC.
+        Avec recherche : index FTS5, tri par pertinence BM25 (score ASC, id ASC),
+        chaque document porte alors `score` et `snippet` (termes surlignés **...**).
+
+        Returns:
+            Dict {items, next_cursor} — next_cursor vaut None sur la dernière page
+        """
+        _check_limit(limit)
 
-        query = "SELECT * FROM library_documents WHERE 1=1"
+        filters = ""
         params = []
 
         if category:
-            query += " AND category = ?"
+            filters += " AND d.category = ?"
             params.append(category)
 
         if agent:
-            query += " AND agents LIKE ?"
-            params.append(f'%"{agent}"%')
+            filters += (
+                " AND d.id IN (SELECT document_id FROM library_document_agents WHERE agent = ?)"
+            )
+            params.append(agent)
 
         if tag:
-            query += " AND tags LIKE ?"
-            params.append(f'%"{tag}"%')
+            filters += " AND d.id IN (SELECT document_id FROM library_document_tags WHERE tag = ?)"
+            params.append(tag)
 
         if search:
-            query += " AND (name LIKE ? OR description LIKE ? OR content LIKE ?)"
-            search_pattern = f"%{search}%"
-            params.extend([search_pattern, search_pattern, search_pattern])
+            fts_query = build_fts_query(search)
+            if not fts_query:
+                return {"items": [], "next_cursor": None}
+            query = (
+                "SELECT * FROM ("
+                f"SELECT d.*, bm25(library_documents_fts, {_FTS_WEIGHTS}) AS score, "
+                "snippet(library_documents_fts, -1, '**', '**', '…', 16) AS snippet "
+                "FROM library_documents_fts "
+                "JOIN library_documents AS d ON d.rowid = library_documents_fts.rowid "
+                f"WHERE library_documents_fts MATCH ?{filters}"
+                ") WHERE 1=1"
+            )
+            params.insert(0, fts_query)
+            sort_key = "score"
+            order = " ORDER BY score ASC, id ASC"
+            keyset = " AND (score, id) > (?, ?)"
+        else:
+            query = f"SELECT d.* FROM library_documents AS d WHERE 1=1{filters}"
+            sort_key = "updated_at"
+            order = " ORDER BY updated_at DESC, id DESC"
+            keyset = " AND (updated_at, id) < (?, ?)"
+
+        if cursor:
+            sort_value, doc_id = decode_cursor(cursor)
+            query += keyset
+            params.extend([sort_value, doc_id])
+
+        query += order
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit + 1)
+
+        async with self._read() as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute(query, params) as db_cursor:
+                rows = await db_cursor.fetchall()
+                items = [self._library_document_from_row(row) for row in rows]
+        return _page(items, limit, sort_key)
 
-        query += " ORDER BY updated_at DESC"
+    async def get_library_facets(self) -> dict:
+        """
+        Nombre de documents par catégorie, tag et agent (une seule requête agrégée).
+
+        Returns:
+            Dict {categories: {nom: n}, tags: {nom: n}, agents: {nom: n}}
+        """
+        facets = {"categories": {}, "tags": {}, "agents": {}}
+        query = (
+            "SELECT 'categories', category, COUNT(*) FROM library_documents GROUP BY category "
+            "UNION ALL "
+            "SELECT 'tags', tag, COUNT(*) FROM library_document_tags GROUP BY tag "
+            "UNION ALL "
+            "SELECT 'agents', agent, COUNT(*) FROM library_document_agents GROUP BY agent"
+        )
+        async with self._read() as db:
+            async with db.execute(query) as cursor:
+                for facet, value, count in await cursor.fetchall():
+                    facets[facet][value] = count
+        return facets
+
+    async def rebuild_library_search_index(self) -> None:
+        """Reconstruit l'index plein texte de la Knowledge Base."""
+        from backend.db.migrations import rebuild_library_fts
 
         async with self._connect() as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute(query, params) as cursor:
-                rows = await cursor.fetchall()
-                return [
-                    {
-                        "id": row["id"],
-                        "category": row["category"],
-                        "name": row["name"],
-                        "icon": row["icon"],
-                        "description": row["description"],
-                        "content": row["content"],
-                        "tags": json.loads(row["tags"]) if row["tags"] else [],
-                        "agents": json.loads(row["agents"]) if row["agents"] else [],
-                        "created_at": row["created_at"],
-                        "updated_at": row["updated_at"],
-                    }
-                    for row in rows
-                ]
+            await rebuild_library_fts(db)
+            await db.commit()
+
+    @staticmethod
+    def _library_document_from_row(row) -> dict:
+        document = {
+            "id": row["id"],
+            "category": row["category"],
+            "name": row["name"],
+            "icon": row["icon"],
+            "description": row["description"],
+            "content": row["content"],
+            "tags": json.loads(row["tags"]) if row["tags"] else [],
+            "agents": json.loads(row["agents"]) if row["agents"] else [],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+        if "score" in row.keys():
+            document["score"] = row["score"]
+            document["snippet"] = row["snippet"]
+        return document
 
     async def update_library_document(
         self,
@@ -433,8 +750,6 @@ class Database:
         agents: list[str] | None = None,
         icon: str | None = None,
     ) -> bool:
-        import json
-
         updates = []
         params = []
 
@@ -477,47 +792,52 @@ class Database:
             await db.commit()
             return cursor.rowcount > 0
 
+    async def import_library_documents(self, items: Iterable[dict], batch_size: int = 500) -> int:
+        """
+        Importe des documents Knowledge Base en une seule transaction (tout ou rien).
+
+        Args:
+            items: Dicts {category, name, description, content, icon?, tags?, agents?}
+            batch_size: Taille des lots executemany
+
+        Returns:
+            Nombre de documents insérés
+
+        Raises:
+            BulkImportError: Document incomplet ou JSON invalide (aucune insertion conservée)
+        """
+        async with self.transaction() as tx:
+            return await tx.add_library_documents(items, batch_size=batch_size)
+
     async def seed_library_if_empty(self):
         """
         Peuple la Library si elle est vide (premier démarrage).
-        Lit les documents depuis library_seed.json et les insère dans la BDD.
+        Lit les documents depuis library_seed.json (en flux) et les insère en une transaction.
         """
-        import json
         import logging
         from pathlib import Path
 
         logger = logging.getLogger(__name__)
 
-        async with self._connect() as db:
+        async with self._read() as db:
             async with db.execute("SELECT COUNT(*) FROM library_documents") as cursor:
                 row = await cursor.fetchone()
                 count = row[0] if row else 0
 
-            if count > 0:
-                logger.debug(f"Library déjà peuplée ({count} documents)")
-                return
-
-            seed_file = Path(__file__).parent / "library_seed.json"
+        if count > 0:
+            logger.debug(f"Library déjà peuplée ({count} documents)")
+            return
 
-            if not seed_file.exists():
-                logger.warning("library_seed.json introuvable, skip seed")
-                return
+        seed_file = Path(__file__).parent / "library_seed.json"
 
-            with open(seed_file, "r", encoding="utf-8") as f:
-                library_items = json.load(f)
+        if not seed_file.exists():
+            logger.warning("library_seed.json introuvable, skip seed")
+            return
 
-            for item in library_items:
-                await self.create_library_document(
-                    category=item["category"],
-                    name=item["name"],
-                    icon=item.get("icon", ""),
-                    description=item["description"],
-                    content=item["content"],
-                    tags=item.get("tags", []),
-                    agents=item.get("agents", []),
-                )
+        with open(seed_file, "r", encoding="utf-8") as f:
+            inserted = await self.import_library_documents(iter_json_array(f))
 
-            logger.info(f"✅ Library initialisée avec {len(library_items)} documents")
+        logger.info(f"✅ Library initialisée avec {inserted} documents")
 
 
 db_instance = Database()
@@ -23,31 +23,137 @@ async def migrate_sessions_to_conversations(sessions_dict: dict):
         description="Projet créé automatiquement pour migrer les anciennes sessions",
     )
 
-    for session_id, session_data in sessions_dict.items():
-        conversation = await db.create_conversation(
-            project_id=legacy_project["id"],
-            agent_id=session_data.get("agent_id", "BASE"),
-            title=f"Session {session_id[:8]}",
-        )
-
-        for msg in session_data.get("history", []):
-            await db.add_message(
-                conversation_id=conversation["id"], role=msg["role"], content=msg["content"]
+    # Une seule transaction : conversations puis messages insérés par executemany
+    async with db.transaction() as tx:
+        for session_id, session_data in sessions_dict.items():
+            conversation = await tx.create_conversation(
+                project_id=legacy_project["id"],
+                agent_id=session_data.get("agent_id", "BASE"),
+                title=f"Session {session_id[:8]}",
+            )
+            await tx.add_messages(
+                {"conversation_id": conversation["id"], "role": msg["role"], "content": msg["content"]}
+                for msg in session_data.get("history", [])
             )
 
     sessions_dict.clear()
 
 
+async def _column_exists(conn, table: str, column: str) -> bool:
+    async with conn.execute(f"PRAGMA table_info({table})") as cursor:
+        return any(row[1] == column for row in await cursor.fetchall())
+
+
+async def migrate_denormalized_counters(conn) -> bool:
+    """
+    Ajoute les compteurs dénormalisés projects.conversation_count et
+    conversations.message_count aux bases créées avant leur introduction,
+    puis les initialise à partir des données existantes (requêtes agrégées).
+    Idempotent : ne fait rien si les colonnes existent déjà.
+    Les triggers qui maintiennent ces compteurs sont définis dans schema.sql.
+
+    Args:
+        conn: Connexion aiosqlite ouverte (le commit est à la charge de l'appelant)
+
+    Returns:
+        True si une migration a été appliquée
+    """
+    migrated = False
+
+    if not await _column_exists(conn, "conversations", "message_count"):
+        await conn.execute(
+            "ALTER TABLE conversations ADD COLUMN message_count INTEGER NOT NULL DEFAULT 0"
+        )
+        await conn.execute(
+            """UPDATE conversations SET message_count = (
+                SELECT agg.count FROM (
+                    SELECT conversation_id, COUNT(*) AS count FROM messages GROUP BY conversation_id
+                ) AS agg WHERE agg.conversation_id = conversations.id
+            ) WHERE id IN (SELECT DISTINCT conversation_id FROM messages)"""
+        )
+        migrated = True
+
+    if not await _column_exists(conn, "projects", "conversation_count"):
+        await conn.execute(
+            "ALTER TABLE projects ADD COLUMN conversation_count INTEGER NOT NULL DEFAULT 0"
+        )
+        await conn.execute(
+            """UPDATE projects SET conversation_count = (
+                SELECT agg.count FROM (
+                    SELECT project_id, COUNT(*) AS count FROM conversations
+                    WHERE project_id IS NOT NULL GROUP BY project_id
+                ) AS agg WHERE agg.project_id = projects.id
+            ) WHERE id IN (SELECT DISTINCT project_id FROM conversations)"""
+        )
+        migrated = True
+
+    return migrated
+
+
+async def migrate_library_associations(conn) -> bool:
+    """
+    Convertit les colonnes JSON library_documents.tags / agents en lignes des tables
+    library_document_tags / library_document_agents pour les documents qui n'y
+    figurent pas encore (bases antérieures aux tables d'association).
+    Idempotent : INSERT OR IGNORE sur les clés primaires.
+
+    Returns:
+        True si des associations ont été créées
+    """
+    migrated = False
+
+    for table, column, json_column in (
+        ("library_document_tags", "tag", "tags"),
+        ("library_document_agents", "agent", "agents"),
+    ):
+        cursor = await conn.execute(
+            f"""INSERT OR IGNORE INTO {table} (document_id, {column})
+            SELECT d.id, j.value FROM library_documents AS d, json_each(d.{json_column}) AS j
+            WHERE d.{json_column} IS NOT NULL AND json_valid(d.{json_column})
+            AND NOT EXISTS (SELECT 1 FROM {table} AS a WHERE a.document_id = d.id)"""
+        )
+        if cursor.rowcount > 0:
+            migrated = True
+
+    return migrated
+
+
+async def rebuild_library_fts(conn) -> None:
+    """
+    Reconstruit l'index plein texte library_documents_fts depuis library_documents.
+    À utiliser après un import hors triggers ou un VACUUM (rowid renumérotés).
+    """
+    await conn.execute(
+        "INSERT INTO library_documents_fts(library_documents_fts) VALUES ('rebuild')"
+    )
+
+
+async def migrate_library_fts(conn) -> bool:
+    """
+    Indexe les documents existants si l'index FTS est désynchronisé
+    (base créée avant l'introduction de library_documents_fts).
+
+    Returns:
+        True si l'index a été reconstruit
+    """
+    async with conn.execute("SELECT COUNT(*) FROM library_documents") as cursor:
+        documents = (await cursor.fetchone())[0]
+    async with conn.execute("SELECT COUNT(*) FROM library_documents_fts_docsize") as cursor:
+        indexed = (await cursor.fetchone())[0]
+
+    if documents == indexed:
+        return False
+
+    await rebuild_library_fts(conn)
+    return True
+
+
 async def migrate_library_data():
     """
     Migre les données statiques de la librairie (frontend/js/views/library.js)
     vers la table library_documents.
     À exécuter une seule fois lors du déploiement de la Knowledge Base.
     """
-    import json
-    import uuid
-    from datetime import datetime
-
     db = Database()
     await db.initialize()
 
@@ -566,28 +672,6 @@ Utilise des imports absolus simples. Chaque fichier doit être complet et autono
         },
     ]
 
-    async with db._connect() as conn:
-        for item in library_items:
-            doc_id = str(uuid.uuid4())
-            now = datetime.now().isoformat()
-
-            await conn.execute(
-                """INSERT INTO library_documents 
-                (id, category, name, icon, description, content, tags, agents, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                (
-                    doc_id,
-                    item["category"],
-                    item["name"],
-                    item.get("icon", ""),
-                    item["description"],
-                    item["content"],
-                    json.dumps(item.get("tags", [])),
-                    json.dumps(item.get("agents", [])),
-                    now,
-                    now,
-                ),
-            )
-        await conn.commit()
+    inserted = await db.import_library_documents(library_items)
 
-    print(f"Migration terminée : {len(library_items)} documents insérés dans library_documents")
+    print(f"Migration terminée : {inserted} documents insérés dans library_documents")
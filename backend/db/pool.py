@@ -0,0 +1,207 @@
+"""
+Pool de connexions SQLite — JARVIS 2.0
+Connexions aiosqlite longue durée, configurées une seule fois (WAL, foreign_keys,
+synchronous=NORMAL, mmap_size) et réutilisées par toutes les méthodes de Database.
+
+Deux voies :
+- écriture : une connexion unique sérialisée (SQLite n'accepte qu'un writer)
+- lecture : jusqu'à `max_readers` connexions concurrentes (WAL → lecteurs non bloquants)
+
+Garde-fous : timeout d'acquisition, détection des connexions retenues trop longtemps,
+rollback automatique d'une transaction laissée ouverte au retour dans le pool.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+
+class PoolError(Exception):
+    pass
+
+
+class PoolTimeoutError(PoolError):
+    pass
+
+
+class PoolClosedError(PoolError):
+    pass
+
+
+class ConnectionPool:
+    """
+    Pool borné de connexions aiosqlite chaudes.
+
+    Les primitives asyncio (verrou writer, sémaphore readers) sont recréées si le pool
+    est utilisé depuis une autre boucle d'événements (TestClient, scripts) ; les
+    connexions elles-mêmes restent valides car aiosqlite résout chaque appel sur la
+    boucle courante.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_readers: int = 4,
+        acquire_timeout: float = 10.0,
+        leak_threshold: float = 30.0,
+        mmap_size: int = 64 * 1024 * 1024,
+        busy_timeout_ms: int = 5000,
+    ):
+        self.db_path = db_path
+        # Base en mémoire : chaque connexion serait une base distincte → voie unique
+        self.shared_memory = db_path == ":memory:"
+        self.max_readers = 0 if self.shared_memory else max(max_readers, 0)
+        self.acquire_timeout = acquire_timeout
+        self.leak_threshold = leak_threshold
+        self.mmap_size = mmap_size
+        self.busy_timeout_ms = busy_timeout_ms
+
+        self._writer: aiosqlite.Connection | None = None
+        self._idle_readers: deque[aiosqlite.Connection] = deque()
+        self._reader_count = 0
+        # id(conn) -> (lane, timestamp d'acquisition)
+        self._checked_out: dict[int, tuple[str, float]] = {}
+        self._closed = False
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._writer_lock: asyncio.Lock | None = None
+        self._reader_slots: asyncio.Semaphore | None = None
+
+        self._stats = {
+            "connections_opened": 0,
+            "acquired_read": 0,
+            "acquired_write": 0,
+            "timeouts": 0,
+            "leaks_detected": 0,
+            "rollbacks_on_release": 0,
+        }
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._writer_lock = asyncio.Lock()
+            self._reader_slots = asyncio.Semaphore(max(self.max_readers, 1))
+
+    async def _open_connection(self) -> aiosqlite.Connection:
+        conn = aiosqlite.connect(self.db_path)
+        # Thread worker daemon : un pool non fermé ne bloque pas l'arrêt de l'interpréteur
+        conn.daemon = True
+        await conn
+        await conn.execute("PRAGMA journal_mode = WAL")
+        await conn.execute("PRAGMA foreign_keys = ON")
+        await conn.execute("PRAGMA synchronous = NORMAL")
+        await conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        await conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        self._stats["connections_opened"] += 1
+        return conn
+
+    async def _wait(self, acquire_coro, lane: str) -> None:
+        try:
+            await asyncio.wait_for(acquire_coro, timeout=self.acquire_timeout)
+        except TimeoutError:
+            self._stats["timeouts"] += 1
+            self._report_leaks()
+            raise PoolTimeoutError(
+                f"Aucune connexion {lane} disponible après {self.acquire_timeout}s "
+                f"({len(self._checked_out)} connexion(s) en cours d'utilisation)"
+            ) from None
+
+    def _report_leaks(self) -> None:
+        now = time.monotonic()
+        for lane, acquired_at in self._checked_out.values():
+            held = now - acquired_at
+            if held > self.leak_threshold:
+                logger.warning(
+                    "Pool SQLite: connexion %s retenue depuis %.1fs (fuite probable)", lane, held
+                )
+
+    async def _release(self, conn: aiosqlite.Connection, lane: str) -> None:
+        _, acquired_at = self._checked_out.pop(id(conn), (lane, time.monotonic()))
+        held = time.monotonic() - acquired_at
+        if held > self.leak_threshold:
+            self._stats["leaks_detected"] += 1
+            logger.warning("Pool SQLite: connexion %s rendue après %.1fs", lane, held)
+
+        # Transaction abandonnée (exception avant commit) : ne pas la propager
+        if conn.in_transaction:
+            self._stats["rollbacks_on_release"] += 1
+            await conn.rollback()
+        conn.row_factory = None
+
+    @asynccontextmanager
+    async def write(self):
+        """Acquiert la connexion d'écriture (exclusive)."""
+        if self._closed:
+            raise PoolClosedError("Pool fermé")
+        self._bind_loop()
+        await self._wait(self._writer_lock.acquire(), "écriture")
+        try:
+            if self._writer is None:
+                self._writer = await self._open_connection()
+            conn = self._writer
+            self._checked_out[id(conn)] = ("écriture", time.monotonic())
+            self._stats["acquired_write"] += 1
+            try:
+                yield conn
+            finally:
+                await self._release(conn, "écriture")
+        finally:
+            self._writer_lock.release()
+
+    @asynccontextmanager
+    async def read(self):
+        """Acquiert une connexion de lecture (partagée, bornée à max_readers)."""
+        if self.max_readers == 0:
+            async with self.write() as conn:
+                yield conn
+            return
+
+        if self._closed:
+            raise PoolClosedError("Pool fermé")
+        self._bind_loop()
+        await self._wait(self._reader_slots.acquire(), "lecture")
+        conn = None
+        try:
+            if self._idle_readers:
+                conn = self._idle_readers.pop()
+            else:
+                conn = await self._open_connection()
+                self._reader_count += 1
+            self._checked_out[id(conn)] = ("lecture", time.monotonic())
+            self._stats["acquired_read"] += 1
+            try:
+                yield conn
+            finally:
+                await self._release(conn, "lecture")
+                if self._closed:
+                    await conn.close()
+                else:
+                    self._idle_readers.append(conn)
+        finally:
+            self._reader_slots.release()
+
+    async def close(self) -> None:
+        """Ferme toutes les connexions inactives et la connexion d'écriture."""
+        self._closed = True
+        while self._idle_readers:
+            await self._idle_readers.pop().close()
+        self._reader_count = 0
+        if self._writer is not None:
+            await self._writer.close()
+            self._writer = None
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "readers_open": self._reader_count,
+            "readers_idle": len(self._idle_readers),
+            "in_use": len(self._checked_out),
+            "writer_open": self._writer is not None,
+        }
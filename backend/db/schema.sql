@@ -7,7 +7,8 @@ CREATE TABLE IF NOT EXISTS projects (
     name TEXT NOT NULL,
     path TEXT NOT NULL UNIQUE,
     description TEXT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    conversation_count INTEGER NOT NULL DEFAULT 0 -- dénormalisé, maintenu par triggers
 );
 
 -- Table conversations
@@ -18,6 +19,7 @@ CREATE TABLE IF NOT EXISTS conversations (
     title TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    message_count INTEGER NOT NULL DEFAULT 0, -- dénormalisé, maintenu par triggers
     FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE CASCADE
 );
 
@@ -37,6 +39,40 @@ CREATE INDEX IF NOT EXISTS idx_conversations_updated ON conversations(updated_at
 CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages(conversation_id);
 CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON messages(timestamp);
 
+-- Index composites pour la pagination keyset (sans OFFSET)
+CREATE INDEX IF NOT EXISTS idx_messages_conversation_keyset ON messages(conversation_id, timestamp, id);
+CREATE INDEX IF NOT EXISTS idx_conversations_project_keyset ON conversations(project_id, updated_at, id);
+
+-- Compteurs dénormalisés (évite un COUNT(*) par ligne dans les listings)
+CREATE TRIGGER IF NOT EXISTS trg_messages_count_insert AFTER INSERT ON messages
+BEGIN
+    UPDATE conversations SET message_count = message_count + 1 WHERE id = NEW.conversation_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_messages_count_delete AFTER DELETE ON messages
+BEGIN
+    UPDATE conversations SET message_count = message_count - 1 WHERE id = OLD.conversation_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_conversations_count_insert AFTER INSERT ON conversations
+WHEN NEW.project_id IS NOT NULL
+BEGIN
+    UPDATE projects SET conversation_count = conversation_count + 1 WHERE id = NEW.project_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_conversations_count_delete AFTER DELETE ON conversations
+WHEN OLD.project_id IS NOT NULL
+BEGIN
+    UPDATE projects SET conversation_count = conversation_count - 1 WHERE id = OLD.project_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_conversations_count_move AFTER UPDATE OF project_id ON conversations
+WHEN OLD.project_id IS NOT NEW.project_id
+BEGIN
+    UPDATE projects SET conversation_count = conversation_count - 1 WHERE id = OLD.project_id;
+    UPDATE projects SET conversation_count = conversation_count + 1 WHERE id = NEW.project_id;
+END;
+
 -- Table library_documents (Knowledge Base)
 CREATE TABLE IF NOT EXISTS library_documents (
     id TEXT PRIMARY KEY,
@@ -55,3 +91,99 @@ CREATE TABLE IF NOT EXISTS library_documents (
 CREATE INDEX IF NOT EXISTS idx_library_category ON library_documents(category);
 CREATE INDEX IF NOT EXISTS idx_library_updated ON library_documents(updated_at DESC);
 CREATE INDEX IF NOT EXISTS idx_library_name ON library_documents(name);
+CREATE INDEX IF NOT EXISTS idx_library_keyset ON library_documents(updated_at, id);
+
+-- Associations normalisées document ↔ tag / agent (filtres indexés, facettes)
+-- Les colonnes JSON tags/agents restent la représentation renvoyée par l'API ;
+-- ces tables sont maintenues par triggers à partir d'elles.
+CREATE TABLE IF NOT EXISTS library_document_tags (
+    document_id TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (document_id, tag),
+    FOREIGN KEY (document_id) REFERENCES library_documents(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS library_document_agents (
+    document_id TEXT NOT NULL,
+    agent TEXT NOT NULL,
+    PRIMARY KEY (document_id, agent),
+    FOREIGN KEY (document_id) REFERENCES library_documents(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_library_tags_tag ON library_document_tags(tag, document_id);
+CREATE INDEX IF NOT EXISTS idx_library_agents_agent ON library_document_agents(agent, document_id);
+
+CREATE TRIGGER IF NOT EXISTS trg_library_assoc_insert AFTER INSERT ON library_documents
+BEGIN
+    INSERT OR IGNORE INTO library_document_tags (document_id, tag)
+    SELECT NEW.id, value FROM json_each(COALESCE(NEW.tags, '[]'));
+    INSERT OR IGNORE INTO library_document_agents (document_id, agent)
+    SELECT NEW.id, value FROM json_each(COALESCE(NEW.agents, '[]'));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_library_assoc_update_tags AFTER UPDATE OF tags ON library_documents
+BEGIN
+    DELETE FROM library_document_tags WHERE document_id = NEW.id;
+    INSERT OR IGNORE INTO library_document_tags (document_id, tag)
+    SELECT NEW.id, value FROM json_each(COALESCE(NEW.tags, '[]'));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_library_assoc_update_agents AFTER UPDATE OF agents ON library_documents
+BEGIN
+    DELETE FROM library_document_agents WHERE document_id = NEW.id;
+    INSERT OR IGNORE INTO library_document_agents (document_id, agent)
+    SELECT NEW.id, value FROM json_each(COALESCE(NEW.agents, '[]'));
+END;
+
+-- Index plein texte de la Knowledge Base (FTS5, contenu externe = library_documents)
+-- Préfixes 2/3 caractères indexés pour les recherches "fast*"
+CREATE VIRTUAL TABLE IF NOT EXISTS library_documents_fts USING fts5(
+    name,
+    description,
+    content,
+    content='library_documents',
+    content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_library_fts_insert AFTER INSERT ON library_documents
+BEGIN
+    INSERT INTO library_documents_fts(rowid, name, description, content)
+    VALUES (NEW.rowid, NEW.name, NEW.description, NEW.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_library_fts_delete AFTER DELETE ON library_documents
+BEGIN
+    INSERT INTO library_documents_fts(library_documents_fts, rowid, name, description, content)
+    VALUES ('delete', OLD.rowid, OLD.name, OLD.description, OLD.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_library_fts_update AFTER UPDATE OF name, description, content ON library_documents
+BEGIN
+    INSERT INTO library_documents_fts(library_documents_fts, rowid, name, description, content)
+    VALUES ('delete', OLD.rowid, OLD.name, OLD.description, OLD.content);
+    INSERT INTO library_documents_fts(rowid, name, description, content)
+    VALUES (NEW.rowid, NEW.name, NEW.description, NEW.content);
+END;
+
+-- Comptabilité des tokens LLM (un enregistrement par appel provider)
+-- conversation_id sans clé étrangère : les appels hors conversation (tests, scripts)
+-- ne sont pas persistés, et la suppression d'une conversation nettoie par trigger.
+CREATE TABLE IF NOT EXISTS token_usage (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    conversation_id TEXT NOT NULL,
+    delegation_id TEXT,
+    agent TEXT NOT NULL,
+    model TEXT,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_token_usage_conversation ON token_usage(conversation_id, agent);
+
+CREATE TRIGGER IF NOT EXISTS trg_token_usage_conversation_delete AFTER DELETE ON conversations
+BEGIN
+    DELETE FROM token_usage WHERE conversation_id = OLD.id;
+END;
@@ -0,0 +1,175 @@
+"""
+Sessions de chat persistantes — JARVIS 2.0
+Réutilise l'objet chat du SDK d'une requête à l'autre pour une même conversation :
+seuls les tours nouveaux sont convertis et ajoutés à l'historique, au lieu de
+reconstruire toute la conversation (start_chat(history=...)) à chaque appel.
+
+L'historique attendu est comparé par empreintes (rôle + texte) : si la conversation
+reçue ne prolonge pas celle de la session (édition, autre prompt, tool calls),
+la session est reconstruite.
+
+Configuration via .env (valeurs par défaut entre parenthèses) :
+- CHAT_SESSIONS_MAX (64)     : sessions conservées par provider (LRU)
+- CHAT_SESSION_TTL (1800)    : durée d'inactivité avant éviction (s)
+"""
+
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from backend.ia.rate_limiter import rate_limit_key
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(message: dict) -> str:
+    """Empreinte d'un message converti ({role, parts: [{text}]})."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(message["role"].encode("utf-8"))
+    for part in message.get("parts", []):
+        digest.update(b"\0")
+        digest.update(str(part.get("text", part)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+@dataclass
+class ChatLease:
+    """Session empruntée pour un appel ; rendue via ChatSessionManager.checkin."""
+
+    key: str | None
+    chat: Any
+    fingerprints: list[str]
+    reused: bool = False
+    appended: int = 0
+
+
+@dataclass
+class _Session:
+    chat: Any
+    fingerprints: list[str]
+    last_used: float = field(default=0.0)
+
+
+class ChatSessionManager:
+    """
+    Sessions de chat par conversation (clé : rate_limit_key positionné par BaseAgent).
+
+    Une session est retirée du gestionnaire pendant l'appel (checkout) puis rendue
+    après une réponse complète (checkin) : deux appels concurrents sur la même
+    conversation ne partagent jamais un objet chat, le second repart d'un historique
+    reconstruit.
+    """
+
+    def __init__(self, max_sessions: int = 64, ttl_seconds: float = 1800.0, clock=time.monotonic):
+        self.max_sessions = max(max_sessions, 0)
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._sessions: OrderedDict[str, _Session] = OrderedDict()
+        self._stats = {
+            "reused": 0,
+            "rebuilt": 0,
+            "created": 0,
+            "evicted": 0,
+            "appended_turns": 0,
+        }
+
+    @classmethod
+    def from_env(cls) -> "ChatSessionManager":
+        try:
+            max_sessions = int(os.getenv("CHAT_SESSIONS_MAX", "64"))
+            ttl = float(os.getenv("CHAT_SESSION_TTL", "1800"))
+        except ValueError:
+            logger.warning("CHAT_SESSIONS_MAX / CHAT_SESSION_TTL invalides, valeurs par défaut")
+            max_sessions, ttl = 64, 1800.0
+        return cls(max_sessions=max_sessions, ttl_seconds=ttl)
+
+    def _evict_expired(self, now: float) -> None:
+        while self._sessions:
+            key, session = next(iter(self._sessions.items()))
+            if now - session.last_used <= self.ttl_seconds:
+                break
+            del self._sessions[key]
+            self._stats["evicted"] += 1
+
+    def checkout(
+        self,
+        messages: list[dict],
+        start_chat: Callable[[list[dict]], Any],
+        key: str | None = None,
+    ) -> ChatLease:
+        """
+        Fournit un chat dont l'historique correspond à messages[:-1].
+
+        Args:
+            messages: Messages déjà convertis au format Gemini (dernier = message à envoyer)
+            start_chat: Fabrique d'un chat à partir d'un historique (client.start_chat)
+            key: Clé de conversation (défaut : rate_limit_key courant ; None = pas de réutilisation)
+        """
+        if key is None:
+            key = rate_limit_key.get()
+        fingerprints = [fingerprint(m) for m in messages]
+        history = messages[:-1]
+
+        session = None
+        if key is not None and self.max_sessions:
+            self._evict_expired(self._clock())
+            session = self._sessions.pop(key, None)
+
+        if session is not None:
+            known = len(session.fingerprints)
+            if known <= len(history) and fingerprints[:known] == session.fingerprints:
+                new_turns = history[known:]
+                if new_turns:
+                    session.chat.history = [*session.chat.history, *new_turns]
+                self._stats["reused"] += 1
+                self._stats["appended_turns"] += len(new_turns)
+                return ChatLease(key, session.chat, fingerprints, reused=True, appended=len(new_turns))
+            self._stats["rebuilt"] += 1
+            logger.debug("ChatSessions[%s]: historique divergent, reconstruction", key)
+        else:
+            self._stats["created"] += 1
+
+        return ChatLease(key, start_chat(history), fingerprints)
+
+    def checkin(self, lease: ChatLease, reply: dict | None) -> None:
+        """
+        Rend la session après l'appel.
+
+        Args:
+            lease: Session empruntée
+            reply: Réponse du modèle convertie ({role: "model", parts}) ; None pour
+                abandonner la session (erreur, tool calls, réponse interrompue)
+        """
+        if lease.key is None or reply is None or not self.max_sessions:
+            return
+        try:
+            # Matérialise le dernier échange dans l'historique du chat ; lève si la
+            # réponse est inexploitable (flux interrompu, blocage de sécurité)
+            _ = lease.chat.history
+        except Exception:
+            logger.debug("ChatSessions[%s]: réponse inexploitable, session abandonnée", lease.key)
+            return
+
+        self._sessions[lease.key] = _Session(
+            chat=lease.chat,
+            fingerprints=[*lease.fingerprints, fingerprint(reply)],
+            last_used=self._clock(),
+        )
+        self._sessions.move_to_end(lease.key)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self._stats["evicted"] += 1
+
+    def discard(self, key: str) -> None:
+        self._sessions.pop(key, None)
+
+    def clear(self) -> None:
+        self._sessions.clear()
+
+    def stats(self) -> dict:
+        return {**self._stats, "active": len(self._sessions)}
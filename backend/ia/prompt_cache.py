@@ -0,0 +1,190 @@
+"""
+Cache de préfixes de prompt (context caching) — JARVIS 2.0
+Les prompts système des agents (config_agents/*.md) et les déclarations d'outils sont
+identiques à chaque passe d'une boucle CODEUR : ils sont enregistrés une fois par
+modèle auprès du provider (contenu mis en cache côté API), puis référencés par
+leur identifiant au lieu d'être renvoyés et refacturés à chaque appel.
+
+Le préfixe stable d'une requête est la suite de messages "system" en tête de
+conversation, accompagnée des fonctions déclarées. Les identifiants ont une durée
+de vie : ils sont prolongés avant expiration et recréés si nécessaire.
+
+Le provider fournit les opérations create/refresh/delete_cached_prefix
+(voir BaseProvider) ; un échec de création retombe sur l'envoi du préfixe en ligne.
+
+Configuration via .env (valeurs par défaut entre parenthèses) :
+- PROMPT_CACHE_ENABLED (false)     : active le cache (stockage facturé par le provider)
+- PROMPT_CACHE_TTL (3600)          : durée de vie demandée pour un préfixe (s)
+- PROMPT_CACHE_REFRESH_MARGIN (300): prolongation si l'expiration est plus proche (s)
+- PROMPT_CACHE_MIN_TOKENS (1024)   : taille minimum d'un préfixe (minimum imposé par l'API)
+- PROMPT_CACHE_MAX_ENTRIES (16)    : préfixes conservés par provider
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+from backend.ia.rate_limiter import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedPrefix:
+    """Préfixe enregistré auprès du provider."""
+
+    key: str
+    handle: Any
+    name: str
+    length: int  # nombre de messages couverts en tête de conversation
+    expires_at: float
+    client: Any = field(default=None)  # client dérivé du contenu en cache (mémorisé par le provider)
+
+
+def split_prefix(messages: list[dict]) -> tuple[list[dict], list[dict]]:
+    """Sépare les messages "system" de tête du reste de la conversation."""
+    index = 0
+    while index < len(messages) and messages[index].get("role") == "system":
+        index += 1
+    return messages[:index], messages[index:]
+
+
+def prefix_key(model: str, prefix: list[dict], functions: list[dict] | None) -> str:
+    payload = {
+        "model": model,
+        "prefix": [m.get("content") or "" for m in prefix],
+        "functions": functions or [],
+    }
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class PromptPrefixCache:
+    def __init__(
+        self,
+        provider,
+        ttl_seconds: float = 3600.0,
+        refresh_margin: float = 300.0,
+        min_tokens: int = 1024,
+        max_entries: int = 16,
+        clock=time.monotonic,
+    ):
+        self.provider = provider
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin = min(refresh_margin, ttl_seconds / 2)
+        self.min_tokens = min_tokens
+        self.max_entries = max(max_entries, 1)
+        self._clock = clock
+        self._entries: OrderedDict[str, CachedPrefix] = OrderedDict()
+        # Préfixes refusés par le provider (trop courts, modèle non compatible) : pas de
+        # nouvelle tentative avant l'échéance
+        self._rejected: dict[str, float] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._stats = {
+            "hits": 0,
+            "created": 0,
+            "refreshed": 0,
+            "failures": 0,
+            "evicted": 0,
+            "skipped": 0,
+        }
+
+    @classmethod
+    def from_env(cls, provider) -> "PromptPrefixCache | None":
+        """Cache configuré par .env, ou None si PROMPT_CACHE_ENABLED est faux."""
+        if os.getenv("PROMPT_CACHE_ENABLED", "false").strip().lower() not in {"1", "true", "yes", "on"}:
+            return None
+        try:
+            return cls(
+                provider,
+                ttl_seconds=float(os.getenv("PROMPT_CACHE_TTL", "3600")),
+                refresh_margin=float(os.getenv("PROMPT_CACHE_REFRESH_MARGIN", "300")),
+                min_tokens=int(os.getenv("PROMPT_CACHE_MIN_TOKENS", "1024")),
+                max_entries=int(os.getenv("PROMPT_CACHE_MAX_ENTRIES", "16")),
+            )
+        except ValueError:
+            logger.warning("Configuration PROMPT_CACHE_* invalide, valeurs par défaut")
+            return cls(provider)
+
+    async def resolve(self, messages: list[dict], functions: list[dict] | None = None) -> CachedPrefix | None:
+        """
+        Préfixe en cache couvrant le début de `messages`, créé ou prolongé au besoin.
+
+        Returns:
+            CachedPrefix, ou None si la requête doit être envoyée sans cache
+        """
+        prefix, rest = split_prefix(messages)
+        if not prefix or not rest or estimate_tokens(prefix) < self.min_tokens:
+            self._stats["skipped"] += 1
+            return None
+
+        key = prefix_key(self.provider.model, prefix, functions)
+        now = self._clock()
+        if self._rejected.get(key, 0) > now:
+            self._stats["skipped"] += 1
+            return None
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(key)
+            now = self._clock()
+            if entry is not None and now < entry.expires_at - self.refresh_margin:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry
+
+            if entry is not None and now < entry.expires_at:
+                try:
+                    await self.provider.refresh_cached_prefix(entry.handle, self.ttl_seconds)
+                    entry.expires_at = now + self.ttl_seconds
+                    self._entries.move_to_end(key)
+                    self._stats["refreshed"] += 1
+                    return entry
+                except Exception as e:
+                    logger.warning("PromptCache[%s]: prolongation impossible (%s), recréation", entry.name, e)
+
+            if entry is not None:
+                del self._entries[key]
+            return await self._create(key, prefix, functions, now)
+
+    async def _create(self, key, prefix, functions, now) -> CachedPrefix | None:
+        try:
+            handle = await self.provider.create_cached_prefix(prefix, functions, self.ttl_seconds)
+        except Exception as e:
+            logger.warning("PromptCache: création impossible (%s: %s), préfixe envoyé en ligne", type(e).__name__, e)
+            self._rejected[key] = now + self.ttl_seconds
+            self._stats["failures"] += 1
+            return None
+
+        entry = CachedPrefix(
+            key=key,
+            handle=handle,
+            name=str(getattr(handle, "name", key[:16])),
+            length=len(prefix),
+            expires_at=now + self.ttl_seconds,
+        )
+        self._entries[key] = entry
+        self._stats["created"] += 1
+        logger.info("PromptCache: préfixe %s enregistré (%d message(s))", entry.name, entry.length)
+
+        while len(self._entries) > self.max_entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._stats["evicted"] += 1
+            try:
+                await self.provider.delete_cached_prefix(evicted.handle)
+            except Exception:
+                logger.debug("PromptCache: suppression de %s impossible (expirera seul)", evicted.name)
+        return entry
+
+    def invalidate(self, entry: CachedPrefix) -> None:
+        """Oublie un préfixe refusé par l'API (expiré ou supprimé côté serveur)."""
+        self._entries.pop(entry.key, None)
+
+    def stats(self) -> dict:
+        return {**self._stats, "active": len(self._entries)}
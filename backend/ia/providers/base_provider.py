@@ -4,7 +4,7 @@ Définit le contrat commun que tous les providers doivent respecter
 """
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 
 class BaseProvider(ABC):
@@ -27,6 +27,10 @@ class BaseProvider(ABC):
         self.api_key = api_key
         self.model = model
         self.kwargs = kwargs
+        # Cache de réponses (ResponseCache) activé par l'agent propriétaire, None sinon
+        self.response_cache = None
+        # Cache de préfixes de prompt (PromptPrefixCache), positionné par les providers compatibles
+        self.prompt_cache = None
 
     @abstractmethod
     async def send_message(
@@ -50,12 +54,67 @@ class BaseProvider(ABC):
                 - content: str (texte de la réponse)
                 - tool_calls: List[Dict] (appels de fonctions si présents)
                 - finish_reason: str (raison de fin: "stop", "tool_calls", etc.)
+                - usage: Dict | None ({prompt_tokens, completion_tokens, total_tokens}
+                  si l'API les retourne)
                 
         Raises:
             Exception: Si l'appel API échoue
         """
         pass
 
+    async def stream_message(
+        self,
+        messages: List[Dict[str, str]],
+        functions: Optional[List[Dict]] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Variante streaming de send_message : produit la réponse par fragments.
+
+        Implémentation par défaut : un seul fragment contenant la réponse complète
+        (providers sans streaming natif).
+
+        Yields:
+            Dict contenant:
+                - content: str (fragment de texte, éventuellement vide)
+                - tool_calls: List[Dict] (appels de fonctions apparus dans ce fragment)
+                - finish_reason: str | None (renseigné uniquement sur le dernier fragment)
+                - usage: Dict | None (dernier fragment uniquement, voir send_message)
+        """
+        response = await self.send_message(
+            messages, functions=functions, temperature=temperature, max_tokens=max_tokens
+        )
+        yield {
+            "content": response.get("content", ""),
+            "tool_calls": response.get("tool_calls", []),
+            "finish_reason": response.get("finish_reason", "stop"),
+            "usage": response.get("usage"),
+        }
+
+    async def create_cached_prefix(
+        self, prefix_messages: List[Dict[str, str]], functions: Optional[List[Dict]], ttl_seconds: float
+    ) -> Any:
+        """
+        Enregistre un préfixe stable (messages system + fonctions) auprès de l'API.
+        Optionnel : utilisé par PromptPrefixCache pour les providers avec context caching.
+
+        Returns:
+            Identifiant opaque du contenu en cache (attribut `name` recommandé)
+
+        Raises:
+            NotImplementedError: Si le provider ne supporte pas le context caching
+        """
+        raise NotImplementedError(f"{type(self).__name__} ne supporte pas le context caching")
+
+    async def refresh_cached_prefix(self, handle: Any, ttl_seconds: float) -> None:
+        """Prolonge la durée de vie d'un préfixe en cache."""
+        raise NotImplementedError(f"{type(self).__name__} ne supporte pas le context caching")
+
+    async def delete_cached_prefix(self, handle: Any) -> None:
+        """Supprime un préfixe en cache (éviction)."""
+        raise NotImplementedError(f"{type(self).__name__} ne supporte pas le context caching")
+
     @abstractmethod
     def format_functions(self, functions: List[Dict]) -> Any:
         """
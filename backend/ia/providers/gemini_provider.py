@@ -6,13 +6,18 @@ Utilisé pour JARVIS_Maître (orchestrateur)
 import asyncio
 import json
 import logging
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+from datetime import timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 import google.generativeai as genai
 from google.generativeai.types import FunctionDeclaration, Tool
 
+from backend.ia.chat_sessions import ChatSessionManager
+from backend.ia.prompt_cache import CachedPrefix, PromptPrefixCache
 from backend.ia.providers.base_provider import BaseProvider
+from backend.ia.rate_limiter import estimate_tokens, rate_limit_key, rate_limiters
+from backend.ia.resilience import resilient, resilient_stream
+from backend.ia.response_cache import cached
 
 logger = logging.getLogger(__name__)
 
@@ -25,21 +30,35 @@ class GeminiProvider(BaseProvider):
     - Contexte large (1M-2M tokens selon modèle)
     - Tool calling natif
     - Multimodal (texte + vision)
-    - Délai adaptatif pour respecter quotas RPM
+    - Quotas RPM/TPM respectés par un limiteur à seaux à jetons partagé par modèle
+    - Nouvels essais (backoff + jitter), disjoncteur par modèle et échéances (resilience)
+    - Cache de réponses optionnel, consulté avant limiteur et nouvels essais
+    - Sessions de chat réutilisées par conversation (seuls les nouveaux tours sont convertis)
+    - Context caching optionnel des prompts système et outils (PromptPrefixCache) ;
+      un contenu en cache refusé par l'API est oublié et la requête renvoyée une fois
+      avec le préfixe en ligne
     """
 
-    # Variables de classe pour gérer le délai entre requêtes (partagées entre instances)
-    _last_request_time: Optional[datetime] = None
-    _min_delay_seconds: float = 4.0  # 60s / 15 RPM = 4s entre requêtes
+    # Contenu en cache supprimé, expiré avant l'échéance locale ou inaccessible
+    STALE_CACHE_STATUS = {403, 404}
+    STALE_CACHE_ERRORS = {"NotFound", "PermissionDenied"}
 
     def __init__(self, api_key: str, model: str, **kwargs):
         super().__init__(api_key, model, **kwargs)
         
         genai.configure(api_key=api_key)
         self.client = genai.GenerativeModel(model)
+        self.rate_limiter = rate_limiters.get(model)
+        self.chat_sessions = ChatSessionManager.from_env()
+        self.prompt_cache = PromptPrefixCache.from_env(self)
         
-        logger.info(f"GeminiProvider initialized: model={model}, min_delay={self._min_delay_seconds}s")
+        logger.info(
+            f"GeminiProvider initialized: model={model}, "
+            f"rpm={self.rate_limiter.rpm}, tpm={self.rate_limiter.tpm}"
+        )
 
+    @cached
+    @resilient
     async def send_message(
         self,
         messages: List[Dict[str, str]],
@@ -48,62 +67,39 @@ class GeminiProvider(BaseProvider):
         max_tokens: int = 4096,
     ) -> Dict[str, Any]:
         """
-        Envoie un message à Gemini avec délai adaptatif pour respecter quotas RPM.
+        Envoie un message à Gemini en respectant les quotas RPM/TPM du modèle.
         
         Note : Gemini utilise un format de conversation différent.
         Le premier message "system" est converti en contexte.
         """
         self.validate_messages(messages)
 
-        # Délai adaptatif pour respecter quota RPM
-        await self._apply_rate_limit_delay()
+        # Créneau du limiteur (quotas RPM/TPM) déjà obtenu par @resilient, hors délai de tentative
+        estimated_tokens = estimate_tokens(messages)
 
-        # Convertir messages au format Gemini
-        gemini_messages = self._convert_messages(messages)
-        
-        # Préparer configuration génération
-        generation_config = {
-            "temperature": temperature,
-            "max_output_tokens": max_tokens,
-        }
-
-        # Préparer tools si fonctions fournies
-        tools = None
-        if functions:
-            tools = [Tool(function_declarations=self.format_functions(functions))]
+        lease, last_parts, request_kwargs, cached = await self._prepare_request(
+            messages, functions, temperature, max_tokens
+        )
 
         try:
             # Gemini utilise generate_content avec historique
-            chat = self.client.start_chat(history=gemini_messages[:-1])
-            
-            response = await chat.send_message_async(
-                gemini_messages[-1]["parts"],
-                generation_config=generation_config,
-                tools=tools,
-            )
+            try:
+                response = await lease.chat.send_message_async(last_parts, **request_kwargs)
+            except Exception as e:
+                if not self._is_stale_cache_error(cached, e):
+                    raise
+                lease, last_parts, request_kwargs, _ = await self._prepare_request(
+                    messages, functions, temperature, max_tokens, use_prompt_cache=False
+                )
+                response = await lease.chat.send_message_async(last_parts, **request_kwargs)
+            self.rate_limiter.record_usage(estimated_tokens, self._usage_tokens(response))
 
             # Extraire contenu et tool calls
             content = ""
             tool_calls = []
-            finish_reason = "stop"
-
             if response.candidates:
-                candidate = response.candidates[0]
-                
-                # Extraire texte
-                if candidate.content.parts:
-                    for part in candidate.content.parts:
-                        if hasattr(part, "text"):
-                            content += part.text
-                        elif hasattr(part, "function_call"):
-                            # Tool call détecté
-                            fc = part.function_call
-                            tool_calls.append({
-                                "id": f"call_{len(tool_calls)}",
-                                "name": fc.name,
-                                "arguments": dict(fc.args),
-                            })
-                            finish_reason = "tool_calls"
+                content = self._extract_parts(response.candidates[0], tool_calls)
+            finish_reason = "tool_calls" if tool_calls else "stop"
 
             logger.info(
                 f"Gemini response: {len(content)} chars, {len(tool_calls)} tool_calls, finish_reason={finish_reason}"
@@ -116,16 +112,208 @@ class GeminiProvider(BaseProvider):
                     logger.warning(f"Candidate finish_reason: {response.candidates[0].finish_reason}")
                     logger.warning(f"Candidate content parts: {response.candidates[0].content.parts}")
 
+            self._release_session(lease, content, tool_calls)
             return {
                 "content": content,
                 "tool_calls": tool_calls,
                 "finish_reason": finish_reason,
+                "usage": self._usage(response),
             }
 
         except Exception as e:
             logger.error(f"Gemini API error: {type(e).__name__} - {str(e)}")
             raise
 
+    @resilient_stream
+    async def stream_message(
+        self,
+        messages: List[Dict[str, str]],
+        functions: Optional[List[Dict]] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming natif Gemini (send_message_async(stream=True)) : chaque fragment
+        reçu est retransmis immédiatement. Le dernier fragment porte finish_reason.
+        """
+        self.validate_messages(messages)
+        estimated_tokens = estimate_tokens(messages)
+
+        lease, last_parts, request_kwargs, cached = await self._prepare_request(
+            messages, functions, temperature, max_tokens
+        )
+
+        tool_calls = []
+        text_parts = []
+        usage = None
+        try:
+            try:
+                response = await lease.chat.send_message_async(
+                    last_parts, stream=True, **request_kwargs
+                )
+            except Exception as e:
+                if not self._is_stale_cache_error(cached, e):
+                    raise
+                lease, last_parts, request_kwargs, _ = await self._prepare_request(
+                    messages, functions, temperature, max_tokens, use_prompt_cache=False
+                )
+                response = await lease.chat.send_message_async(
+                    last_parts, stream=True, **request_kwargs
+                )
+            async for chunk in response:
+                usage = self._usage(chunk) or usage
+                if not chunk.candidates:
+                    continue
+                known_calls = len(tool_calls)
+                text = self._extract_parts(chunk.candidates[0], tool_calls)
+                text_parts.append(text)
+                if text or len(tool_calls) > known_calls:
+                    yield {
+                        "content": text,
+                        "tool_calls": tool_calls[known_calls:],
+                        "finish_reason": None,
+                    }
+        except Exception as e:
+            logger.error(f"Gemini API error (stream): {type(e).__name__} - {str(e)}")
+            raise
+
+        self.rate_limiter.record_usage(estimated_tokens, usage["total_tokens"] if usage else None)
+        content = "".join(text_parts)
+        self._release_session(lease, content, tool_calls)
+        finish_reason = "tool_calls" if tool_calls else "stop"
+        logger.info(
+            f"Gemini stream: {len(content)} chars, {len(tool_calls)} tool_calls, finish_reason={finish_reason}"
+        )
+        yield {"content": "", "tool_calls": [], "finish_reason": finish_reason, "usage": usage}
+
+    async def _prepare_request(
+        self,
+        messages: List[Dict[str, str]],
+        functions: Optional[List[Dict]],
+        temperature: float,
+        max_tokens: int,
+        use_prompt_cache: bool = True,
+    ) -> tuple:
+        """
+        Prépare la session de chat Gemini et les paramètres de génération.
+        La session de la conversation courante est réutilisée si l'historique la prolonge ;
+        le prompt système et les outils sont référencés depuis le context caching si actif
+        (et si use_prompt_cache).
+
+        Returns:
+            (ChatLease, parts du dernier message, kwargs pour send_message_async,
+            CachedPrefix utilisé ou None)
+        """
+        cached = None
+        if self.prompt_cache and use_prompt_cache:
+            cached = await self.prompt_cache.resolve(messages, functions)
+
+        # Convertir messages au format Gemini
+        gemini_messages = self._convert_messages(messages)
+
+        # Préparer configuration génération
+        generation_config = {
+            "temperature": temperature,
+            "max_output_tokens": max_tokens,
+        }
+
+        client = self.client
+        session_key = rate_limit_key.get()
+        tools = None
+        if cached is not None:
+            # Messages system de tête (jamais filtrés par _convert_messages) : déjà en cache,
+            # outils compris — l'API refuse de les redéclarer dans la requête
+            gemini_messages = gemini_messages[cached.length:]
+            client = self._cached_client(cached)
+            if session_key is not None:
+                session_key = f"{session_key}@{cached.name}"
+        elif functions:
+            # Préparer tools si fonctions fournies
+            tools = [Tool(function_declarations=self.format_functions(functions))]
+
+        lease = self.chat_sessions.checkout(
+            gemini_messages, lambda history: client.start_chat(history=history), key=session_key
+        )
+        return (
+            lease,
+            gemini_messages[-1]["parts"],
+            {"generation_config": generation_config, "tools": tools},
+            cached,
+        )
+
+    def _is_stale_cache_error(self, cached: Optional[CachedPrefix], exc: Exception) -> bool:
+        """
+        Vrai si la requête a été refusée à cause du contenu en cache (supprimé, expiré
+        plus tôt que prévu, horloges décalées) : le préfixe est alors oublié.
+        """
+        if cached is None:
+            return False
+        code = getattr(exc, "code", None)
+        if code not in self.STALE_CACHE_STATUS and type(exc).__name__ not in self.STALE_CACHE_ERRORS:
+            return False
+        logger.warning(
+            "Gemini: contenu en cache %s refusé (%s), nouvel envoi avec le préfixe en ligne",
+            cached.name,
+            type(exc).__name__,
+        )
+        self.prompt_cache.invalidate(cached)
+        return True
+
+    @staticmethod
+    def _cached_client(cached: CachedPrefix):
+        """Client Gemini adossé au contenu en cache (créé une fois par préfixe)."""
+        if cached.client is None:
+            cached.client = genai.GenerativeModel.from_cached_content(cached_content=cached.handle)
+        return cached.client
+
+    async def create_cached_prefix(
+        self, prefix_messages: List[Dict[str, str]], functions: Optional[List[Dict]], ttl_seconds: float
+    ):
+        """Enregistre prompt système + outils comme CachedContent Gemini."""
+        tools = [Tool(function_declarations=self.format_functions(functions))] if functions else None
+        return await asyncio.to_thread(
+            genai.caching.CachedContent.create,
+            model=self.model,
+            system_instruction="\n\n".join(m["content"] for m in prefix_messages),
+            tools=tools,
+            ttl=timedelta(seconds=ttl_seconds),
+        )
+
+    async def refresh_cached_prefix(self, handle, ttl_seconds: float) -> None:
+        await asyncio.to_thread(handle.update, ttl=timedelta(seconds=ttl_seconds))
+
+    async def delete_cached_prefix(self, handle) -> None:
+        await asyncio.to_thread(handle.delete)
+
+    def _release_session(self, lease, content: str, tool_calls: List[Dict]) -> None:
+        """
+        Rend la session de chat. Après des tool calls, l'historique du SDK contient des
+        function_call que la conversation JARVIS ne rejoue pas : session abandonnée.
+        """
+        reply = None if tool_calls else {"role": "model", "parts": [{"text": content}]}
+        self.chat_sessions.checkin(lease, reply)
+
+    @staticmethod
+    def _extract_parts(candidate, tool_calls: List[Dict]) -> str:
+        """
+        Extrait le texte d'un candidat Gemini et ajoute ses function calls à tool_calls
+        (identifiants numérotés à la suite des appels déjà présents).
+        """
+        content = ""
+        if candidate.content.parts:
+            for part in candidate.content.parts:
+                if hasattr(part, "text"):
+                    content += part.text
+                elif hasattr(part, "function_call"):
+                    # Tool call détecté
+                    fc = part.function_call
+                    tool_calls.append({
+                        "id": f"call_{len(tool_calls)}",
+                        "name": fc.name,
+                        "arguments": dict(fc.args),
+                    })
+        return content
+
     def format_functions(self, functions: List[Dict]) -> List[FunctionDeclaration]:
         """
         Convertit fonctions JARVIS → format Gemini FunctionDeclaration.
@@ -229,23 +417,24 @@ class GeminiProvider(BaseProvider):
 
         return gemini_schema
 
-    async def _apply_rate_limit_delay(self) -> None:
-        """
-        Applique un délai adaptatif pour respecter le quota RPM de Gemini.
-        
-        Calcul : 60s / 15 RPM = 4s entre requêtes minimum
-        Si dernière requête < 4s, attend le temps restant.
-        """
-        if GeminiProvider._last_request_time is not None:
-            elapsed = (datetime.now() - GeminiProvider._last_request_time).total_seconds()
-            
-            if elapsed < self._min_delay_seconds:
-                wait_time = self._min_delay_seconds - elapsed
-                logger.info(
-                    f"GeminiProvider: attente {wait_time:.1f}s pour respecter quota RPM "
-                    f"(15 req/min = {self._min_delay_seconds}s entre requêtes)"
-                )
-                await asyncio.sleep(wait_time)
-        
-        # Enregistrer timestamp de cette requête
-        GeminiProvider._last_request_time = datetime.now()
+    @staticmethod
+    def _usage_tokens(response) -> Optional[int]:
+        """Tokens réellement facturés (usage_metadata), si fournis par l'API."""
+        usage = getattr(response, "usage_metadata", None)
+        total = getattr(usage, "total_token_count", None)
+        return total if isinstance(total, int) and total > 0 else None
+
+    @classmethod
+    def _usage(cls, response) -> Optional[Dict[str, int]]:
+        """Usage détaillé {prompt_tokens, completion_tokens, total_tokens}, si fourni."""
+        total = cls._usage_tokens(response)
+        if total is None:
+            return None
+        metadata = response.usage_metadata
+        prompt = getattr(metadata, "prompt_token_count", 0)
+        completion = getattr(metadata, "candidates_token_count", 0)
+        return {
+            "prompt_tokens": prompt if isinstance(prompt, int) else 0,
+            "completion_tokens": completion if isinstance(completion, int) else 0,
+            "total_tokens": total,
+        }
@@ -0,0 +1,292 @@
+"""
+Limitation de débit des appels LLM — JARVIS 2.0
+Un limiteur par modèle, à deux seaux à jetons (requêtes/minute et tokens/minute),
+avec file d'attente équitable entre conversations (round-robin).
+
+Configuration via .env (valeurs par défaut entre parenthèses) :
+- RATE_LIMIT_RPM (15)      : requêtes par minute
+- RATE_LIMIT_TPM (1000000) : tokens par minute (0 = pas de limite)
+- RATE_LIMIT_BURST (1)     : requêtes consécutives autorisées sans attente
+- RATE_LIMIT_<MODELE>_RPM / _TPM / _BURST : surcharge par modèle
+  (nom du modèle en majuscules, caractères non alphanumériques → "_",
+  ex. RATE_LIMIT_GEMINI_2_5_PRO_RPM=150)
+"""
+
+import asyncio
+import logging
+import os
+import re
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RPM = 15
+DEFAULT_TPM = 1_000_000
+DEFAULT_BURST = 1
+
+# Clé d'équité courante (conversation) — positionnée par BaseAgent
+rate_limit_key: ContextVar[str | None] = ContextVar("rate_limit_key", default=None)
+
+
+@contextmanager
+def rate_limit_scope(key: str | None):
+    """Associe les appels LLM du bloc à une clé d'équité (ex. conversation_id)."""
+    token = rate_limit_key.set(key)
+    try:
+        yield
+    finally:
+        rate_limit_key.reset(token)
+
+
+def estimate_tokens(messages: list[dict]) -> int:
+    """Estimation grossière avant appel : ~4 caractères par token."""
+    chars = sum(len(m.get("content") or "") for m in messages if isinstance(m, dict))
+    return chars // 4 + 1
+
+
+class TokenBucket:
+    """
+    Seau à jetons : `capacity` jetons au maximum, rechargé à `rate` jetons/seconde.
+    Le solde peut devenir négatif (ajustement après coup de la consommation réelle).
+    """
+
+    def __init__(self, rate: float, capacity: float, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def time_until(self, amount: float) -> float:
+        """Secondes à attendre avant de pouvoir consommer `amount` jetons."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self._tokens >= amount:
+            return 0.0
+        return (amount - self._tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self._tokens -= amount
+
+
+class ModelRateLimiter:
+    """
+    Limiteur d'un modèle : RPM + TPM, rafale configurable, équité entre clés.
+
+    Les demandes sont mises en file par clé (conversation) ; un répartiteur sert les
+    clés à tour de rôle, une demande à la fois, dès que les deux seaux le permettent.
+    Une conversation qui enchaîne les appels ne peut donc pas affamer les autres.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        rpm: int = DEFAULT_RPM,
+        tpm: int = DEFAULT_TPM,
+        burst: int = DEFAULT_BURST,
+        clock=time.monotonic,
+    ):
+        if rpm <= 0:
+            raise ValueError("rpm doit être strictement positif")
+        self.model = model
+        self.rpm = rpm
+        self.tpm = tpm
+        self.burst = max(burst, 1)
+        self._requests = TokenBucket(rpm / 60.0, self.burst, clock)
+        self._tokens = TokenBucket(tpm / 60.0, tpm, clock) if tpm > 0 else None
+
+        self._queues: dict[str | None, deque] = {}
+        self._turns: deque = deque()
+        self._dispatcher: asyncio.Task | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+        self._stats = {
+            "requests": 0,
+            "tokens": 0,
+            "waited": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "max_queue_depth": 0,
+        }
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Nouvelle boucle (TestClient, scripts) : les futures de l'ancienne sont perdues
+            self._loop = loop
+            self._queues.clear()
+            self._turns.clear()
+            self._dispatcher = None
+            self._wakeup = asyncio.Event()
+
+    async def acquire(self, tokens: int = 1, key: str | None = None) -> float:
+        """
+        Attend son tour puis consomme 1 requête et `tokens` tokens.
+
+        Args:
+            tokens: Estimation des tokens de la requête
+            key: Clé d'équité (défaut : rate_limit_key courant)
+
+        Returns:
+            Temps d'attente en secondes
+        """
+        self._bind_loop()
+        if key is None:
+            key = rate_limit_key.get()
+
+        started = time.monotonic()
+        future = self._loop.create_future()
+        if key not in self._queues:
+            self._queues[key] = deque()
+            self._turns.append(key)
+        self._queues[key].append((future, tokens))
+        self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self.queue_depth)
+
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = self._loop.create_task(self._dispatch())
+        self._wakeup.set()
+
+        await future
+
+        waited = time.monotonic() - started
+        self._stats["total_wait_seconds"] += waited
+        self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], waited)
+        if waited > 0.01:
+            self._stats["waited"] += 1
+            logger.info(
+                "RateLimiter[%s]: attente %.1fs (file: %d)", self.model, waited, self.queue_depth
+            )
+        return waited
+
+    def record_usage(self, estimated: int, actual: int | None) -> None:
+        """Ajuste le seau TPM avec la consommation réelle retournée par l'API."""
+        if actual is None or self._tokens is None:
+            return
+        delta = actual - estimated
+        if delta:
+            self._tokens.consume(delta)
+            self._stats["tokens"] += delta
+
+    def _next_request(self):
+        """Premier élément non annulé de la clé en tête du tour, ou None si file vide."""
+        while self._turns:
+            key = self._turns[0]
+            queue = self._queues[key]
+            while queue and queue[0][0].done():
+                queue.popleft()  # appelant annulé
+            if queue:
+                return key, queue[0]
+            self._turns.popleft()
+            del self._queues[key]
+        return None
+
+    async def _dispatch(self) -> None:
+        while True:
+            head = self._next_request()
+            if head is None:
+                return
+            key, (future, tokens) = head
+
+            wait = self._requests.time_until(1)
+            if self._tokens is not None:
+                wait = max(wait, self._tokens.time_until(tokens))
+            if wait > 0:
+                self._wakeup.clear()
+                try:
+                    # Réveil anticipé si une nouvelle demande arrive
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except TimeoutError:
+                    pass
+                continue
+
+            self._queues[key].popleft()
+            self._requests.consume(1)
+            if self._tokens is not None:
+                self._tokens.consume(tokens)
+            self._stats["requests"] += 1
+            self._stats["tokens"] += tokens
+
+            # Tour suivant : la clé servie passe en fin de rotation
+            self._turns.rotate(-1)
+            future.set_result(None)
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "model": self.model,
+            "rpm": self.rpm,
+            "tpm": self.tpm,
+            "burst": self.burst,
+            "queue_depth": self.queue_depth,
+            "active_keys": len(self._queues),
+            "avg_wait_seconds": (
+                self._stats["total_wait_seconds"] / self._stats["requests"]
+                if self._stats["requests"]
+                else 0.0
+            ),
+        }
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning("Variable %s invalide (%r), valeur par défaut %d", name, value, default)
+        return default
+
+
+def model_env_prefix(model: str) -> str:
+    return "RATE_LIMIT_" + re.sub(r"[^A-Z0-9]+", "_", model.upper()).strip("_")
+
+
+class RateLimiterRegistry:
+    """Un ModelRateLimiter par modèle, partagé par tous les providers et agents."""
+
+    def __init__(self):
+        self._limiters: dict[str, ModelRateLimiter] = {}
+
+    def get(self, model: str) -> ModelRateLimiter:
+        limiter = self._limiters.get(model)
+        if limiter is None:
+            prefix = model_env_prefix(model)
+            rpm = _env_int(f"{prefix}_RPM", _env_int("RATE_LIMIT_RPM", DEFAULT_RPM))
+            tpm = _env_int(f"{prefix}_TPM", _env_int("RATE_LIMIT_TPM", DEFAULT_TPM))
+            burst = _env_int(f"{prefix}_BURST", _env_int("RATE_LIMIT_BURST", DEFAULT_BURST))
+            limiter = ModelRateLimiter(model, rpm=rpm, tpm=tpm, burst=burst)
+            self._limiters[model] = limiter
+            logger.info(
+                "RateLimiter[%s]: %d RPM, %d TPM, rafale %d", model, rpm, tpm, limiter.burst
+            )
+        return limiter
+
+    def stats(self) -> dict[str, dict]:
+        return {model: limiter.stats() for model, limiter in self._limiters.items()}
+
+    def clear(self) -> None:
+        """Oublie les limiteurs (relecture de la configuration, tests)."""
+        self._limiters.clear()
+
+
+rate_limiters = RateLimiterRegistry()
@@ -0,0 +1,402 @@
+"""
+Résilience des appels LLM — JARVIS 2.0
+Couche appliquée autour de BaseProvider.send_message / stream_message :
+- classification des erreurs (transitoires → nouvel essai, autres → échec immédiat)
+- backoff exponentiel avec jitter, en respectant les indications retry-after
+- disjoncteur (circuit breaker) par modèle
+- délai d'attente par tentative et échéance globale par appel
+- créneau du limiteur de débit (provider.rate_limiter) obtenu avant chaque tentative,
+  hors du délai par tentative : l'attente dans la file locale ne compte ni comme
+  dépassement de délai ni comme échec pour le disjoncteur (seulement pour l'échéance)
+
+Configuration via .env (valeurs par défaut entre parenthèses) :
+- LLM_MAX_ATTEMPTS (4)           : tentatives par appel
+- LLM_BACKOFF_BASE (1.0)         : délai de base du backoff (s)
+- LLM_BACKOFF_MAX (30.0)         : délai maximum entre deux tentatives (s)
+- LLM_ATTEMPT_TIMEOUT (120.0)    : durée maximum d'une tentative (s)
+- LLM_CALL_DEADLINE (300.0)      : durée maximum d'un appel, nouvels essais compris (s)
+- LLM_BREAKER_THRESHOLD (5)      : échecs consécutifs avant ouverture du disjoncteur
+- LLM_BREAKER_RESET (30.0)       : durée d'ouverture avant un appel de test (s)
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from backend.ia.rate_limiter import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+_RETRY_IN = re.compile(r"retry in ([0-9]+(?:\.[0-9]+)?)\s*s", re.IGNORECASE)
+_RETRY_DELAY_SECONDS = re.compile(r"retry_delay\s*\{\s*seconds:\s*([0-9]+)", re.IGNORECASE)
+
+# Échéance spécifique à un appel (secondes), prioritaire sur LLM_CALL_DEADLINE
+call_deadline: ContextVar[float | None] = ContextVar("call_deadline", default=None)
+
+
+class ProviderError(Exception):
+    pass
+
+
+class CircuitOpenError(ProviderError):
+    pass
+
+
+class DeadlineExceededError(ProviderError):
+    pass
+
+
+@contextmanager
+def deadline_scope(seconds: float | None):
+    """Impose une échéance aux appels LLM du bloc."""
+    token = call_deadline.set(seconds)
+    try:
+        yield
+    finally:
+        call_deadline.reset(token)
+
+
+def _status_code(exc: BaseException) -> int | None:
+    for attr in ("status_code", "code", "status"):
+        value = getattr(exc, attr, None)
+        try:
+            code = int(value)
+        except (TypeError, ValueError):
+            continue
+        if 100 <= code < 600:
+            return code
+    return None
+
+
+def _retry_after(exc: BaseException) -> float | None:
+    value = getattr(exc, "retry_after", None)
+    if value is None:
+        response = getattr(exc, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        try:
+            value = headers.get("retry-after") or headers.get("Retry-After")
+        except AttributeError:
+            value = None
+    if value is not None:
+        try:
+            return max(float(value), 0.0)
+        except (TypeError, ValueError):
+            pass
+
+    message = str(exc)
+    match = _RETRY_IN.search(message) or _RETRY_DELAY_SECONDS.search(message)
+    return float(match.group(1)) if match else None
+
+
+def classify_error(exc: BaseException) -> tuple[bool, float | None]:
+    """
+    Détermine si une erreur est transitoire.
+
+    Returns:
+        (retryable, retry_after en secondes ou None)
+    """
+    if isinstance(exc, (CircuitOpenError, DeadlineExceededError)):
+        return False, None
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True, None
+
+    code = _status_code(exc)
+    if code is not None:
+        return code in RETRYABLE_STATUS, _retry_after(exc)
+
+    # Exceptions google.api_core sans code exploitable : se fier au nom
+    name = type(exc).__name__
+    if name in {"ResourceExhausted", "ServiceUnavailable", "InternalServerError",
+                "DeadlineExceeded", "TooManyRequests", "GatewayTimeout"}:
+        return True, _retry_after(exc)
+    return False, None
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning("Variable %s invalide (%r), valeur par défaut %s", name, value, default)
+        return default
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 4
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+    attempt_timeout: float = 120.0
+    deadline: float = 300.0
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        return cls(
+            max_attempts=max(int(_env_float("LLM_MAX_ATTEMPTS", 4)), 1),
+            base_delay=_env_float("LLM_BACKOFF_BASE", 1.0),
+            max_delay=_env_float("LLM_BACKOFF_MAX", 30.0),
+            attempt_timeout=_env_float("LLM_ATTEMPT_TIMEOUT", 120.0),
+            deadline=_env_float("LLM_CALL_DEADLINE", 300.0),
+        )
+
+    def backoff(self, attempt: int, retry_after: float | None = None) -> float:
+        """
+        Délai avant la tentative suivante (attempt commence à 1).
+        Full jitter : uniforme entre 0 et base × 2^(attempt-1), plafonné à max_delay ;
+        une indication retry-after du serveur sert de minimum.
+        """
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        delay = random.uniform(0, ceiling)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur : après `failure_threshold` échecs transitoires consécutifs, les appels
+    échouent immédiatement pendant `reset_timeout` secondes, puis un seul appel de test
+    est autorisé (semi-ouvert) : succès → fermé, échec → rouvert.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = max(failure_threshold, 1)
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def before_call(self) -> None:
+        """Raises CircuitOpenError si l'appel doit être refusé."""
+        if self.state == self.OPEN:
+            remaining = self.reset_timeout - (self._clock() - self._opened_at)
+            if remaining > 0:
+                raise CircuitOpenError(
+                    f"Disjoncteur ouvert pour {self.name} (réessai possible dans {remaining:.0f}s)"
+                )
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                raise CircuitOpenError(f"Disjoncteur semi-ouvert pour {self.name} (test en cours)")
+            self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            logger.info("CircuitBreaker[%s]: fermé", self.name)
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(
+                    "CircuitBreaker[%s]: ouvert après %d échec(s)", self.name, self.failures
+                )
+            self.state = self.OPEN
+            self._opened_at = self._clock()
+
+    def release(self) -> None:
+        """Libère le créneau de test sans verdict (erreur non transitoire, annulation)."""
+        self._probe_in_flight = False
+
+    def stats(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self.failures}
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(model: str) -> CircuitBreaker:
+    breaker = _breakers.get(model)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            model,
+            failure_threshold=int(_env_float("LLM_BREAKER_THRESHOLD", 5)),
+            reset_timeout=_env_float("LLM_BREAKER_RESET", 30.0),
+        )
+        _breakers[model] = breaker
+    return breaker
+
+
+def reset_circuit_breakers() -> None:
+    """Oublie l'état des disjoncteurs (tests, rechargement de configuration)."""
+    _breakers.clear()
+
+
+def circuit_breaker_stats() -> dict[str, dict]:
+    return {model: breaker.stats() for model, breaker in _breakers.items()}
+
+
+def _policy_for(provider) -> RetryPolicy:
+    policy = getattr(provider, "retry_policy", None)
+    if policy is None:
+        policy = RetryPolicy.from_env()
+        provider.retry_policy = policy
+    return policy
+
+
+def _deadline_for(policy: RetryPolicy) -> float:
+    override = call_deadline.get()
+    return time.monotonic() + (override if override is not None else policy.deadline)
+
+
+async def _acquire_slot(provider, breaker, args, kwargs, deadline) -> None:
+    """
+    Attend un créneau du limiteur de débit du provider (s'il en a un) avant une tentative.
+    L'attente est bornée par l'échéance de l'appel, jamais par le délai par tentative.
+    """
+    limiter = getattr(provider, "rate_limiter", None)
+    if limiter is None:
+        return
+    messages = kwargs["messages"] if "messages" in kwargs else (args[0] if args else [])
+    remaining = deadline - time.monotonic()
+    try:
+        if remaining <= 0:
+            raise TimeoutError()
+        await asyncio.wait_for(limiter.acquire(estimate_tokens(messages)), timeout=remaining)
+    except TimeoutError:
+        breaker.release()
+        raise DeadlineExceededError(
+            f"Échéance atteinte pour {provider.model} en attente du limiteur de débit"
+        ) from None
+    except BaseException:
+        breaker.release()
+        raise
+
+
+def _next_delay(policy, breaker, model, attempt, exc, deadline) -> float:
+    """Enregistre l'échec et retourne le délai avant nouvel essai, ou relève l'erreur."""
+    retryable, retry_after = classify_error(exc)
+    if not retryable:
+        breaker.release()
+        raise exc
+    breaker.record_failure()
+    if attempt >= policy.max_attempts:
+        raise exc
+
+    delay = policy.backoff(attempt, retry_after)
+    if time.monotonic() + delay >= deadline:
+        raise DeadlineExceededError(
+            f"Échéance atteinte pour {model} après {attempt} tentative(s) : {exc}"
+        ) from exc
+    logger.warning(
+        "Provider[%s]: tentative %d/%d échouée (%s: %s), nouvel essai dans %.1fs",
+        model,
+        attempt,
+        policy.max_attempts,
+        type(exc).__name__,
+        exc,
+        delay,
+    )
+    return delay
+
+
+def resilient(method):
+    """
+    Décorateur pour send_message : nouvels essais, disjoncteur et échéances.
+    Le provider décoré doit exposer `model` ; `retry_policy` et `rate_limiter` sont
+    optionnels.
+    """
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        policy = _policy_for(self)
+        breaker = get_circuit_breaker(self.model)
+        deadline = _deadline_for(policy)
+
+        for attempt in range(1, policy.max_attempts + 1):
+            breaker.before_call()
+            await _acquire_slot(self, breaker, args, kwargs, deadline)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                breaker.release()
+                raise DeadlineExceededError(f"Échéance atteinte pour {self.model}")
+            try:
+                result = await asyncio.wait_for(
+                    method(self, *args, **kwargs), timeout=min(policy.attempt_timeout, remaining)
+                )
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+            except Exception as e:
+                delay = _next_delay(policy, breaker, self.model, attempt, e, deadline)
+                await asyncio.sleep(delay)
+                continue
+            breaker.record_success()
+            return result
+
+    return wrapper
+
+
+def resilient_stream(method):
+    """
+    Décorateur pour stream_message : mêmes garanties que `resilient`, mais un nouvel
+    essai n'est tenté que si aucun fragment n'a encore été transmis à l'appelant.
+    Le délai par tentative s'applique à l'attente de chaque fragment.
+    """
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        policy = _policy_for(self)
+        breaker = get_circuit_breaker(self.model)
+        deadline = _deadline_for(policy)
+
+        for attempt in range(1, policy.max_attempts + 1):
+            breaker.before_call()
+            await _acquire_slot(self, breaker, args, kwargs, deadline)
+            started = False
+            stream = method(self, *args, **kwargs)
+            try:
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise DeadlineExceededError(f"Échéance atteinte pour {self.model}")
+                    try:
+                        chunk = await asyncio.wait_for(
+                            stream.__anext__(), timeout=min(policy.attempt_timeout, remaining)
+                        )
+                    except StopAsyncIteration:
+                        break
+                    started = True
+                    yield chunk
+            except (asyncio.CancelledError, GeneratorExit, DeadlineExceededError):
+                breaker.release()
+                raise
+            except Exception as e:
+                if started:
+                    # Des fragments ont déjà été transmis : impossible de rejouer
+                    if classify_error(e)[0]:
+                        breaker.record_failure()
+                    else:
+                        breaker.release()
+                    raise
+                delay = _next_delay(policy, breaker, self.model, attempt, e, deadline)
+                await asyncio.sleep(delay)
+                continue
+            finally:
+                await stream.aclose()
+            breaker.record_success()
+            return
+
+    return wrapper
@@ -0,0 +1,284 @@
+"""
+Cache des réponses LLM — JARVIS 2.0
+Cache adressé par contenu pour les appels déterministes (vérification de complétude,
+rapports de code BASE) : même modèle, température, messages normalisés et outils
+→ même réponse, sans latence ni consommation de quota.
+
+Deux niveaux :
+- mémoire : LRU borné en nombre d'entrées
+- disque : table SQLite avec TTL et éviction par taille totale (LRU sur accessed_at)
+
+Activation par agent : "response_cache": True dans AGENT_CONFIGS.
+
+Configuration via .env (valeurs par défaut entre parenthèses) :
+- LLM_CACHE_DB (llm_cache.db)         : fichier SQLite du niveau disque
+- LLM_CACHE_MEMORY_ENTRIES (256)      : entrées du niveau mémoire
+- LLM_CACHE_TTL (604800)              : durée de vie d'une entrée (s)
+- LLM_CACHE_MAX_MB (50)               : taille maximum du niveau disque
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+
+from backend.db.pool import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed_at);
+"""
+
+
+def _normalize_text(text: str) -> str:
+    return "\n".join(line.rstrip() for line in text.replace("\r\n", "\n").split("\n")).strip()
+
+
+def cache_key(
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    messages: list[dict],
+    functions: list[dict] | None = None,
+) -> str:
+    """Empreinte SHA-256 de la requête (messages normalisés : fins de ligne, espaces)."""
+    payload = {
+        "model": model,
+        "temperature": round(float(temperature), 4),
+        "max_tokens": max_tokens,
+        "messages": [
+            {"role": m.get("role"), "content": _normalize_text(m.get("content") or "")}
+            for m in messages
+        ],
+        "functions": functions or [],
+    }
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _is_cacheable(response: dict) -> bool:
+    return (
+        isinstance(response, dict)
+        and bool(response.get("content"))
+        and not response.get("tool_calls")
+        and response.get("finish_reason", "stop") == "stop"
+    )
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        db_path: str = "llm_cache.db",
+        memory_entries: int = 256,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_bytes: int = 50 * 1024 * 1024,
+    ):
+        self.db_path = db_path
+        self.memory_entries = memory_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._memory: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._pool = ConnectionPool(db_path, max_readers=1)
+        self._initialized = False
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "expired": 0,
+            "evicted": 0,
+        }
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        def number(name, default):
+            try:
+                return float(os.getenv(name, default))
+            except ValueError:
+                logger.warning("Variable %s invalide, valeur par défaut %s", name, default)
+                return float(default)
+
+        return cls(
+            db_path=os.getenv("LLM_CACHE_DB", "llm_cache.db"),
+            memory_entries=int(number("LLM_CACHE_MEMORY_ENTRIES", 256)),
+            ttl_seconds=number("LLM_CACHE_TTL", 7 * 24 * 3600),
+            max_bytes=int(number("LLM_CACHE_MAX_MB", 50) * 1024 * 1024),
+        )
+
+    async def _ensure_schema(self) -> None:
+        if self._initialized:
+            return
+        async with self._pool.write() as db:
+            await db.executescript(SCHEMA)
+            await db.commit()
+        self._initialized = True
+
+    def _remember(self, key: str, created_at: float, response: dict) -> None:
+        self._memory[key] = (created_at, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    async def get(self, key: str) -> dict | None:
+        now = time.time()
+
+        entry = self._memory.get(key)
+        if entry is not None:
+            created_at, response = entry
+            if now - created_at <= self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return dict(response)
+            del self._memory[key]
+
+        await self._ensure_schema()
+        async with self._pool.write() as db:
+            async with db.execute(
+                "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+            ) as cursor:
+                row = await cursor.fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            if now - row[1] > self.ttl_seconds:
+                await db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                await db.commit()
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            await db.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            await db.commit()
+
+        response = json.loads(row[0])
+        self._remember(key, row[1], response)
+        self._stats["disk_hits"] += 1
+        return dict(response)
+
+    async def set(self, key: str, model: str, response: dict) -> None:
+        now = time.time()
+        payload = json.dumps(response, ensure_ascii=False)
+        self._remember(key, now, response)
+
+        await self._ensure_schema()
+        async with self._pool.write() as db:
+            await db.execute(
+                """INSERT OR REPLACE INTO llm_cache
+                (key, model, response, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)""",
+                (key, model, payload, len(payload.encode("utf-8")), now, now),
+            )
+            await db.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+            await self._evict_over_budget(db)
+            await db.commit()
+        self._stats["stores"] += 1
+
+    async def _evict_over_budget(self, db) -> None:
+        async with db.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache") as cursor:
+            total = (await cursor.fetchone())[0]
+        if total <= self.max_bytes:
+            return
+        # Supprimer les entrées les moins récemment utilisées jusqu'à repasser sous le budget
+        async with db.execute("SELECT key, size FROM llm_cache ORDER BY accessed_at ASC") as cursor:
+            victims = []
+            async for key, size in cursor:
+                if total <= self.max_bytes:
+                    break
+                victims.append((key,))
+                total -= size
+        await db.executemany("DELETE FROM llm_cache WHERE key = ?", victims)
+        for (key,) in victims:
+            self._memory.pop(key, None)
+        self._stats["evicted"] += len(victims)
+
+    async def clear(self) -> None:
+        self._memory.clear()
+        await self._ensure_schema()
+        async with self._pool.write() as db:
+            await db.execute("DELETE FROM llm_cache")
+            await db.commit()
+
+    async def close(self) -> None:
+        await self._pool.close()
+
+    def stats(self) -> dict:
+        hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+        lookups = hits + self._stats["misses"]
+        return {
+            **self._stats,
+            "hits": hits,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+
+def cached(method):
+    """
+    Décorateur pour send_message : consulte `self.response_cache` (None = désactivé).
+    Les appels avec outils (function calling) ne sont jamais mis en cache : leurs
+    réponses déclenchent des effets de bord côté FunctionExecutor.
+    """
+
+    @functools.wraps(method)
+    async def wrapper(self, messages, functions=None, temperature=0.7, max_tokens=4096):
+        cache = getattr(self, "response_cache", None)
+        if cache is None or functions:
+            return await method(
+                self, messages, functions=functions, temperature=temperature, max_tokens=max_tokens
+            )
+
+        key = cache_key(self.model, temperature, max_tokens, messages)
+        try:
+            hit = await cache.get(key)
+        except Exception:
+            logger.exception("ResponseCache: lecture impossible, appel direct")
+            hit = None
+        if hit is not None:
+            logger.info("ResponseCache[%s]: hit %s", self.model, key[:12])
+            return hit
+
+        response = await method(
+            self, messages, functions=functions, temperature=temperature, max_tokens=max_tokens
+        )
+        if _is_cacheable(response):
+            try:
+                # L'usage mesuré n'est pas rejoué : un hit ne consomme aucun token
+                stored = {k: v for k, v in response.items() if k != "usage"}
+                await cache.set(key, self.model, stored)
+            except Exception:
+                logger.exception("ResponseCache: écriture impossible")
+        return response
+
+    return wrapper
+
+
+_shared_cache: ResponseCache | None = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Cache partagé par tous les agents ayant activé response_cache."""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = ResponseCache.from_env()
+    return _shared_cache
+
+
+async def close_response_cache() -> None:
+    global _shared_cache
+    if _shared_cache is not None:
+        await _shared_cache.close()
+        _shared_cache = None
+
+
+def response_cache_stats() -> dict:
+    return _shared_cache.stats() if _shared_cache is not None else {}
@@ -0,0 +1,192 @@
+"""
+Comptabilité des tokens — JARVIS 2.0
+Enregistre les tokens prompt/complétion retournés par chaque appel LLM, agrégés par
+agent, conversation et délégation, persistés en SQLite (table token_usage), et
+applique un budget par conversation pour arrêter tôt les boucles CODEUR/BASE.
+
+Mesure aussi le coût réel d'un fichier produit par le CODEUR (tokens de complétion
+par fichier écrit), utilisé par SimpleOrchestrator.estimate_passes.
+
+Configuration via .env (valeurs par défaut entre parenthèses) :
+- TOKEN_BUDGET_PER_CONVERSATION (0) : tokens maximum par conversation (0 = illimité)
+"""
+
+import logging
+import os
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Délégation d'orchestration courante — positionnée par SimpleOrchestrator.execute_delegation
+current_delegation: ContextVar[str | None] = ContextVar("current_delegation", default=None)
+
+
+class TokenBudgetExceededError(RuntimeError):
+    def __init__(self, conversation_id: str, used: int, budget: int):
+        super().__init__(
+            f"Budget de tokens épuisé pour la conversation {conversation_id} ({used}/{budget})"
+        )
+        self.conversation_id = conversation_id
+        self.used = used
+        self.budget = budget
+
+
+@contextmanager
+def delegation_scope(agent_name: str):
+    """Rattache les appels LLM du bloc à une nouvelle délégation ; produit son identifiant."""
+    delegation_id = f"{agent_name}-{uuid.uuid4().hex[:12]}"
+    token = current_delegation.set(delegation_id)
+    try:
+        yield delegation_id
+    finally:
+        current_delegation.reset(token)
+
+
+def usage_from_response(response: dict) -> dict | None:
+    """Usage {prompt_tokens, completion_tokens} d'une réponse provider, ou None si absent."""
+    usage = response.get("usage") if isinstance(response, dict) else None
+    if not usage:
+        return None
+    prompt = int(usage.get("prompt_tokens") or 0)
+    completion = int(usage.get("completion_tokens") or 0)
+    if prompt <= 0 and completion <= 0:
+        return None
+    return {"prompt_tokens": prompt, "completion_tokens": completion}
+
+
+class TokenLedger:
+    """
+    Registre des consommations. Les totaux en mémoire servent au contrôle de budget
+    (pas de requête SQL par appel LLM) ; le total d'une conversation est relu depuis
+    la base au premier accès après redémarrage.
+    """
+
+    # Lissage exponentiel des mesures tokens/fichier
+    TOKENS_PER_FILE_SMOOTHING = 0.3
+
+    def __init__(self, db=None, budget: int | None = None):
+        self.db = db
+        self.budget = budget if budget is not None else self._budget_from_env()
+        self._conversations: dict[str, int] = {}
+        self._delegations: dict[str, dict[str, dict[str, int]]] = defaultdict(
+            lambda: defaultdict(lambda: {"prompt_tokens": 0, "completion_tokens": 0})
+        )
+        self._agents: dict[str, dict[str, int]] = defaultdict(
+            lambda: {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        )
+        self._tokens_per_file: float | None = None
+
+    @staticmethod
+    def _budget_from_env() -> int:
+        try:
+            return max(int(os.getenv("TOKEN_BUDGET_PER_CONVERSATION", "0")), 0)
+        except ValueError:
+            logger.warning("TOKEN_BUDGET_PER_CONVERSATION invalide, budget désactivé")
+            return 0
+
+    def bind(self, db) -> None:
+        """Active la persistance (Database) ; sans base, la comptabilité reste en mémoire."""
+        self.db = db
+        self._conversations.clear()
+
+    async def used(self, conversation_id: str | None) -> int:
+        if conversation_id is None:
+            return 0
+        if conversation_id not in self._conversations:
+            total = 0
+            if self.db is not None:
+                total = (await self.db.get_token_usage(conversation_id))["total_tokens"]
+            self._conversations[conversation_id] = total
+        return self._conversations[conversation_id]
+
+    async def check_budget(self, conversation_id: str | None) -> None:
+        """Raises TokenBudgetExceededError si le budget de la conversation est atteint."""
+        if not self.budget or conversation_id is None:
+            return
+        used = await self.used(conversation_id)
+        if used >= self.budget:
+            raise TokenBudgetExceededError(conversation_id, used, self.budget)
+
+    async def budget_exhausted(self, conversation_id: str | None) -> bool:
+        try:
+            await self.check_budget(conversation_id)
+        except TokenBudgetExceededError:
+            return True
+        return False
+
+    async def record(
+        self, conversation_id: str | None, agent: str, model: str | None, usage: dict | None
+    ) -> None:
+        """Enregistre l'usage d'un appel. Un échec de persistance n'interrompt pas l'appel."""
+        if not usage:
+            return
+        prompt = usage["prompt_tokens"]
+        completion = usage["completion_tokens"]
+        delegation_id = current_delegation.get()
+
+        stats = self._agents[agent]
+        stats["calls"] += 1
+        stats["prompt_tokens"] += prompt
+        stats["completion_tokens"] += completion
+        if delegation_id is not None:
+            totals = self._delegations[delegation_id][agent]
+            totals["prompt_tokens"] += prompt
+            totals["completion_tokens"] += completion
+        if conversation_id is None:
+            return
+
+        await self.used(conversation_id)
+        self._conversations[conversation_id] += prompt + completion
+
+        if self.db is not None:
+            try:
+                await self.db.record_token_usage([{
+                    "conversation_id": conversation_id,
+                    "delegation_id": delegation_id,
+                    "agent": agent,
+                    "model": model,
+                    "prompt_tokens": prompt,
+                    "completion_tokens": completion,
+                    "created_at": datetime.now().isoformat(),
+                }])
+            except Exception:
+                logger.exception("TokenLedger: échec persistance usage (%s)", conversation_id)
+
+    def delegation_usage(self, delegation_id: str) -> dict[str, dict[str, int]]:
+        """Tokens consommés par agent pendant une délégation."""
+        return {agent: dict(totals) for agent, totals in self._delegations.get(delegation_id, {}).items()}
+
+    def release_delegation(self, delegation_id: str) -> dict[str, dict[str, int]]:
+        """Retourne et oublie les totaux en mémoire d'une délégation terminée."""
+        usage = self.delegation_usage(delegation_id)
+        self._delegations.pop(delegation_id, None)
+        return usage
+
+    def observe_tokens_per_file(self, completion_tokens: int, files: int) -> None:
+        """Mesure : tokens de complétion CODEUR nécessaires pour produire `files` fichiers."""
+        if completion_tokens <= 0 or files <= 0:
+            return
+        sample = completion_tokens / files
+        if self._tokens_per_file is None:
+            self._tokens_per_file = sample
+        else:
+            alpha = self.TOKENS_PER_FILE_SMOOTHING
+            self._tokens_per_file = alpha * sample + (1 - alpha) * self._tokens_per_file
+
+    def tokens_per_file(self, default: int) -> float:
+        """Tokens par fichier mesurés, ou `default` tant qu'aucune mesure n'existe."""
+        return self._tokens_per_file if self._tokens_per_file is not None else default
+
+    def stats(self) -> dict:
+        return {
+            "budget_per_conversation": self.budget,
+            "agents": {agent: dict(totals) for agent, totals in self._agents.items()},
+            "tokens_per_file": self._tokens_per_file,
+        }
+
+
+token_ledger = TokenLedger()
@@ -4,7 +4,7 @@ from backend.models.conversation import (
     ConversationCreate,
     Message,
 )
-from backend.models.file import DirectoryListing, FileContent, FileInfo
+from backend.models.file import DirectoryListing, FileContent, FileInfo, GrepMatch, GrepResult
 from backend.models.library import (
     LibraryDocument,
     LibraryDocumentCreate,
@@ -23,6 +23,8 @@ __all__ = [
     "FileInfo",
     "DirectoryListing",
     "FileContent",
+    "GrepMatch",
+    "GrepResult",
     "LibraryDocument",
     "LibraryDocumentCreate",
     "LibraryDocumentUpdate",
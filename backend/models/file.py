@@ -22,3 +22,20 @@ class FileContent(BaseModel):
     content: str
     size: int
     encoding: str = "utf-8"
+
+
+class GrepMatch(BaseModel):
+    path: str
+    line: int
+    column: int
+    text: str
+    before: list[str] = []
+    after: list[str] = []
+
+
+class GrepResult(BaseModel):
+    pattern: str
+    matches: list[GrepMatch]
+    files_scanned: int
+    truncated: bool = False
+    engine: str = "scan"
@@ -13,6 +13,9 @@ class LibraryDocument(BaseModel):
     agents: list[str]
     created_at: str
     updated_at: str
+    # Renseignés uniquement pour une recherche plein texte
+    score: float | None = None
+    snippet: str | None = None
 
 
 class LibraryDocumentCreate(BaseModel):
@@ -1,4 +1,9 @@
-from backend.services.file_cache import FileTreeCache, file_tree_cache
+from backend.services.file_cache import (
+    BoundedCache,
+    cached_project_view,
+    invalidate_project,
+    project_cache,
+)
 from backend.services.file_service import FileService
 from backend.services.function_executor import FunctionExecutionError, FunctionExecutor
 from backend.services.orchestration import SimpleOrchestrator
@@ -9,8 +14,10 @@ from backend.services.project_context import (
 
 __all__ = [
     "FileService",
-    "FileTreeCache",
-    "file_tree_cache",
+    "BoundedCache",
+    "project_cache",
+    "cached_project_view",
+    "invalidate_project",
     "build_project_context_message",
     "build_chat_simple_context",
     "SimpleOrchestrator",
@@ -0,0 +1,94 @@
+"""
+Briques communes des services — JARVIS 2.0
+- env_int / env_number : lecture des réglages .env avec repli sur la valeur par
+  défaut (et un avertissement) si la valeur est invalide ;
+- ProjectRegistry : objets par projet (racine résolue), bornés en nombre (LRU),
+  base des registres d'index (fichiers, trigrammes, symboles).
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+N = TypeVar("N", int, float)
+
+
+def env_number(name: str, default: N, cast: Callable[[str], N], minimum: N | None = None) -> N:
+    """Valeur numérique de la variable `name`, ramenée au moins à `minimum` s'il est donné."""
+    try:
+        value = cast(os.getenv(name, str(default)))
+    except ValueError:
+        logger.warning("%s invalide, valeur par défaut utilisée", name)
+        return default
+    return value if minimum is None else max(value, minimum)
+
+
+def env_int(name: str, default: int, minimum: int | None = None) -> int:
+    return env_number(name, default, int, minimum)
+
+
+class ProjectRegistry(Generic[T]):
+    """Objets par projet (racine résolue), bornés en nombre (LRU).
+
+    Les sous-classes fournissent `_create(root)` et, si l'objet détient des
+    ressources, `_release(entry)` (appelé hors verrou à l'éviction ou à l'oubli).
+    """
+
+    def __init__(self, max_projects: int):
+        self.max_projects = max_projects
+        self._entries: OrderedDict[str, T] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _create(self, root: str) -> T:
+        raise NotImplementedError
+
+    def _release(self, entry: T) -> None:
+        pass
+
+    def get(self, project_path: str) -> T:
+        root = str(Path(project_path).resolve())
+        evicted = None
+        with self._lock:
+            entry = self._entries.get(root)
+            if entry is None:
+                entry = self._create(root)
+                self._entries[root] = entry
+                if len(self._entries) > self.max_projects:
+                    _, evicted = self._entries.popitem(last=False)
+            self._entries.move_to_end(root)
+        if evicted is not None:
+            self._release(evicted)
+        return entry
+
+    def entries(self) -> list[T]:
+        with self._lock:
+            return list(self._entries.values())
+
+    def containing(self, target: Path) -> Iterator[tuple[T, str]]:
+        """(objet, chemin relatif posix) pour chaque projet ouvert contenant `target`."""
+        for entry in self.entries():
+            try:
+                rel = target.relative_to(entry.root).as_posix()
+            except ValueError:
+                continue
+            yield entry, rel
+
+    def forget(self, project_path: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(str(Path(project_path).resolve()), None)
+        if entry is not None:
+            self._release(entry)
+
+    def close(self) -> None:
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            self._release(entry)
@@ -0,0 +1,93 @@
+"""
+Scanner de dette technique — JARVIS 2.0
+Compte les marqueurs de dette (TODO, FIXME, print(…)) de chaque fichier en une seule
+passe : les motifs sont compilés en une alternative unique (plus long d'abord), le
+fichier est lu par blocs avec un recouvrement de (longueur max - 1) caractères.
+
+Résultat mémorisé par fichier, clé (chemin, mtime_ns, taille) fournie par l'index du
+projet : seuls les fichiers modifiés depuis le dernier audit sont relus.
+
+Configuration via .env (valeurs par défaut entre parenthèses) :
+- DEBT_SCAN_CHUNK_CHARS (1048576) : taille d'un bloc de lecture (caractères)
+- DEBT_SCAN_CACHE_FILES (20000)   : fichiers mémorisés maximum (les plus anciens sont oubliés)
+"""
+
+import logging
+import re
+import threading
+from collections import Counter
+
+from backend.services.common import env_int
+
+logger = logging.getLogger(__name__)
+
+
+class DebtScanner:
+    """
+    Comptage multi-motifs en une passe, avec mémoire par fichier.
+    Les occurrences sont non chevauchantes, comme str.count motif par motif.
+    """
+
+    def __init__(self, patterns, chunk_chars: int = 1024 * 1024, max_cached_files: int = 20000):
+        self.patterns = tuple(patterns)
+        ordered = sorted(self.patterns, key=len, reverse=True)
+        self._regex = re.compile("|".join(re.escape(p) for p in ordered))
+        self._overlap = max(len(p) for p in self.patterns) - 1
+        self.chunk_chars = max(chunk_chars, self._overlap + 1)
+        self.max_cached_files = max_cached_files
+        self._lock = threading.Lock()
+        # chemin absolu → (mtime_ns, taille, compteurs)
+        self._cache: dict[str, tuple[int, int | None, dict[str, int]]] = {}
+        self.scans = 0
+        self.cache_hits = 0
+
+    @classmethod
+    def from_env(cls, patterns) -> "DebtScanner":
+        return cls(
+            patterns,
+            chunk_chars=env_int("DEBT_SCAN_CHUNK_CHARS", 1024 * 1024, minimum=1),
+            max_cached_files=env_int("DEBT_SCAN_CACHE_FILES", 20000, minimum=0),
+        )
+
+    def count_stream(self, stream) -> dict[str, int]:
+        """Compte les motifs d'un flux texte lu par blocs de chunk_chars."""
+        counts = Counter()
+        carry = ""
+        while True:
+            chunk = stream.read(self.chunk_chars)
+            eof = not chunk
+            buffer = carry + chunk
+            # Un motif commençant après `cutoff` peut se prolonger dans le bloc suivant
+            cutoff = len(buffer) if eof else len(buffer) - self._overlap
+            resume = 0
+            for match in self._regex.finditer(buffer):
+                if match.start() >= cutoff:
+                    break
+                counts[match.group()] += 1
+                resume = match.end()
+            if eof:
+                return dict(counts)
+            carry = buffer[max(cutoff, resume):]
+
+    def count_file(self, path: str, mtime_ns: int, size: int | None) -> dict[str, int]:
+        """Compteurs d'un fichier, relu seulement si (mtime_ns, taille) a changé."""
+        with self._lock:
+            cached = self._cache.get(path)
+            if cached is not None and cached[:2] == (mtime_ns, size):
+                self.cache_hits += 1
+                return cached[2]
+
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            counts = self.count_stream(f)
+
+        with self._lock:
+            self.scans += 1
+            self._cache.pop(path, None)
+            self._cache[path] = (mtime_ns, size, counts)
+            while len(self._cache) > self.max_cached_files:
+                del self._cache[next(iter(self._cache))]
+        return counts
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"cached_files": len(self._cache), "scans": self.scans, "cache_hits": self.cache_hits}
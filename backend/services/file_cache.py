@@ -1,31 +1,232 @@
-from datetime import datetime, timedelta
+"""
+Cache des vues de projet — JARVIS 2.0
+Cache mémoire borné (LRU + TTL, nombre d'entrées et budget en octets) pour les
+arborescences, listings de dossiers et rapports de dette technique.
 
+Chaque entrée porte l'étiquette de son projet (chemin résolu) : write_files_to_project
+et la suppression d'un projet invalident toutes les vues du projet concerné
+(invalidate_project). Les vues sont aussi indexées par la version de l'index des
+fichiers du projet : une modification faite hors de JARVIS, détectée par l'index,
+rend les vues existantes caduques dès la requête suivante.
 
-class FileTreeCache:
-    """Cache simple pour arborescences (évite régénération)"""
+Configuration via .env (valeurs par défaut entre parenthèses) :
+- PROJECT_CACHE_MAX_ENTRIES (256)    : entrées maximum
+- PROJECT_CACHE_MAX_BYTES (16777216) : taille cumulée maximum (octets, estimée)
+- PROJECT_CACHE_TTL (300)            : durée de vie d'une entrée (s)
+"""
 
-    def __init__(self, ttl_seconds: int = 300):
-        self.cache: dict[str, tuple[datetime, dict]] = {}
-        self.ttl = timedelta(seconds=ttl_seconds)
+import json
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
 
-    def get(self, project_id: str) -> dict | None:
-        if project_id in self.cache:
-            cached_at, tree = self.cache[project_id]
-            if datetime.now() - cached_at < self.ttl:
-                return tree
+from backend.services.common import env_int, env_number
+from backend.services.file_index import get_file_index
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_size(value) -> int:
+    """Taille approximative d'une valeur cachée (sérialisation JSON, modèles Pydantic compris)."""
+    if hasattr(value, "model_dump_json"):
+        return len(value.model_dump_json())
+    try:
+        return len(json.dumps(value, default=str, ensure_ascii=False))
+    except (TypeError, ValueError):
+        return sys.getsizeof(value)
+
+
+@dataclass(slots=True)
+class _CacheEntry:
+    value: object
+    size: int
+    expires_at: float
+    tags: tuple
+
+
+class BoundedCache:
+    """
+    LRU + TTL borné en nombre d'entrées et en octets, avec invalidation par étiquette.
+    Thread-safe : les invalidations arrivent aussi depuis le pool d'écriture de fichiers.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_bytes: int = 16 * 1024 * 1024,
+        ttl_seconds: float = 300,
+        clock=time.monotonic,
+        sizeof=estimate_size,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl_seconds
+        self._clock = clock
+        self._sizeof = sizeof
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[object, _CacheEntry] = OrderedDict()
+        self._tags: dict[object, set] = {}
+        # Invalidations par étiquette : une valeur calculée pendant une invalidation
+        # de son étiquette n'est pas stockée (elle peut précéder l'écriture)
+        self._generations: dict[object, int] = {}
+        self._bytes = 0
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "rejected": 0,
+            "evicted": 0,
+            "expired": 0,
+            "invalidated": 0,
+            "stale": 0,
+        }
+
+    @classmethod
+    def from_env(cls) -> "BoundedCache":
+        return cls(
+            max_entries=env_int("PROJECT_CACHE_MAX_ENTRIES", 256),
+            max_bytes=env_int("PROJECT_CACHE_MAX_BYTES", 16 * 1024 * 1024),
+            ttl_seconds=env_number("PROJECT_CACHE_TTL", 300, float),
+        )
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return default
+            if entry.expires_at <= self._clock():
+                self._remove(key)
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return default
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry.value
+
+    def set(self, key, value, tags: tuple = ()) -> bool:
+        """Stocke une valeur ; une valeur plus grosse que le budget entier n'est pas cachée."""
+        size = self._sizeof(value)
+        with self._lock:
+            return self._store(key, value, size, tags)
+
+    def get_or_compute(self, key, compute, tags: tuple = ()):
+        """
+        Valeur cachée, ou calculée par `compute()` (hors verrou) puis stockée — sauf si
+        une de ses étiquettes a été invalidée pendant le calcul.
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is not sentinel:
+            return value
+        with self._lock:
+            generations = [self._generations.get(tag, 0) for tag in tags]
+        value = compute()
+        size = self._sizeof(value)
+        with self._lock:
+            if [self._generations.get(tag, 0) for tag in tags] != generations:
+                self._stats["stale"] += 1
             else:
-                del self.cache[project_id]
-        return None
+                self._store(key, value, size, tags)
+        return value
+
+    def invalidate(self, key) -> bool:
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            self._stats["invalidated"] += 1
+            return True
+
+    def invalidate_tag(self, tag) -> int:
+        """Supprime toutes les entrées portant l'étiquette ; retourne leur nombre."""
+        with self._lock:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+            keys = list(self._tags.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            self._stats["invalidated"] += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+            }
+
+    def _store(self, key, value, size: int, tags: tuple) -> bool:
+        """Stockage effectif (appelé sous self._lock)."""
+        if key in self._entries:
+            self._remove(key)
+        if size > self.max_bytes or self.max_entries <= 0:
+            self._stats["rejected"] += 1
+            return False
+        self._entries[key] = _CacheEntry(value, size, self._clock() + self.ttl, tuple(tags))
+        self._bytes += size
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        self._stats["stores"] += 1
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._stats["evicted"] += 1
+        return True
+
+    def _remove(self, key) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+project_cache = BoundedCache.from_env()
+
+
+def project_tag(project_path: str) -> str:
+    """Étiquette de cache d'un projet (chemin résolu)."""
+    return str(Path(project_path).resolve())
+
 
-    def set(self, project_id: str, tree: dict):
-        self.cache[project_id] = (datetime.now(), tree)
+_view_versions: dict[str, int] = {}
 
-    def invalidate(self, project_id: str):
-        if project_id in self.cache:
-            del self.cache[project_id]
 
-    def clear(self):
-        self.cache.clear()
+def cached_project_view(project_path: str, kind: str, compute, *params):
+    """
+    Vue `kind` d'un projet (tree, listing, state…), cachée et étiquetée par projet,
+    valable pour la version courante de l'index des fichiers du projet.
+    """
+    tag = project_tag(project_path)
+    version = get_file_index(tag).version
+    if _view_versions.get(tag, version) != version:
+        invalidate_project(tag)  # modification externe : vues des versions précédentes
+    _view_versions[tag] = version
+    return project_cache.get_or_compute((kind, tag, version, *params), compute, tags=(tag,))
 
 
-file_tree_cache = FileTreeCache()
+def invalidate_project(project_path: str) -> int:
+    """Invalide toutes les vues cachées d'un projet (après écriture ou suppression)."""
+    removed = project_cache.invalidate_tag(project_tag(project_path))
+    if removed:
+        logger.debug("ProjectCache: %d vue(s) invalidée(s) pour %s", removed, project_path)
+    return removed
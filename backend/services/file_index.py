@@ -0,0 +1,505 @@
+"""
+Index des fichiers de projet — JARVIS 2.0
+Index en mémoire par projet (chemins, tailles, mtimes, extensions, empreintes de
+contenu), construit une fois puis tenu à jour. FileService, ProjectService et la
+détection de langage l'interrogent au lieu de reparcourir le disque à chaque requête.
+
+Fraîcheur :
+- watchdog installé : les événements du système de fichiers marquent les chemins
+  modifiés, réexaminés à la requête suivante ;
+- sinon : mtime des dossiers comparé à chaque requête (ajouts, suppressions,
+  renommages) et re-stat des fichiers toutes les FILE_INDEX_POLL_SECONDS
+  (modifications de contenu) ;
+- write_files_to_project met l'index à jour immédiatement (record_write).
+
+Configuration via .env (valeurs par défaut entre parenthèses) :
+- FILE_INDEX_POLL_SECONDS (2)    : intervalle de re-stat des fichiers en mode polling
+- FILE_INDEX_MAX_ENTRIES (50000) : entrées maximum par projet (au-delà : index partiel)
+- FILE_INDEX_MAX_PROJECTS (32)   : projets indexés simultanément (LRU)
+- FILE_INDEX_WATCH (true)        : utiliser watchdog s'il est installé
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from backend.services.common import ProjectRegistry, env_int, env_number
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # dépendance optionnelle : repli sur le polling des mtimes
+    FileSystemEventHandler = None
+    Observer = None
+
+logger = logging.getLogger(__name__)
+
+# Dossiers jamais indexés (dépendances, caches, artefacts de build)
+IGNORED_DIRS = frozenset(
+    {
+        "__pycache__",
+        "node_modules",
+        ".git",
+        ".venv",
+        "venv",
+        "dist",
+        "build",
+        ".next",
+        ".nuxt",
+        "target",
+        ".pytest_cache",
+        ".mypy_cache",
+        ".tox",
+        "coverage",
+        ".coverage",
+        "htmlcov",
+    }
+)
+
+
+@dataclass(slots=True)
+class IndexEntry:
+    path: str  # relatif à la racine du projet, séparateur "/"
+    name: str
+    is_dir: bool
+    size: int | None
+    mtime: float
+    mtime_ns: int
+    extension: str | None
+    digest: str | None = None  # sha256 du contenu, calculé à la demande
+
+
+def _entry(rel: str, name: str, is_dir: bool, st: os.stat_result) -> IndexEntry:
+    suffix = os.path.splitext(name)[1]
+    return IndexEntry(
+        path=rel,
+        name=name,
+        is_dir=is_dir,
+        size=None if is_dir else st.st_size,
+        mtime=st.st_mtime,
+        mtime_ns=st.st_mtime_ns,
+        extension=None if is_dir or not suffix else suffix.lower(),
+    )
+
+
+def _join(rel: str, name: str) -> str:
+    return f"{rel}/{name}" if rel else name
+
+
+def _parent(rel: str) -> str:
+    return rel.rpartition("/")[0]
+
+
+def _signature(children: dict[str, IndexEntry]) -> dict[str, tuple]:
+    return {name: (e.is_dir, e.mtime_ns, e.size) for name, e in children.items()}
+
+
+class ProjectFileIndex:
+    """
+    Index d'un projet. Toutes les méthodes publiques sont thread-safe (les écritures
+    de fichiers arrivent depuis le pool de file_writer) et rafraîchissent l'index
+    avant de répondre.
+    """
+
+    # Un dossier modifié moins de 2 s avant son scan peut encore changer dans la
+    # même granularité de mtime : il est réexaminé à la requête suivante
+    RACY_WINDOW_NS = 2_000_000_000
+
+    def __init__(
+        self,
+        root: str,
+        poll_seconds: float = 2.0,
+        max_entries: int = 50_000,
+        watch: bool = True,
+        clock=time.monotonic,
+    ):
+        self.root = Path(root).resolve()
+        self.poll_seconds = poll_seconds
+        self.max_entries = max_entries
+        self.watch = watch and Observer is not None
+        self.truncated = False
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._entries: dict[str, IndexEntry] = {}
+        self._children: dict[str, dict[str, IndexEntry]] = {}
+        self._dir_mtimes: dict[str, int] = {}
+        self._racy: set[str] = set()
+        self._unreadable: set[str] = set()
+        self._dirty: set[str] = set()
+        self._observer = None
+        self._built = False
+        self._last_restat = 0.0
+        self._version = 0
+        self._sorted_files: tuple[int, list[IndexEntry]] | None = None
+        self._stats = {"builds": 0, "rescans": 0, "restats": 0, "events": 0, "hashes": 0}
+
+    @classmethod
+    def from_env(cls, root: str) -> "ProjectFileIndex":
+        return cls(
+            root,
+            poll_seconds=env_number("FILE_INDEX_POLL_SECONDS", 2.0, float),
+            max_entries=env_int("FILE_INDEX_MAX_ENTRIES", 50_000),
+            watch=os.getenv("FILE_INDEX_WATCH", "true").lower() == "true",
+        )
+
+    # ------------------------------------------------------------------
+    # Requêtes
+    # ------------------------------------------------------------------
+
+    def relative(self, path: str | Path) -> str:
+        """Chemin relatif indexé ("" pour la racine) d'un chemin absolu du projet."""
+        rel = Path(path).resolve().relative_to(self.root).as_posix()
+        return "" if rel == "." else rel
+
+    def get(self, rel: str) -> IndexEntry | None:
+        with self._lock:
+            self._ensure_fresh()
+            return self._entries.get(rel)
+
+    def children(self, rel: str = "") -> list[IndexEntry]:
+        """
+        Entrées directes d'un dossier. Un dossier hors index (lien symbolique, dossier
+        ignoré, index partiel) est lu à la demande, sans être conservé.
+
+        Raises:
+            PermissionError, FileNotFoundError, NotADirectoryError : comme os.scandir
+        """
+        with self._lock:
+            self._ensure_fresh()
+            if rel in self._unreadable:
+                raise PermissionError(f"Permission denied: {rel}")
+            if rel in self._children:
+                return list(self._children[rel].values())
+        return [entry for entry, _ in self._read_dir(rel)]
+
+    @property
+    def version(self) -> int:
+        """Compteur de modifications, incrémenté à chaque changement détecté dans le projet."""
+        with self._lock:
+            self._ensure_fresh()
+            return self._version
+
+    def files(self) -> list[IndexEntry]:
+        """Fichiers indexés, triés par chemin."""
+        with self._lock:
+            self._ensure_fresh()
+            if self._sorted_files is None or self._sorted_files[0] != self._version:
+                files = sorted(
+                    (e for e in self._entries.values() if not e.is_dir), key=lambda e: e.path
+                )
+                self._sorted_files = (self._version, files)
+            return list(self._sorted_files[1])
+
+    def content_hash(self, rel: str) -> str | None:
+        """sha256 du contenu d'un fichier indexé (mis en cache jusqu'à sa prochaine modification)."""
+        with self._lock:
+            self._ensure_fresh()
+            entry = self._entries.get(rel)
+            if entry is None or entry.is_dir:
+                return None
+            if entry.digest is None:
+                try:
+                    entry.digest = hashlib.sha256((self.root / rel).read_bytes()).hexdigest()
+                    self._stats["hashes"] += 1
+                except OSError:
+                    return None
+            return entry.digest
+
+    def known_digest(self, rel: str, mtime_ns: int, size: int) -> str | None:
+        """
+        Empreinte mémorisée d'un fichier si son entrée correspond encore à (mtime_ns, taille),
+        sans rafraîchir l'index (None : inconnue, à recalculer).
+        """
+        with self._lock:
+            entry = self._entries.get(rel)
+            if entry is None or entry.is_dir or (entry.mtime_ns, entry.size) != (mtime_ns, size):
+                return None
+            return entry.digest
+
+    def record_write(self, rel: str, digest: str | None = None) -> None:
+        """Fichier que l'on vient d'écrire : entrée mise à jour sans attendre le polling."""
+        with self._lock:
+            if not self._built:
+                return
+            parent = _parent(rel)
+            known = parent
+            while known and known not in self._children:
+                known = _parent(known)
+            if known != parent:
+                self._scan_subtree(known)  # dossiers créés par l'écriture
+            if parent not in self._children:
+                return  # dossier ignoré ou hors index
+            try:
+                st = os.stat(self.root / rel)
+            except OSError:
+                return
+            name = rel.rpartition("/")[2]
+            entry = _entry(rel, name, False, st)
+            entry.digest = digest
+            self._children[parent][name] = entry
+            self._entries[rel] = entry
+            self._version += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "root": str(self.root),
+                "entries": len(self._entries),
+                "directories": len(self._children),
+                "truncated": self.truncated,
+                "mode": "watchdog" if self._observer is not None else "polling",
+                **self._stats,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            observer, self._observer = self._observer, None
+        if observer is not None:
+            observer.stop()
+            observer.join(timeout=2)
+
+    # ------------------------------------------------------------------
+    # Construction et rafraîchissement (appelés sous self._lock)
+    # ------------------------------------------------------------------
+
+    def _ensure_fresh(self) -> None:
+        if not self._built:
+            self._build()
+        elif self._observer is not None:
+            dirty, self._dirty = self._dirty, set()
+            for rel in sorted(dirty, key=lambda r: r.count("/")):
+                for directory in (_parent(rel), rel):
+                    if directory in self._children or directory == "":
+                        self._scan_subtree(directory)
+        else:
+            self._check_directories()
+            if self._clock() - self._last_restat >= self.poll_seconds:
+                self._restat_files()
+
+    def _build(self) -> None:
+        self._entries.clear()
+        self._children.clear()
+        self._dir_mtimes.clear()
+        self._racy.clear()
+        self._unreadable.clear()
+        self.truncated = False
+        self._scan_subtree("")
+        self._built = True
+        self._last_restat = self._clock()
+        self._stats["builds"] += 1
+        if self.watch and self._observer is None and self.root.is_dir():
+            self._start_observer()
+
+    def _scan_subtree(self, rel: str) -> None:
+        stack = [rel]
+        while stack:
+            stack.extend(self._scan_dir(stack.pop()))
+
+    def _read_dir(self, rel: str) -> list[tuple[IndexEntry, bool]]:
+        """Lecture brute d'un dossier : [(entrée, est_un_lien)]."""
+        result = []
+        with os.scandir(self.root / rel if rel else self.root) as it:
+            for item in it:
+                try:
+                    is_dir = item.is_dir()
+                    if is_dir and item.name in IGNORED_DIRS:
+                        continue
+                    st = item.stat()
+                    result.append((_entry(_join(rel, item.name), item.name, is_dir, st), item.is_symlink()))
+                except OSError:
+                    continue
+        return result
+
+    def _scan_dir(self, rel: str) -> list[str]:
+        """
+        (Re)lit un dossier et réconcilie ses enfants avec l'index.
+
+        Returns:
+            Sous-dossiers nouvellement découverts, à parcourir à leur tour
+        """
+        self._stats["rescans"] += 1
+        try:
+            dir_stat = os.stat(self.root / rel if rel else self.root)
+            scanned = self._read_dir(rel)
+            self._unreadable.discard(rel)
+        except PermissionError:
+            self._unreadable.add(rel)
+            scanned = []
+            dir_stat = None
+        except (FileNotFoundError, NotADirectoryError):
+            self._forget(rel)
+            return []
+
+        old = self._children.get(rel, {})
+        children: dict[str, IndexEntry] = {}
+        new_dirs = []
+        for entry, is_link in scanned:
+            previous = old.get(entry.name)
+            if previous is not None and previous.is_dir != entry.is_dir:
+                self._forget(entry.path)
+                previous = None
+            if previous is None and len(self._entries) >= self.max_entries:
+                if not self.truncated:
+                    logger.warning(
+                        "FileIndex: %s dépasse %d entrées, index partiel", self.root, self.max_entries
+                    )
+                self.truncated = True
+                continue
+            if previous is not None and (previous.mtime_ns, previous.size) == (entry.mtime_ns, entry.size):
+                entry.digest = previous.digest
+            children[entry.name] = entry
+            self._entries[entry.path] = entry
+            # Liens symboliques : listés, mais jamais parcourus (pas de cycles)
+            if entry.is_dir and not is_link and entry.path not in self._children:
+                new_dirs.append(entry.path)
+        for name in old.keys() - children.keys():
+            self._forget(_join(rel, name))
+        # Relecture sans changement (dossier « racy ») : version inchangée
+        changed = rel not in self._children or _signature(old) != _signature(children)
+
+        self._children[rel] = children
+        if dir_stat is not None:
+            self._dir_mtimes[rel] = dir_stat.st_mtime_ns
+            if rel in self._entries:
+                self._entries[rel].mtime = dir_stat.st_mtime
+                self._entries[rel].mtime_ns = dir_stat.st_mtime_ns
+            if time.time_ns() - dir_stat.st_mtime_ns < self.RACY_WINDOW_NS:
+                self._racy.add(rel)
+            else:
+                self._racy.discard(rel)
+        if changed:
+            self._version += 1
+        return new_dirs
+
+    def _forget(self, rel: str) -> None:
+        """Retire une entrée et, pour un dossier, tout son sous-arbre."""
+        stack = [rel]
+        while stack:
+            current = stack.pop()
+            children = self._children.pop(current, {})
+            stack.extend(child.path for child in children.values())
+            self._dir_mtimes.pop(current, None)
+            self._racy.discard(current)
+            self._unreadable.discard(current)
+            if current:
+                self._entries.pop(current, None)
+        if rel:
+            self._children.get(_parent(rel), {}).pop(rel.rpartition("/")[2], None)
+        self._version += 1
+
+    def _check_directories(self) -> None:
+        """Polling : relit les dossiers dont le mtime a changé (ajouts, suppressions, renommages)."""
+        if "" not in self._dir_mtimes:
+            self._scan_subtree("")  # racine absente au scan précédent
+            return
+        for rel in sorted(self._dir_mtimes, key=lambda r: r.count("/")):
+            if rel not in self._dir_mtimes:
+                continue  # oublié par la relecture d'un parent
+            try:
+                mtime_ns = os.stat(self.root / rel if rel else self.root).st_mtime_ns
+            except OSError:
+                mtime_ns = None
+            if mtime_ns != self._dir_mtimes[rel] or rel in self._racy:
+                self._scan_subtree(rel)
+
+    def _restat_files(self) -> None:
+        """Polling : détecte les fichiers modifiés sur place (taille, mtime)."""
+        self._stats["restats"] += 1
+        for entry in [e for e in self._entries.values() if not e.is_dir]:
+            try:
+                st = os.stat(self.root / entry.path)
+            except OSError:
+                self._scan_dir(_parent(entry.path))
+                continue
+            if (st.st_mtime_ns, st.st_size) != (entry.mtime_ns, entry.size):
+                entry.size = st.st_size
+                entry.mtime = st.st_mtime
+                entry.mtime_ns = st.st_mtime_ns
+                entry.digest = None
+                self._version += 1
+        self._last_restat = self._clock()
+
+    def _start_observer(self) -> None:
+        index = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                paths = [event.src_path, getattr(event, "dest_path", "") or ""]
+                with index._lock:
+                    index._stats["events"] += 1
+                    for path in filter(None, paths):
+                        try:
+                            rel = Path(os.fsdecode(path)).relative_to(index.root).as_posix()
+                        except ValueError:
+                            continue
+                        index._dirty.add("" if rel == "." else rel)
+
+        try:
+            observer = Observer()
+            observer.daemon = True
+            observer.schedule(_Handler(), str(self.root), recursive=True)
+            observer.start()
+            self._observer = observer
+        except Exception:
+            logger.exception("FileIndex: watchdog indisponible pour %s, polling des mtimes", self.root)
+
+
+class FileIndexRegistry(ProjectRegistry[ProjectFileIndex]):
+    """Index par projet (racine résolue), bornés en nombre (LRU)."""
+
+    def __init__(self, max_projects: int = 32):
+        super().__init__(max_projects)
+
+    @classmethod
+    def from_env(cls) -> "FileIndexRegistry":
+        return cls(max_projects=env_int("FILE_INDEX_MAX_PROJECTS", 32, minimum=1))
+
+    def _create(self, root: str) -> ProjectFileIndex:
+        return ProjectFileIndex.from_env(root)
+
+    def _release(self, index: ProjectFileIndex) -> None:
+        index.close()
+
+    def record_write(self, target: Path, digest: str | None = None) -> None:
+        """Notifie l'écriture d'un fichier aux index des projets qui le contiennent."""
+        for index, rel in self.containing(target):
+            index.record_write(rel, digest)
+
+    def known_digest(self, target: Path, mtime_ns: int, size: int) -> str | None:
+        """Empreinte mémorisée par l'index du projet contenant le fichier, s'il y en a une."""
+        for index, rel in self.containing(target):
+            digest = index.known_digest(rel, mtime_ns, size)
+            if digest is not None:
+                return digest
+        return None
+
+    def stats(self) -> dict:
+        indexes = self.entries()
+        return {"projects": len(indexes), "indexes": [index.stats() for index in indexes]}
+
+
+file_indexes = FileIndexRegistry.from_env()
+
+
+def get_file_index(project_path: str) -> ProjectFileIndex:
+    return file_indexes.get(project_path)
+
+
+def record_write(target: Path, digest: str | None = None) -> None:
+    file_indexes.record_write(target, digest)
+
+
+def known_digest(target: Path, mtime_ns: int, size: int) -> str | None:
+    return file_indexes.known_digest(target, mtime_ns, size)
+
+
+def forget_file_index(project_path: str) -> None:
+    file_indexes.forget(project_path)
+
+
+def close_file_indexes() -> None:
+    file_indexes.close()
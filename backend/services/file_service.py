@@ -2,6 +2,7 @@ from datetime import datetime
 from pathlib import Path
 
 from backend.models.file import DirectoryListing, FileContent, FileInfo
+from backend.services.file_index import IGNORED_DIRS, IndexEntry, get_file_index
 
 
 class FileServiceError(Exception):
@@ -77,24 +78,11 @@ class FileService:
     MAX_FILE_SIZE = 1024 * 1024
     MAX_TREE_DEPTH = 5
 
-    IGNORED_PATTERNS = {
-        "__pycache__",
-        "node_modules",
-        ".git",
-        ".venv",
-        "venv",
-        "dist",
-        "build",
-        ".next",
-        ".nuxt",
-        "target",
-        ".pytest_cache",
-        ".mypy_cache",
-        ".tox",
-        "coverage",
-        ".coverage",
-        "htmlcov",
-    }
+    IGNORED_PATTERNS = IGNORED_DIRS
+
+    @staticmethod
+    def _sort_key(entry: IndexEntry) -> tuple[bool, str]:
+        return (not entry.is_dir, entry.name.lower())
 
     @staticmethod
     def validate_path(project_path: str, requested_path: str) -> str:
@@ -123,53 +111,42 @@ class FileService:
 
     @staticmethod
     def list_directory(project_path: str, subpath: str = "") -> DirectoryListing:
-        """Liste le contenu d'un dossier avec métadonnées"""
+        """Liste le contenu d'un dossier avec métadonnées (depuis l'index du projet)"""
         abs_path = FileService.validate_path(project_path, subpath)
         path_obj = Path(abs_path)
 
         if not path_obj.is_dir():
             raise FileServiceError(f"Not a directory: {subpath}")
 
-        items = []
+        index = get_file_index(project_path)
         try:
-            for item in sorted(path_obj.iterdir(), key=lambda x: (not x.is_dir(), x.name.lower())):
-                if item.name in FileService.IGNORED_PATTERNS:
-                    continue
-
-                if item.name.startswith(".") and item.name not in {
-                    ".env",
-                    ".gitignore",
-                    ".editorconfig",
-                }:
-                    continue
-
-                relative_path = str(item.relative_to(Path(project_path)))
-
-                if item.is_dir():
-                    items.append(
-                        FileInfo(
-                            name=item.name,
-                            path=relative_path,
-                            type="directory",
-                            size=None,
-                            extension=None,
-                            modified_at=datetime.fromtimestamp(item.stat().st_mtime).isoformat(),
-                        )
-                    )
-                else:
-                    items.append(
-                        FileInfo(
-                            name=item.name,
-                            path=relative_path,
-                            type="file",
-                            size=item.stat().st_size,
-                            extension=item.suffix.lower() if item.suffix else None,
-                            modified_at=datetime.fromtimestamp(item.stat().st_mtime).isoformat(),
-                        )
-                    )
+            entries = index.children(index.relative(path_obj))
         except PermissionError:
             raise PermissionDeniedError(f"Permission denied: {subpath}")
 
+        items = []
+        for entry in sorted(entries, key=FileService._sort_key):
+            if entry.name in FileService.IGNORED_PATTERNS:
+                continue
+
+            if entry.name.startswith(".") and entry.name not in {
+                ".env",
+                ".gitignore",
+                ".editorconfig",
+            }:
+                continue
+
+            items.append(
+                FileInfo(
+                    name=entry.name,
+                    path=str(Path(entry.path)),
+                    type="directory" if entry.is_dir else "file",
+                    size=entry.size,
+                    extension=entry.extension,
+                    modified_at=datetime.fromtimestamp(entry.mtime).isoformat(),
+                )
+            )
+
         return DirectoryListing(path=subpath, items=items, total_count=len(items))
 
     @staticmethod
@@ -201,83 +178,84 @@ class FileService:
 
     @staticmethod
     def get_file_tree(project_path: str, max_depth: int = 3) -> dict:
-        """Génère une arborescence complète (limitée en profondeur)"""
+        """Génère une arborescence complète (limitée en profondeur, depuis l'index du projet)"""
+        project_abs = Path(project_path).resolve()
+        if not project_abs.exists():
+            raise FileNotFoundError(f"Project path not found: {project_path}")
 
-        def build_tree(path: Path, current_depth: int) -> dict:
+        index = get_file_index(project_path)
+
+        def build_tree(rel: str, name: str, current_depth: int) -> dict:
             if current_depth >= max_depth:
-                return {"name": path.name, "type": "directory", "truncated": True}
+                return {"name": name, "type": "directory", "truncated": True}
 
             items = []
             try:
-                for item in sorted(path.iterdir(), key=lambda x: (not x.is_dir(), x.name.lower())):
-                    if item.name in FileService.IGNORED_PATTERNS:
-                        continue
-
-                    if item.name.startswith(".") and item.name not in {".env", ".gitignore"}:
-                        continue
-
-                    if item.is_dir():
-                        items.append(build_tree(item, current_depth + 1))
-                    else:
-                        items.append(
-                            {
-                                "name": item.name,
-                                "type": "file",
-                                "size": item.stat().st_size,
-                                "extension": item.suffix.lower() if item.suffix else None,
-                            }
-                        )
-            except PermissionError:
-                pass
+                entries = index.children(rel)
+            except OSError:
+                entries = []
 
-            return {"name": path.name, "type": "directory", "items": items}
+            for entry in sorted(entries, key=FileService._sort_key):
+                if entry.name in FileService.IGNORED_PATTERNS:
+                    continue
 
-        project_abs = Path(project_path).resolve()
-        if not project_abs.exists():
-            raise FileNotFoundError(f"Project path not found: {project_path}")
+                if entry.name.startswith(".") and entry.name not in {".env", ".gitignore"}:
+                    continue
 
-        return build_tree(project_abs, 0)
+                if entry.is_dir:
+                    items.append(build_tree(entry.path, entry.name, current_depth + 1))
+                else:
+                    items.append(
+                        {
+                            "name": entry.name,
+                            "type": "file",
+                            "size": entry.size,
+                            "extension": entry.extension,
+                        }
+                    )
+
+            return {"name": name, "type": "directory", "items": items}
+
+        return build_tree("", project_abs.name, 0)
 
     @staticmethod
     def search_files(project_path: str, pattern: str, max_results: int = 50) -> list[FileInfo]:
-        """Recherche de fichiers par nom/pattern"""
+        """Recherche de fichiers par nom/pattern (depuis l'index du projet)"""
         project_abs = Path(project_path).resolve()
         if not project_abs.exists():
             raise FileNotFoundError(f"Project path not found: {project_path}")
 
+        index = get_file_index(project_path)
         results = []
         pattern_lower = pattern.lower()
 
-        def search_recursive(path: Path, depth: int = 0):
+        def search_recursive(rel: str, depth: int = 0):
             if depth > FileService.MAX_TREE_DEPTH or len(results) >= max_results:
                 return
 
             try:
-                for item in path.iterdir():
-                    if item.name in FileService.IGNORED_PATTERNS:
-                        continue
-
-                    if pattern_lower in item.name.lower():
-                        relative_path = str(item.relative_to(project_abs))
-                        results.append(
-                            FileInfo(
-                                name=item.name,
-                                path=relative_path,
-                                type="directory" if item.is_dir() else "file",
-                                size=item.stat().st_size if item.is_file() else None,
-                                extension=item.suffix.lower()
-                                if item.is_file() and item.suffix
-                                else None,
-                                modified_at=datetime.fromtimestamp(
-                                    item.stat().st_mtime
-                                ).isoformat(),
-                            )
+                entries = index.children(rel)
+            except OSError:
+                return
+
+            for entry in entries:
+                if entry.name in FileService.IGNORED_PATTERNS:
+                    continue
+
+                if pattern_lower in entry.name.lower() and len(results) < max_results:
+                    results.append(
+                        FileInfo(
+                            name=entry.name,
+                            path=str(Path(entry.path)),
+                            type="directory" if entry.is_dir else "file",
+                            size=entry.size,
+                            extension=entry.extension,
+                            modified_at=datetime.fromtimestamp(entry.mtime).isoformat(),
                         )
+                    )
 
-                    if item.is_dir() and len(results) < max_results:
-                        search_recursive(item, depth + 1)
-            except PermissionError:
-                pass
+                if entry.is_dir and len(results) < max_results:
+                    search_recursive(entry.path, depth + 1)
 
-        search_recursive(project_abs)
+        search_recursive("")
         return results
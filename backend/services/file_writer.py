@@ -2,14 +2,38 @@
 Service d'écriture de fichiers — JARVIS 2.0
 Écrit les fichiers produits par les agents dans le dossier projet.
 Sécurisé : validation de chemin, extensions autorisées, pas de sortie du projet.
+Écriture atomique (fichier temporaire + renommage), contenu inchangé non réécrit,
+version async exécutée dans un pool de threads dédié.
+Toute écriture effective invalide les vues cachées du projet (arborescence, listings, dette).
+
+Configuration via .env (valeurs par défaut entre parenthèses) :
+- FILE_WRITE_WORKERS (4) : threads du pool d'écriture
 """
 
+import asyncio
+import contextlib
+import hashlib
 import logging
+import os
 import re
+import secrets
+import stat as stat_module
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from backend.services.common import env_int
+from backend.services.file_cache import invalidate_project
+from backend.services.file_index import known_digest, record_write
+from backend.services.symbol_index import record_symbols
+
 logger = logging.getLogger(__name__)
 
+
+_WRITE_EXECUTOR = ThreadPoolExecutor(
+    max_workers=env_int("FILE_WRITE_WORKERS", 4, minimum=1), thread_name_prefix="file-writer"
+)
+
 # Extensions autorisées en écriture
 WRITABLE_EXTENSIONS = {
     ".py",
@@ -49,8 +73,7 @@ WRITABLE_EXTENSIONS = {
     ".env.example",
 }
 
-# Pattern pour détecter les blocs de code avec chemin de fichier
-# Supporte :
+# Formats de blocs de code avec chemin de fichier reconnus :
 #   # chemin/vers/fichier.py
 #   ```python
 #   code...
@@ -64,28 +87,20 @@ WRITABLE_EXTENSIONS = {
 #   ```python
 #   code...
 #   ```
-PATTERN_FILE_HEADER = re.compile(
-    r"(?:^|\n)"
+# L'analyse se fait ligne par ligne (CodeBlockParser) : un en-tête de chemin reste
+# valable jusqu'à la prochaine ligne non vide, qui doit ouvrir le bloc.
+_PATTERN_HEADER_LINE = re.compile(
     r"(?:"
     r"#+\s*`?([^\n`]+\.\w+)`?"  # # chemin/fichier.ext ou # `chemin/fichier.ext`
     r"|"
     r"\*\*([^\n*]+\.\w+)\*\*"  # **chemin/fichier.ext**
     r"|"
     r"`([^\n`]+\.\w+)`"  # `chemin/fichier.ext` seul sur une ligne
-    r")"
-    r"\s*\n"
-    r"```\w*\s*\n"  # ```langage
-    r"(.*?)"  # contenu
-    r"\n```",  # ```
-    re.DOTALL,
-)
-
-PATTERN_INLINE_PATH = re.compile(
-    r"```(\w+)\s+([\w/\\.\-]+\.\w+)\s*\n"  # ```python chemin/fichier.ext
-    r"(.*?)"  # contenu
-    r"\n```",
-    re.DOTALL,
+    r")\s*"
 )
+_PATTERN_FENCE_OPEN = re.compile(r"```\w*\s*")  # ```langage
+_PATTERN_FENCE_OPEN_INLINE = re.compile(r"```(\w+)\s+([\w/\\.\-]+\.\w+)\s*")  # ```python chemin.ext
+FENCE = "```"
 
 
 class FileWriteError(Exception):
@@ -100,45 +115,128 @@ class ExtensionNotAllowedError(FileWriteError):
     pass
 
 
+class CodeBlockParser:
+    """
+    Analyse incrémentale des blocs de code d'une réponse d'agent (machine à états
+    ligne par ligne, temps linéaire). Accepte la réponse en fragments (streaming) :
+    chaque bloc {path, content} est produit dès que sa fence fermante est reçue.
+
+    Un bloc ouvert mais jamais fermé (réponse tronquée par la limite de tokens) est
+    exposé par `partial` après close(), pour ne redemander que la suite du fichier.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._ended_with_newline = True
+        self._header_path: str | None = None  # en-tête en attente d'une fence ouvrante
+        self._block_path: str | None = None  # bloc ouvert avec chemin
+        self._in_fence = False  # bloc ouvert (avec ou sans chemin)
+        self._block_lines: list[str] = []
+        self._seen_paths: set[str] = set()
+        self.blocks: list[dict] = []
+        self.partial: dict | None = None
+
+    def feed(self, chunk: str) -> list[dict]:
+        """Consomme un fragment ; retourne les blocs complétés par ce fragment."""
+        if not chunk:
+            return []
+        self._ended_with_newline = chunk.endswith("\n")
+        *lines, self._buffer = (self._buffer + chunk).split("\n")
+        completed = []
+        for line in lines:
+            block = self._consume_line(line)
+            if block is not None:
+                completed.append(block)
+        return completed
+
+    def close(self) -> list[dict]:
+        """
+        Termine l'analyse (fin de réponse). Retourne le bloc complété par la dernière
+        ligne le cas échéant, et renseigne `partial` si un bloc reste ouvert :
+        {path, content, lines} — la dernière ligne, probablement coupée, en est exclue.
+        """
+        completed = []
+        tail, self._buffer = self._buffer, ""
+        if tail:
+            block = self._consume_line(tail)
+            if block is not None:
+                completed.append(block)
+        if self._in_fence and self._block_path is not None:
+            lines = self._block_lines
+            if tail and not self._ended_with_newline and lines and lines[-1] == tail:
+                lines = lines[:-1]
+            content = "\n".join(lines)
+            self.partial = {
+                "path": _normalize_path(self._block_path),
+                "content": content + "\n" if content else "",
+                "lines": len(lines),
+            }
+            logger.warning(
+                "Parsing markdown : bloc tronqué %s (%d lignes reçues)",
+                self.partial["path"],
+                len(lines),
+            )
+        self._in_fence = False
+        return completed
+
+    def _consume_line(self, line: str) -> dict | None:
+        if self._in_fence:
+            # La ligne qui suit immédiatement l'ouverture n'est jamais une fermeture
+            # (fence dupliquée du type ```python\n```python, nettoyée par _clean_content)
+            if line.startswith(FENCE) and self._block_lines:
+                return self._close_block()
+            self._block_lines.append(line)
+            return None
+
+        stripped = line.rstrip()
+        inline = _PATTERN_FENCE_OPEN_INLINE.fullmatch(stripped)
+        if inline:
+            self._open_block(inline.group(2).strip())
+            return None
+        if _PATTERN_FENCE_OPEN.fullmatch(stripped):
+            self._open_block(self._header_path)
+            return None
+        if not stripped:
+            return None  # lignes vides tolérées entre en-tête et fence
+
+        header = _PATTERN_HEADER_LINE.fullmatch(stripped)
+        self._header_path = None
+        if header:
+            path = header.group(1) or header.group(2) or header.group(3)
+            self._header_path = path.strip().strip("`").strip() or None
+        return None
+
+    def _open_block(self, path: str | None) -> None:
+        self._in_fence = True
+        self._block_path = path
+        self._block_lines = []
+        self._header_path = None
+
+    def _close_block(self) -> dict | None:
+        path, lines = self._block_path, self._block_lines
+        self._in_fence = False
+        self._block_path = None
+        self._block_lines = []
+        if path is None or path in self._seen_paths:
+            return None
+        self._seen_paths.add(path)
+        block = {"path": _normalize_path(path), "content": _clean_content("\n".join(lines))}
+        self.blocks.append(block)
+        return block
+
+
 def parse_code_blocks(response: str) -> list[dict]:
     """
     Parse la réponse d'un agent pour extraire les blocs de code avec chemins de fichiers.
+    Un bloc tronqué (fence non fermée) n'est pas retourné ; voir CodeBlockParser.partial.
 
     Returns:
-        Liste de dicts {path, content, language}
+        Liste de dicts {path, content}
     """
-    files = []
-    seen_paths = set()
-
-    # Pattern 1 : chemin en header puis bloc de code
-    for match in PATTERN_FILE_HEADER.finditer(response):
-        path = match.group(1) or match.group(2) or match.group(3)
-        path = path.strip().strip("`").strip()
-        content = match.group(4)
-
-        if path and path not in seen_paths:
-            files.append(
-                {
-                    "path": _normalize_path(path),
-                    "content": _clean_content(content),
-                }
-            )
-            seen_paths.add(path)
-
-    # Pattern 2 : ```langage chemin/fichier.ext
-    for match in PATTERN_INLINE_PATH.finditer(response):
-        language = match.group(1)
-        path = match.group(2).strip()
-        content = match.group(3)
-
-        if path and path not in seen_paths:
-            files.append(
-                {
-                    "path": _normalize_path(path),
-                    "content": _clean_content(content),
-                }
-            )
-            seen_paths.add(path)
+    parser = CodeBlockParser()
+    parser.feed(response)
+    parser.close()
+    files = parser.blocks
 
     # Logging détaillé si échec
     logger.info(f"Parsing markdown : {len(files)} blocs de code détectés")
@@ -219,13 +317,138 @@ def validate_write_path(project_path: str, file_path: str) -> Path:
     return target
 
 
+def _blocked_results(files: list[dict], session_state) -> list[dict] | None:
+    """Résultats "blocked" si la session interdit l'écriture disque, sinon None."""
+    # 🚨 PROTECTION CRITIQUE : Vérifier autorisation écriture disque
+    if not session_state or session_state.can_write_disk():
+        return None
+    logger.warning(
+        "🚨 ÉCRITURE DISQUE BLOQUÉE : mode=%s, phase=%s",
+        session_state.mode.value if session_state.mode else "unknown",
+        session_state.phase.value if session_state.phase else "none",
+    )
+    return [
+        {
+            "path": f["path"],
+            "status": "blocked",
+            "error": f"Écriture disque interdite (mode={session_state.mode.value}, phase={session_state.phase.value if session_state.phase else 'none'})",
+        }
+        for f in files
+    ]
+
+
+def _plan_writes(
+    project_path: str, files: list[dict]
+) -> tuple[list[tuple[int, dict, Path]], list[dict | None]]:
+    """
+    Valide les chemins de tous les fichiers avant toute écriture.
+
+    Returns:
+        (cibles valides [(index, file_info, target)], résultats indexés — refus déjà remplis)
+    """
+    targets = []
+    results: list[dict | None] = [None] * len(files)
+    for index, file_info in enumerate(files):
+        file_path = file_info["path"]
+        try:
+            targets.append((index, file_info, validate_write_path(project_path, file_path)))
+        except (PathSecurityError, ExtensionNotAllowedError) as e:
+            logger.warning("Écriture refusée : %s — %s", file_path, e)
+            results[index] = {"path": file_path, "status": "rejected", "error": str(e)}
+    return targets, results
+
+
+def _make_parent_dirs(targets: list[tuple[int, dict, Path]]) -> None:
+    """Crée une seule fois chaque dossier parent du lot (un échec ressort à l'écriture du fichier)."""
+    for directory in sorted({target.parent for _, _, target in targets}):
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+        except OSError:
+            logger.exception("Erreur création dossier : %s", directory)
+
+
+def _is_unchanged(target: Path, digest: str) -> bool:
+    """
+    Le fichier contient-il déjà ces octets ? L'empreinte mémorisée par l'index du projet
+    (record_write) sert tant que mtime et taille n'ont pas changé ; sinon le fichier est
+    relu et haché.
+    """
+    try:
+        stat = target.stat()
+    except FileNotFoundError:
+        return False
+    known = known_digest(target, stat.st_mtime_ns, stat.st_size)
+    if known is not None:
+        return known == digest
+    return hashlib.sha256(target.read_bytes()).hexdigest() == digest
+
+
+def _atomic_write(target: Path, data: bytes) -> None:
+    """
+    Écrit dans un fichier temporaire du même dossier puis le renomme sur la cible.
+    Le temporaire est créé avec le mode 0o666 (umask du processus appliqué par le
+    système, comme un open() ordinaire) ; un fichier existant garde ses permissions.
+    """
+    try:
+        existing_mode = stat_module.S_IMODE(target.stat().st_mode)
+    except FileNotFoundError:
+        existing_mode = None
+    tmp_name = target.parent / f".{target.name}.{secrets.token_hex(6)}.tmp"
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+    fd = os.open(tmp_name, flags, 0o666)
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(data)
+        if existing_mode is not None:
+            os.chmod(tmp_name, existing_mode)
+        os.replace(tmp_name, target)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_name)
+        raise
+
+
+def _write_one(file_info: dict, target: Path) -> dict:
+    file_path = file_info["path"]
+    content = file_info["content"]
+    started = time.perf_counter()
+    try:
+        data = content.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        unchanged = _is_unchanged(target, digest)
+        if unchanged:
+            logger.debug("Fichier inchangé : %s", target)
+        else:
+            _atomic_write(target, data)
+            logger.info("Fichier écrit : %s", target)
+        stat = target.stat()
+        record_write(target, digest)
+        if not unchanged:
+            record_symbols(target, content, stat.st_mtime_ns, stat.st_size)
+        result = {"path": file_path, "status": "written", "size": len(content), "unchanged": unchanged}
+    except Exception as e:
+        logger.exception("Erreur écriture : %s", file_path)
+        result = {"path": file_path, "status": "error", "error": str(e)}
+    result["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return result
+
+
+def _invalidate_views(project_path: str, results: list[dict]) -> None:
+    """Invalide le cache des vues du projet si au moins un fichier a réellement changé."""
+    if any(r.get("status") == "written" and not r.get("unchanged") for r in results):
+        invalidate_project(project_path)
+
+
 def write_files_to_project(
     project_path: str,
     files: list[dict],
     session_state=None,
 ) -> list[dict]:
     """
-    Écrit une liste de fichiers dans le dossier projet.
+    Écrit une liste de fichiers dans le dossier projet (version synchrone).
+    Écriture atomique (fichier temporaire + renommage) ; un contenu identique à celui
+    du disque n'est pas réécrit. Depuis du code async, préférer
+    write_files_to_project_async.
 
     Args:
         project_path: Chemin absolu du projet
@@ -233,67 +456,49 @@ def write_files_to_project(
         session_state: SessionState optionnel pour vérification can_write_disk()
 
     Returns:
-        Liste de dicts {path, status, error?} pour chaque fichier
+        Liste de dicts {path, status, size?, unchanged?, duration_ms?, error?} pour chaque fichier
     """
-    # 🚨 PROTECTION CRITIQUE : Vérifier autorisation écriture disque
-    if session_state and not session_state.can_write_disk():
-        logger.warning(
-            "🚨 ÉCRITURE DISQUE BLOQUÉE : mode=%s, phase=%s",
-            session_state.mode.value if session_state.mode else "unknown",
-            session_state.phase.value if session_state.phase else "none",
-        )
-        # Retourner tous les fichiers comme "blocked"
-        return [
-            {
-                "path": f["path"],
-                "status": "blocked",
-                "error": f"Écriture disque interdite (mode={session_state.mode.value}, phase={session_state.phase.value if session_state.phase else 'none'})",
-            }
-            for f in files
-        ]
-
-    results = []
-
-    for file_info in files:
-        file_path = file_info["path"]
-        content = file_info["content"]
-
-        try:
-            target = validate_write_path(project_path, file_path)
-
-            # Créer les dossiers parents si nécessaire
-            target.parent.mkdir(parents=True, exist_ok=True)
+    blocked = _blocked_results(files, session_state)
+    if blocked is not None:
+        return blocked
+
+    targets, results = _plan_writes(project_path, files)
+    _make_parent_dirs(targets)
+    for index, file_info, target in targets:
+        results[index] = _write_one(file_info, target)
+    _invalidate_views(project_path, results)
+    return results
 
-            # Écrire le fichier
-            target.write_text(content, encoding="utf-8")
 
-            logger.info("Fichier écrit : %s", target)
-            results.append(
-                {
-                    "path": file_path,
-                    "status": "written",
-                    "size": len(content),
-                }
-            )
-
-        except (PathSecurityError, ExtensionNotAllowedError) as e:
-            logger.warning("Écriture refusée : %s — %s", file_path, e)
-            results.append(
-                {
-                    "path": file_path,
-                    "status": "rejected",
-                    "error": str(e),
-                }
-            )
-
-        except Exception as e:
-            logger.exception("Erreur écriture : %s", file_path)
-            results.append(
-                {
-                    "path": file_path,
-                    "status": "error",
-                    "error": str(e),
-                }
-            )
+async def write_files_to_project_async(
+    project_path: str,
+    files: list[dict],
+    session_state=None,
+) -> list[dict]:
+    """
+    Équivalent async de write_files_to_project : validation et création des dossiers
+    en une tâche, puis écriture des fichiers en parallèle dans le pool d'écriture
+    (FILE_WRITE_WORKERS threads) — la boucle d'événements n'est jamais bloquée.
 
+    Returns:
+        Résultats dans l'ordre de `files`
+    """
+    blocked = _blocked_results(files, session_state)
+    if blocked is not None:
+        return blocked
+
+    loop = asyncio.get_running_loop()
+    targets, results = await loop.run_in_executor(
+        _WRITE_EXECUTOR, _plan_writes, project_path, files
+    )
+    await loop.run_in_executor(_WRITE_EXECUTOR, _make_parent_dirs, targets)
+    written = await asyncio.gather(
+        *(
+            loop.run_in_executor(_WRITE_EXECUTOR, _write_one, file_info, target)
+            for _, file_info, target in targets
+        )
+    )
+    for (index, _, _), result in zip(targets, written, strict=True):
+        results[index] = result
+    _invalidate_views(project_path, results)
     return results
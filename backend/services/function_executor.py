@@ -2,6 +2,9 @@ import logging
 
 from backend.db.database import Database
 from backend.services.file_service import FileService
+from backend.services.grep_engine import grep_project
+from backend.services.io_executor import io_executor
+from backend.services.symbol_index import get_symbol_index
 
 logger = logging.getLogger(__name__)
 
@@ -56,6 +59,69 @@ class FunctionExecutor:
                     "required": [],
                 },
             },
+            {
+                "name": "grep_project",
+                "description": (
+                    "Recherche un texte ou une expression régulière dans le contenu des "
+                    "fichiers du projet en cours (chemin, ligne, extrait)"
+                ),
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "pattern": {
+                            "type": "string",
+                            "description": "Texte à rechercher (ou expression régulière si regex=true)",
+                        },
+                        "regex": {
+                            "type": "boolean",
+                            "description": "Interpréter pattern comme une expression régulière (défaut: false)",
+                        },
+                        "case_sensitive": {
+                            "type": "boolean",
+                            "description": "Respecter la casse (défaut: false)",
+                        },
+                        "include": {
+                            "type": "string",
+                            "description": "Globs de fichiers séparés par des virgules (ex: *.py,src/*)",
+                        },
+                        "max_results": {
+                            "type": "integer",
+                            "description": "Nombre maximum de lignes retournées (défaut: 30)",
+                        },
+                        "context": {
+                            "type": "integer",
+                            "description": "Lignes de contexte avant/après (défaut: 2)",
+                        },
+                    },
+                    "required": ["pattern"],
+                },
+            },
+            {
+                "name": "find_symbols",
+                "description": (
+                    "Recherche les classes, méthodes et fonctions du projet en cours par nom "
+                    "(chemin, ligne, signature)"
+                ),
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "query": {
+                            "type": "string",
+                            "description": "Partie du nom recherché (vide : tous les symboles)",
+                        },
+                        "kind": {
+                            "type": "string",
+                            "enum": ["class", "method", "function"],
+                            "description": "Type de symbole optionnel pour filtrer",
+                        },
+                        "path": {
+                            "type": "string",
+                            "description": "Préfixe de chemin optionnel (ex: backend/services)",
+                        },
+                    },
+                    "required": [],
+                },
+            },
             {
                 "name": "get_library_document",
                 "description": "Recherche et retourne un document de la Knowledge Base",
@@ -117,6 +183,10 @@ class FunctionExecutor:
                 return await self.get_project_file(**arguments)
             elif function_name == "get_project_structure":
                 return await self.get_project_structure(**arguments)
+            elif function_name == "grep_project":
+                return await self.grep_project(**arguments)
+            elif function_name == "find_symbols":
+                return await self.find_symbols(**arguments)
             else:
                 raise FunctionExecutionError(f"Unknown function: {function_name}")
         except Exception as e:
@@ -135,7 +205,11 @@ class FunctionExecutor:
             dict: Document trouvé ou erreur
         """
         try:
-            docs = await self.db.list_library_documents(category=category, search=name)
+            # Recherche plein texte (FTS5/BM25) : les meilleurs résultats suffisent
+            page = await self.db.list_library_documents_page(
+                category=category, search=name, limit=5
+            )
+            docs = page["items"]
 
             if not docs:
                 return {"success": False, "error": f"Document '{name}' not found in Knowledge Base"}
@@ -259,3 +333,73 @@ class FunctionExecutor:
         except Exception as e:
             logger.exception(f"get_project_structure failed for max_depth={max_depth}")
             return {"success": False, "error": f"Failed to get project structure: {str(e)}"}
+
+    async def grep_project(
+        self,
+        pattern: str,
+        regex: bool = False,
+        case_sensitive: bool = False,
+        include: str | None = None,
+        max_results: int = 30,
+        context: int = 2,
+    ) -> dict:
+        """
+        Recherche dans le contenu des fichiers du projet en cours.
+
+        Args:
+            pattern: Texte (ou expression régulière si regex=True)
+            include: Globs de fichiers séparés par des virgules
+
+        Returns:
+            dict: Correspondances {path, line, column, text, before, after} ou erreur
+        """
+        if not self.project_path:
+            return {"success": False, "error": "No project context available"}
+
+        try:
+            result = await io_executor.run(
+                self.project_path,
+                grep_project,
+                self.project_path,
+                pattern,
+                regex=regex,
+                case_sensitive=case_sensitive,
+                include=include,
+                max_results=max_results,
+                context=context,
+            )
+            return {"success": True, **result.model_dump()}
+        except Exception as e:
+            logger.exception(f"grep_project failed for pattern={pattern}")
+            return {"success": False, "error": f"Search failed: {str(e)}"}
+
+    async def find_symbols(
+        self,
+        query: str = "",
+        kind: str | None = None,
+        path: str | None = None,
+        max_results: int = 50,
+    ) -> dict:
+        """
+        Recherche des symboles (classes, méthodes, fonctions) dans l'index du projet.
+
+        Args:
+            query: Partie du nom (casse ignorée)
+            kind: class, method ou function
+            path: Préfixe de chemin relatif
+
+        Returns:
+            dict: Symboles {path, kind, name, signature, line, parent} ou erreur
+        """
+        if not self.project_path:
+            return {"success": False, "error": "No project context available"}
+
+        try:
+            index = get_symbol_index(self.project_path)
+            symbols = await io_executor.run(
+                self.project_path, index.find, query, kind, path, max_results
+            )
+            return {"success": True, "count": len(symbols), "symbols": symbols}
+        except Exception as e:
+            logger.exception(f"find_symbols failed for query={query}")
+            return {"success": False, "error": f"Symbol search failed: {str(e)}"}
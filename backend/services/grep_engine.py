@@ -0,0 +1,392 @@
+"""
+Recherche dans le contenu des fichiers de projet (grep) — JARVIS 2.0
+Texte littéral ou expression régulière, filtres glob, limite de résultats et lignes
+de contexte. Utilisé par /api/projects/{id}/files/grep et la fonction agent grep_project.
+
+Deux étages :
+- Index de trigrammes par projet (fichiers texte jusqu'à GREP_INDEX_MAX_FILE_BYTES) :
+  les littéraux obligatoires du motif réduisent la liste des fichiers candidats.
+  Mis à jour de façon incrémentale depuis l'index des fichiers (mtime_ns, taille).
+- Scan des candidats en parallèle (mmap) : seul juge des correspondances. Sans
+  littéral exploitable (motif trop court, alternative, groupe spécial), tous les
+  fichiers texte sont scannés.
+
+Les motifs sont appliqués aux octets UTF-8 (re.MULTILINE) : l'insensibilité à la
+casse ne porte que sur l'ASCII.
+
+Configuration via .env (valeurs par défaut entre parenthèses) :
+- GREP_WORKERS (4)                        : threads du scan parallèle
+- GREP_INDEX_MAX_FILE_BYTES (262144)      : taille maximum d'un fichier indexé (octets)
+- GREP_INDEX_MAX_PROJECTS (8)             : index de trigrammes conservés (LRU)
+"""
+
+import fnmatch
+import logging
+import mmap
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from backend.models.file import GrepMatch, GrepResult
+from backend.services.common import ProjectRegistry, env_int
+from backend.services.file_index import get_file_index
+from backend.services.file_service import FileService, FileServiceError
+
+logger = logging.getLogger(__name__)
+
+MAX_RESULTS_LIMIT = 1000
+MAX_CONTEXT_LINES = 10
+MAX_LINE_CHARS = 300
+_BINARY_SNIFF_BYTES = 8192
+_REGEX_SPECIALS = set(".^$*+?{}[]\\|()")
+
+
+_SCAN_EXECUTOR = ThreadPoolExecutor(max_workers=env_int("GREP_WORKERS", 4, minimum=1), thread_name_prefix="grep")
+
+
+def _trigrams(data: bytes) -> set[bytes]:
+    return {data[i : i + 3] for i in range(len(data) - 2)}
+
+
+_ESCAPE_ARGUMENT_LENGTH = {"x": 2, "u": 4, "U": 8}
+
+
+def _skip_escape_argument(pattern: str, escaped: str, i: int) -> int:
+    """
+    Position après l'argument d'un échappement (i : juste après la lettre) : chiffres de
+    \\x, \\u, \\U, nom de \\N{…}, suite d'un octal ou d'une référence arrière. L'argument
+    n'est jamais pris comme texte littéral (il ne figure pas tel quel dans la correspondance).
+    """
+    if escaped in _ESCAPE_ARGUMENT_LENGTH:
+        return min(i + _ESCAPE_ARGUMENT_LENGTH[escaped], len(pattern))
+    if escaped == "N" and pattern[i : i + 1] == "{":
+        end = pattern.find("}", i)
+        return len(pattern) if end == -1 else end + 1
+    if escaped.isdigit():
+        # \0, \012 (octal), \1 à \99 (référence) : au plus 3 chiffres au total
+        j = i
+        while j < len(pattern) and j < i + 2 and pattern[j].isdigit():
+            j += 1
+        return j
+    return i
+
+
+def required_literals(pattern: str, regex: bool) -> list[str]:
+    """
+    Littéraux (≥ 3 caractères) présents dans toute correspondance du motif.
+    Analyse conservatrice : alternative ou groupe spécial « (? » → aucun littéral.
+    """
+    if not regex:
+        return [pattern] if len(pattern) >= 3 else []
+    if "(?" in pattern:
+        return []
+
+    runs, current = [], []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\" and i + 1 < len(pattern):
+            escaped = pattern[i + 1]
+            i += 2
+            if escaped.isalnum():  # \d, \w, \b, \1, \x41… : pas un littéral
+                runs.append("".join(current))
+                current = []
+                i = _skip_escape_argument(pattern, escaped, i)
+            else:
+                current.append(escaped)
+            continue
+        if char == "[":
+            # Classe de caractères : sauter jusqu'au « ] » fermant (échappements compris)
+            j = i + 1
+            if j < len(pattern) and pattern[j] == "^":
+                j += 1
+            if j < len(pattern) and pattern[j] == "]":
+                j += 1
+            while j < len(pattern) and pattern[j] != "]":
+                j += 2 if pattern[j] == "\\" else 1
+            if j >= len(pattern):
+                return []
+            runs.append("".join(current))
+            current = []
+            i = j + 1
+            continue
+        if char == "|":
+            return []
+        if char == ")" and pattern[i + 1 : i + 2] in ("?", "*", "{"):
+            return []  # groupe optionnel : son contenu n'est pas obligatoire
+        if char in "?*{":
+            # Le caractère précédent devient optionnel ou répété un nombre variable de fois
+            if current:
+                current.pop()
+            runs.append("".join(current))
+            current = []
+            if char == "{":
+                end = pattern.find("}", i)
+                i = len(pattern) if end == -1 else end
+        elif char == "+":
+            runs.append("".join(current))
+            current = []
+        elif char in _REGEX_SPECIALS:
+            runs.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+        i += 1
+    runs.append("".join(current))
+    return [run for run in runs if len(run) >= 3]
+
+
+class TrigramIndex:
+    """Trigrammes (octets en minuscules) → fichiers, mis à jour depuis l'index des fichiers."""
+
+    def __init__(self, root: str, max_file_bytes: int = 256 * 1024):
+        self.root = Path(root).resolve()
+        self.max_file_bytes = max_file_bytes
+        self._lock = threading.Lock()
+        self._postings: dict[bytes, set[str]] = {}
+        self._files: dict[str, tuple[int, int | None, set[bytes]]] = {}
+        # Fichiers texte trop gros pour l'index : toujours candidats
+        self._unindexed: set[str] = set()
+
+    def refresh(self, entries) -> None:
+        """Réindexe les fichiers nouveaux ou modifiés, oublie les fichiers disparus."""
+        with self._lock:
+            seen = set()
+            for entry in entries:
+                seen.add(entry.path)
+                known = self._files.get(entry.path)
+                if known is not None and known[:2] == (entry.mtime_ns, entry.size):
+                    continue
+                if entry.path in self._unindexed and (entry.size or 0) > self.max_file_bytes:
+                    continue
+                self._drop(entry.path)
+                if (entry.size or 0) > self.max_file_bytes:
+                    self._unindexed.add(entry.path)
+                    continue
+                try:
+                    data = (self.root / entry.path).read_bytes().lower()
+                except OSError:
+                    self._unindexed.add(entry.path)  # laissé au scan
+                    continue
+                grams = _trigrams(data)
+                self._files[entry.path] = (entry.mtime_ns, entry.size, grams)
+                for gram in grams:
+                    self._postings.setdefault(gram, set()).add(entry.path)
+            for path in (set(self._files) | self._unindexed) - seen:
+                self._drop(path)
+
+    def candidates(self, literals: list[str]) -> set[str]:
+        """Fichiers pouvant contenir tous les littéraux (sur-ensemble des correspondances)."""
+        with self._lock:
+            result = None
+            for literal in literals:
+                for gram in _trigrams(literal.encode("utf-8").lower()):
+                    paths = self._postings.get(gram, set())
+                    result = set(paths) if result is None else result & paths
+                    if not result:
+                        return set(self._unindexed)
+            return (result or set()) | self._unindexed
+
+    def _drop(self, path: str) -> None:
+        self._unindexed.discard(path)
+        known = self._files.pop(path, None)
+        if known is None:
+            return
+        for gram in known[2]:
+            paths = self._postings.get(gram)
+            if paths is not None:
+                paths.discard(path)
+                if not paths:
+                    del self._postings[gram]
+
+
+class TrigramIndexRegistry(ProjectRegistry[TrigramIndex]):
+    """Index de trigrammes par projet (racine résolue), bornés en nombre (LRU)."""
+
+    def __init__(self, max_projects: int = 8, max_file_bytes: int = 256 * 1024):
+        super().__init__(max_projects)
+        self.max_file_bytes = max_file_bytes
+
+    @classmethod
+    def from_env(cls) -> "TrigramIndexRegistry":
+        return cls(
+            max_projects=env_int("GREP_INDEX_MAX_PROJECTS", 8, minimum=1),
+            max_file_bytes=env_int("GREP_INDEX_MAX_FILE_BYTES", 256 * 1024, minimum=0),
+        )
+
+    def _create(self, root: str) -> TrigramIndex:
+        return TrigramIndex(root, self.max_file_bytes)
+
+
+trigram_indexes = TrigramIndexRegistry.from_env()
+
+
+def forget_grep_index(project_path: str) -> None:
+    trigram_indexes.forget(project_path)
+
+
+def _split_globs(globs: str | None) -> list[str]:
+    return [g.strip() for g in (globs or "").split(",") if g.strip()]
+
+
+def _glob_match(rel: str, name: str, globs: list[str]) -> bool:
+    return any(fnmatch.fnmatch(rel, g) or fnmatch.fnmatch(name, g) for g in globs)
+
+
+def _decode(line: bytes) -> str:
+    return line.decode("utf-8", errors="replace")[:MAX_LINE_CHARS]
+
+
+def _context_before(mm, line_start: int, count: int) -> list[str]:
+    lines = []
+    end = line_start - 1
+    while count > 0 and end >= 0:
+        start = mm.rfind(b"\n", 0, end) + 1
+        lines.append(_decode(mm[start:end]))
+        end = start - 1
+        count -= 1
+    return lines[::-1]
+
+
+def _context_after(mm, line_end: int, count: int) -> list[str]:
+    lines = []
+    start = line_end + 1
+    while count > 0 and start < len(mm):
+        end = mm.find(b"\n", start)
+        end = len(mm) if end == -1 else end
+        lines.append(_decode(mm[start:end]))
+        start = end + 1
+        count -= 1
+    return lines
+
+
+def _scan_file(root: Path, rel: str, compiled, context: int, limit: int) -> list[GrepMatch]:
+    """Lignes correspondantes d'un fichier (une entrée par ligne), au plus `limit`."""
+    matches = []
+    try:
+        with open(root / rel, "rb") as f:
+            if b"\0" in f.read(_BINARY_SNIFF_BYTES):
+                return matches
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # fichier vide
+                return matches
+    except OSError:
+        return matches
+
+    with mm:
+        line_no, counted_to, last_line_start = 1, 0, -1
+        for match in compiled.finditer(mm):
+            start = match.start()
+            line_start = mm.rfind(b"\n", 0, start) + 1
+            if line_start == last_line_start:
+                continue  # une seule entrée par ligne
+            line_no += mm[counted_to:line_start].count(b"\n")
+            counted_to = last_line_start = line_start
+            line_end = mm.find(b"\n", start)
+            line_end = len(mm) if line_end == -1 else line_end
+            matches.append(
+                GrepMatch(
+                    path=rel,
+                    line=line_no,
+                    column=len(mm[line_start:start].decode("utf-8", errors="replace")) + 1,
+                    text=_decode(mm[line_start:line_end]),
+                    before=_context_before(mm, line_start, context),
+                    after=_context_after(mm, line_end, context),
+                )
+            )
+            if len(matches) >= limit:
+                break
+    return matches
+
+
+def grep_project(
+    project_path: str,
+    pattern: str,
+    regex: bool = False,
+    case_sensitive: bool = False,
+    include: str | None = None,
+    exclude: str | None = None,
+    max_results: int = 100,
+    context: int = 0,
+    use_index: bool = True,
+) -> GrepResult:
+    """
+    Recherche `pattern` dans les fichiers texte du projet.
+
+    Args:
+        project_path: Chemin absolu du projet
+        pattern: Texte littéral, ou expression régulière si regex=True
+        include / exclude: Globs séparés par des virgules (chemin relatif ou nom de fichier)
+        max_results: Lignes retournées au plus (≤ 1000)
+        context: Lignes de contexte avant/après chaque correspondance (≤ 10)
+        use_index: Réduire les fichiers candidats par l'index de trigrammes
+
+    Returns:
+        GrepResult (correspondances triées par chemin puis ligne)
+
+    Raises:
+        FileServiceError: motif vide ou expression régulière invalide
+    """
+    if not pattern:
+        raise FileServiceError("Empty search pattern")
+    root = Path(project_path).resolve()
+    if not root.exists():
+        raise FileServiceError(f"Project path not found: {project_path}")
+
+    source = pattern if regex else re.escape(pattern)
+    flags = re.MULTILINE | (0 if case_sensitive else re.IGNORECASE)
+    try:
+        compiled = re.compile(source.encode("utf-8"), flags)
+    except re.error as e:
+        raise FileServiceError(f"Invalid regular expression: {e}") from e
+
+    max_results = min(max(max_results, 1), MAX_RESULTS_LIMIT)
+    context = min(max(context, 0), MAX_CONTEXT_LINES)
+    includes, excludes = _split_globs(include), _split_globs(exclude)
+
+    text_files = [
+        e
+        for e in get_file_index(project_path).files()
+        if e.extension and e.extension.lower() in FileService.ALLOWED_EXTENSIONS
+    ]
+    files = [
+        e.path
+        for e in text_files
+        if (not includes or _glob_match(e.path, e.name, includes))
+        and not (excludes and _glob_match(e.path, e.name, excludes))
+    ]
+
+    engine = "scan"
+    literals = required_literals(pattern, regex)
+    if use_index and literals:
+        index = trigram_indexes.get(project_path)
+        index.refresh(text_files)
+        candidates = index.candidates(literals)
+        files = [path for path in files if path in candidates]
+        engine = "trigram"
+
+    # Une correspondance de plus que demandé : la coupure dans un seul fichier est détectée
+    futures = [
+        _SCAN_EXECUTOR.submit(_scan_file, root, rel, compiled, context, max_results + 1)
+        for rel in files
+    ]
+    matches, truncated = [], False
+    for future in futures:
+        if truncated:
+            future.cancel()
+            continue
+        for match in future.result():
+            if len(matches) >= max_results:
+                truncated = True
+                break
+            matches.append(match)
+
+    return GrepResult(
+        pattern=pattern,
+        matches=matches,
+        files_scanned=len(files),
+        truncated=truncated,
+        engine=engine,
+    )
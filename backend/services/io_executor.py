@@ -0,0 +1,112 @@
+"""
+Exécuteur d'E/S disque — JARVIS 2.0
+Exécute les appels bloquants des services fichiers (FileService, ProjectService…)
+hors de la boucle d'événements, dans un pool de threads borné, avec une limite de
+travaux simultanés par projet : un gros parcours de projet ne bloque plus les autres
+requêtes ni n'accapare tout le pool.
+
+Annulation : un travail encore en file d'attente est abandonné si la tâche appelante
+est annulée ou si le client HTTP se déconnecte (requête surveillée) ; un travail déjà
+lancé dans un thread se termine, son résultat est ignoré, et il garde son créneau de
+projet jusqu'à la fin du thread.
+
+Configuration via .env (valeurs par défaut entre parenthèses) :
+- IO_EXECUTOR_WORKERS (8)            : threads du pool d'E/S
+- IO_EXECUTOR_PER_PROJECT (2)        : travaux simultanés maximum par projet
+- IO_DISCONNECT_POLL_SECONDS (0.25)  : intervalle de vérification de la connexion client
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.services.common import env_int, env_number
+
+logger = logging.getLogger(__name__)
+
+
+class ClientDisconnectedError(Exception):
+    """Le client s'est déconnecté avant la fin du travail."""
+
+
+class IOExecutor:
+    """Pool de threads borné + sémaphore par projet (un jeu de sémaphores par boucle)."""
+
+    def __init__(self, max_workers: int = 8, per_project: int = 2, disconnect_poll: float = 0.25):
+        self.max_workers = max(max_workers, 1)
+        self.per_project = max(per_project, 1)
+        self.disconnect_poll = disconnect_poll
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="io")
+        self._limits: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def from_env(cls) -> "IOExecutor":
+        return cls(
+            max_workers=env_int("IO_EXECUTOR_WORKERS", 8),
+            per_project=env_int("IO_EXECUTOR_PER_PROJECT", 2),
+            disconnect_poll=env_number("IO_DISCONNECT_POLL_SECONDS", 0.25, float),
+        )
+
+    def _project_limit(self, project_path: str | None) -> asyncio.Semaphore:
+        limits = self._limits.setdefault(asyncio.get_running_loop(), {})
+        key = os.path.normpath(project_path) if project_path else None
+        if key not in limits:
+            limits[key] = asyncio.Semaphore(self.per_project)
+        return limits[key]
+
+    async def run(self, project_path: str | None, func, *args, request=None, **kwargs):
+        """
+        Exécute func(*args, **kwargs) dans le pool, au plus `per_project` à la fois par projet.
+
+        Args:
+            project_path: Projet concerné (None : limite commune aux appels hors projet)
+            request: Requête Starlette optionnelle ; sa déconnexion annule le travail
+
+        Raises:
+            ClientDisconnectedError: si le client s'est déconnecté avant la fin
+        """
+        job = asyncio.ensure_future(self._run_limited(project_path, func, *args, **kwargs))
+        if request is None:
+            return await job
+
+        watcher = asyncio.ensure_future(self._wait_disconnect(request))
+        try:
+            await asyncio.wait({job, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            abandoned = not job.done()
+            if abandoned:
+                job.cancel()
+            watcher.cancel()
+        if abandoned:
+            logger.debug("IOExecutor: client déconnecté, %s abandonné", getattr(func, "__name__", func))
+            raise ClientDisconnectedError()
+        return job.result()
+
+    async def _run_limited(self, project_path, func, *args, **kwargs):
+        limit = self._project_limit(project_path)
+        await limit.acquire()  # annulable tant que le créneau n'est pas obtenu
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+        except BaseException:
+            limit.release()
+            raise
+        # Créneau libéré à la fin du thread, même si l'appelant a abandonné le travail
+        future.add_done_callback(functools.partial(self._release, limit))
+        return await asyncio.shield(future)
+
+    @staticmethod
+    def _release(limit: asyncio.Semaphore, future: asyncio.Future) -> None:
+        limit.release()
+        if not future.cancelled():
+            future.exception()  # résultat d'un travail abandonné : ne pas signaler l'erreur
+
+    async def _wait_disconnect(self, request) -> None:
+        while not await request.is_disconnected():
+            await asyncio.sleep(self.disconnect_poll)
+
+
+io_executor = IOExecutor.from_env()
@@ -5,6 +5,8 @@ Détection automatique du langage et framework d'un projet.
 import json
 from pathlib import Path
 
+from backend.services.file_index import get_file_index
+
 
 def detect_language_and_framework(project_path: str) -> dict:
     """
@@ -18,13 +20,14 @@ def detect_language_and_framework(project_path: str) -> dict:
             "confidence": float (0-1)
         }
     """
+    index = get_file_index(str(project_path))
     project_path = Path(project_path)
 
-    # Vérifier fichiers de configuration
-    has_package_json = (project_path / "package.json").exists()
-    has_requirements_txt = (project_path / "requirements.txt").exists()
-    has_pyproject_toml = (project_path / "pyproject.toml").exists()
-    has_tsconfig = (project_path / "tsconfig.json").exists()
+    # Vérifier fichiers de configuration (index du projet, sans accès disque)
+    has_package_json = index.get("package.json") is not None
+    has_requirements_txt = index.get("requirements.txt") is not None
+    has_pyproject_toml = index.get("pyproject.toml") is not None
+    has_tsconfig = index.get("tsconfig.json") is not None
 
     # Détection langage
     language = "unknown"
@@ -96,11 +99,12 @@ def detect_language_and_framework(project_path: str) -> dict:
         else:
             test_framework = "none"
 
-    # Fallback : compter les extensions de fichiers
+    # Fallback : compter les extensions de fichiers (hors dépendances, voir file_index)
     else:
-        py_count = len(list(project_path.rglob("*.py")))
-        js_count = len(list(project_path.rglob("*.js")))
-        ts_count = len(list(project_path.rglob("*.ts")))
+        names = [entry.name for entry in index.files()]
+        py_count = sum(1 for name in names if name.endswith(".py"))
+        js_count = sum(1 for name in names if name.endswith(".js"))
+        ts_count = sum(1 for name in names if name.endswith(".ts"))
 
         if py_count > js_count and py_count > ts_count:
             language = "python"
@@ -9,18 +9,44 @@ Flux adaptatif :
 3. Jarvis_maitre valide le résultat final (max 2 relances complètes)
 
 Garde-fous : estimation dynamique des passes, détection de stagnation,
-maximum absolu de 20 passes par délégation.
+maximum absolu de 20 passes par délégation, budget de tokens par conversation.
+
+Les délégations indépendantes d'un même cycle s'exécutent en parallèle ; seules
+celles qui lisent le projet attendent les agents qui l'écrivent.
+
+Pour les instructions multi-fichiers, le CODEUR est sollicité en éventail : un
+contrat d'interfaces commun, puis une génération concurrente par groupe de fichiers,
+chaque groupe étant écrit dès sa réception.
+
+Avant le VALIDATEUR, une pré-validation locale (syntaxe, formats, imports internes)
+est exécutée ; ses diagnostics vont directement dans la consigne de correction du
+CODEUR, sans appel au VALIDATEUR. Les fichiers corrigés repassent la pré-validation,
+puis le VALIDATEUR si elle ne signale plus rien.
+
+Configuration via .env (valeurs par défaut entre parenthèses) :
+- ORCHESTRATION_MAX_PARALLEL (2) : délégations exécutées simultanément
+- CODEUR_FANOUT_MIN_FILES (3)    : fichiers attendus à partir desquels le CODEUR
+                                   travaille en éventail (0 = désactivé)
+- CODEUR_FANOUT_PARALLEL (4)     : générations CODEUR simultanées en éventail
 """
 
+import asyncio
 import logging
 import math
+import posixpath
 import re
+from collections import Counter
 from pathlib import Path
 
 from backend.agents.agent_factory import get_agent
+from backend.ia.token_accounting import TokenBudgetExceededError, delegation_scope, token_ledger
 from backend.models.session_state import Mode, ProjectState, SessionState
-from backend.services.file_writer import parse_code_blocks, write_files_to_project
+from backend.services.common import env_int
+from backend.services.file_writer import CodeBlockParser, write_files_to_project_async
+from backend.services.io_executor import io_executor
+from backend.services.prevalidation import format_diagnostics, prevalidate_files
 from backend.services.safety_service import SafetyService
+from backend.services.symbol_index import build_code_report
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +55,41 @@ PATTERN_CODE = re.compile(r"\[DEMANDE_CODE_CODEUR:\s*(.*?)\]", re.DOTALL)
 PATTERN_VALIDATION = re.compile(r"\[DEMANDE_VALIDATION_BASE:\s*(.*?)\]", re.DOTALL)
 PATTERN_VALIDATION_VALIDATEUR = re.compile(r"\[DEMANDE_VALIDATION_VALIDATEUR:\s*(.*?)\]", re.DOTALL)
 
+# Agents qui écrivent dans le projet : les autres délégations du cycle lisent leur résultat
+WRITER_AGENTS = frozenset({"CODEUR"})
+DEFAULT_MAX_PARALLEL = 2
+DEFAULT_FANOUT_MIN_FILES = 3
+DEFAULT_FANOUT_PARALLEL = 4
+
+
+def _max_parallel_delegations() -> int:
+    return env_int("ORCHESTRATION_MAX_PARALLEL", DEFAULT_MAX_PARALLEL, minimum=1)
+
+
+async def _emit(on_event, event: str, **data) -> None:
+    """
+    Notifie un événement de progression (flux SSE). Sans callback : no-op.
+    Une erreur du callback n'interrompt jamais l'orchestration.
+    """
+    if on_event is None:
+        return
+    try:
+        await on_event({"event": event, **data})
+    except Exception:
+        logger.exception("Orchestration: échec notification événement %s", event)
+
+
+async def _emit_files_written(on_event, agent_name: str, files: list[dict]) -> None:
+    for file_info in files:
+        if file_info.get("status") == "written":
+            await _emit(
+                on_event,
+                "file_written",
+                agent=agent_name,
+                path=file_info["path"],
+                size=file_info.get("size"),
+            )
+
 
 class SimpleOrchestrator:
     """
@@ -41,6 +102,7 @@ class SimpleOrchestrator:
     - Estimation dynamique du nombre de passes
     - Détection de stagnation (1 passe vide tolérée)
     - Maximum absolu de 20 passes par délégation
+    - Budget de tokens par conversation (TokenLedger) : arrêt anticipé des boucles
     - Maximum 2 relances complètes par Jarvis_maitre
     - Fallback : si l'agent échoue, retourne la réponse initiale
     """
@@ -89,17 +151,20 @@ class SimpleOrchestrator:
 
     # Constantes d'orchestration
     MAX_ABSOLU_PASSES = 20
-    TOKENS_PAR_FICHIER = 800
+    TOKENS_PAR_FICHIER = 800  # valeur initiale, remplacée par la mesure (TokenLedger)
     TOKENS_MAX_CODEUR = 4096
     MAX_RELANCES_MAITRE = 2
     STAGNATION_TOLERANCE = 1  # nombre de passes vides tolérées avant arrêt
+    MAX_SUITES_FICHIER = 2  # demandes de suite pour un fichier tronqué
+    LIGNES_CONTEXTE_SUITE = 30  # fin du fichier tronqué rappelée au CODEUR
 
     @staticmethod
     def estimate_passes(instruction: str) -> int:
         """
         Estime le nombre de passes nécessaires à partir de l'instruction.
-        Compte les fichiers mentionnés et calcule le nombre de passes
-        en fonction de la limite de tokens du CODEUR.
+        Compte les fichiers mentionnés et calcule le nombre de passes en fonction
+        de la limite de tokens du CODEUR et du coût mesuré d'un fichier
+        (tokens de complétion par fichier écrit lors des délégations précédentes).
 
         Returns:
             Nombre de passes estimé (minimum 1)
@@ -110,10 +175,9 @@ class SimpleOrchestrator:
             re.MULTILINE,
         )
         nb_fichiers = max(len(file_patterns), 1)
+        tokens_par_fichier = token_ledger.tokens_per_file(SimpleOrchestrator.TOKENS_PAR_FICHIER)
         passes = math.ceil(
-            nb_fichiers
-            * SimpleOrchestrator.TOKENS_PAR_FICHIER
-            / SimpleOrchestrator.TOKENS_MAX_CODEUR
+            nb_fichiers * tokens_par_fichier / SimpleOrchestrator.TOKENS_MAX_CODEUR
         )
         return max(passes, 1)
 
@@ -310,6 +374,330 @@ class SimpleOrchestrator:
         messages = [{"role": "user", "content": completion_prompt}]
         return await codeur.handle(messages, session_id=session_id)
 
+    @staticmethod
+    async def _request_continuation(partial: dict, session_id: str | None = None) -> str:
+        """
+        Relance le CODEUR pour la suite d'un fichier tronqué (bloc non fermé),
+        sans régénérer ce qui a déjà été reçu.
+
+        Returns:
+            Réponse du CODEUR (suite du fichier)
+        """
+        received = partial["content"].splitlines()
+        tail = "\n".join(received[-SimpleOrchestrator.LIGNES_CONTEXTE_SUITE :])
+        continuation_prompt = (
+            f"Ta réponse a été coupée pendant l'écriture de {partial['path']} "
+            f"({partial['lines']} lignes reçues). Voici les dernières lignes reçues :\n"
+            f"```\n{tail}\n```\n\n"
+            "Produis UNIQUEMENT la suite du fichier, à partir de la ligne qui suit cet "
+            "extrait, sans répéter ce qui précède, avec le format :\n"
+            f"# {partial['path']}\n"
+            "```langage\n"
+            "suite du fichier\n"
+            "```"
+        )
+
+        codeur = get_agent("CODEUR")
+        messages = [{"role": "user", "content": continuation_prompt}]
+        return await codeur.handle(messages, session_id=session_id)
+
+    @staticmethod
+    def _merge_continuation(head: str, continuation: str) -> str:
+        """Recolle la suite d'un fichier tronqué ; si le CODEUR a tout régénéré, garde la suite seule."""
+        first_head = next((line for line in head.splitlines() if line.strip()), None)
+        first_cont = next((line for line in continuation.splitlines() if line.strip()), None)
+        if first_head is not None and first_head == first_cont:
+            return continuation
+        return head + continuation
+
+    async def _parse_reply(self, reply: str, session_id: str | None = None) -> list[dict]:
+        """
+        Blocs de code d'une réponse CODEUR. Un fichier tronqué par la limite de tokens
+        (fence non fermée) est complété par des demandes de suite (MAX_SUITES_FICHIER)
+        plutôt que par une nouvelle passe complète ; à défaut il est ignoré.
+        """
+        parser = CodeBlockParser()
+        parser.feed(reply)
+        parser.close()
+        blocks = list(parser.blocks)
+        partial = parser.partial
+        if partial is not None and any(b["path"] == partial["path"] for b in blocks):
+            partial = None
+
+        for _ in range(self.MAX_SUITES_FICHIER):
+            if partial is None:
+                break
+            try:
+                continuation = await self._request_continuation(partial, session_id=session_id)
+            except Exception:
+                logger.exception("Orchestration: échec demande de suite pour %s", partial["path"])
+                break
+
+            parser = CodeBlockParser()
+            parser.feed(continuation)
+            parser.close()
+            complete = next((b for b in parser.blocks if b["path"] == partial["path"]), None)
+            if complete is not None:
+                blocks.append(
+                    {
+                        "path": partial["path"],
+                        "content": self._merge_continuation(partial["content"], complete["content"]),
+                    }
+                )
+                logger.info("Orchestration: fichier tronqué %s complété", partial["path"])
+                partial = None
+            elif parser.partial is not None and parser.partial["path"] == partial["path"]:
+                content = self._merge_continuation(partial["content"], parser.partial["content"])
+                partial = {"path": partial["path"], "content": content, "lines": len(content.splitlines())}
+            else:
+                break
+
+        if partial is not None:
+            logger.warning("Orchestration: fichier tronqué %s ignoré", partial["path"])
+        return blocks
+
+    @staticmethod
+    def plan_fan_out(expected_files: list[str]) -> list[list[str]]:
+        """
+        Répartit les fichiers attendus en groupes générés en parallèle par le CODEUR.
+        Autant de groupes que de générations simultanées (CODEUR_FANOUT_PARALLEL),
+        chaque groupe restant dans une seule réponse (TOKENS_MAX_CODEUR / tokens
+        mesurés par fichier).
+
+        Returns:
+            Groupes de fichiers, ou [] si l'éventail ne s'applique pas
+            (moins de CODEUR_FANOUT_MIN_FILES fichiers, ou un seul groupe)
+        """
+        min_files = env_int("CODEUR_FANOUT_MIN_FILES", DEFAULT_FANOUT_MIN_FILES, minimum=0)
+        if not min_files or len(expected_files) < min_files:
+            return []
+
+        parallel = env_int("CODEUR_FANOUT_PARALLEL", DEFAULT_FANOUT_PARALLEL, minimum=1)
+        tokens_par_fichier = token_ledger.tokens_per_file(SimpleOrchestrator.TOKENS_PAR_FICHIER)
+        fit = max(int(SimpleOrchestrator.TOKENS_MAX_CODEUR // tokens_par_fichier), 1)
+        size = min(fit, math.ceil(len(expected_files) / parallel))
+        groups = [expected_files[i : i + size] for i in range(0, len(expected_files), size)]
+        return groups if len(groups) > 1 else []
+
+    @staticmethod
+    async def _shared_interfaces(
+        instruction: str,
+        expected_files: list[str],
+        session_id: str | None = None,
+    ) -> str:
+        """
+        Demande au CODEUR le contrat d'interfaces commun aux générations parallèles
+        (éléments publics de chaque fichier, imports entre fichiers), sans code.
+
+        Returns:
+            Contrat textuel, ou "" en cas d'échec (les groupes s'appuient alors
+            sur l'instruction seule)
+        """
+        interfaces_prompt = (
+            "Le projet suivant va être généré en parallèle, un groupe de fichiers par "
+            "développeur. Définis le CONTRAT D'INTERFACES commun, SANS écrire le code.\n\n"
+            f"**Instruction originale** :\n{instruction}\n\n"
+            "**Fichiers du projet** :\n"
+            + "\n".join(f"- {path}" for path in expected_files)
+            + "\n\n"
+            "Pour chaque fichier : classes, fonctions (signatures complètes), constantes, "
+            "routes exposées, et ce qu'il importe des autres fichiers du projet. "
+            "Format compact, une section par fichier, aucun bloc de code."
+        )
+        try:
+            codeur = get_agent("CODEUR")
+            return await codeur.handle(
+                [{"role": "user", "content": interfaces_prompt}], session_id=session_id
+            )
+        except TokenBudgetExceededError:
+            raise
+        except Exception:
+            logger.exception("Orchestration: échec contrat d'interfaces CODEUR")
+            return ""
+
+    @staticmethod
+    def _normalize_path(path: str) -> str:
+        return posixpath.normpath(path.replace("\\", "/").strip()).lstrip("/")
+
+    @classmethod
+    def _blocks_for_group(
+        cls, code_blocks: list[dict], group: list[str], expected_files: list[str]
+    ) -> list[dict]:
+        """
+        Blocs de code correspondant aux fichiers du groupe (les autres appartiennent à un
+        autre groupe). Correspondance sur le chemin complet normalisé ; un bloc sans
+        dossier (« models.py ») n'est rattaché par son nom que si ce nom est unique
+        parmi les fichiers attendus.
+        """
+        names = {cls._normalize_path(path) for path in group}
+        basename_counts = Counter(
+            posixpath.basename(cls._normalize_path(path)) for path in expected_files
+        )
+        unique_basenames = {
+            posixpath.basename(path): path
+            for path in names
+            if basename_counts.get(posixpath.basename(path)) == 1
+        }
+
+        kept = []
+        for block in code_blocks:
+            path = cls._normalize_path(block["path"])
+            if path in names:
+                kept.append(block)
+            elif "/" not in path and path in unique_basenames:
+                kept.append({**block, "path": unique_basenames[path]})  # chemin attendu
+        if len(kept) < len(code_blocks):
+            logger.info(
+                "Orchestration: %d bloc(s) hors groupe ignoré(s)", len(code_blocks) - len(kept)
+            )
+        return kept
+
+    async def _fan_out_generation(
+        self,
+        agent,
+        instruction: str,
+        expected_files: list[str],
+        groups: list[list[str]],
+        session_id: str | None = None,
+        project_path: str | None = None,
+        session_state=None,
+        on_event=None,
+    ) -> tuple[str, list[dict], bool]:
+        """
+        Génère les fichiers en éventail : contrat d'interfaces partagé, puis une
+        génération CODEUR par groupe (concurrence CODEUR_FANOUT_PARALLEL), chaque
+        groupe écrit sur le disque dès sa réception.
+
+        Returns:
+            (réponses concaténées, fichiers écrits, budget_dépassé) — réponses et
+            fichiers dans l'ordre des groupes, quel que soit l'ordre de terminaison
+        """
+        await _emit(on_event, "fan_out", agent=agent.name, groups=len(groups), files=len(expected_files))
+        try:
+            interfaces = await self._shared_interfaces(instruction, expected_files, session_id)
+        except TokenBudgetExceededError:
+            return "", [], True
+
+        all_files = "\n".join(f"- {path}" for path in expected_files)
+        semaphore = asyncio.Semaphore(env_int("CODEUR_FANOUT_PARALLEL", DEFAULT_FANOUT_PARALLEL, minimum=1))
+
+        async def generate(index: int, group: list[str]) -> tuple[int, str, list[dict]]:
+            group_prompt = (
+                "Génération parallèle : d'autres développeurs produisent en même temps les "
+                "autres fichiers du projet. Produis UNIQUEMENT les fichiers suivants : "
+                f"{', '.join(group)}\n\n"
+                f"**Instruction originale** :\n{instruction}\n\n"
+                f"**Tous les fichiers du projet** :\n{all_files}\n\n"
+                + (
+                    f"**Contrat d'interfaces (à respecter exactement)** :\n{interfaces}\n\n"
+                    if interfaces
+                    else ""
+                )
+                + "Produis chaque fichier avec le format :\n"
+                "# chemin/vers/fichier.ext\n"
+                "```langage\n"
+                "code complet du fichier\n"
+                "```"
+            )
+            async with semaphore:
+                reply = await agent.handle(
+                    [{"role": "user", "content": group_prompt}], session_id=session_id
+                )
+                blocks = await self._parse_reply(reply, session_id=session_id)
+            return index, reply, blocks
+
+        replies = [""] * len(groups)
+        written_by_group: list[list[dict]] = [[] for _ in groups]
+        budget_exceeded = False
+        tasks = [asyncio.ensure_future(generate(i, group)) for i, group in enumerate(groups)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    index, reply, blocks = await next_done
+                except TokenBudgetExceededError:
+                    budget_exceeded = True
+                    continue
+                except Exception:
+                    logger.exception("Orchestration: échec génération CODEUR d'un groupe")
+                    continue
+
+                replies[index] = reply
+                blocks = self._blocks_for_group(blocks, groups[index], expected_files)
+                if blocks:
+                    written = await write_files_to_project_async(project_path, blocks, session_state)
+                    written_by_group[index] = written
+                    await _emit_files_written(on_event, agent.name, written)
+        finally:
+            # Délégation annulée (client déconnecté…) : les groupes en cours sont annulés
+            # au lieu de continuer à consommer tokens et créneaux du limiteur
+            pending = [task for task in tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        files_written = [f for written in written_by_group for f in written]
+        logger.info(
+            "Orchestration: éventail CODEUR — %d groupe(s), %d fichier(s) écrit(s)",
+            len(groups),
+            sum(1 for f in files_written if f["status"] == "written"),
+        )
+        return "\n\n".join(r for r in replies if r), files_written, budget_exceeded
+
+    async def _validate_files(
+        self,
+        project_path: str,
+        files: list[dict],
+        session_id: str | None = None,
+        on_event=None,
+    ) -> tuple[str | None, str]:
+        """
+        Valide des fichiers écrits par le CODEUR : pré-validation locale, puis VALIDATEUR
+        seulement si elle ne signale rien.
+
+        Returns:
+            (verdict ou None si rien à valider, en-tête de la consigne de correction)
+        """
+        diagnostics = await prevalidate_files(project_path, files)
+        await _emit(on_event, "prevalidation", errors=len(diagnostics))
+
+        if diagnostics:
+            report = format_diagnostics(diagnostics)
+            logger.info(
+                "Orchestration: pré-validation → %d problème(s), VALIDATEUR non sollicité",
+                len(diagnostics),
+            )
+            verdict = f"INVALIDE (pré-validation locale)\n{report}"
+            await _emit(on_event, "validation", agent="PREVALIDATION", valid=False)
+            return verdict, (
+                "La pré-validation automatique a détecté des erreurs dans ton code. "
+                f"Corrige-les.\n\nDIAGNOSTICS :\n{report}"
+            )
+
+        # Lire fichiers écrits pour validation
+        file_contents = self._read_project_files(project_path, files)
+        if not file_contents:
+            return None, ""
+
+        # Construire prompt validation
+        validation_prompt = "Vérifie ce code produit par le CODEUR :\n\n"
+        for path, content in file_contents.items():
+            validation_prompt += f"# {path}\n```\n{content}\n```\n\n"
+
+        # Appeler VALIDATEUR
+        validateur = get_agent("VALIDATEUR")
+        verdict = await validateur.handle(
+            [{"role": "user", "content": validation_prompt}], session_id=session_id
+        )
+        logger.info("Orchestration: VALIDATEUR → %s", verdict[:100])
+        await _emit(
+            on_event, "validation", agent="VALIDATEUR", valid="INVALIDE" not in verdict
+        )
+        return verdict, (
+            "Le VALIDATEUR a détecté des problèmes dans ton code. Corrige-les."
+            f"\n\nRAPPORT VALIDATEUR :\n{verdict}"
+        )
+
     @staticmethod
     def _read_project_files(
         project_path: str,
@@ -356,65 +744,36 @@ class SimpleOrchestrator:
         return file_contents
 
     @staticmethod
-    async def _build_code_report(
-        file_contents: dict[str, str],
-        session_id: str | None = None,
-    ) -> str:
+    async def _build_code_report(project_path: str, files_written: list[dict]) -> tuple[str, int]:
         """
-        Demande à BASE d'analyser les fichiers produits et de générer
-        un rapport structuré (classes, fonctions, signatures, imports, routes).
+        Rapport structuré (classes, fonctions, signatures, imports, routes,
+        dépendances) des fichiers produits, extrait localement par l'index des
+        symboles — déterministe, sans appel LLM. Lecture et analyse des fichiers dans
+        le pool d'E/S, hors de la boucle d'événements.
 
         Ce rapport sera inclus dans le followup envoyé à Jarvis_maitre
         pour qu'il puisse donner des instructions précises au CODEUR
         lors des étapes suivantes.
 
         Args:
-            file_contents: Dict {chemin_relatif: contenu} des fichiers lus
-            session_id: ID de session pour traçabilité
+            project_path: Chemin absolu du projet
+            files_written: Liste de dicts {path, status, size}
 
         Returns:
-            Rapport structuré (string) ou chaîne vide si échec
+            (rapport structuré ou chaîne vide si aucun fichier de code, nombre de
+            fichiers écrits distincts) — un fichier réécrit par une passe de complétion
+            ou de correction n'apparaît qu'une fois
         """
-        if not file_contents:
-            return ""
-
-        files_text = ""
-        for path, content in file_contents.items():
-            files_text += f"\n### {path}\n```\n{content}\n```\n"
-
-        report_prompt = (
-            "Analyse ces fichiers et produis un RAPPORT STRUCTURÉ.\n"
-            "Pour chaque fichier, liste :\n"
-            "- Chemin du fichier\n"
-            "- Classes (nom + méthodes avec signatures)\n"
-            "- Fonctions libres (nom + signatures)\n"
-            "- Imports\n"
-            "- Routes API (si FastAPI/Flask)\n"
-            "- Dépendances externes (pip)\n\n"
-            "Format OBLIGATOIRE :\n"
-            "## chemin/fichier.py\n"
-            "- Classes : ClassName(method1(args), method2(args))\n"
-            "- Fonctions : func_name(args) -> return_type\n"
-            "- Imports : module1, module2\n"
-            "- Routes : GET /path, POST /path\n\n"
-            "Sois CONCIS. Pas de code, pas d'explication. Juste le rapport.\n\n"
-            f"--- FICHIERS À ANALYSER ---\n{files_text}"
+        paths = list(
+            dict.fromkeys(f["path"] for f in files_written if f.get("status") == "written")
         )
-
         try:
-            base_agent = get_agent("BASE")
-            messages = [{"role": "user", "content": report_prompt}]
-            report = await base_agent.handle(messages, session_id=session_id)
-
-            logger.info(
-                "Orchestration: rapport BASE généré (%d chars)",
-                len(report),
-            )
-            return report
-
+            report = await io_executor.run(project_path, build_code_report, project_path, paths)
         except Exception:
-            logger.exception("Orchestration: échec génération rapport BASE")
-            return ""
+            logger.exception("Orchestration: échec génération rapport de code")
+            return "", 0
+        logger.info("Orchestration: rapport de code généré (%d chars)", len(report))
+        return report, len(paths)
 
     async def execute_delegation(
         self,
@@ -424,34 +783,85 @@ class SimpleOrchestrator:
         user_prompt: str | None = None,
         function_executor=None,
         session_state=None,
+        on_event=None,
     ) -> dict:
         """
         Exécute une délégation vers un agent.
         Si l'agent est CODEUR et project_path est fourni :
         1. Estime le nombre de passes nécessaires
-        2. Boucle itérative CODEUR/BASE avec détection de stagnation
-        3. Retourne le bilan complet
+        2. Passe 1 : réponse unique, ou génération en éventail si l'instruction
+           cite assez de fichiers (plan_fan_out)
+        3. Boucle itérative CODEUR/BASE avec détection de stagnation
+        4. Retourne le bilan complet
+
+        Les tokens consommés par tous les agents sollicités sont imputés à la délégation.
+
+        `on_event` (optionnel) reçoit les événements de progression :
+        delegation_started, pass, fan_out, budget_exceeded, file_written, validation,
+        delegation_finished.
 
         Returns:
             Dict {agent_name, instruction, result, success, files_written,
-                  passes_used, stagnation}
+                  passes_used, stagnation, budget_exceeded, tokens}
         """
+        with delegation_scope(delegation["agent_name"]) as delegation_id:
+            result = await self._run_delegation(
+                delegation,
+                session_id=session_id,
+                project_path=project_path,
+                user_prompt=user_prompt,
+                function_executor=function_executor,
+                session_state=session_state,
+                on_event=on_event,
+            )
+
+        result["tokens"] = token_ledger.release_delegation(delegation_id)
+        if result["agent_name"] == "CODEUR":
+            written = {f["path"] for f in result["files_written"] if f.get("status") == "written"}
+            codeur_tokens = result["tokens"].get("CODEUR", {}).get("completion_tokens", 0)
+            token_ledger.observe_tokens_per_file(codeur_tokens, len(written))
+        return result
+
+    async def _run_delegation(
+        self,
+        delegation: dict,
+        session_id: str | None = None,
+        project_path: str | None = None,
+        user_prompt: str | None = None,
+        function_executor=None,
+        session_state=None,
+        on_event=None,
+    ) -> dict:
         agent_name = delegation["agent_name"]
         instruction = delegation["instruction"]
+        await _emit(on_event, "delegation_started", agent=agent_name, instruction=instruction[:200])
 
         try:
             agent = get_agent(agent_name)
-            messages = [{"role": "user", "content": instruction}]
-            result = await agent.handle(
-                messages, session_id=session_id, function_executor=function_executor
-            )
 
-            logger.info("Orchestration: %s a répondu (%d chars)", agent_name, len(result))
+            # Combiner instruction du marqueur + prompt user pour extraire les fichiers
+            combined_instruction = instruction
+            if user_prompt:
+                combined_instruction = user_prompt + "\n\n" + instruction
+            fan_out_groups = []
+            if agent_name == "CODEUR" and project_path:
+                expected_files = self._extract_expected_files(combined_instruction)
+                fan_out_groups = self.plan_fan_out(expected_files)
+
+            # En éventail, la génération a lieu après le passage en phase EXECUTION
+            result = ""
+            if not fan_out_groups:
+                messages = [{"role": "user", "content": instruction}]
+                result = await agent.handle(
+                    messages, session_id=session_id, function_executor=function_executor
+                )
+                logger.info("Orchestration: %s a répondu (%d chars)", agent_name, len(result))
 
             # Si CODEUR + projet : boucle adaptative CODEUR/BASE
             files_written = []
             passes_used = 1
             stagnation = False
+            budget_exceeded = False
 
             if agent_name == "CODEUR" and project_path:
                 # 🔥 CRITIQUE : Passer en phase EXECUTION pour autoriser écriture disque
@@ -461,12 +871,7 @@ class SimpleOrchestrator:
                         logger.info("Orchestration: transition phase REFLEXION → EXECUTION pour CODEUR")
                     except Exception as e:
                         logger.warning("Orchestration: échec transition phase: %s", str(e))
-                
-                # Combiner instruction du marqueur + prompt user pour extraire les fichiers
-                combined_instruction = instruction
-                if user_prompt:
-                    combined_instruction = user_prompt + "\n\n" + instruction
-                expected_files = self._extract_expected_files(combined_instruction)
+
                 logger.info(
                     "Orchestration: instruction CODEUR (%d chars), fichiers attendus extraits: %s",
                     len(instruction),
@@ -475,10 +880,26 @@ class SimpleOrchestrator:
                 max_passes = self.compute_max_passes(instruction)
                 empty_passes = 0
 
-                # Passe 1 : écriture initiale
-                code_blocks = parse_code_blocks(result)
-                if code_blocks:
-                    files_written = write_files_to_project(project_path, code_blocks, session_state)
+                # Passe 1 : écriture initiale (réponse unique, ou éventail par groupe)
+                await _emit(on_event, "pass", agent=agent_name, number=1, max_passes=max_passes)
+                if fan_out_groups:
+                    result, files_written, budget_exceeded = await self._fan_out_generation(
+                        agent,
+                        instruction,
+                        expected_files,
+                        fan_out_groups,
+                        session_id=session_id,
+                        project_path=project_path,
+                        session_state=session_state,
+                        on_event=on_event,
+                    )
+                else:
+                    code_blocks = await self._parse_reply(result, session_id=session_id)
+                    if code_blocks:
+                        files_written = await write_files_to_project_async(
+                            project_path, code_blocks, session_state
+                        )
+                        await _emit_files_written(on_event, agent_name, files_written)
                 written_count = sum(1 for f in files_written if f["status"] == "written")
                 logger.info(
                     "Orchestration: passe 1 — %d fichier(s) écrit(s) dans %s",
@@ -488,6 +909,15 @@ class SimpleOrchestrator:
 
                 # Boucle de vérification adaptative
                 for pass_num in range(2, max_passes + 1):
+                    if await token_ledger.budget_exhausted(session_id):
+                        logger.warning(
+                            "Orchestration: budget de tokens épuisé — arrêt avant la passe %d",
+                            pass_num,
+                        )
+                        await _emit(on_event, "budget_exceeded", agent=agent_name, number=pass_num)
+                        budget_exceeded = True
+                        break
+
                     verification = await self._verify_completeness(
                         combined_instruction,
                         result,
@@ -507,6 +937,9 @@ class SimpleOrchestrator:
                         pass_num,
                         max_passes,
                     )
+                    await _emit(
+                        on_event, "pass", agent=agent_name, number=pass_num, max_passes=max_passes
+                    )
 
                     try:
                         completion_result = await self._request_completion(
@@ -517,13 +950,16 @@ class SimpleOrchestrator:
                         )
                         result += "\n\n" + completion_result
 
-                        extra_blocks = parse_code_blocks(completion_result)
+                        extra_blocks = await self._parse_reply(
+                            completion_result, session_id=session_id
+                        )
                         extra_count = 0
                         if extra_blocks:
-                            extra_written = write_files_to_project(
+                            extra_written = await write_files_to_project_async(
                                 project_path, extra_blocks, session_state
                             )
                             files_written.extend(extra_written)
+                            await _emit_files_written(on_event, agent_name, extra_written)
                             extra_count = sum(1 for f in extra_written if f["status"] == "written")
 
                         passes_used = pass_num
@@ -556,67 +992,73 @@ class SimpleOrchestrator:
                         )
                         break
 
-            # Validation automatique par VALIDATEUR après génération de code
+            # Validation automatique après génération de code : pré-validation locale,
+            # puis VALIDATEUR (revue sémantique) seulement si elle ne trouve rien
             validation_result = None
             if agent_name == "CODEUR" and files_written and project_path:
                 try:
-                    # Lire fichiers écrits pour validation
-                    file_contents = self._read_project_files(project_path, files_written)
-
-                    if file_contents:
-                        # Construire prompt validation
-                        validation_prompt = "Vérifie ce code produit par le CODEUR :\n\n"
-                        for path, content in file_contents.items():
-                            validation_prompt += f"# {path}\n```\n{content}\n```\n\n"
-
-                        # Appeler VALIDATEUR
-                        validateur = get_agent("VALIDATEUR")
-                        validation_result = await validateur.handle(
-                            [{"role": "user", "content": validation_prompt}], session_id=session_id
+                    validation_result, correction_header = await self._validate_files(
+                        project_path, files_written, session_id, on_event
+                    )
+
+                    # Si INVALIDE et passes restantes, relancer CODEUR avec corrections
+                    if (
+                        validation_result
+                        and "INVALIDE" in validation_result
+                        and passes_used < max_passes
+                        and not await token_ledger.budget_exhausted(session_id)
+                    ):
+                        logger.warning(
+                            "Orchestration: problèmes détectés à la validation, relance CODEUR pour correction"
                         )
 
-                        logger.info("Orchestration: VALIDATEUR → %s", validation_result[:100])
+                        correction_prompt = (
+                            f"{correction_header}\n\n"
+                            f"INSTRUCTION ORIGINALE :\n{instruction}\n\n"
+                            "Régénère UNIQUEMENT les fichiers avec problèmes. Respecte le format de sortie."
+                        )
 
-                        # Si INVALIDE et passes restantes, relancer CODEUR avec corrections
-                        if "INVALIDE" in validation_result and passes_used < max_passes:
-                            logger.warning(
-                                "Orchestration: VALIDATEUR a détecté des problèmes, relance CODEUR pour correction"
-                            )
+                        # Relancer CODEUR
+                        result = await agent.handle(
+                            [{"role": "user", "content": correction_prompt}],
+                            session_id=session_id,
+                        )
+                        passes_used += 1
 
-                            # Extraire recommandations du rapport VALIDATEUR
-                            correction_prompt = (
-                                f"Le VALIDATEUR a détecté des problèmes dans ton code. Corrige-les.\n\n"
-                                f"RAPPORT VALIDATEUR :\n{validation_result}\n\n"
-                                f"INSTRUCTION ORIGINALE :\n{instruction}\n\n"
-                                "Régénère UNIQUEMENT les fichiers avec problèmes. Respecte le format de sortie."
+                        # Parser et écrire fichiers corrigés
+                        parsed = await self._parse_reply(result, session_id=session_id)
+                        if parsed and project_path:
+                            corrected_files = await write_files_to_project_async(
+                                project_path, parsed, session_state
                             )
-
-                            # Relancer CODEUR
-                            result = await agent.handle(
-                                [{"role": "user", "content": correction_prompt}],
-                                session_id=session_id,
+                            files_written.extend(corrected_files)
+                            await _emit_files_written(on_event, agent_name, corrected_files)
+                            logger.info(
+                                "Orchestration: CODEUR correction → %d fichiers corrigés",
+                                len(corrected_files),
                             )
-                            passes_used += 1
-
-                            # Parser et écrire fichiers corrigés
-                            parsed = parse_code_blocks(result)
-                            if parsed and project_path:
-                                corrected_files = write_files_to_project(
-                                    project_path, parsed, session_state
-                                )
-                                files_written.extend(corrected_files)
-                                logger.info(
-                                    "Orchestration: CODEUR correction → %d fichiers corrigés",
-                                    len(corrected_files),
+                            # Les fichiers corrigés repassent la pré-validation, puis le
+                            # VALIDATEUR ; le verdict final est celui des fichiers corrigés
+                            if any(f["status"] == "written" for f in corrected_files):
+                                validation_result, _ = await self._validate_files(
+                                    project_path, corrected_files, session_id, on_event
                                 )
-                        elif "INVALIDE" in validation_result:
-                            logger.warning(
-                                "Orchestration: VALIDATEUR a détecté des problèmes mais max passes atteint"
-                            )
+                    elif validation_result and "INVALIDE" in validation_result:
+                        logger.warning(
+                            "Orchestration: problèmes détectés à la validation mais max passes ou budget atteint"
+                        )
 
                 except Exception:
                     logger.exception("Orchestration: échec validation VALIDATEUR")
 
+            await _emit(
+                on_event,
+                "delegation_finished",
+                agent=agent_name,
+                success=True,
+                passes_used=passes_used,
+                files_written=sum(1 for f in files_written if f["status"] == "written"),
+            )
             return {
                 "agent_name": agent_name,
                 "instruction": instruction,
@@ -625,11 +1067,15 @@ class SimpleOrchestrator:
                 "files_written": files_written,
                 "passes_used": passes_used,
                 "stagnation": stagnation,
+                "budget_exceeded": budget_exceeded,
                 "validation": validation_result,
             }
 
         except Exception as e:
             logger.exception("Orchestration: échec appel %s", agent_name)
+            await _emit(
+                on_event, "delegation_finished", agent=agent_name, success=False, error=str(e)
+            )
             return {
                 "agent_name": agent_name,
                 "instruction": instruction,
@@ -638,9 +1084,68 @@ class SimpleOrchestrator:
                 "files_written": [],
                 "passes_used": 0,
                 "stagnation": False,
+                "budget_exceeded": False,
                 "validation": None,
             }
 
+    @staticmethod
+    def plan_delegation_stages(
+        delegations: list[dict], project_path: str | None = None
+    ) -> list[list[int]]:
+        """
+        Ordonnance les délégations en étapes successives (indices dans `delegations`).
+        Les délégations d'une même étape sont indépendantes et peuvent s'exécuter en
+        parallèle. Avec un projet, les agents qui l'écrivent (CODEUR) passent avant
+        ceux qui le lisent (BASE, VALIDATEUR) ; sans projet, aucune dépendance.
+        """
+        if not delegations:
+            return []
+        if not project_path:
+            return [list(range(len(delegations)))]
+        writers = [i for i, d in enumerate(delegations) if d["agent_name"] in WRITER_AGENTS]
+        readers = [i for i, d in enumerate(delegations) if d["agent_name"] not in WRITER_AGENTS]
+        return [stage for stage in (writers, readers) if stage]
+
+    async def run_delegations(
+        self,
+        delegations: list[dict],
+        session_id: str | None = None,
+        project_path: str | None = None,
+        user_prompt: str | None = None,
+        function_executor=None,
+        session_state=None,
+        on_event=None,
+    ) -> list[dict]:
+        """
+        Exécute les délégations étape par étape (plan_delegation_stages), chaque étape
+        via asyncio.gather sous un plafond de concurrence (ORCHESTRATION_MAX_PARALLEL) :
+        les appels LLM passent de toute façon par le limiteur de débit du modèle, le
+        plafond évite d'y empiler plus de requêtes qu'il ne peut en servir.
+
+        Returns:
+            Résultats dans l'ordre de détection des marqueurs, quel que soit l'ordre
+            de terminaison (bilan déterministe pour build_followup_message).
+        """
+        semaphore = asyncio.Semaphore(_max_parallel_delegations())
+        results: list[dict | None] = [None] * len(delegations)
+
+        async def run(index: int) -> None:
+            async with semaphore:
+                results[index] = await self.execute_delegation(
+                    delegations[index],
+                    session_id=session_id,
+                    project_path=project_path,
+                    user_prompt=user_prompt,
+                    function_executor=function_executor,
+                    session_state=session_state,
+                    on_event=on_event,
+                )
+
+        for stage in self.plan_delegation_stages(delegations, project_path):
+            await asyncio.gather(*(run(index) for index in stage))
+
+        return results
+
     @staticmethod
     def build_followup_message(
         original_response: str,
@@ -691,16 +1196,12 @@ class SimpleOrchestrator:
                     file_list += f" (+{len(written) - 5} autres)"
                 parts.append(f"  Fichiers: {file_list}")
 
-        # Rapport BASE ultra-compact (500 chars max)
+        # Rapport de code ultra-compact (500 chars max)
         if code_report:
             # Extraire seulement les noms de classes/fonctions
             compact_report = []
             for line in code_report.split("\n"):
-                if (
-                    line.startswith("## ")
-                    or line.startswith("- Classes:")
-                    or line.startswith("- Fonctions:")
-                ):
+                if line.startswith(("## ", "- Classes", "- Fonctions")):
                     compact_report.append(line[:100])  # Tronquer à 100 chars
 
             report_text = "\n".join(compact_report[:10])  # Max 10 lignes
@@ -733,11 +1234,13 @@ class SimpleOrchestrator:
         project_path: str | None = None,
         function_executor=None,
         session_state: SessionState | None = None,
+        on_event=None,
     ) -> tuple[str, list[dict]]:
         """
         Traite la réponse de Jarvis_maitre :
         1. Détecte les marqueurs de délégation
-        2. Exécute les délégations (boucle adaptative CODEUR/BASE)
+        2. Exécute les délégations (boucle adaptative CODEUR/BASE ; les délégations
+           indépendantes en parallèle, voir run_delegations)
         3. Renvoie le bilan à Jarvis_maitre pour validation finale
         4. Si Jarvis_maitre relance une délégation, reboucle (max 2 relances)
 
@@ -747,6 +1250,8 @@ class SimpleOrchestrator:
             session_id: ID de session pour traçabilité
             project_path: Chemin du projet pour écriture fichiers
             function_executor: Executor pour les function calls
+            on_event: Callback async optionnel recevant les événements de progression
+                      ({"event": ..., ...}) — utilisé par le endpoint SSE
 
         Returns:
             (réponse_finale, all_delegation_results)
@@ -827,26 +1332,27 @@ class SimpleOrchestrator:
                 del SimpleOrchestrator._pending_actions[session_id]
                 logger.info("Orchestration: action confirmée exécutée, flag nettoyé")
 
-            # Exécuter chaque délégation (max 1 par agent)
+            # Exécuter les délégations (max 1 par agent), indépendantes en parallèle
             seen_agents = set()
-            delegation_results = []
+            unique_delegations = []
             for delegation in delegations:
                 if delegation["agent_name"] in seen_agents:
                     continue
                 seen_agents.add(delegation["agent_name"])
-                result = await self.execute_delegation(
-                    delegation,
-                    session_id=session_id,
-                    project_path=project_path,
-                    user_prompt=user_prompt,
-                    function_executor=function_executor,
-                    session_state=session_state,
-                )
-                delegation_results.append(result)
+                unique_delegations.append(delegation)
+            delegation_results = await self.run_delegations(
+                unique_delegations,
+                session_id=session_id,
+                project_path=project_path,
+                user_prompt=user_prompt,
+                function_executor=function_executor,
+                session_state=session_state,
+                on_event=on_event,
+            )
 
             all_delegation_results.extend(delegation_results)
 
-            # Générer le rapport structuré BASE pour les délégations CODEUR
+            # Rapport structuré (index des symboles) pour les délégations CODEUR
             code_report = ""
             if project_path:
                 for result in delegation_results:
@@ -855,13 +1361,11 @@ class SimpleOrchestrator:
                         and result["success"]
                         and result.get("files_written")
                     ):
-                        file_contents = self._read_project_files(
+                        code_report, report_files = await self._build_code_report(
                             project_path, result["files_written"]
                         )
-                        if file_contents:
-                            code_report = await self._build_code_report(
-                                file_contents, session_id=session_id
-                            )
+                        if code_report:
+                            await _emit(on_event, "code_report", files=report_files)
                         break  # 1 seul rapport par cycle de délégation
 
             # Construire le bilan et renvoyer à Jarvis_maitre
@@ -875,11 +1379,16 @@ class SimpleOrchestrator:
                     {"role": "assistant", "content": current_response},
                     {"role": "user", "content": followup},
                 ]
+                await _emit(on_event, "synthesis", agent="JARVIS_Maître", relance=relance_num)
                 final_response = await maitre.handle(running_history, session_id=session_id)
 
                 # Vérifier si Jarvis_maitre relance une délégation
                 new_delegations = self.detect_delegations(final_response)
-                if new_delegations and relance_num < self.MAX_RELANCES_MAITRE:
+                if (
+                    new_delegations
+                    and relance_num < self.MAX_RELANCES_MAITRE
+                    and not await token_ledger.budget_exhausted(session_id)
+                ):
                     logger.info(
                         "Orchestration: Jarvis_maitre relance — "
                         "nouvelle délégation détectée (relance %d/%d)",
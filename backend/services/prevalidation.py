@@ -0,0 +1,378 @@
+"""
+Pré-validation locale du code produit — JARVIS 2.0
+Contrôles statiques exécutés avant le VALIDATEUR, sans appel LLM :
+- Python : compilation (syntaxe, indentation), définitions dupliquées
+- JSON / TOML / YAML : analyse du format (YAML si PyYAML est installé)
+- Imports internes au projet : modules Python relatifs ou de paquets du projet,
+  imports relatifs JS/TS ("./module")
+
+Les fichiers sont analysés en parallèle dans un pool de processus ; la résolution
+des imports se fait ensuite dans le processus principal (index des fichiers).
+Un diagnostic bloque l'appel au VALIDATEUR : il est transmis tel quel au CODEUR
+dans la consigne de correction.
+
+Configuration via .env (valeurs par défaut entre parenthèses) :
+- PREVALIDATION_WORKERS (4)          : processus du pool (0 = analyse dans le processus courant)
+- PREVALIDATION_POOL_MIN_FILES (4)   : fichiers à partir desquels le pool est utilisé
+- PREVALIDATION_MAX_DIAGNOSTICS (20) : diagnostics retenus au maximum
+"""
+
+import ast
+import asyncio
+import json
+import logging
+import posixpath
+import tomllib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+
+from backend.services.common import env_int
+from backend.services.file_index import get_file_index
+from backend.services.io_executor import io_executor
+from backend.services.symbol_index import SCRIPT_EXTENSIONS, parse_script
+
+try:
+    import yaml
+except ImportError:  # PyYAML optionnel : fichiers YAML non vérifiés
+    yaml = None
+
+logger = logging.getLogger(__name__)
+
+CHECKED_EXTENSIONS = {".py", ".json", ".toml", ".yaml", ".yml"} | SCRIPT_EXTENSIONS
+MAX_FILE_BYTES = 2 * 1024 * 1024
+
+
+@dataclass(slots=True)
+class Diagnostic:
+    path: str
+    line: int | None
+    check: str  # syntax, duplicate, json, toml, yaml, import
+    message: str
+
+    def format(self) -> str:
+        location = f"{self.path}:{self.line}" if self.line else self.path
+        return f"- {location} [{self.check}] {self.message}"
+
+
+def format_diagnostics(diagnostics: list[Diagnostic]) -> str:
+    return "\n".join(d.format() for d in diagnostics)
+
+
+# ----------------------------------------------------------------------------
+# Analyse d'un fichier (exécutée dans le pool de processus)
+# ----------------------------------------------------------------------------
+
+
+def _python_duplicates(rel: str, tree: ast.Module) -> list[Diagnostic]:
+    """Fonctions/classes redéfinies dans un même module ou une même classe."""
+
+    def is_overload(node) -> bool:
+        for decorator in getattr(node, "decorator_list", []):
+            if isinstance(decorator, ast.Attribute):
+                name = decorator.attr
+            else:
+                name = getattr(decorator, "id", "")
+            if name in ("overload", "setter", "getter", "deleter", "register"):
+                return True
+        return False
+
+    diagnostics = []
+    definitions = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+    scopes = [(tree.body, None)] + [
+        (node.body, node.name) for node in tree.body if isinstance(node, ast.ClassDef)
+    ]
+    for body, owner in scopes:
+        seen: dict[str, int] = {}
+        for node in body:
+            if not isinstance(node, definitions) or is_overload(node):
+                continue
+            if node.name in seen:
+                where = f"classe {owner}" if owner else "module"
+                diagnostics.append(
+                    Diagnostic(
+                        rel,
+                        node.lineno,
+                        "duplicate",
+                        f"« {node.name} » déjà défini ligne {seen[node.name]} ({where})",
+                    )
+                )
+            else:
+                seen[node.name] = node.lineno
+    return diagnostics
+
+
+def _python_module_info(tree: ast.Module) -> tuple[list[tuple], list[str] | None]:
+    """Imports [(module, [noms], niveau, ligne)] et noms de premier niveau (None : dynamique)."""
+    imports = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.extend((alias.name, [], 0, node.lineno) for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            names = [alias.name for alias in node.names]
+            imports.append((node.module or "", names, node.level, node.lineno))
+
+    # Noms liés au niveau module ; blocs if/try/with… parcourus entièrement (sur-ensemble)
+    defined = []
+    for statement in tree.body:
+        if isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            nodes = [statement]
+        else:
+            nodes = ast.walk(statement)
+        for node in nodes:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                defined.append(node.name)
+            elif isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+                defined.append(node.id)
+            elif isinstance(node, ast.Import):
+                defined.extend((a.asname or a.name).split(".")[0] for a in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                if any(a.name == "*" for a in node.names):
+                    return imports, None
+                defined.extend(a.asname or a.name for a in node.names)
+    if "__getattr__" in defined:
+        return imports, None
+    return imports, defined
+
+
+def check_file(root: str, rel: str) -> dict:
+    """
+    Contrôles locaux d'un fichier. Retourne un dict sérialisable :
+    {diagnostics, imports, defined} (imports/defined : Python et JS/TS uniquement).
+    """
+    result = {"diagnostics": [], "imports": [], "defined": None}
+    path = Path(root) / rel
+    try:
+        if path.stat().st_size > MAX_FILE_BYTES:
+            return result
+        content = path.read_text(encoding="utf-8")
+    except UnicodeDecodeError:
+        result["diagnostics"].append(Diagnostic(rel, None, "encoding", "fichier non UTF-8"))
+        return result
+    except OSError:
+        return result
+
+    suffix = path.suffix.lower()
+    diagnostics = result["diagnostics"]
+    if suffix == ".py":
+        try:
+            tree = ast.parse(content, rel)
+            # La compilation détecte aussi return/await/nonlocal mal placés
+            compile(tree, rel, "exec", dont_inherit=True)
+        except SyntaxError as e:
+            diagnostics.append(Diagnostic(rel, e.lineno, "syntax", e.msg))
+            return result
+        diagnostics.extend(_python_duplicates(rel, tree))
+        result["imports"], result["defined"] = _python_module_info(tree)
+    elif suffix == ".json":
+        try:
+            json.loads(content)
+        except json.JSONDecodeError as e:
+            diagnostics.append(Diagnostic(rel, e.lineno, "json", e.msg))
+    elif suffix == ".toml":
+        try:
+            tomllib.loads(content)
+        except tomllib.TOMLDecodeError as e:
+            diagnostics.append(Diagnostic(rel, None, "toml", str(e)))
+    elif suffix in (".yaml", ".yml"):
+        if yaml is not None:
+            try:
+                list(yaml.safe_load_all(content))
+            except yaml.YAMLError as e:
+                mark = getattr(e, "problem_mark", None)
+                line = mark.line + 1 if mark is not None else None
+                message = getattr(e, "problem", None) or str(e)
+                diagnostics.append(Diagnostic(rel, line, "yaml", message))
+    elif suffix in SCRIPT_EXTENSIONS:
+        result["imports"] = [(module, [], 0, None) for module in parse_script(rel, content).imports]
+    return result
+
+
+# ----------------------------------------------------------------------------
+# Résolution des imports internes (processus principal)
+# ----------------------------------------------------------------------------
+
+
+class _ImportResolver:
+    """Existence des modules du projet, depuis l'index des fichiers et le lot analysé."""
+
+    SCRIPT_SUFFIXES = ("", ".ts", ".tsx", ".js", ".jsx", ".mjs", ".cjs", ".json")
+    # Imports ESM/NodeNext : « ./util.js » désigne aussi la source TypeScript util.ts
+    TS_EQUIVALENTS = {
+        ".js": (".ts", ".tsx"),
+        ".jsx": (".tsx",),
+        ".mjs": (".mts",),
+        ".cjs": (".cts",),
+    }
+
+    def __init__(self, project_path: str, defined_by_path: dict[str, list[str] | None]):
+        self.index = get_file_index(project_path)
+        self.defined_by_path = defined_by_path
+
+    def _exists(self, rel: str) -> bool:
+        return self.index.get(rel) is not None
+
+    def _is_dir(self, rel: str) -> bool:
+        entry = self.index.get(rel)
+        return entry is not None and entry.is_dir
+
+    def python_module(self, rel_module: str) -> str | None:
+        """Chemin du module (fichier .py, __init__.py ou dossier namespace) ou None."""
+        if self._exists(f"{rel_module}.py"):
+            return f"{rel_module}.py"
+        if self._exists(f"{rel_module}/__init__.py"):
+            return f"{rel_module}/__init__.py"
+        if self._is_dir(rel_module):
+            return rel_module
+        return None
+
+    def check_python(self, rel: str, imports: list[tuple]) -> list[Diagnostic]:
+        diagnostics = []
+        package = posixpath.dirname(rel)
+        for module, names, level, line in imports:
+            if level:
+                base = package
+                for _ in range(level - 1):
+                    base = posixpath.dirname(base)
+                target = posixpath.join(base, *module.split(".")) if module else base
+            else:
+                top = module.split(".")[0]
+                if not (self._exists(f"{top}.py") or self._is_dir(top)):
+                    continue  # stdlib ou paquet externe
+                target = "/".join(module.split("."))
+
+            resolved = self.python_module(target) if target else ""
+            if resolved is None:
+                shown = "." * level + module
+                diagnostics.append(
+                    Diagnostic(rel, line, "import", f"module interne introuvable : {shown}")
+                )
+                continue
+            for name in names:
+                if name == "*" or self._name_available(resolved, target, name):
+                    continue
+                shown = "." * level + module
+                diagnostics.append(
+                    Diagnostic(rel, line, "import", f"« {name} » introuvable dans {shown}")
+                )
+        return diagnostics
+
+    def _name_available(self, resolved: str, target: str, name: str) -> bool:
+        if target and self.python_module(f"{target}/{name}") is not None:
+            return True  # sous-module
+        if not resolved.endswith(".py"):
+            return True  # paquet namespace : rien à vérifier
+        if resolved not in self.defined_by_path:
+            return True  # module hors du lot : noms non vérifiés
+        defined = self.defined_by_path[resolved]
+        return defined is None or name in defined
+
+    def check_script(self, rel: str, imports: list[tuple]) -> list[Diagnostic]:
+        diagnostics = []
+        base = posixpath.dirname(rel)
+        for module, _, _, line in imports:
+            if not module.startswith("."):
+                continue
+            # Suffixes de requête des bundlers (« ./logo.svg?url », « ./a.css#x »)
+            specifier = module.split("?", 1)[0].split("#", 1)[0]
+            target = posixpath.normpath(posixpath.join(base, specifier))
+            candidates = [target + suffix for suffix in self.SCRIPT_SUFFIXES]
+            candidates += [f"{target}/index{suffix}" for suffix in self.SCRIPT_SUFFIXES[1:]]
+            stem, extension = posixpath.splitext(target)
+            candidates += [stem + ts for ts in self.TS_EQUIVALENTS.get(extension, ())]
+            if not any(self._exists(c) and not self._is_dir(c) for c in candidates):
+                diagnostics.append(
+                    Diagnostic(rel, line, "import", f"module relatif introuvable : {module}")
+                )
+        return diagnostics
+
+
+def _resolve_imports(project_path: str, analyses: dict[str, dict]) -> list[Diagnostic]:
+    defined_by_path = {
+        rel: analysis["defined"] for rel, analysis in analyses.items() if rel.endswith(".py")
+    }
+    resolver = _ImportResolver(project_path, defined_by_path)
+    diagnostics = []
+    for rel, analysis in analyses.items():
+        if not analysis["imports"]:
+            continue
+        if rel.endswith(".py"):
+            diagnostics.extend(resolver.check_python(rel, analysis["imports"]))
+        else:
+            diagnostics.extend(resolver.check_script(rel, analysis["imports"]))
+    return diagnostics
+
+
+# ----------------------------------------------------------------------------
+# Point d'entrée
+# ----------------------------------------------------------------------------
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _process_pool() -> ProcessPoolExecutor | None:
+    global _pool
+    workers = env_int("PREVALIDATION_WORKERS", 4, minimum=0)
+    if workers == 0:
+        return None
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=workers)
+    return _pool
+
+
+async def _analyze(root: str, paths: list[str]) -> list[dict]:
+    global _pool
+    loop = asyncio.get_running_loop()
+    pool = None
+    if len(paths) >= env_int("PREVALIDATION_POOL_MIN_FILES", 4, minimum=1):
+        pool = _process_pool()
+    if pool is not None:
+        try:
+            return await asyncio.gather(
+                *(loop.run_in_executor(pool, check_file, root, rel) for rel in paths)
+            )
+        except BrokenProcessPool:
+            _pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+            logger.warning("Pré-validation : pool de processus indisponible, analyse locale")
+    return await io_executor.run(root, lambda: [check_file(root, rel) for rel in paths])
+
+
+def shutdown_prevalidation_pool() -> None:
+    """Arrête le pool de processus (fin de l'application) ; recréé au besoin."""
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+async def prevalidate_files(project_path: str, files_written: list[dict]) -> list[Diagnostic]:
+    """
+    Pré-valide les fichiers écrits (statut "written") d'une délégation.
+
+    Returns:
+        Diagnostics (vide : aucun problème détecté localement), au plus
+        PREVALIDATION_MAX_DIAGNOSTICS
+    """
+    paths = list(
+        dict.fromkeys(
+            f["path"]
+            for f in files_written
+            if f.get("status") == "written" and Path(f["path"]).suffix.lower() in CHECKED_EXTENSIONS
+        )
+    )
+    if not paths:
+        return []
+
+    root = str(Path(project_path).resolve())
+    analyses = dict(
+        zip((Path(p).as_posix() for p in paths), await _analyze(root, paths), strict=True)
+    )
+    diagnostics = [d for analysis in analyses.values() for d in analysis["diagnostics"]]
+    diagnostics += await io_executor.run(root, _resolve_imports, root, analyses)
+
+    limit = env_int("PREVALIDATION_MAX_DIAGNOSTICS", 20, minimum=1)
+    if diagnostics:
+        logger.info("Pré-validation : %d problème(s) détecté(s)", len(diagnostics))
+    return diagnostics[:limit]
@@ -13,12 +13,18 @@ Interdictions :
 - Pas d'écriture disque
 
 Ce service retourne des données. Point.
+
+Audit de dette : une passe par fichier (DebtScanner), résultats mémorisés par
+fichier et recalculés uniquement pour les fichiers modifiés. Voir debt_scanner.py
+pour la configuration.
 """
 
 import os
 from pathlib import Path
 
 from backend.models.session_state import ProjectState
+from backend.services.debt_scanner import DebtScanner
+from backend.services.file_index import IndexEntry, get_file_index
 from backend.services.project_context import format_file_tree
 
 
@@ -57,22 +63,29 @@ class ProjectService:
             - Fichiers code sans dette → CLEAN
             - Dette détectée → DEBT
         """
-        if not os.path.exists(project_path):
-            return ProjectState.NEW
+        return ProjectService.analyze_project(project_path)[0]
 
-        # Compter fichiers code
-        code_files = ProjectService._list_code_files(project_path)
+    @staticmethod
+    def analyze_project(project_path: str) -> tuple[ProjectState, dict | None]:
+        """
+        État du projet et rapport de dette en un seul audit
 
-        if len(code_files) < 3:
-            return ProjectState.NEW
+        Returns:
+            (ProjectState, rapport de dette ou None si le projet est NEW)
+        """
+        if not os.path.exists(project_path):
+            return ProjectState.NEW, None
+
+        # Compter fichiers code (3 suffisent pour sortir de NEW)
+        if len(ProjectService._list_code_files(project_path, max_files=3)) < 3:
+            return ProjectState.NEW, None
 
-        # Analyser dette
         debt_report = ProjectService.analyze_debt(project_path)
 
         if debt_report["total_issues"] > 0:
-            return ProjectState.DEBT
+            return ProjectState.DEBT, debt_report
 
-        return ProjectState.CLEAN
+        return ProjectState.CLEAN, debt_report
 
     @staticmethod
     def analyze_debt(project_path: str) -> dict:
@@ -89,8 +102,9 @@ class ProjectService:
                 "summary": "Projet inexistant",
             }
 
-        code_files = ProjectService._list_code_files(project_path)
-        if not code_files:
+        # Tous les fichiers code : le scanner ne relit que ceux modifiés depuis le dernier audit
+        code_entries = ProjectService._code_entries(project_path)
+        if not code_entries:
             return {
                 "total_issues": 0,
                 "files_with_debt": [],
@@ -101,28 +115,28 @@ class ProjectService:
         files_with_debt = []
         debt_by_type = dict.fromkeys(ProjectService.DEBT_PATTERNS, 0)
 
-        for file_path in code_files:
+        for entry in code_entries:
+            file_path = os.path.join(project_path, *entry.path.split("/"))
             try:
-                with open(file_path, encoding="utf-8", errors="ignore") as f:
-                    content = f.read()
-
-                file_issues = []
-                for pattern in ProjectService.DEBT_PATTERNS:
-                    count = content.count(pattern)
-                    if count > 0:
-                        debt_by_type[pattern] += count
-                        file_issues.append(f"{pattern} ({count})")
-
-                if file_issues:
-                    files_with_debt.append(
-                        {
-                            "path": os.path.relpath(file_path, project_path),
-                            "issues": file_issues,
-                        }
-                    )
+                counts = _debt_scanner.count_file(file_path, entry.mtime_ns, entry.size)
             except Exception:
                 continue
 
+            file_issues = []
+            for pattern in ProjectService.DEBT_PATTERNS:
+                count = counts.get(pattern, 0)
+                if count > 0:
+                    debt_by_type[pattern] += count
+                    file_issues.append(f"{pattern} ({count})")
+
+            if file_issues:
+                files_with_debt.append(
+                    {
+                        "path": os.path.relpath(file_path, project_path),
+                        "issues": file_issues,
+                    }
+                )
+
         total_issues = sum(debt_by_type.values())
 
         if total_issues == 0:
@@ -209,7 +223,8 @@ MODE PROJET: Méthodologie obligatoire"""
     @staticmethod
     def _list_code_files(project_path: str, max_files: int = 100) -> list[str]:
         """
-        Liste fichiers code du projet
+        Liste fichiers code du projet (depuis l'index du projet, qui exclut déjà
+        node_modules, venv, __pycache__, dist, build)
 
         Args:
             project_path: Chemin projet
@@ -218,31 +233,36 @@ MODE PROJET: Méthodologie obligatoire"""
         Returns:
             Liste chemins absolus fichiers code
         """
-        code_files = []
+        return [
+            os.path.join(project_path, *entry.path.split("/"))
+            for entry in ProjectService._code_entries(project_path, max_files)
+        ]
+
+    @staticmethod
+    def _code_entries(project_path: str, max_files: int | None = None) -> list[IndexEntry]:
+        """
+        Entrées d'index des fichiers code (hors dossiers cachés), sans limite par défaut
+        """
+        entries = []
 
         try:
-            for root, dirs, files in os.walk(project_path):
-                # Ignorer dossiers cachés et dépendances
-                dirs[:] = [
-                    d
-                    for d in dirs
-                    if not d.startswith(".")
-                    and d not in {"node_modules", "venv", "__pycache__", "dist", "build"}
-                ]
-
-                for file in files:
-                    if len(code_files) >= max_files:
-                        break
-
-                    ext = Path(file).suffix
-                    if ext in ProjectService.CODE_EXTENSIONS:
-                        code_files.append(os.path.join(root, file))
-
-                if len(code_files) >= max_files:
+            for entry in get_file_index(project_path).files():
+                if max_files is not None and len(entries) >= max_files:
                     break
 
+                # Ignorer dossiers cachés
+                parts = entry.path.split("/")
+                if any(part.startswith(".") for part in parts[:-1]):
+                    continue
+
+                if Path(entry.name).suffix in ProjectService.CODE_EXTENSIONS:
+                    entries.append(entry)
+
         except Exception:
             # Erreur accès dossier, retourner ce qu'on a
             pass
 
-        return code_files
+        return entries
+
+
+_debt_scanner = DebtScanner.from_env(ProjectService.DEBT_PATTERNS)
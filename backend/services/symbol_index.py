@@ -0,0 +1,536 @@
+"""
+Index des symboles de code — JARVIS 2.0
+Extraction statique et déterministe des classes, méthodes, fonctions, imports, routes
+et dépendances externes des fichiers d'un projet :
+- Python : module ast
+- JavaScript / TypeScript : tokenizer léger (commentaires, chaînes, accolades)
+
+Produit le rapport structuré joint au bilan envoyé à JARVIS_Maître (remplace l'appel
+LLM à BASE) et répond aux recherches de symboles des agents (find_symbols).
+
+Mise à jour incrémentale : write_files_to_project met à jour les index ouverts avec
+le contenu écrit (record_write) ; à chaque requête, les fichiers dont
+(mtime_ns, taille) a changé sont ré-analysés.
+
+Configuration via .env (valeurs par défaut entre parenthèses) :
+- SYMBOL_INDEX_MAX_PROJECTS (16)        : index conservés (LRU)
+- SYMBOL_INDEX_MAX_FILE_BYTES (1048576) : taille maximum d'un fichier analysé (octets)
+"""
+
+import ast
+import logging
+import re
+import sys
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from backend.services.common import ProjectRegistry, env_int
+from backend.services.file_index import get_file_index
+
+logger = logging.getLogger(__name__)
+
+PYTHON_EXTENSIONS = {".py"}
+SCRIPT_EXTENSIONS = {".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs"}
+HTTP_METHODS = {"get", "post", "put", "delete", "patch", "head", "options"}
+
+
+@dataclass(slots=True)
+class Symbol:
+    name: str
+    kind: str  # class, function, method
+    signature: str
+    line: int
+    parent: str | None = None
+
+
+@dataclass(slots=True)
+class FileSymbols:
+    path: str
+    language: str
+    symbols: list[Symbol] = field(default_factory=list)
+    imports: list[str] = field(default_factory=list)
+    routes: list[str] = field(default_factory=list)
+    error: str | None = None
+
+
+# ----------------------------------------------------------------------------
+# Python
+# ----------------------------------------------------------------------------
+
+
+def _py_signature(node) -> str:
+    args = node.args
+    if args.args and args.args[0].arg in ("self", "cls"):
+        # Les valeurs par défaut s'alignent sur la fin : self n'en a pas
+        positional = len(args.posonlyargs) + len(args.args) - 1
+        args = ast.arguments(
+            posonlyargs=args.posonlyargs,
+            args=args.args[1:],
+            vararg=args.vararg,
+            kwonlyargs=args.kwonlyargs,
+            kw_defaults=args.kw_defaults,
+            kwarg=args.kwarg,
+            defaults=args.defaults[-positional:] if positional else [],
+        )
+    signature = f"{node.name}({ast.unparse(args)})"
+    if node.returns is not None:
+        signature += f" -> {ast.unparse(node.returns)}"
+    return signature
+
+
+def _py_routes(node) -> list[str]:
+    """Routes FastAPI (@app.get("/x")) et Flask (@app.route("/x", methods=[...]))."""
+    routes = []
+    for decorator in node.decorator_list:
+        if not (isinstance(decorator, ast.Call) and isinstance(decorator.func, ast.Attribute)):
+            continue
+        method = decorator.func.attr.lower()
+        if not decorator.args or not isinstance(decorator.args[0], ast.Constant):
+            continue
+        path = decorator.args[0].value
+        if method in HTTP_METHODS:
+            routes.append(f"{method.upper()} {path}")
+        elif method == "route":
+            methods = ["GET"]
+            for keyword in decorator.keywords:
+                if keyword.arg == "methods" and isinstance(keyword.value, (ast.List, ast.Tuple)):
+                    methods = [
+                        e.value.upper() for e in keyword.value.elts if isinstance(e, ast.Constant)
+                    ]
+            routes.extend(f"{m} {path}" for m in methods)
+    return routes
+
+
+def parse_python(path: str, content: str) -> FileSymbols:
+    result = FileSymbols(path=path, language="python")
+    try:
+        tree = ast.parse(content)
+    except SyntaxError as e:
+        result.error = f"syntaxe invalide ligne {e.lineno}"
+        return result
+
+    functions = (ast.FunctionDef, ast.AsyncFunctionDef)
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            result.symbols.append(Symbol(node.name, "class", node.name, node.lineno))
+            for item in node.body:
+                if isinstance(item, functions):
+                    result.symbols.append(
+                        Symbol(item.name, "method", _py_signature(item), item.lineno, node.name)
+                    )
+                    result.routes.extend(_py_routes(item))
+        elif isinstance(node, functions):
+            result.symbols.append(Symbol(node.name, "function", _py_signature(node), node.lineno))
+            result.routes.extend(_py_routes(node))
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            result.imports.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            result.imports.append("." * node.level + (node.module or ""))
+    result.imports = list(dict.fromkeys(result.imports))
+    return result
+
+
+# ----------------------------------------------------------------------------
+# JavaScript / TypeScript
+# ----------------------------------------------------------------------------
+
+_JS_TOKEN = re.compile(
+    r"""
+    (?P<comment>//[^\n]*|/\*.*?\*/)
+    |(?P<string>'(?:\\.|[^'\\\n])*'|"(?:\\.|[^"\\\n])*"|`(?:\\.|[^`\\])*`)
+    |(?P<ident>[A-Za-z_$][\w$]*)
+    |(?P<punct>=>|[{}()\[\];,=<>:.?*])
+    |(?P<newline>\n)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+_JS_MODIFIERS = {
+    "async", "static", "public", "private", "protected", "readonly",
+    "get", "set", "override", "abstract", "export", "default", "declare",
+}
+_JS_NOT_METHODS = {"if", "for", "while", "switch", "catch", "return", "function"}
+
+
+@dataclass(slots=True)
+class _Token:
+    kind: str
+    text: str
+    line: int
+    start: int
+    end: int
+
+
+def _js_tokens(content: str) -> list[_Token]:
+    tokens, line = [], 1
+    for match in _JS_TOKEN.finditer(content):
+        kind = match.lastgroup
+        if kind == "newline":
+            line += 1
+            continue
+        if kind != "comment":
+            tokens.append(_Token(kind, match.group(), line, match.start(), match.end()))
+        line += match.group().count("\n")
+    return tokens
+
+
+def _js_params(content: str, tokens: list[_Token], open_index: int) -> tuple[str, int]:
+    """Texte des paramètres entre la parenthèse `open_index` et sa fermante (index retourné)."""
+    depth = 0
+    for i in range(open_index, len(tokens)):
+        if tokens[i].text == "(":
+            depth += 1
+        elif tokens[i].text == ")":
+            depth -= 1
+            if depth == 0:
+                raw = content[tokens[open_index].end : tokens[i].start]
+                return " ".join(raw.split()), i
+    return "", len(tokens) - 1
+
+
+def _skip_generics(tokens: list[_Token], i: int) -> int:
+    if i < len(tokens) and tokens[i].text == "<":
+        depth = 0
+        while i < len(tokens):
+            depth += {"<": 1, ">": -1}.get(tokens[i].text, 0)
+            i += 1
+            if depth == 0:
+                break
+    return i
+
+
+def _string_value(token: _Token) -> str:
+    return token.text[1:-1]
+
+
+def parse_script(path: str, content: str) -> FileSymbols:
+    typescript = Path(path).suffix.lower() in (".ts", ".tsx")
+    result = FileSymbols(path=path, language="typescript" if typescript else "javascript")
+    tokens = _js_tokens(content)
+    depth = 0
+    class_stack: list[tuple[str, int]] = []  # (nom, profondeur du corps)
+    pending_class = None
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        text = token.text
+        nxt = tokens[i + 1] if i + 1 < len(tokens) else None
+
+        if text == "{":
+            depth += 1
+            if pending_class is not None:
+                class_stack.append((pending_class, depth))
+                pending_class = None
+        elif text == "}":
+            if class_stack and class_stack[-1][1] == depth:
+                class_stack.pop()
+            depth -= 1
+        elif token.kind == "ident" and text == "import" and (nxt is None or nxt.text != "."):
+            # import x from "mod" ; import "mod" ; import("mod") — pas import.meta
+            j = i + 1
+            while j < len(tokens) and tokens[j].kind != "string" and tokens[j].text not in (";", "}"):
+                j += 1
+            if j < len(tokens) and tokens[j].text == "}":
+                j += 1  # import { a, b } from "mod"
+                while j < len(tokens) and tokens[j].kind != "string" and tokens[j].text != ";":
+                    j += 1
+            if j < len(tokens) and tokens[j].kind == "string":
+                result.imports.append(_string_value(tokens[j]))
+            i = j
+        elif token.kind == "ident" and text == "require" and nxt is not None and nxt.text == "(":
+            if i + 2 < len(tokens) and tokens[i + 2].kind == "string":
+                result.imports.append(_string_value(tokens[i + 2]))
+        elif token.kind == "ident" and text == "class" and nxt is not None and nxt.kind == "ident":
+            result.symbols.append(Symbol(nxt.text, "class", nxt.text, token.line))
+            pending_class = nxt.text
+            i += 1
+        elif token.kind == "ident" and text == "function":
+            j = i + 1
+            if j < len(tokens) and tokens[j].text == "*":
+                j += 1
+            if j < len(tokens) and tokens[j].kind == "ident" and depth == 0:
+                name = tokens[j].text
+                k = _skip_generics(tokens, j + 1)
+                if k < len(tokens) and tokens[k].text == "(":
+                    params, end = _js_params(content, tokens, k)
+                    result.symbols.append(Symbol(name, "function", f"{name}({params})", token.line))
+                    i = end
+        elif (
+            token.kind == "ident"
+            and text in ("const", "let", "var")
+            and depth == 0
+            and i + 3 < len(tokens)
+            and tokens[i + 1].kind == "ident"
+        ):
+            # const name = (args) => … ; const name = async function (args) …
+            name = tokens[i + 1].text
+            j = i + 2
+            if tokens[j].text == ":":  # annotation de type TS
+                while j < len(tokens) and tokens[j].text not in ("=", ";"):
+                    j += 1
+            if j < len(tokens) and tokens[j].text == "=":
+                k = j + 1
+                if k < len(tokens) and tokens[k].text == "async":
+                    k += 1
+                if k < len(tokens) and tokens[k].text == "function":
+                    k += 1
+                k = _skip_generics(tokens, k)
+                if k < len(tokens) and tokens[k].text == "(":
+                    params, end = _js_params(content, tokens, k)
+                    after = tokens[end + 1].text if end + 1 < len(tokens) else ""
+                    if after in ("=>", "{", ":") or tokens[k - 1].text == "function":
+                        signature = f"{name}({params})"
+                        result.symbols.append(Symbol(name, "function", signature, token.line))
+                        i = end
+                elif k + 1 < len(tokens) and tokens[k].kind == "ident" and tokens[k + 1].text == "=>":
+                    signature = f"{name}({tokens[k].text})"
+                    result.symbols.append(Symbol(name, "function", signature, token.line))
+        elif (
+            token.kind == "ident"
+            and class_stack
+            and depth == class_stack[-1][1]
+            and text not in _JS_NOT_METHODS
+            and (text not in _JS_MODIFIERS or (nxt is not None and nxt.text == "("))
+        ):
+            # Méthode de classe : nom [<T>] ( … ) [: type] {
+            k = _skip_generics(tokens, i + 1)
+            if k < len(tokens) and tokens[k].text == "(":
+                params, end = _js_params(content, tokens, k)
+                j = end + 1
+                while j < len(tokens) and tokens[j].text not in ("{", ";", "}"):
+                    j += 1
+                if j < len(tokens) and tokens[j].text == "{":
+                    result.symbols.append(
+                        Symbol(text, "method", f"{text}({params})", token.line, class_stack[-1][0])
+                    )
+                    i = end
+        elif (
+            token.kind == "ident"
+            and text.lower() in HTTP_METHODS
+            and i > 0
+            and tokens[i - 1].text == "."
+            and nxt is not None
+            and nxt.text == "("
+            and i + 2 < len(tokens)
+            and tokens[i + 2].kind == "string"
+            and _string_value(tokens[i + 2]).startswith("/")
+        ):
+            # Express : app.get("/path", …), router.post("/path", …)
+            result.routes.append(f"{text.upper()} {_string_value(tokens[i + 2])}")
+        i += 1
+
+    result.imports = list(dict.fromkeys(result.imports))
+    return result
+
+
+def parse_source(path: str, content: str) -> FileSymbols | None:
+    """Symboles d'un fichier selon son extension (None : langage non pris en charge)."""
+    suffix = Path(path).suffix.lower()
+    if suffix in PYTHON_EXTENSIONS:
+        return parse_python(path, content)
+    if suffix in SCRIPT_EXTENSIONS:
+        return parse_script(path, content)
+    return None
+
+
+def external_dependencies(file_symbols: FileSymbols, local_modules: set[str]) -> list[str]:
+    """Paquets externes importés (hors stdlib, imports relatifs et modules du projet)."""
+    deps = []
+    for module in file_symbols.imports:
+        if file_symbols.language == "python":
+            top = module.split(".")[0]
+            if not top or top in sys.stdlib_module_names or top in local_modules:
+                continue
+        else:
+            if module.startswith((".", "/")) or module.startswith("node:"):
+                continue
+            top = "/".join(module.split("/")[:2]) if module.startswith("@") else module.split("/")[0]
+        deps.append(top)
+    return list(dict.fromkeys(deps))
+
+
+def format_report(files: list[FileSymbols], local_modules: set[str] | None = None) -> str:
+    """
+    Rapport structuré, au format historique du rapport BASE : une section « ## chemin »
+    par fichier, puis les lignes Classes, Fonctions, Imports, Routes et Dépendances.
+    """
+    local_modules = local_modules or set()
+    sections = []
+    for fs in files:
+        lines = [f"## {fs.path}"]
+        if fs.error:
+            lines.append(f"- Erreur : {fs.error}")
+        classes = [s for s in fs.symbols if s.kind == "class"]
+        if classes:
+            rendered = []
+            for cls in classes:
+                methods = [
+                    s.signature for s in fs.symbols if s.kind == "method" and s.parent == cls.name
+                ]
+                rendered.append(f"{cls.name}({', '.join(methods)})")
+            lines.append(f"- Classes : {', '.join(rendered)}")
+        functions = [s.signature for s in fs.symbols if s.kind == "function"]
+        if functions:
+            lines.append(f"- Fonctions : {', '.join(functions)}")
+        if fs.imports:
+            lines.append(f"- Imports : {', '.join(fs.imports)}")
+        if fs.routes:
+            lines.append(f"- Routes : {', '.join(fs.routes)}")
+        deps = external_dependencies(fs, local_modules)
+        if deps:
+            lines.append(f"- Dépendances : {', '.join(deps)}")
+        sections.append("\n".join(lines))
+    return "\n\n".join(sections)
+
+
+class SymbolIndex:
+    """Symboles d'un projet, par chemin relatif ; thread-safe."""
+
+    def __init__(self, root: str, max_file_bytes: int = 1024 * 1024):
+        self.root = Path(root).resolve()
+        self.max_file_bytes = max_file_bytes
+        self._lock = threading.Lock()
+        # chemin relatif → (mtime_ns, taille, symboles)
+        self._files: dict[str, tuple[int, int, FileSymbols]] = {}
+
+    def record(self, rel: str, content: str, mtime_ns: int, size: int) -> None:
+        """Analyse un contenu qui vient d'être écrit (pas de relecture disque)."""
+        if Path(rel).suffix.lower() not in PYTHON_EXTENSIONS | SCRIPT_EXTENSIONS:
+            return
+        symbols = parse_source(rel, content)
+        with self._lock:
+            self._files[rel] = (mtime_ns, size, symbols)
+
+    def _refresh_one(self, rel: str, mtime_ns: int, size: int) -> FileSymbols | None:
+        with self._lock:
+            known = self._files.get(rel)
+        if known is not None and known[:2] == (mtime_ns, size):
+            return known[2]
+        if size > self.max_file_bytes:
+            return None
+        try:
+            content = (self.root / rel).read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            return None
+        symbols = parse_source(rel, content)
+        with self._lock:
+            self._files[rel] = (mtime_ns, size, symbols)
+        return symbols
+
+    def files(self, paths: list[str] | None = None) -> list[FileSymbols]:
+        """Symboles des fichiers demandés (tous les fichiers de code si None), à jour."""
+        if paths is None:
+            entries = [
+                e for e in get_file_index(str(self.root)).files()
+                if (e.extension or "").lower() in PYTHON_EXTENSIONS | SCRIPT_EXTENSIONS
+            ]
+            with self._lock:
+                for rel in set(self._files) - {e.path for e in entries}:
+                    del self._files[rel]
+            stats = [(e.path, e.mtime_ns, e.size or 0) for e in entries]
+        else:
+            stats = []
+            for rel in paths:
+                if Path(rel).suffix.lower() not in PYTHON_EXTENSIONS | SCRIPT_EXTENSIONS:
+                    continue
+                try:
+                    st = (self.root / rel).stat()
+                except OSError:
+                    continue
+                stats.append((Path(rel).as_posix(), st.st_mtime_ns, st.st_size))
+
+        results = []
+        for rel, mtime_ns, size in stats:
+            symbols = self._refresh_one(rel, mtime_ns, size)
+            if symbols is not None:
+                results.append(symbols)
+        return results
+
+    def local_modules(self) -> set[str]:
+        """Modules Python de premier niveau du projet (dossiers et fichiers .py racine)."""
+        index = get_file_index(str(self.root))
+        return {
+            e.name if e.is_dir else e.name[:-3]
+            for e in index.children("")
+            if e.is_dir or e.name.endswith(".py")
+        }
+
+    def find(
+        self,
+        query: str = "",
+        kind: str | None = None,
+        path: str | None = None,
+        max_results: int = 50,
+    ) -> list[dict]:
+        """Symboles dont le nom contient `query` (casse ignorée), filtrés par type et chemin."""
+        query = query.lower()
+        found = []
+        for fs in self.files():
+            if path and not fs.path.startswith(path.strip("/")):
+                continue
+            for symbol in fs.symbols:
+                if kind and symbol.kind != kind:
+                    continue
+                if query in symbol.name.lower():
+                    found.append(
+                        {
+                            "path": fs.path,
+                            "kind": symbol.kind,
+                            "name": symbol.name,
+                            "signature": symbol.signature,
+                            "line": symbol.line,
+                            "parent": symbol.parent,
+                        }
+                    )
+                    if len(found) >= max_results:
+                        return found
+        return found
+
+
+class SymbolIndexRegistry(ProjectRegistry[SymbolIndex]):
+    """Index de symboles par projet (racine résolue), bornés en nombre (LRU)."""
+
+    def __init__(self, max_projects: int = 16, max_file_bytes: int = 1024 * 1024):
+        super().__init__(max_projects)
+        self.max_file_bytes = max_file_bytes
+
+    @classmethod
+    def from_env(cls) -> "SymbolIndexRegistry":
+        return cls(
+            max_projects=env_int("SYMBOL_INDEX_MAX_PROJECTS", 16, minimum=1),
+            max_file_bytes=env_int("SYMBOL_INDEX_MAX_FILE_BYTES", 1024 * 1024, minimum=1),
+        )
+
+    def _create(self, root: str) -> SymbolIndex:
+        return SymbolIndex(root, self.max_file_bytes)
+
+    def record_write(self, target: Path, content: str, mtime_ns: int, size: int) -> None:
+        """Notifie l'écriture d'un fichier aux index ouverts des projets qui le contiennent."""
+        for index, rel in self.containing(target):
+            try:
+                index.record(rel, content, mtime_ns, size)
+            except Exception:
+                logger.exception("SymbolIndex: analyse impossible de %s", target)
+
+
+symbol_indexes = SymbolIndexRegistry.from_env()
+
+
+def get_symbol_index(project_path: str) -> SymbolIndex:
+    return symbol_indexes.get(project_path)
+
+
+def record_symbols(target: Path, content: str, mtime_ns: int, size: int) -> None:
+    symbol_indexes.record_write(target, content, mtime_ns, size)
+
+
+def forget_symbol_index(project_path: str) -> None:
+    symbol_indexes.forget(project_path)
+
+
+def build_code_report(project_path: str, paths: list[str]) -> str:
+    """Rapport structuré des fichiers `paths` (relatifs au projet)."""
+    index = get_symbol_index(project_path)
+    return format_report(index.files(paths), index.local_modules())
@@ -95,10 +95,16 @@ class Chat {
         if (!this.conversationId) return;
 
         try {
-            const response = await fetch(
-                `http://localhost:8000/api/conversations/${this.conversationId}/messages?limit=100`
-            );
-            const messages = await response.json();
+            // Pagination keyset : suivre X-Next-Cursor jusqu'à la dernière page
+            const messages = [];
+            let cursor = null;
+            do {
+                let url = `http://localhost:8000/api/conversations/${this.conversationId}/messages?limit=100`;
+                if (cursor) url += `&cursor=${encodeURIComponent(cursor)}`;
+                const response = await fetch(url);
+                messages.push(...await response.json());
+                cursor = response.headers.get('X-Next-Cursor');
+            } while (cursor);
             this.messages = messages;
             this.renderMessages();
         } catch (error) {
@@ -149,6 +155,7 @@ class Chat {
 
         this.messagesContainer.appendChild(messageEl);
         scrollToBottom(this.messagesContainer, animate);
+        return bubble;
     }
 
     /**
@@ -292,7 +299,7 @@ class Chat {
 
         try {
             const response = await fetch(
-                `http://localhost:8000/api/conversations/${this.conversationId}/messages`,
+                `http://localhost:8000/api/conversations/${this.conversationId}/messages/stream`,
                 {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
@@ -300,23 +307,14 @@ class Chat {
                 }
             );
 
-            const data = await response.json();
-
-            this.hideTypingIndicator();
-
-            if (response.ok) {
-                // Ne pas ajouter de message si la réponse est vide (Gemini peut retourner "" avec tool_calls)
-                if (data.response && data.response.trim()) {
-                    this.addMessage('assistant', data.response);
-                    this.messages.push({ 
-                        role: 'assistant', 
-                        content: data.response, 
-                        timestamp: new Date().toISOString() 
-                    });
-                }
-            } else {
+            if (!response.ok) {
+                const data = await response.json();
+                this.hideTypingIndicator();
                 this.addErrorMessage(data.detail || 'Erreur lors de l\'envoi du message.');
+                return;
             }
+
+            await this.readStream(response);
         } catch (error) {
             console.error('Erreur envoi message:', error);
             this.hideTypingIndicator();
@@ -326,6 +324,95 @@ class Chat {
         }
     }
 
+    /**
+     * Lit le flux SSE de la réponse et met à jour la bulle assistant au fil de l'eau
+     * @param {Response} response
+     */
+    async readStream(response) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let text = '';
+        let bubble = null;
+        let progress = null;
+
+        const ensureBubble = () => {
+            if (!bubble) {
+                this.hideTypingIndicator();
+                bubble = this.addMessage('assistant', '');
+            }
+            return bubble;
+        };
+
+        const handleEvent = (event, data) => {
+            if (event === 'token') {
+                text += data.content;
+                ensureBubble().textContent = text;
+            } else if (event === 'progress') {
+                ensureBubble();
+                if (!progress) {
+                    progress = createElement('div', { className: 'stream-progress' });
+                    bubble.after(progress);
+                }
+                progress.textContent = this.formatProgress(data);
+            } else if (event === 'message') {
+                text = data.content;
+                if (progress) progress.remove();
+                if (text && text.trim()) {
+                    ensureBubble().innerHTML = this.formatAssistantContent(text);
+                }
+            } else if (event === 'done') {
+                if (text && text.trim()) {
+                    this.messages.push({
+                        role: 'assistant',
+                        content: text,
+                        timestamp: new Date().toISOString()
+                    });
+                }
+            } else if (event === 'error') {
+                this.hideTypingIndicator();
+                this.addErrorMessage(data.detail || 'Erreur lors de l\'envoi du message.');
+            }
+            scrollToBottom(this.messagesContainer);
+        };
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            let separator;
+            while ((separator = buffer.indexOf('\n\n')) !== -1) {
+                const block = buffer.slice(0, separator);
+                buffer = buffer.slice(separator + 2);
+                const eventLine = block.split('\n').find(l => l.startsWith('event: '));
+                const dataLine = block.split('\n').find(l => l.startsWith('data: '));
+                if (eventLine && dataLine) {
+                    handleEvent(eventLine.slice(7), JSON.parse(dataLine.slice(6)));
+                }
+            }
+        }
+        this.hideTypingIndicator();
+    }
+
+    /**
+     * Libellé d'un événement de progression d'orchestration
+     * @param {Object} data
+     * @returns {string}
+     */
+    formatProgress(data) {
+        switch (data.event) {
+            case 'delegation_started': return `➡️ Délégation à ${data.agent}…`;
+            case 'pass': return `🔁 ${data.agent} — passe ${data.number}/${data.max_passes}`;
+            case 'file_written': return `📄 ${data.path}`;
+            case 'validation': return data.valid ? '✅ Validation OK' : '⚠️ Corrections demandées';
+            case 'delegation_finished': return `${data.success ? '✅' : '❌'} ${data.agent} terminé`;
+            case 'code_report': return '📋 Analyse du code produit…';
+            case 'synthesis': return '🧠 Synthèse de JARVIS…';
+            default: return data.event;
+        }
+    }
+
     /**
      * Définit la conversation
      * @param {string} conversationId
@@ -0,0 +1,24 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.db.database import Database
+
+
+async def main():
+    print("🔎 Reconstruction de l'index plein texte de la Knowledge Base...")
+    db = Database()
+    try:
+        await db.rebuild_library_search_index()
+        print("✅ Index reconstruit avec succès!")
+    except Exception as e:
+        print(f"❌ Erreur lors de la reconstruction: {e}")
+        raise
+    finally:
+        await db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -176,6 +176,80 @@ def test_send_message(client, temp_project_path):
     assert response.status_code in [200, 503]
 
 
+def _parse_sse(body: str) -> list[tuple[str, dict]]:
+    import json
+
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class _StreamingAgent:
+    async def handle_stream(self, messages, session_id=None, function_executor=None):
+        for text in ("Bonjour", " !"):
+            yield {"type": "token", "content": text}
+        yield {"type": "done", "content": "Bonjour !"}
+
+    def _validate_messages(self, messages):
+        return messages
+
+
+def test_stream_message_sse(client, clean_db):
+    conversation_id = client.post("/api/conversations", json={"agent_id": "BASE"}).json()["id"]
+
+    with patch("backend.api.get_agent", return_value=_StreamingAgent()):
+        response = client.post(
+            f"/api/conversations/{conversation_id}/messages/stream", json={"content": "Salut"}
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _parse_sse(response.text)
+    assert [e for e, _ in events] == ["token", "token", "message", "done"]
+    assert events[2][1]["content"] == "Bonjour !"
+
+    messages = client.get(f"/api/conversations/{conversation_id}/messages").json()
+    assert [(m["role"], m["content"]) for m in messages] == [
+        ("user", "Salut"),
+        ("assistant", "Bonjour !"),
+    ]
+
+
+def test_stream_message_relays_orchestration_progress(client, temp_project_path):
+    project_id = client.post(
+        "/api/projects", json={"name": "Test", "path": temp_project_path}
+    ).json()["id"]
+    conversation_id = client.post(
+        f"/api/projects/{project_id}/conversations", json={"agent_id": "JARVIS_Maître"}
+    ).json()["id"]
+
+    async def fake_process_response(response, on_event=None, **kwargs):
+        await on_event({"event": "delegation_started", "agent": "CODEUR"})
+        await on_event({"event": "file_written", "agent": "CODEUR", "path": "main.py", "size": 3})
+        return "Synthèse finale", []
+
+    with (
+        patch("backend.api.get_agent", return_value=_StreamingAgent()),
+        patch("backend.api.orchestrator.process_response", side_effect=fake_process_response),
+    ):
+        response = client.post(
+            f"/api/conversations/{conversation_id}/messages/stream", json={"content": "Code"}
+        )
+
+    events = _parse_sse(response.text)
+    progress = [data["event"] for event, data in events if event == "progress"]
+    assert progress == ["delegation_started", "file_written"]
+    assert ("message", {"content": "Synthèse finale"}) in events
+    assert events[-1][0] == "done"
+
+
+def test_stream_message_unknown_conversation(client):
+    response = client.post("/api/conversations/missing/messages/stream", json={"content": "x"})
+    assert response.status_code == 404
+
+
 def test_get_messages(client, temp_project_path):
     project_response = client.post(
         "/api/projects", json={"name": "Test", "path": temp_project_path}
@@ -193,6 +267,26 @@ def test_get_messages(client, temp_project_path):
     assert isinstance(data, list)
 
 
+def test_list_conversations_pagination_header(client, temp_project_path):
+    project_response = client.post(
+        "/api/projects", json={"name": "Test", "path": temp_project_path}
+    )
+    project_id = project_response.json()["id"]
+    for _ in range(3):
+        client.post(f"/api/projects/{project_id}/conversations", json={"agent_id": "BASE"})
+
+    response = client.get(f"/api/projects/{project_id}/conversations?limit=2")
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = client.get(f"/api/projects/{project_id}/conversations?limit=2&cursor={cursor}")
+    assert len(response.json()) == 1
+    assert "X-Next-Cursor" not in response.headers
+
+    response = client.get(f"/api/projects/{project_id}/conversations?cursor=invalid")
+    assert response.status_code == 400
+
 def test_get_file_tree(client, temp_project_path):
     project_response = client.post(
         "/api/projects", json={"name": "Test", "path": temp_project_path}
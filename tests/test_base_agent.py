@@ -258,3 +258,81 @@ class TestHandleLogs:
         logs = agent.log_file.read_text(encoding="utf-8").strip().split("\n")
         entry = json.loads(logs[0])
         assert entry["session_id"] is None
+
+
+class FakeStreamingProvider:
+    """Provider factice : premier appel → tool call, second appel → texte en fragments."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def stream_message(self, messages, functions=None, temperature=0.7, max_tokens=4096):
+        self.calls += 1
+        if self.calls == 1 and functions:
+            yield {
+                "content": "",
+                "tool_calls": [{"id": "call_0", "name": "list_files", "arguments": {}}],
+                "finish_reason": None,
+            }
+            yield {"content": "", "tool_calls": [], "finish_reason": "tool_calls"}
+            return
+        for text in ("Bon", "jour"):
+            yield {"content": text, "tool_calls": [], "finish_reason": None}
+        yield {"content": "", "tool_calls": [], "finish_reason": "stop"}
+
+    def format_tool_result(self, tool_call_id, function_name, result):
+        return {"role": "tool", "content": json.dumps(result)}
+
+
+@pytest.fixture
+def streaming_agent(tmp_path):
+    with patch("backend.agents.base_agent.ProviderFactory") as MockFactory:
+        MockFactory.create.return_value = FakeStreamingProvider()
+        a = BaseAgent(
+            agent_id="ag_stream",
+            name="BASE",
+            role="Assistant générique",
+            description="Agent de test streaming",
+        )
+    a.log_file = tmp_path / "test_audit.log"
+    return a
+
+
+class TestHandleStream:
+    """Tests de handle_stream() (streaming SSE)."""
+
+    @pytest.mark.asyncio
+    async def test_tokens_then_done(self, streaming_agent):
+        events = [e async for e in streaming_agent.handle_stream([{"role": "user", "content": "Salut"}])]
+
+        assert events == [
+            {"type": "token", "content": "Bon"},
+            {"type": "token", "content": "jour"},
+            {"type": "done", "content": "Bonjour"},
+        ]
+        assert streaming_agent.state == "idle"
+
+    @pytest.mark.asyncio
+    async def test_tool_calls_executed_between_generations(self, streaming_agent):
+        from unittest.mock import AsyncMock
+
+        executor = MagicMock()
+        executor.get_available_functions.return_value = [{"name": "list_files"}]
+        executor.execute = AsyncMock(return_value={"success": True})
+
+        events = [
+            e
+            async for e in streaming_agent.handle_stream(
+                [{"role": "user", "content": "Liste"}], function_executor=executor
+            )
+        ]
+
+        assert events[0] == {"type": "tool_call", "name": "list_files"}
+        assert events[-1] == {"type": "done", "content": "Bonjour"}
+        executor.execute.assert_awaited_once_with("list_files", {})
+
+    @pytest.mark.asyncio
+    async def test_invalid_messages_rejected(self, streaming_agent):
+        with pytest.raises(InvalidRuntimeMessageError):
+            async for _ in streaming_agent.handle_stream([{"role": "user", "content": ""}]):
+                pass
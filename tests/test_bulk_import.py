@@ -0,0 +1,39 @@
+import io
+import json
+
+import pytest
+
+from backend.db.bulk_import import BulkImportError, iter_batches, iter_json_array
+
+
+def _stream(items, chunk_size=7):
+    return list(iter_json_array(io.StringIO(json.dumps(items, ensure_ascii=False)), chunk_size))
+
+
+def test_iter_json_array_small_chunks():
+    items = [{"name": f"doc {i}", "content": "é" * i, "tags": ["a", "b"]} for i in range(20)]
+    assert _stream(items) == items
+
+
+def test_iter_json_array_scalars_split_across_chunks():
+    assert _stream([123456789, 3.14159, "texte", None, True], chunk_size=3) == [
+        123456789,
+        3.14159,
+        "texte",
+        None,
+        True,
+    ]
+
+
+def test_iter_json_array_empty():
+    assert list(iter_json_array(io.StringIO("  [ ]  "))) == []
+
+
+@pytest.mark.parametrize("payload", ['{"a": 1}', '[{"a": 1}', '[{"a": 1} {"b": 2}]', "[{"])
+def test_iter_json_array_invalid(payload):
+    with pytest.raises(BulkImportError):
+        list(iter_json_array(io.StringIO(payload), chunk_size=4))
+
+
+def test_iter_batches():
+    assert list(iter_batches(range(5), 2)) == [[0, 1], [2, 3], [4]]
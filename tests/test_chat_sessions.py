@@ -0,0 +1,137 @@
+"""
+Tests des sessions de chat Gemini réutilisées par conversation
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from backend.ia.chat_sessions import ChatSessionManager
+from backend.ia.providers.gemini_provider import GeminiProvider
+from backend.ia.rate_limiter import rate_limit_scope
+
+
+class FakeChat:
+    def __init__(self, history):
+        self.history = list(history)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def msg(role, text):
+    return {"role": role, "parts": [{"text": text}]}
+
+
+def reply(text):
+    return msg("model", text)
+
+
+@pytest.fixture
+def starts():
+    created = []
+
+    def start_chat(history):
+        chat = FakeChat(history)
+        created.append(chat)
+        return chat
+
+    start_chat.created = created
+    return start_chat
+
+
+def test_new_turns_are_appended(starts):
+    manager = ChatSessionManager()
+    turn1 = [msg("user", "system"), msg("user", "Bonjour")]
+
+    lease = manager.checkout(turn1, starts, key="conv")
+    assert lease.chat.history == turn1[:-1]
+    lease.chat.history.append(turn1[-1])  # le SDK ajoute l'échange envoyé
+    lease.chat.history.append(reply("Salut"))
+    manager.checkin(lease, reply("Salut"))
+
+    turn2 = [*turn1, reply("Salut"), msg("user", "Et ensuite ?")]
+    lease = manager.checkout(turn2, starts, key="conv")
+
+    assert lease.reused and lease.appended == 0
+    assert len(starts.created) == 1
+    assert manager.stats()["reused"] == 1
+
+
+def test_divergent_history_is_rebuilt(starts):
+    manager = ChatSessionManager()
+    lease = manager.checkout([msg("user", "A")], starts, key="conv")
+    manager.checkin(lease, reply("B"))
+
+    edited = [msg("user", "A modifié"), reply("B"), msg("user", "C")]
+    lease = manager.checkout(edited, starts, key="conv")
+
+    assert not lease.reused
+    assert lease.chat.history == edited[:-1]
+    assert manager.stats()["rebuilt"] == 1
+
+
+def test_checked_out_session_is_not_shared(starts):
+    manager = ChatSessionManager()
+    lease = manager.checkout([msg("user", "A")], starts, key="conv")
+    manager.checkin(lease, reply("B"))
+
+    turn = [msg("user", "A"), reply("B"), msg("user", "C")]
+    first = manager.checkout(turn, starts, key="conv")
+    second = manager.checkout(turn, starts, key="conv")
+
+    assert first.chat is not second.chat
+
+
+def test_abandoned_and_keyless_sessions_are_not_kept(starts):
+    manager = ChatSessionManager()
+    manager.checkin(manager.checkout([msg("user", "A")], starts, key="conv"), None)
+    manager.checkin(manager.checkout([msg("user", "A")], starts), reply("B"))
+    assert manager.stats()["active"] == 0
+
+
+def test_lru_and_ttl_eviction(starts):
+    clock = FakeClock()
+    manager = ChatSessionManager(max_sessions=2, ttl_seconds=10, clock=clock)
+    for key in ("a", "b", "c"):
+        manager.checkin(manager.checkout([msg("user", key)], starts, key=key), reply("ok"))
+    assert manager.stats()["active"] == 2
+
+    clock.now = 11
+    manager.checkout([msg("user", "x")], starts, key="x")
+    stats = manager.stats()
+    assert stats["active"] == 0
+    assert stats["evicted"] == 3
+
+
+@pytest.mark.asyncio
+async def test_gemini_provider_reuses_chat_across_turns():
+    def response(text):
+        return MagicMock(
+            candidates=[MagicMock(content=MagicMock(parts=[MagicMock(text=text)]))],
+            usage_metadata=None,
+        )
+
+    with patch("google.generativeai.GenerativeModel") as mock_model:
+        chat = MagicMock()
+        chat.history = []
+        chat.send_message_async = AsyncMock(side_effect=[response("Salut"), response("Voilà")])
+        mock_model.return_value.start_chat.return_value = chat
+
+        provider = GeminiProvider(api_key="test_key", model="gemini-session-test")
+        messages = [{"role": "user", "content": "Bonjour"}]
+        with patch.object(provider.rate_limiter, "acquire", AsyncMock()), rate_limit_scope("conv-1"):
+            await provider.send_message(messages)
+            messages += [
+                {"role": "assistant", "content": "Salut"},
+                {"role": "user", "content": "Et ensuite ?"},
+            ]
+            await provider.send_message(messages)
+
+        assert mock_model.return_value.start_chat.call_count == 1
+        assert provider.chat_sessions.stats()["reused"] == 1
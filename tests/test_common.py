@@ -0,0 +1,48 @@
+"""
+Tests des briques communes des services (réglages .env, registre LRU par projet)
+"""
+
+from backend.services.common import ProjectRegistry, env_int, env_number
+
+
+def test_env_number_default_minimum_and_invalid(monkeypatch, caplog):
+    monkeypatch.delenv("JARVIS_TEST_VALUE", raising=False)
+    assert env_int("JARVIS_TEST_VALUE", 3) == 3
+
+    monkeypatch.setenv("JARVIS_TEST_VALUE", "-5")
+    assert env_int("JARVIS_TEST_VALUE", 3) == -5
+    assert env_int("JARVIS_TEST_VALUE", 3, minimum=1) == 1
+
+    monkeypatch.setenv("JARVIS_TEST_VALUE", "abc")
+    assert env_number("JARVIS_TEST_VALUE", 0.5, float) == 0.5
+    assert "JARVIS_TEST_VALUE invalide" in caplog.text
+
+
+class Entry:
+    def __init__(self, root):
+        self.root = root
+        self.closed = False
+
+
+class ClosingRegistry(ProjectRegistry[Entry]):
+    def _create(self, root):
+        return Entry(root)
+
+    def _release(self, entry):
+        entry.closed = True
+
+
+def test_project_registry_lru_and_release(tmp_path):
+    registry = ClosingRegistry(max_projects=2)
+    a, b, c = (tmp_path / name for name in "abc")
+    first = registry.get(str(a))
+    assert registry.get(str(a)) is first
+    second = registry.get(str(b))
+    registry.get(str(a))
+    registry.get(str(c))  # évince b, le moins récemment utilisé
+
+    assert second.closed and not first.closed
+    assert [rel for _, rel in registry.containing(a / "pkg" / "m.py")] == ["pkg/m.py"]
+
+    registry.close()
+    assert first.closed and registry.entries() == []
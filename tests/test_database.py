@@ -11,6 +11,7 @@ async def db(tmp_path):
     db_instance = Database(test_db_path)
     await db_instance.initialize()
     yield db_instance
+    await db_instance.close()
 
 
 @pytest.mark.asyncio
@@ -203,3 +204,229 @@ async def test_project_conversation_count(db):
 
     retrieved = await db.get_project(project["id"])
     assert retrieved["conversation_count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_pool_reuses_connections(db):
+    project = await db.create_project(name="Test", path="/test")
+    for _ in range(5):
+        await db.get_project(project["id"])
+        await db.update_project(project["id"], name="Renamed")
+
+    stats = db.pool_stats()
+    # 1 writer + 1 reader suffisent pour des appels séquentiels
+    assert stats["connections_opened"] == 2
+    assert stats["in_use"] == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_connection_pragmas(db):
+    async with db._read() as conn:
+        async with conn.execute("PRAGMA journal_mode") as cursor:
+            assert (await cursor.fetchone())[0] == "wal"
+        async with conn.execute("PRAGMA foreign_keys") as cursor:
+            assert (await cursor.fetchone())[0] == 1
+        async with conn.execute("PRAGMA synchronous") as cursor:
+            assert (await cursor.fetchone())[0] == 1  # NORMAL
+
+
+@pytest.mark.asyncio
+async def test_pool_concurrent_reads_bounded(db):
+    import asyncio
+
+    project = await db.create_project(name="Test", path="/test")
+    results = await asyncio.gather(*(db.get_project(project["id"]) for _ in range(20)))
+
+    assert all(r["id"] == project["id"] for r in results)
+    assert db.pool_stats()["readers_open"] <= 4
+
+
+@pytest.mark.asyncio
+async def test_pool_rolls_back_abandoned_transaction(db):
+    with pytest.raises(RuntimeError):
+        async with db._connect() as conn:
+            await conn.execute(
+                "INSERT INTO projects (id, name, path) VALUES (?, ?, ?)", ("p1", "X", "/x")
+            )
+            raise RuntimeError("boom")
+
+    assert await db.get_project("p1") is None
+    assert db.pool_stats()["rollbacks_on_release"] == 1
+
+
+@pytest.mark.asyncio
+async def test_pool_acquire_timeout(tmp_path):
+    from backend.db.pool import ConnectionPool, PoolTimeoutError
+
+    pool = ConnectionPool(str(tmp_path / "pool.db"), acquire_timeout=0.05)
+    async with pool.write():
+        with pytest.raises(PoolTimeoutError):
+            async with pool.write():
+                pass
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_list_conversations_message_count(db):
+    project = await db.create_project(name="Test", path="/test")
+    conv = await db.create_conversation(agent_id="BASE", project_id=project["id"])
+    await db.add_message(conv["id"], "user", "Hello")
+    await db.add_message(conv["id"], "assistant", "Hi")
+
+    conversations = await db.list_conversations(project["id"])
+    assert conversations[0]["message_count"] == 2
+
+    projects = await db.list_projects()
+    assert projects[0]["conversation_count"] == 1
+
+    await db.delete_conversation(conv["id"])
+    projects = await db.list_projects()
+    assert projects[0]["conversation_count"] == 0
+
+
+@pytest.mark.asyncio
+async def test_migrate_denormalized_counters_backfill(tmp_path):
+    import aiosqlite
+
+    legacy_path = str(tmp_path / "legacy.db")
+    async with aiosqlite.connect(legacy_path) as conn:
+        await conn.executescript(
+            """
+            CREATE TABLE projects (id TEXT PRIMARY KEY, name TEXT NOT NULL,
+                path TEXT NOT NULL UNIQUE, description TEXT, created_at TIMESTAMP);
+            CREATE TABLE conversations (id TEXT PRIMARY KEY, project_id TEXT,
+                agent_id TEXT NOT NULL, title TEXT, created_at TIMESTAMP, updated_at TIMESTAMP);
+            CREATE TABLE messages (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                conversation_id TEXT NOT NULL, role TEXT NOT NULL, content TEXT NOT NULL,
+                timestamp TIMESTAMP);
+            INSERT INTO projects VALUES ('p1', 'P', '/p', NULL, '2026-01-01');
+            INSERT INTO conversations VALUES ('c1', 'p1', 'BASE', 'T', '2026-01-01', '2026-01-01');
+            INSERT INTO conversations VALUES ('c2', 'p1', 'BASE', 'T', '2026-01-01', '2026-01-01');
+            INSERT INTO messages (conversation_id, role, content) VALUES ('c1', 'user', 'a');
+            INSERT INTO messages (conversation_id, role, content) VALUES ('c1', 'assistant', 'b');
+            """
+        )
+        await conn.commit()
+
+    legacy_db = Database(legacy_path)
+    await legacy_db.initialize()
+
+    assert (await legacy_db.get_project("p1"))["conversation_count"] == 2
+    assert (await legacy_db.get_conversation("c1"))["message_count"] == 2
+    assert (await legacy_db.get_conversation("c2"))["message_count"] == 0
+
+    await legacy_db.add_message("c2", "user", "c")
+    assert (await legacy_db.get_conversation("c2"))["message_count"] == 1
+    await legacy_db.close()
+
+
+@pytest.mark.asyncio
+async def test_get_messages_keyset_pagination(db):
+    conv = await db.create_conversation(agent_id="BASE")
+    for i in range(7):
+        await db.add_message(conv["id"], "user", f"msg {i}")
+
+    page1 = await db.get_messages_page(conv["id"], limit=3)
+    page2 = await db.get_messages_page(conv["id"], limit=3, cursor=page1["next_cursor"])
+    page3 = await db.get_messages_page(conv["id"], limit=3, cursor=page2["next_cursor"])
+
+    contents = [m["content"] for m in page1["items"] + page2["items"] + page3["items"]]
+    assert contents == [f"msg {i}" for i in range(7)]
+    assert page3["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_get_conversation_history_not_capped(db):
+    conv = await db.create_conversation(agent_id="BASE")
+    for i in range(120):
+        await db.add_message(conv["id"], "user", f"msg {i}")
+
+    history = await db.get_conversation_history(conv["id"])
+    assert len(history) == 120
+    assert history[-1]["content"] == "msg 119"
+
+
+@pytest.mark.asyncio
+async def test_list_conversations_keyset_pagination(db):
+    project = await db.create_project(name="Test", path="/test")
+    for i in range(5):
+        await db.create_conversation(agent_id="BASE", project_id=project["id"], title=f"C{i}")
+
+    seen = []
+    cursor = None
+    while True:
+        page = await db.list_conversations_page(project["id"], limit=2, cursor=cursor)
+        seen.extend(c["id"] for c in page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    all_ids = [c["id"] for c in await db.list_conversations(project["id"])]
+    assert seen == all_ids
+    assert len(set(seen)) == 5
+
+
+@pytest.mark.asyncio
+async def test_invalid_cursor_rejected(db):
+    from backend.db.database import InvalidCursorError
+
+    with pytest.raises(InvalidCursorError):
+        await db.get_messages_page("any", cursor="not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_add_message_single_commit_updates_timestamp(db):
+    conv = await db.create_conversation(agent_id="BASE")
+    writes_before = db.pool_stats()["acquired_write"]
+
+    message = await db.add_message(conv["id"], "user", "Hello")
+
+    assert db.pool_stats()["acquired_write"] == writes_before + 1
+    refreshed = await db.get_conversation(conv["id"])
+    assert refreshed["updated_at"] >= message["timestamp"]
+    assert refreshed["message_count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_transaction_commits_all_writes(db):
+    conv = await db.create_conversation(agent_id="BASE")
+
+    async with db.transaction() as tx:
+        await tx.add_message(conv["id"], "user", "Question", timestamp="2020-01-01T00:00:00")
+        await tx.add_message(conv["id"], "assistant", "Réponse")
+
+    messages = await db.get_messages(conv["id"])
+    assert [m["role"] for m in messages] == ["user", "assistant"]
+    assert messages[0]["timestamp"] == "2020-01-01T00:00:00"
+    refreshed = await db.get_conversation(conv["id"])
+    assert refreshed["updated_at"] > conv["updated_at"]
+
+
+@pytest.mark.asyncio
+async def test_transaction_rolls_back_on_error(db):
+    conv = await db.create_conversation(agent_id="BASE")
+
+    with pytest.raises(RuntimeError):
+        async with db.transaction() as tx:
+            await tx.add_message(conv["id"], "user", "Question")
+            raise RuntimeError("échec agent")
+
+    assert await db.get_messages(conv["id"]) == []
+    refreshed = await db.get_conversation(conv["id"])
+    assert refreshed["updated_at"] == conv["updated_at"]
+    assert refreshed["message_count"] == 0
+
+
+@pytest.mark.asyncio
+async def test_add_messages_bulk(db):
+    conv_a = await db.create_conversation(agent_id="BASE")
+    conv_b = await db.create_conversation(agent_id="BASE")
+    batch = [
+        {"conversation_id": conv_a["id"], "role": "user", "content": f"A{i}"} for i in range(50)
+    ] + [{"conversation_id": conv_b["id"], "role": "user", "content": "B0"}]
+
+    inserted = await db.add_messages(batch)
+
+    assert inserted == 51
+    assert (await db.get_conversation(conv_a["id"]))["message_count"] == 50
+    assert (await db.get_conversation(conv_b["id"]))["message_count"] == 1
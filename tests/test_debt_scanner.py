@@ -0,0 +1,49 @@
+"""
+Tests du scanner de dette technique (passe unique, lecture par blocs, mémoire par fichier)
+"""
+
+import io
+
+from backend.services.debt_scanner import DebtScanner
+from backend.services.project_service import ProjectService
+
+PATTERNS = ProjectService.DEBT_PATTERNS
+
+
+def naive_counts(content):
+    return {p: content.count(p) for p in PATTERNS if content.count(p)}
+
+
+def test_single_pass_matches_per_pattern_count():
+    content = "# TODO x\nprint(any)\n# type: ignore\nconsole.log(1) FIXME XXXXXX DEPRECATED HACK"
+    assert DebtScanner(PATTERNS).count_stream(io.StringIO(content)) == naive_counts(content)
+
+
+def test_patterns_split_across_chunks():
+    content = ("a" * 5 + "# type: ignore" + "b" * 3 + "TODO") * 40
+    for chunk in (14, 15, 16, 17, 50):
+        scanner = DebtScanner(PATTERNS, chunk_chars=chunk)
+        assert scanner.count_stream(io.StringIO(content)) == naive_counts(content), chunk
+
+
+def test_file_rescanned_only_when_changed(tmp_path):
+    path = tmp_path / "a.py"
+    path.write_text("# TODO\n", encoding="utf-8")
+    scanner = DebtScanner(PATTERNS)
+
+    assert scanner.count_file(str(path), 1, 7) == {"TODO": 1}
+    path.write_text("# FIXME\n", encoding="utf-8")
+    assert scanner.count_file(str(path), 1, 7) == {"TODO": 1}  # même clé : mémorisé
+    assert scanner.count_file(str(path), 2, 8) == {"FIXME": 1}
+    assert scanner.stats() == {"cached_files": 1, "scans": 2, "cache_hits": 1}
+
+
+def test_analyze_debt_scans_past_former_file_cap(tmp_path):
+    for i in range(150):
+        (tmp_path / f"file{i:03}.py").write_text("def f(): pass\n")
+    (tmp_path / "zz_last.py").write_text("# TODO: fin\n")
+
+    state, report = ProjectService.analyze_project(str(tmp_path))
+
+    assert state.value == "debt"
+    assert report["files_with_debt"] == [{"path": "zz_last.py", "issues": ["TODO (1)"]}]
@@ -0,0 +1,133 @@
+"""
+Tests du cache borné des vues de projet (LRU, TTL, budget mémoire, invalidation)
+"""
+
+from backend.services.file_cache import BoundedCache, cached_project_view, project_cache
+from backend.services.file_service import FileService
+from backend.services.file_writer import write_files_to_project
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(**kwargs):
+    kwargs.setdefault("sizeof", len)
+    return BoundedCache(**kwargs)
+
+
+def test_lru_eviction_by_entry_count():
+    cache = make_cache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"  # « a » devient le plus récent
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+    assert cache.stats()["evicted"] == 1
+
+
+def test_byte_budget_and_oversized_values():
+    cache = make_cache(max_bytes=10)
+    cache.set("a", "x" * 6)
+    cache.set("b", "y" * 6)  # 12 octets > 10 : « a » évincé
+
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 6
+    assert cache.set("big", "z" * 11) is False
+    assert cache.get("b") == "y" * 6
+    assert cache.stats()["rejected"] == 1
+
+
+def test_ttl_expiration():
+    clock = FakeClock()
+    cache = make_cache(ttl_seconds=10, clock=clock)
+    cache.set("a", "1")
+
+    clock.now = 9.0
+    assert cache.get("a") == "1"
+    clock.now = 10.0
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert (stats["expired"], stats["entries"], stats["bytes"]) == (1, 0, 0)
+
+
+def test_invalidate_tag_and_get_or_compute():
+    cache = make_cache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return "v"
+
+    assert cache.get_or_compute("k1", compute, tags=("p1",)) == "v"
+    assert cache.get_or_compute("k1", compute, tags=("p1",)) == "v"
+    cache.set("k2", "w", tags=("p2",))
+    assert len(calls) == 1
+
+    assert cache.invalidate_tag("p1") == 1
+    assert cache.get("k2") == "w"
+    cache.get_or_compute("k1", compute, tags=("p1",))
+    assert len(calls) == 2
+    assert cache.stats()["hit_rate"] > 0
+
+
+def test_project_views_invalidated_by_write(tmp_path):
+    (tmp_path / "main.py").write_text("x = 1", encoding="utf-8")
+    project_cache.clear()
+
+    def tree():
+        return cached_project_view(
+            str(tmp_path), "tree", lambda: FileService.get_file_tree(str(tmp_path), 2), 2
+        )
+
+    assert [i["name"] for i in tree()["items"]] == ["main.py"]
+    # Contenu identique : rien n'est réécrit, le cache reste valide
+    write_files_to_project(str(tmp_path), [{"path": "main.py", "content": "x = 1"}])
+    assert project_cache.stats()["entries"] == 1
+
+    write_files_to_project(str(tmp_path), [{"path": "app.py", "content": "y = 2"}])
+    assert project_cache.stats()["entries"] == 0
+    assert [i["name"] for i in tree()["items"]] == ["app.py", "main.py"]
+
+
+def test_project_views_follow_external_changes(tmp_path):
+    (tmp_path / "main.py").write_text("x = 1", encoding="utf-8")
+    project_cache.clear()
+    calls = []
+
+    def tree():
+        def compute():
+            calls.append(1)
+            return FileService.get_file_tree(str(tmp_path), 2)
+
+        return cached_project_view(str(tmp_path), "tree", compute, 2)
+
+    assert [i["name"] for i in tree()["items"]] == ["main.py"]
+    assert [i["name"] for i in tree()["items"]] == ["main.py"]
+    assert len(calls) == 1  # index inchangé : vue servie depuis le cache
+
+    # Fichier créé hors de JARVIS : visible sans attendre le TTL
+    (tmp_path / "external.py").write_text("z = 3", encoding="utf-8")
+    assert [i["name"] for i in tree()["items"]] == ["external.py", "main.py"]
+    assert project_cache.stats()["entries"] == 1  # vue de l'ancienne version oubliée
+
+
+def test_value_computed_during_invalidation_is_not_stored():
+    cache = make_cache()
+
+    def compute():
+        cache.invalidate_tag("p1")  # écriture concurrente pendant le calcul
+        return "ancien"
+
+    assert cache.get_or_compute("k", compute, tags=("p1",)) == "ancien"
+    assert cache.get("k") is None
+    assert cache.stats()["stale"] == 1
+
+    assert cache.get_or_compute("k", lambda: "nouveau", tags=("p1",)) == "nouveau"
+    assert cache.get("k") == "nouveau"
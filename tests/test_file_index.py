@@ -0,0 +1,117 @@
+"""
+Tests de l'index des fichiers de projet (construction, polling, écritures, registre)
+"""
+
+import os
+
+import pytest
+
+from backend.services.file_index import FileIndexRegistry, ProjectFileIndex, get_file_index
+from backend.services.file_service import FileService
+from backend.services.file_writer import write_files_to_project
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "main.py").write_text("print('main')", encoding="utf-8")
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.ts").write_text("export {}", encoding="utf-8")
+    (tmp_path / "node_modules" / "lib").mkdir(parents=True)
+    (tmp_path / "node_modules" / "lib" / "index.js").write_text("x", encoding="utf-8")
+    return tmp_path
+
+
+def make_index(root, clock=None):
+    return ProjectFileIndex(str(root), poll_seconds=2.0, watch=False, clock=clock or FakeClock())
+
+
+def test_build_indexes_project_without_ignored_dirs(project):
+    index = make_index(project)
+
+    assert [e.path for e in index.files()] == ["main.py", "src/app.ts"]
+    assert index.get("src").is_dir
+    assert index.get("src/app.ts").extension == ".ts"
+    assert index.get("node_modules") is None
+    # Dossier ignoré demandé explicitement : lu à la demande
+    assert [e.name for e in index.children("node_modules")] == ["lib"]
+
+
+def test_added_and_removed_files_detected_by_directory_mtime(project):
+    index = make_index(project)
+    index.files()
+
+    (project / "src" / "new.py").write_text("x = 1", encoding="utf-8")
+    (project / "main.py").unlink()
+    (project / "pkg" / "sub").mkdir(parents=True)
+    (project / "pkg" / "sub" / "mod.py").write_text("y = 2", encoding="utf-8")
+
+    assert [e.path for e in index.files()] == ["pkg/sub/mod.py", "src/app.ts", "src/new.py"]
+
+
+def test_in_place_modification_detected_after_poll_interval(project):
+    for directory in (project, project / "src"):
+        os.utime(directory, ns=(10**9, 10**9))  # hors fenêtre « racy » : pas de relecture
+    clock = FakeClock()
+    index = make_index(project, clock)
+    first_hash = index.content_hash("main.py")
+
+    # Écriture sur place : le mtime du dossier ne change pas
+    (project / "main.py").write_text("print('modifié, plus long')", encoding="utf-8")
+
+    clock.now = 1.0
+    assert index.content_hash("main.py") == first_hash  # pas encore re-stat
+
+    clock.now = 3.0
+    assert index.get("main.py").size == len("print('modifié, plus long')".encode())
+    assert index.content_hash("main.py") != first_hash
+
+
+def test_record_write_updates_index_immediately(tmp_path):
+    index = get_file_index(str(tmp_path))
+    assert index.files() == []
+
+    write_files_to_project(str(tmp_path), [{"path": "deep/pkg/mod.py", "content": "z = 3\n"}])
+
+    entry = index._entries["deep/pkg/mod.py"]  # sans rafraîchissement
+    assert entry.size == 6
+    assert entry.digest is not None
+    assert index.content_hash("deep/pkg/mod.py") == entry.digest
+    assert index.stats()["hashes"] == 0
+
+
+def test_file_service_served_from_index(project):
+    listing = FileService.list_directory(str(project), "src")
+    assert [item.name for item in listing.items] == ["app.ts"]
+
+    (project / "src" / "b.py").write_text("b = 1", encoding="utf-8")
+    listing = FileService.list_directory(str(project), "src")
+    assert [item.name for item in listing.items] == ["app.ts", "b.py"]
+
+    tree = FileService.get_file_tree(str(project), max_depth=3)
+    assert [item["name"] for item in tree["items"]] == ["src", "main.py"]
+    assert [r.path for r in FileService.search_files(str(project), "app")] == [
+        os.path.join("src", "app.ts")
+    ]
+
+
+def test_registry_lru_and_forget(tmp_path):
+    registry = FileIndexRegistry(max_projects=2)
+    roots = []
+    for name in ("a", "b", "c"):
+        (tmp_path / name).mkdir()
+        roots.append(str(tmp_path / name))
+        registry.get(roots[-1])
+
+    assert registry.stats()["projects"] == 2
+    first = registry.get(roots[1])
+    assert registry.get(roots[1]) is first
+    registry.forget(roots[1])
+    assert registry.get(roots[1]) is not first
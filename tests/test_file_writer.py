@@ -2,10 +2,14 @@
 Tests pour le service d'écriture de fichiers — parse_code_blocks, write_files_to_project.
 """
 
+import os
+import stat
 
 import pytest
 
+from backend.services.file_index import get_file_index
 from backend.services.file_writer import (
+    CodeBlockParser,
     ExtensionNotAllowedError,
     PathSecurityError,
     _clean_content,
@@ -13,6 +17,7 @@ from backend.services.file_writer import (
     parse_code_blocks,
     validate_write_path,
     write_files_to_project,
+    write_files_to_project_async,
 )
 
 
@@ -120,6 +125,45 @@ class TestParseCodeBlocks:
         assert len(files) == 1
 
 
+class TestCodeBlockParser:
+    RESPONSE = (
+        "Intro\n# src/a.py\n\n```python\na = 1\n```\ntexte\n"
+        "```python src/b.py\nb = 2\n```\n**c.py**\n```\nc = 3\n```\n"
+    )
+
+    def test_chunked_feed_matches_full_parse(self):
+        parser = CodeBlockParser()
+        emitted = []
+        for i in range(0, len(self.RESPONSE), 4):
+            emitted += parser.feed(self.RESPONSE[i : i + 4])
+        emitted += parser.close()
+        assert emitted == parse_code_blocks(self.RESPONSE)
+        assert [b["path"] for b in emitted] == ["src/a.py", "src/b.py", "c.py"]
+
+    def test_block_emitted_when_fence_closes(self):
+        parser = CodeBlockParser()
+        assert parser.feed("# main.py\n```python\nx = 1\n") == []
+        assert parser.feed("```\n") == [{"path": "main.py", "content": "x = 1\n"}]
+
+    def test_truncated_block_reported_as_partial(self):
+        parser = CodeBlockParser()
+        parser.feed("# ok.py\n```python\nok = 1\n```\n# big.py\n```python\nline1\nline2\nli")
+        parser.close()
+        assert [b["path"] for b in parser.blocks] == ["ok.py"]
+        # La dernière ligne, coupée, est exclue
+        assert parser.partial == {"path": "big.py", "content": "line1\nline2\n", "lines": 2}
+
+    def test_unnamed_block_not_partial(self):
+        parser = CodeBlockParser()
+        parser.feed("```python\nprint('exemple')\n")
+        parser.close()
+        assert parser.blocks == [] and parser.partial is None
+
+    def test_header_reset_by_text_line(self):
+        files = parse_code_blocks("# main.py\nVoici le code :\n```python\nx = 1\n```")
+        assert files == []
+
+
 class TestValidateWritePath:
     def test_valid_path(self, tmp_path):
         target = validate_write_path(str(tmp_path), "src/main.py")
@@ -178,3 +222,70 @@ class TestWriteFilesToProject:
         results = write_files_to_project(str(tmp_path), files)
         assert results[0]["status"] == "written"
         assert (tmp_path / "file.py").read_text(encoding="utf-8") == "new"
+
+    def test_unchanged_content_not_rewritten(self, tmp_path):
+        files = [{"path": "same.py", "content": "x = 1\n"}]
+        first = write_files_to_project(str(tmp_path), files)
+        mtime = (tmp_path / "same.py").stat().st_mtime_ns
+        second = write_files_to_project(str(tmp_path), files)
+        assert first[0]["unchanged"] is False
+        assert second[0]["status"] == "written" and second[0]["unchanged"] is True
+        assert (tmp_path / "same.py").stat().st_mtime_ns == mtime
+
+    def test_unchanged_detected_for_foreign_file(self, tmp_path):
+        (tmp_path / "ext.py").write_bytes(b"y = 2\n")
+        results = write_files_to_project(str(tmp_path), [{"path": "ext.py", "content": "y = 2\n"}])
+        assert results[0]["unchanged"] is True
+
+    def test_unchanged_uses_index_digest_without_rereading(self, tmp_path, monkeypatch):
+        get_file_index(str(tmp_path)).files()  # projet indexé : empreintes mémorisées
+        files = [{"path": "idx.py", "content": "z = 3\n"}]
+        write_files_to_project(str(tmp_path), files)
+
+        def no_rehash(self):
+            raise AssertionError("fichier relu")
+
+        monkeypatch.setattr("pathlib.Path.read_bytes", no_rehash)
+        assert write_files_to_project(str(tmp_path), files)[0]["unchanged"] is True
+
+    def test_new_file_mode_follows_umask_and_existing_mode_kept(self, tmp_path):
+        previous = os.umask(0o027)
+        try:
+            write_files_to_project(str(tmp_path), [{"path": "new.py", "content": "n = 1"}])
+        finally:
+            os.umask(previous)
+        assert stat.S_IMODE((tmp_path / "new.py").stat().st_mode) == 0o640
+
+        (tmp_path / "run.sh").write_text("echo 1", encoding="utf-8")
+        (tmp_path / "run.sh").chmod(0o755)
+        write_files_to_project(str(tmp_path), [{"path": "run.sh", "content": "echo 2"}])
+        assert stat.S_IMODE((tmp_path / "run.sh").stat().st_mode) == 0o755
+
+    def test_result_has_timing_and_no_temp_file(self, tmp_path):
+        results = write_files_to_project(str(tmp_path), [{"path": "t.py", "content": "t = 1"}])
+        assert results[0]["duration_ms"] >= 0
+        assert [p.name for p in tmp_path.iterdir()] == ["t.py"]
+
+    def test_failed_write_keeps_previous_content(self, tmp_path, monkeypatch):
+        (tmp_path / "keep.py").write_text("old", encoding="utf-8")
+
+        def crash(src, dst):
+            raise OSError("disque plein")
+
+        monkeypatch.setattr("backend.services.file_writer.os.replace", crash)
+        results = write_files_to_project(str(tmp_path), [{"path": "keep.py", "content": "new"}])
+        assert results[0]["status"] == "error"
+        assert (tmp_path / "keep.py").read_text(encoding="utf-8") == "old"
+        assert [p.name for p in tmp_path.iterdir()] == ["keep.py"]
+
+    @pytest.mark.asyncio
+    async def test_async_writes_in_order(self, tmp_path):
+        files = [
+            {"path": "pkg/a.py", "content": "a = 1"},
+            {"path": "../evil.py", "content": "bad"},
+            {"path": "pkg/sub/b.py", "content": "b = 2"},
+        ]
+        results = await write_files_to_project_async(str(tmp_path), files)
+        assert [r["status"] for r in results] == ["written", "rejected", "written"]
+        assert [r["path"] for r in results] == ["pkg/a.py", "../evil.py", "pkg/sub/b.py"]
+        assert (tmp_path / "pkg" / "sub" / "b.py").read_text(encoding="utf-8") == "b = 2"
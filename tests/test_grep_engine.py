@@ -0,0 +1,113 @@
+"""
+Tests de la recherche dans le contenu des fichiers (littéraux, regex, globs, contexte, index)
+"""
+
+import pytest
+
+from backend.services.file_service import FileServiceError
+from backend.services.grep_engine import TrigramIndexRegistry, grep_project, required_literals
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.setattr("backend.services.grep_engine.trigram_indexes", TrigramIndexRegistry())
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.py").write_text(
+        "import os\n\n\nclass UserService:\n    def load_user(self):\n        return None\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "src" / "view.ts").write_text("export class UserView {}\n", encoding="utf-8")
+    (tmp_path / "README.md").write_text("UserService documentation\n", encoding="utf-8")
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG\0UserService")
+    return tmp_path
+
+
+def test_literal_search_case_insensitive_with_positions(project):
+    result = grep_project(str(project), "userservice")
+
+    assert result.engine == "trigram"
+    assert [(m.path, m.line, m.column) for m in result.matches] == [
+        ("README.md", 1, 1),
+        ("src/app.py", 4, 7),
+    ]
+    assert result.matches[1].text == "class UserService:"
+
+
+def test_regex_include_exclude_and_context(project):
+    result = grep_project(
+        str(project), r"^\s*def \w+", regex=True, include="*.py", context=1
+    )
+    match = result.matches[0]
+    assert (match.path, match.line) == ("src/app.py", 5)
+    assert match.before == ["class UserService:"]
+    assert match.after == ["        return None"]
+
+    result = grep_project(str(project), "class User", case_sensitive=True, exclude="*.ts")
+    assert [m.path for m in result.matches] == ["src/app.py"]
+
+
+def test_index_follows_file_changes(project):
+    assert grep_project(str(project), "needle_value").matches == []
+
+    (project / "src" / "new.py").write_text("x = 'needle_value'\n", encoding="utf-8")
+    result = grep_project(str(project), "needle_value")
+
+    assert [m.path for m in result.matches] == ["src/new.py"]
+    assert result.files_scanned == 1  # seul candidat retenu par les trigrammes
+
+
+def test_scan_without_index_and_limits(project):
+    for i in range(5):
+        (project / f"f{i}.py").write_text("hit\nhit\n", encoding="utf-8")
+
+    result = grep_project(str(project), "hit", use_index=False, max_results=3)
+
+    assert result.engine == "scan"
+    assert len(result.matches) == 3
+    assert result.truncated
+
+
+@pytest.mark.parametrize("use_index", [True, False])
+def test_truncated_within_single_file(project, use_index):
+    (project / "many.py").write_text("foo\n" * 6, encoding="utf-8")
+
+    result = grep_project(str(project), "foo", use_index=use_index, max_results=3)
+    assert [m.line for m in result.matches] == [1, 2, 3]
+    assert result.truncated
+
+    exact = grep_project(str(project), "foo", use_index=use_index, max_results=6)
+    assert len(exact.matches) == 6
+    assert not exact.truncated
+
+
+def test_invalid_regex(project):
+    with pytest.raises(FileServiceError):
+        grep_project(str(project), "(unclosed", regex=True)
+
+
+def test_required_literals_are_conservative():
+    assert required_literals(r"def\s+load_user\(", True) == ["def", "load_user("]
+    assert required_literals(r"colou?r_name", True) == ["colo", "r_name"]
+    assert required_literals(r"(abc)?xyz", True) == []
+    assert required_literals(r"foo|bar", True) == []
+    assert required_literals("ab", False) == []
+
+
+def test_escape_arguments_are_not_literals():
+    assert required_literals(r"\x41BCD", True) == ["BCD"]
+    assert required_literals(r"foo\0123", True) == ["foo"]
+    assert required_literals(r"\N{LATIN SMALL LETTER A}bcdef", True) == ["bcdef"]
+    assert required_literals(r"A\U00000042CDE", True) == ["CDE"]
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [r"\x55serService", r"UserService", r"import\040os", r"(os)\n\n\nclass", r"(User)Service:\n\s+def"],
+)
+def test_index_matches_plain_scan_for_escapes(project, pattern):
+    def found(use_index):
+        result = grep_project(str(project), pattern, regex=True, case_sensitive=True, use_index=use_index)
+        return [(m.path, m.line) for m in result.matches]
+
+    assert found(use_index=False)
+    assert found(use_index=True) == found(use_index=False)
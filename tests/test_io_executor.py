@@ -0,0 +1,97 @@
+"""
+Tests de l'exécuteur d'E/S disque (limite par projet, annulation, déconnexion client)
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from backend.services.io_executor import ClientDisconnectedError, IOExecutor
+
+
+class ConcurrencyProbe:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+        self.calls = 0
+
+    def work(self, duration=0.02):
+        with self.lock:
+            self.calls += 1
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(duration)
+        with self.lock:
+            self.running -= 1
+        return threading.current_thread().name
+
+
+class FakeRequest:
+    def __init__(self, disconnect_after: int):
+        self.polls = 0
+        self.disconnect_after = disconnect_after
+
+    async def is_disconnected(self):
+        self.polls += 1
+        return self.polls > self.disconnect_after
+
+
+@pytest.mark.asyncio
+async def test_runs_off_loop_with_per_project_limit():
+    executor = IOExecutor(max_workers=8, per_project=2)
+    probe = ConcurrencyProbe()
+
+    names = await asyncio.gather(*(executor.run("/p/a", probe.work) for _ in range(6)))
+
+    assert probe.max_running == 2
+    assert all(name.startswith("io") for name in names)
+
+
+@pytest.mark.asyncio
+async def test_projects_do_not_share_limit():
+    executor = IOExecutor(max_workers=8, per_project=1)
+    probe = ConcurrencyProbe()
+
+    await asyncio.gather(executor.run("/p/a", probe.work), executor.run("/p/b", probe.work))
+
+    assert probe.max_running == 2
+
+
+@pytest.mark.asyncio
+async def test_queued_job_dropped_on_disconnect():
+    executor = IOExecutor(max_workers=2, per_project=1, disconnect_poll=0.01)
+    probe = ConcurrencyProbe()
+
+    running = asyncio.ensure_future(executor.run("/p/a", probe.work, 0.1))
+    await asyncio.sleep(0.01)
+    with pytest.raises(ClientDisconnectedError):
+        await executor.run("/p/a", probe.work, request=FakeRequest(disconnect_after=1))
+    await running
+
+    assert probe.calls == 1  # le travail en attente n'a jamais été lancé
+
+
+@pytest.mark.asyncio
+async def test_connected_client_gets_result():
+    executor = IOExecutor(disconnect_poll=0.01)
+
+    result = await executor.run(None, sum, [1, 2, 3], request=FakeRequest(disconnect_after=100))
+
+    assert result == 6
+
+
+@pytest.mark.asyncio
+async def test_abandoned_running_job_keeps_project_slot():
+    executor = IOExecutor(max_workers=4, per_project=1, disconnect_poll=0.01)
+    probe = ConcurrencyProbe()
+
+    # Le client se déconnecte pendant que le travail tourne dans son thread
+    with pytest.raises(ClientDisconnectedError):
+        await executor.run("/p/a", probe.work, 0.1, request=FakeRequest(disconnect_after=1))
+    await asyncio.gather(*(executor.run("/p/a", probe.work) for _ in range(3)))
+
+    assert probe.calls == 4
+    assert probe.max_running == 1  # aucun travail lancé avant la fin du thread abandonné
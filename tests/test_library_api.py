@@ -22,7 +22,8 @@ async def db():
 
     yield db
 
-    # Nettoyage après les tests
+    # Nettoyage après les tests (fermer le pool avant suppression : fichiers WAL)
+    await db.close()
     if os.path.exists(test_db_path):
         os.remove(test_db_path)
 
@@ -292,3 +293,197 @@ async def test_library_document_update_model_all_none():
     assert update.tags is None
     assert update.agents is None
     assert update.icon is None
+
+
+@pytest.mark.asyncio
+async def test_list_library_documents_pagination(db):
+    for i in range(5):
+        await db.create_library_document(
+            category="libraries",
+            name=f"Doc {i}",
+            description="Doc",
+            content="Content",
+            tags=[],
+            agents=[],
+        )
+
+    page1 = await db.list_library_documents_page(limit=3)
+    page2 = await db.list_library_documents_page(limit=3, cursor=page1["next_cursor"])
+
+    assert len(page1["items"]) == 3
+    assert len(page2["items"]) == 2
+    assert page2["next_cursor"] is None
+    names = {d["name"] for d in page1["items"] + page2["items"]}
+    assert names == {f"Doc {i}" for i in range(5)}
+
+
+@pytest.mark.asyncio
+async def test_search_ranking_prefix_and_snippet(db):
+    await db.create_library_document(
+        category="libraries",
+        name="FastAPI",
+        description="Framework web",
+        content="Routes et middleware",
+        tags=[],
+        agents=[],
+    )
+    await db.create_library_document(
+        category="libraries",
+        name="Pytest",
+        description="Tests",
+        content="Exemple de client FastAPI dans un test",
+        tags=[],
+        agents=[],
+    )
+
+    docs = await db.list_library_documents(search="fast")
+
+    assert [d["name"] for d in docs] == ["FastAPI", "Pytest"]
+    assert docs[0]["score"] <= docs[1]["score"]
+    assert "**FastAPI**" in docs[1]["snippet"]
+
+
+@pytest.mark.asyncio
+async def test_search_index_follows_update_and_delete(db, sample_doc):
+    await db.update_library_document(sample_doc["id"], name="Renamed Zeppelin")
+    assert len(await db.list_library_documents(search="zeppelin")) == 1
+
+    await db.delete_library_document(sample_doc["id"])
+    assert await db.list_library_documents(search="zeppelin") == []
+
+
+@pytest.mark.asyncio
+async def test_search_ignores_fts_syntax(db, sample_doc):
+    assert await db.list_library_documents(search='"') == []
+    docs = await db.list_library_documents(search="test) (")
+    assert len(docs) == 1
+
+
+@pytest.mark.asyncio
+async def test_rebuild_library_search_index(db, sample_doc):
+    await db.rebuild_library_search_index()
+    docs = await db.list_library_documents(search="library")
+    assert docs[0]["id"] == sample_doc["id"]
+
+
+@pytest.mark.asyncio
+async def test_agent_filter_exact_match(db):
+    await db.create_library_document(
+        category="prompts",
+        name="Maitre",
+        description="Doc",
+        content="Content",
+        tags=["python"],
+        agents=["JARVIS_Maître"],
+    )
+    await db.create_library_document(
+        category="prompts",
+        name="Substring",
+        description="Doc",
+        content="Content",
+        tags=["python3"],
+        agents=["CODEUR_BIS"],
+    )
+
+    docs = await db.list_library_documents(agent="JARVIS_Maître")
+    assert [d["name"] for d in docs] == ["Maitre"]
+
+    assert await db.list_library_documents(agent="CODEUR") == []
+    assert [d["name"] for d in await db.list_library_documents(tag="python")] == ["Maitre"]
+
+
+@pytest.mark.asyncio
+async def test_associations_follow_update(db, sample_doc):
+    await db.update_library_document(sample_doc["id"], tags=["renamed"], agents=["VALIDATEUR"])
+
+    assert await db.list_library_documents(tag="test") == []
+    assert len(await db.list_library_documents(tag="renamed")) == 1
+    assert len(await db.list_library_documents(agent="VALIDATEUR")) == 1
+
+
+@pytest.mark.asyncio
+async def test_library_facets(db, sample_doc):
+    await db.create_library_document(
+        category="prompts",
+        name="Other",
+        description="Doc",
+        content="Content",
+        tags=["python"],
+        agents=["CODEUR"],
+    )
+
+    facets = await db.get_library_facets()
+
+    assert facets["categories"] == {"libraries": 1, "prompts": 1}
+    assert facets["tags"] == {"test": 1, "python": 2}
+    assert facets["agents"] == {"CODEUR": 2, "BASE": 1}
+
+
+@pytest.mark.asyncio
+async def test_migrate_library_associations_backfill(db, sample_doc):
+    from backend.db.migrations import migrate_library_associations
+
+    async with db._connect() as conn:
+        await conn.execute("DELETE FROM library_document_tags")
+        await conn.execute("DELETE FROM library_document_agents")
+        assert await migrate_library_associations(conn) is True
+        assert await migrate_library_associations(conn) is False
+        await conn.commit()
+
+    assert len(await db.list_library_documents(agent="CODEUR")) == 1
+
+
+def _import_items(count):
+    return (
+        {
+            "category": "libraries",
+            "name": f"Bulk {i}",
+            "description": f"Document importé {i}",
+            "content": f"Contenu importé numéro {i}",
+            "tags": ["bulk", f"t{i % 3}"],
+            "agents": ["CODEUR"],
+        }
+        for i in range(count)
+    )
+
+
+@pytest.mark.asyncio
+async def test_import_library_documents_bulk(db):
+    writes_before = db.pool_stats()["acquired_write"]
+
+    inserted = await db.import_library_documents(_import_items(120), batch_size=50)
+
+    assert inserted == 120
+    assert db.pool_stats()["acquired_write"] == writes_before + 1
+    facets = await db.get_library_facets()
+    assert facets["tags"]["bulk"] == 120
+    assert facets["agents"]["CODEUR"] == 120
+    found = await db.list_library_documents(search="numéro")
+    assert len(found) == 120
+
+
+@pytest.mark.asyncio
+async def test_import_library_documents_all_or_nothing(db):
+    from backend.db.bulk_import import BulkImportError
+
+    items = list(_import_items(3))
+    del items[2]["content"]
+
+    with pytest.raises(BulkImportError):
+        await db.import_library_documents(items, batch_size=2)
+
+    assert await db.list_library_documents() == []
+
+
+@pytest.mark.asyncio
+async def test_seed_library_if_empty_streams_seed_file(db):
+    import json
+    from pathlib import Path
+
+    seed_file = Path(__file__).parent.parent / "backend" / "db" / "library_seed.json"
+    expected = len(json.loads(seed_file.read_text(encoding="utf-8")))
+
+    await db.seed_library_if_empty()
+    await db.seed_library_if_empty()
+
+    assert len(await db.list_library_documents()) == expected
@@ -0,0 +1,255 @@
+"""
+Tests de l'ordonnancement des délégations (étapes, parallélisme, ordre des résultats)
+"""
+
+import asyncio
+import re
+from unittest.mock import patch
+
+import pytest
+
+from backend.ia.token_accounting import TokenLedger
+from backend.services.orchestration import SimpleOrchestrator
+
+CODEUR = {"agent_name": "CODEUR", "instruction": "code", "marker": "[C]"}
+BASE = {"agent_name": "BASE", "instruction": "check", "marker": "[B]"}
+VALIDATEUR = {"agent_name": "VALIDATEUR", "instruction": "valide", "marker": "[V]"}
+
+
+class RecordingOrchestrator(SimpleOrchestrator):
+    """Délégations factices : durée par agent, trace des exécutions simultanées."""
+
+    def __init__(self, durations):
+        self.durations = durations
+        self.running = set()
+        self.max_running = 0
+        self.started = []
+
+    async def execute_delegation(self, delegation, **kwargs):
+        name = delegation["agent_name"]
+        self.started.append((name, frozenset(self.running)))
+        self.running.add(name)
+        self.max_running = max(self.max_running, len(self.running))
+        await asyncio.sleep(self.durations[name])
+        self.running.discard(name)
+        return {"agent_name": name, "success": True, "files_written": []}
+
+
+def test_plan_stages_writer_before_readers():
+    delegations = [BASE, CODEUR, VALIDATEUR]
+    assert SimpleOrchestrator.plan_delegation_stages(delegations, "/tmp/p") == [[1], [0, 2]]
+    assert SimpleOrchestrator.plan_delegation_stages(delegations) == [[0, 1, 2]]
+    assert SimpleOrchestrator.plan_delegation_stages([BASE], "/tmp/p") == [[0]]
+    assert SimpleOrchestrator.plan_delegation_stages([]) == []
+
+
+@pytest.mark.asyncio
+async def test_independent_delegations_run_concurrently(monkeypatch):
+    monkeypatch.setenv("ORCHESTRATION_MAX_PARALLEL", "3")
+    orchestrator = RecordingOrchestrator({"CODEUR": 0.05, "BASE": 0.01, "VALIDATEUR": 0.0})
+
+    results = await orchestrator.run_delegations([CODEUR, BASE, VALIDATEUR])
+
+    assert orchestrator.max_running == 3
+    # Ordre de détection conservé malgré l'ordre de terminaison inverse
+    assert [r["agent_name"] for r in results] == ["CODEUR", "BASE", "VALIDATEUR"]
+
+
+@pytest.mark.asyncio
+async def test_readers_wait_for_codeur_with_project(monkeypatch):
+    monkeypatch.setenv("ORCHESTRATION_MAX_PARALLEL", "3")
+    orchestrator = RecordingOrchestrator({"CODEUR": 0.02, "BASE": 0.01, "VALIDATEUR": 0.01})
+
+    results = await orchestrator.run_delegations([BASE, CODEUR, VALIDATEUR], project_path="/tmp/p")
+
+    assert orchestrator.started[0] == ("CODEUR", frozenset())
+    assert orchestrator.max_running == 2  # BASE et VALIDATEUR ensemble, après CODEUR
+    assert [r["agent_name"] for r in results] == ["BASE", "CODEUR", "VALIDATEUR"]
+
+
+@pytest.mark.asyncio
+async def test_concurrency_cap(monkeypatch):
+    monkeypatch.setenv("ORCHESTRATION_MAX_PARALLEL", "1")
+    orchestrator = RecordingOrchestrator({"CODEUR": 0.01, "BASE": 0.01, "VALIDATEUR": 0.01})
+
+    await orchestrator.run_delegations([CODEUR, BASE, VALIDATEUR])
+
+    assert orchestrator.max_running == 1
+
+
+class FanOutCodeur:
+    """CODEUR (et VALIDATEUR) factice : contrat d'interfaces, puis un bloc par fichier demandé."""
+
+    name = "CODEUR"
+
+    def __init__(self):
+        self.prompts = []
+        self.running = 0
+        self.max_running = 0
+
+    async def handle(self, messages, session_id=None, function_executor=None):
+        prompt = messages[-1]["content"]
+        if prompt.startswith("Vérifie ce code"):
+            return "VALIDE"
+        self.prompts.append(prompt)
+        if "CONTRAT D'INTERFACES" in prompt:
+            return "main.py : main() ; utils.py : helper() -> int"
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        files = re.search(r"UNIQUEMENT les fichiers suivants : (.*)", prompt).group(1).split(", ")
+        # Fichier d'un autre groupe glissé dans la réponse : doit être ignoré
+        files.append("intrus.py")
+        return "\n\n".join(f"# {f}\n```python\nNAME = '{f}'\n```" for f in files)
+
+
+def test_plan_fan_out_groups(monkeypatch):
+    monkeypatch.setenv("CODEUR_FANOUT_PARALLEL", "2")
+    files = ["a.py", "b.py", "c.py", "d.py", "e.py"]
+    with patch("backend.services.orchestration.token_ledger", TokenLedger()):
+        assert SimpleOrchestrator.plan_fan_out(files) == [["a.py", "b.py", "c.py"], ["d.py", "e.py"]]
+        assert SimpleOrchestrator.plan_fan_out(files[:2]) == []  # sous le seuil
+
+        monkeypatch.setenv("CODEUR_FANOUT_MIN_FILES", "0")
+        assert SimpleOrchestrator.plan_fan_out(files) == []
+
+
+def test_plan_fan_out_respects_reply_size(monkeypatch):
+    monkeypatch.setenv("CODEUR_FANOUT_PARALLEL", "1")
+    ledger = TokenLedger()
+    ledger.observe_tokens_per_file(completion_tokens=4000, files=2)  # 2000 tokens/fichier
+    with patch("backend.services.orchestration.token_ledger", ledger):
+        groups = SimpleOrchestrator.plan_fan_out(["a.py", "b.py", "c.py", "d.py", "e.py"])
+    assert groups == [["a.py", "b.py"], ["c.py", "d.py"], ["e.py"]]
+
+
+@pytest.mark.asyncio
+async def test_codeur_fan_out_writes_all_files(tmp_path, monkeypatch):
+    monkeypatch.setenv("CODEUR_FANOUT_PARALLEL", "4")
+    monkeypatch.setenv("CODEUR_FANOUT_MIN_FILES", "3")
+    codeur = FanOutCodeur()
+    delegation = {
+        "agent_name": "CODEUR",
+        "instruction": "Créer : main.py, utils.py, models.py, config.py",
+        "marker": "[C]",
+    }
+    events = []
+
+    async def on_event(event):
+        events.append(event)
+
+    with (
+        patch("backend.services.orchestration.get_agent", return_value=codeur),
+        patch("backend.services.orchestration.token_ledger", TokenLedger()),
+    ):
+        result = await SimpleOrchestrator()._run_delegation(
+            delegation, project_path=str(tmp_path), on_event=on_event
+        )
+
+    written = [f["path"] for f in result["files_written"] if f["status"] == "written"]
+    assert written == ["config.py", "main.py", "models.py", "utils.py"]  # ordre des groupes
+    assert not (tmp_path / "intrus.py").exists()
+    assert (tmp_path / "utils.py").read_text().strip() == "NAME = 'utils.py'"
+    assert codeur.max_running == 4
+    assert len(codeur.prompts) == 5  # contrat + 4 générations, aucune passe de complétion
+    assert all("helper() -> int" in p for p in codeur.prompts[1:])
+    assert result["passes_used"] == 1
+    assert any(e["event"] == "fan_out" and e["groups"] == 4 for e in events)
+
+
+class TruncatingCodeur:
+    """CODEUR factice dont la première réponse est coupée au milieu d'un fichier."""
+
+    def __init__(self):
+        self.prompts = []
+
+    async def handle(self, messages, session_id=None, function_executor=None):
+        prompt = messages[-1]["content"]
+        self.prompts.append(prompt)
+        return "# app.py\n```python\ndef b():\n    return 2\n```"
+
+
+@pytest.mark.asyncio
+async def test_truncated_file_completed_by_continuation():
+    codeur = TruncatingCodeur()
+    reply = "# ok.py\n```python\nok = 1\n```\n# app.py\n```python\ndef a():\n    return 1\n\ndef"
+    with patch("backend.services.orchestration.get_agent", return_value=codeur):
+        blocks = await SimpleOrchestrator()._parse_reply(reply)
+
+    assert len(codeur.prompts) == 1
+    assert "app.py" in codeur.prompts[0] and "3 lignes reçues" in codeur.prompts[0]
+    assert blocks[1] == {
+        "path": "app.py",
+        "content": "def a():\n    return 1\n\ndef b():\n    return 2\n",
+    }
+
+
+def test_merge_continuation_regenerated_file():
+    head = "import os\n\nx = 1\n"
+    assert SimpleOrchestrator._merge_continuation(head, "import os\nx = 2\n") == "import os\nx = 2\n"
+    assert SimpleOrchestrator._merge_continuation(head, "y = 2\n") == head + "y = 2\n"
+
+
+def test_blocks_for_group_matches_full_paths():
+    expected = ["app/__init__.py", "app/main.py", "app/models/__init__.py", "config.py"]
+    blocks = [
+        {"path": "app/__init__.py", "content": "a"},
+        {"path": "app/models/__init__.py", "content": "b"},
+        {"path": "__init__.py", "content": "ambigu"},
+        {"path": "config.py", "content": "c"},
+    ]
+
+    first = SimpleOrchestrator._blocks_for_group(blocks, ["app/__init__.py", "app/main.py"], expected)
+    second = SimpleOrchestrator._blocks_for_group(blocks, ["app/models/__init__.py"], expected)
+
+    assert [b["path"] for b in first] == ["app/__init__.py"]
+    assert [b["path"] for b in second] == ["app/models/__init__.py"]
+    # Nom sans dossier rattaché seulement s'il est unique parmi les fichiers attendus
+    blocks = [{"path": "main.py", "content": "m"}]
+    assert SimpleOrchestrator._blocks_for_group(blocks, ["app/main.py"], expected) == [
+        {"path": "app/main.py", "content": "m"}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_fan_out_cancels_group_generations(tmp_path, monkeypatch):
+    monkeypatch.setenv("CODEUR_FANOUT_PARALLEL", "4")
+    monkeypatch.setenv("CODEUR_FANOUT_MIN_FILES", "3")
+
+    class SlowCodeur(FanOutCodeur):
+        def __init__(self):
+            super().__init__()
+            self.started = 0
+            self.finished = 0
+
+        async def handle(self, messages, session_id=None, function_executor=None):
+            if "CONTRAT D'INTERFACES" in messages[-1]["content"]:
+                return "contrat"
+            self.started += 1
+            await asyncio.sleep(5)
+            self.finished += 1
+            return ""
+
+    codeur = SlowCodeur()
+    delegation = {
+        "agent_name": "CODEUR",
+        "instruction": "Créer : main.py, utils.py, models.py, config.py",
+        "marker": "[C]",
+    }
+    with (
+        patch("backend.services.orchestration.get_agent", return_value=codeur),
+        patch("backend.services.orchestration.token_ledger", TokenLedger()),
+    ):
+        task = asyncio.ensure_future(
+            SimpleOrchestrator()._run_delegation(delegation, project_path=str(tmp_path))
+        )
+        while codeur.started < 4:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    await asyncio.sleep(0.05)
+    assert codeur.finished == 0
+    assert all(t.done() for t in asyncio.all_tasks() if t is not asyncio.current_task())
@@ -0,0 +1,220 @@
+"""
+Tests de la pré-validation locale (syntaxe, formats, imports internes, court-circuit du VALIDATEUR)
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from backend.ia.token_accounting import TokenLedger
+from backend.services import prevalidation
+from backend.services.orchestration import SimpleOrchestrator
+from backend.services.prevalidation import (
+    check_file,
+    format_diagnostics,
+    prevalidate_files,
+    shutdown_prevalidation_pool,
+)
+
+
+def _write(root, files: dict[str, str]) -> list[dict]:
+    written = []
+    for rel, content in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+        written.append({"path": rel, "status": "written"})
+    return written
+
+
+def test_check_file_python_syntax_and_duplicates(tmp_path):
+    _write(tmp_path, {"bad.py": "def f(:\n    pass\n", "dup.py": "def f():\n    pass\n\n\ndef f():\n    pass\n"})
+
+    bad = check_file(str(tmp_path), "bad.py")["diagnostics"]
+    assert [d.check for d in bad] == ["syntax"]
+    assert bad[0].line == 1
+
+    dup = check_file(str(tmp_path), "dup.py")["diagnostics"]
+    assert [d.check for d in dup] == ["duplicate"]
+    assert dup[0].line == 5
+
+
+def test_check_file_data_formats(tmp_path):
+    _write(tmp_path, {"a.json": '{"a": 1,}', "b.toml": "key = = 1", "ok.json": '{"a": 1}'})
+
+    assert [d.check for d in check_file(str(tmp_path), "a.json")["diagnostics"]] == ["json"]
+    assert [d.check for d in check_file(str(tmp_path), "b.toml")["diagnostics"]] == ["toml"]
+    assert check_file(str(tmp_path), "ok.json")["diagnostics"] == []
+
+
+@pytest.mark.asyncio
+async def test_prevalidate_resolves_internal_imports(tmp_path):
+    written = _write(
+        tmp_path,
+        {
+            "app/__init__.py": "",
+            "app/models.py": "class User:\n    pass\n",
+            "app/service.py": (
+                "import os\nimport requests\n"
+                "from app.models import User, Missing\nfrom .helpers import tool\n"
+            ),
+            "web/main.js": "import { api } from './api';\nimport React from 'react';\n",
+        },
+    )
+
+    diagnostics = await prevalidate_files(str(tmp_path), written)
+
+    messages = format_diagnostics(diagnostics)
+    assert {d.check for d in diagnostics} == {"import"}
+    assert "Missing" in messages
+    assert "helpers" in messages
+    assert "./api" in messages
+    assert "requests" not in messages and "react" not in messages  # dépendances externes
+
+
+@pytest.mark.asyncio
+async def test_prevalidate_esm_and_bundler_specifiers(tmp_path):
+    written = _write(
+        tmp_path,
+        {
+            "src/util.ts": "export function f() { return 1; }\n",
+            "src/view.tsx": "export const View = () => null;\n",
+            "src/logo.svg": "<svg/>",
+            "src/main.ts": (
+                "import { f } from './util.js';\n"
+                "import { View } from './view.js';\n"
+                "import logo from './logo.svg?url';\n"
+                "import { g } from './gone.js';\n"
+            ),
+        },
+    )
+
+    diagnostics = await prevalidate_files(str(tmp_path), written)
+
+    assert [d.message for d in diagnostics] == ["module relatif introuvable : ./gone.js"]
+
+
+@pytest.mark.asyncio
+async def test_prevalidate_clean_project(tmp_path):
+    written = _write(
+        tmp_path,
+        {"pkg/__init__.py": "", "pkg/a.py": "def a():\n    return 1\n", "pkg/b.py": "from pkg.a import a\n"},
+    )
+    written.append({"path": "pkg/skipped.py", "status": "skipped"})
+
+    assert await prevalidate_files(str(tmp_path), written) == []
+
+
+@pytest.mark.asyncio
+async def test_process_pool_shutdown_and_recreated(tmp_path, monkeypatch):
+    monkeypatch.setenv("PREVALIDATION_POOL_MIN_FILES", "1")
+    monkeypatch.setenv("PREVALIDATION_WORKERS", "1")
+    written = _write(tmp_path, {"bad.py": "def f(:\n"})
+
+    assert [d.check for d in await prevalidate_files(str(tmp_path), written)] == ["syntax"]
+    assert prevalidation._pool is not None
+
+    shutdown_prevalidation_pool()
+    assert prevalidation._pool is None
+    assert [d.check for d in await prevalidate_files(str(tmp_path), written)] == ["syntax"]
+    shutdown_prevalidation_pool()
+
+
+class BrokenThenFixedCodeur:
+    """CODEUR factice : première réponse syntaxiquement invalide, correction ensuite."""
+
+    def __init__(self):
+        self.prompts = []
+
+    async def handle(self, messages, session_id=None, function_executor=None):
+        prompt = messages[-1]["content"]
+        self.prompts.append(prompt)
+        if len(self.prompts) == 1:
+            return "# app.py\n```python\ndef run(:\n    return 1\n```"
+        return "# app.py\n```python\ndef run():\n    return 1\n```"
+
+
+class RecordingValidateur:
+    def __init__(self):
+        self.calls = 0
+
+    async def handle(self, messages, session_id=None, function_executor=None):
+        self.calls += 1
+        return "VALIDE"
+
+
+@pytest.mark.asyncio
+async def test_local_errors_skip_validateur(tmp_path):
+    codeur, validateur = BrokenThenFixedCodeur(), RecordingValidateur()
+    agents = {"CODEUR": codeur, "VALIDATEUR": validateur}
+    events = []
+
+    async def on_event(event):
+        events.append(event)
+
+    with (
+        patch("backend.services.orchestration.get_agent", side_effect=agents.__getitem__),
+        patch("backend.services.orchestration.token_ledger", TokenLedger()),
+    ):
+        result = await SimpleOrchestrator()._run_delegation(
+            {"agent_name": "CODEUR", "instruction": "Créer app.py", "marker": "[C]"},
+            project_path=str(tmp_path),
+            on_event=on_event,
+        )
+
+    assert validateur.calls == 1  # revue sémantique des fichiers corrigés seulement
+    assert result["validation"] == "VALIDE"
+    assert len(codeur.prompts) == 2
+    assert "DIAGNOSTICS" in codeur.prompts[1]
+    assert "app.py:1 [syntax]" in codeur.prompts[1]
+    assert (tmp_path / "app.py").read_text().startswith("def run():")
+    assert any(e["event"] == "prevalidation" and e["errors"] == 1 for e in events)
+    assert result["passes_used"] == 2
+
+
+@pytest.mark.asyncio
+async def test_clean_code_goes_to_validateur(tmp_path):
+    class CleanCodeur(BrokenThenFixedCodeur):
+        async def handle(self, messages, session_id=None, function_executor=None):
+            self.prompts.append(messages[-1]["content"])
+            return "# app.py\n```python\ndef run():\n    return 1\n```"
+
+    codeur, validateur = CleanCodeur(), RecordingValidateur()
+    agents = {"CODEUR": codeur, "VALIDATEUR": validateur}
+
+    with (
+        patch("backend.services.orchestration.get_agent", side_effect=agents.__getitem__),
+        patch("backend.services.orchestration.token_ledger", TokenLedger()),
+    ):
+        await SimpleOrchestrator()._run_delegation(
+            {"agent_name": "CODEUR", "instruction": "Créer app.py", "marker": "[C]"},
+            project_path=str(tmp_path),
+        )
+
+    assert validateur.calls == 1
+    assert len(codeur.prompts) == 1
+
+
+@pytest.mark.asyncio
+async def test_unresolved_diagnostics_reported_after_correction(tmp_path):
+    class AlwaysBrokenCodeur(BrokenThenFixedCodeur):
+        async def handle(self, messages, session_id=None, function_executor=None):
+            self.prompts.append(messages[-1]["content"])
+            return "# app.py\n```python\ndef run(:\n    return 1\n```"
+
+    codeur, validateur = AlwaysBrokenCodeur(), RecordingValidateur()
+    agents = {"CODEUR": codeur, "VALIDATEUR": validateur}
+
+    with (
+        patch("backend.services.orchestration.get_agent", side_effect=agents.__getitem__),
+        patch("backend.services.orchestration.token_ledger", TokenLedger()),
+    ):
+        result = await SimpleOrchestrator()._run_delegation(
+            {"agent_name": "CODEUR", "instruction": "Créer app.py", "marker": "[C]"},
+            project_path=str(tmp_path),
+        )
+
+    assert validateur.calls == 0
+    assert len(codeur.prompts) == 2  # une seule passe de correction
+    assert result["validation"].startswith("INVALIDE (pré-validation locale)")
+    assert "app.py:1 [syntax]" in result["validation"]
@@ -0,0 +1,263 @@
+"""
+Tests du cache de préfixes de prompt (context caching) contre un provider local
+simulant des identifiants de contenu en cache.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from backend.ia.prompt_cache import PromptPrefixCache, split_prefix
+from backend.ia.providers.base_provider import BaseProvider
+from backend.ia.providers.gemini_provider import GeminiProvider
+
+SYSTEM = {"role": "system", "content": "Tu es CODEUR. " * 400}
+MESSAGES = [SYSTEM, {"role": "user", "content": "Écris main.py"}]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class StubHandle:
+    def __init__(self, name):
+        self.name = name
+        self.deleted = False
+
+
+class StubProvider(BaseProvider):
+    """Provider factice : crée des handles numérotés, peut refuser création ou prolongation."""
+
+    def __init__(self):
+        super().__init__(api_key="k", model="stub-model")
+        self.created = []
+        self.refreshed = []
+        self.fail_create = False
+        self.fail_refresh = False
+
+    async def create_cached_prefix(self, prefix_messages, functions, ttl_seconds):
+        await asyncio.sleep(0)
+        if self.fail_create:
+            raise ValueError("contenu trop court")
+        handle = StubHandle(f"cachedContents/{len(self.created)}")
+        self.created.append((handle, prefix_messages, functions))
+        return handle
+
+    async def refresh_cached_prefix(self, handle, ttl_seconds):
+        if self.fail_refresh:
+            raise LookupError("introuvable")
+        self.refreshed.append(handle.name)
+
+    async def delete_cached_prefix(self, handle):
+        handle.deleted = True
+
+    async def send_message(self, messages, functions=None, temperature=0.7, max_tokens=4096):
+        return {"content": "", "tool_calls": [], "finish_reason": "stop"}
+
+    def format_functions(self, functions):
+        return functions
+
+    def extract_tool_calls(self, response):
+        return []
+
+    def format_tool_result(self, tool_call_id, function_name, result):
+        return {}
+
+
+@pytest.fixture
+def provider():
+    return StubProvider()
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(provider, clock):
+    return PromptPrefixCache(provider, ttl_seconds=100, refresh_margin=10, min_tokens=100, clock=clock)
+
+
+def test_split_prefix():
+    prefix, rest = split_prefix([SYSTEM, {"role": "user", "content": "a"}, SYSTEM])
+    assert prefix == [SYSTEM]
+    assert len(rest) == 2
+
+
+@pytest.mark.asyncio
+async def test_prefix_registered_once(cache, provider):
+    first = await cache.resolve(MESSAGES)
+    second = await cache.resolve([*MESSAGES, {"role": "user", "content": "Et tests.py"}])
+
+    assert first is second
+    assert first.length == 1
+    assert len(provider.created) == 1
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_functions_are_part_of_the_key(cache, provider):
+    await cache.resolve(MESSAGES, functions=[{"name": "read_file"}])
+    await cache.resolve(MESSAGES, functions=[{"name": "write_file"}])
+    assert len(provider.created) == 2
+
+
+@pytest.mark.asyncio
+async def test_refreshed_before_expiry(cache, provider, clock):
+    entry = await cache.resolve(MESSAGES)
+    clock.now = 95  # dans la marge de prolongation
+    assert await cache.resolve(MESSAGES) is entry
+    assert provider.refreshed == [entry.name]
+    assert entry.expires_at == 195
+
+
+@pytest.mark.asyncio
+async def test_recreated_after_expiry_or_failed_refresh(cache, provider, clock):
+    first = await cache.resolve(MESSAGES)
+    clock.now = 150
+    second = await cache.resolve(MESSAGES)
+    assert second.name != first.name
+
+    provider.fail_refresh = True
+    clock.now = 245
+    third = await cache.resolve(MESSAGES)
+    assert third.name != second.name
+    assert len(provider.created) == 3
+
+
+@pytest.mark.asyncio
+async def test_short_or_lonely_prefix_skipped(cache, provider):
+    assert await cache.resolve([{"role": "system", "content": "court"}, MESSAGES[1]]) is None
+    assert await cache.resolve([SYSTEM]) is None  # rien à envoyer après le préfixe
+    assert provider.created == []
+
+
+@pytest.mark.asyncio
+async def test_creation_failure_falls_back_and_is_not_retried(cache, provider, clock):
+    provider.fail_create = True
+    assert await cache.resolve(MESSAGES) is None
+    provider.fail_create = False
+    assert await cache.resolve(MESSAGES) is None  # refus mémorisé jusqu'à l'échéance
+
+    clock.now = 101
+    assert await cache.resolve(MESSAGES) is not None
+    assert cache.stats()["failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_eviction_deletes_provider_handle(provider, clock):
+    cache = PromptPrefixCache(provider, ttl_seconds=100, min_tokens=1, max_entries=1, clock=clock)
+    first = await cache.resolve(MESSAGES)
+    await cache.resolve([{"role": "system", "content": "autre prompt"}, MESSAGES[1]])
+
+    assert first.handle.deleted
+    assert cache.stats()["evicted"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_resolves_create_once(cache, provider):
+    entries = await asyncio.gather(*(cache.resolve(MESSAGES) for _ in range(5)))
+    assert len({id(e) for e in entries}) == 1
+    assert len(provider.created) == 1
+
+
+def test_disabled_by_default(monkeypatch, provider):
+    monkeypatch.delenv("PROMPT_CACHE_ENABLED", raising=False)
+    assert PromptPrefixCache.from_env(provider) is None
+    monkeypatch.setenv("PROMPT_CACHE_ENABLED", "true")
+    assert PromptPrefixCache.from_env(provider) is not None
+
+
+@pytest.mark.asyncio
+async def test_gemini_sends_only_uncached_turns(monkeypatch):
+    monkeypatch.setenv("PROMPT_CACHE_ENABLED", "true")
+    monkeypatch.setenv("PROMPT_CACHE_MIN_TOKENS", "100")
+
+    with patch("google.generativeai.GenerativeModel") as mock_model:
+        cached_chat = MagicMock()
+        cached_chat.send_message_async = AsyncMock(
+            return_value=MagicMock(
+                candidates=[MagicMock(content=MagicMock(parts=[MagicMock(text="ok")]))],
+                usage_metadata=None,
+            )
+        )
+        cached_client = mock_model.from_cached_content.return_value
+        cached_client.start_chat.return_value = cached_chat
+
+        provider = GeminiProvider(api_key="test_key", model="gemini-prompt-cache-test")
+        provider.create_cached_prefix = AsyncMock(return_value=StubHandle("cachedContents/x"))
+
+        with patch.object(provider.rate_limiter, "acquire", AsyncMock()):
+            response = await provider.send_message(MESSAGES, functions=[{"name": "read_file"}])
+
+        assert response["content"] == "ok"
+        assert cached_client.start_chat.call_args.kwargs["history"] == []  # prompt système en cache
+        assert cached_chat.send_message_async.call_args.kwargs["tools"] is None
+        mock_model.return_value.start_chat.assert_not_called()
+
+
+class NotFound(Exception):
+    """Équivalent local de google.api_core.exceptions.NotFound."""
+
+    code = 404
+
+
+@pytest.mark.asyncio
+async def test_gemini_stale_cached_content_falls_back_inline(monkeypatch):
+    monkeypatch.setenv("PROMPT_CACHE_ENABLED", "true")
+    monkeypatch.setenv("PROMPT_CACHE_MIN_TOKENS", "100")
+
+    def reply(text):
+        return MagicMock(
+            candidates=[MagicMock(content=MagicMock(parts=[MagicMock(text=text)]))],
+            usage_metadata=None,
+        )
+
+    with patch("google.generativeai.GenerativeModel") as mock_model:
+        cached_chat = MagicMock()
+        cached_chat.send_message_async = AsyncMock(side_effect=NotFound("CachedContent not found"))
+        mock_model.from_cached_content.return_value.start_chat.return_value = cached_chat
+        inline_chat = MagicMock()
+        inline_chat.send_message_async = AsyncMock(return_value=reply("en ligne"))
+        mock_model.return_value.start_chat.return_value = inline_chat
+
+        provider = GeminiProvider(api_key="test_key", model="gemini-prompt-cache-stale")
+        provider.create_cached_prefix = AsyncMock(return_value=StubHandle("cachedContents/x"))
+
+        with patch.object(provider.rate_limiter, "acquire", AsyncMock()):
+            response = await provider.send_message(MESSAGES, functions=[{"name": "read_file"}])
+
+        assert response["content"] == "en ligne"
+        assert cached_chat.send_message_async.await_count == 1
+        # Préfixe renvoyé en ligne : prompt système dans l'historique, outils déclarés
+        history = mock_model.return_value.start_chat.call_args.kwargs["history"]
+        assert history[0]["parts"][0]["text"] == SYSTEM["content"]
+        assert inline_chat.send_message_async.call_args.kwargs["tools"] is not None
+        assert provider.prompt_cache.stats()["active"] == 0  # préfixe oublié
+
+
+@pytest.mark.asyncio
+async def test_gemini_other_errors_do_not_drop_cached_content(monkeypatch):
+    monkeypatch.setenv("PROMPT_CACHE_ENABLED", "true")
+    monkeypatch.setenv("PROMPT_CACHE_MIN_TOKENS", "100")
+
+    with patch("google.generativeai.GenerativeModel") as mock_model:
+        cached_chat = MagicMock()
+        cached_chat.send_message_async = AsyncMock(side_effect=ValueError("requête invalide"))
+        mock_model.from_cached_content.return_value.start_chat.return_value = cached_chat
+
+        provider = GeminiProvider(api_key="test_key", model="gemini-prompt-cache-error")
+        provider.create_cached_prefix = AsyncMock(return_value=StubHandle("cachedContents/y"))
+
+        with patch.object(provider.rate_limiter, "acquire", AsyncMock()):
+            with pytest.raises(ValueError):
+                await provider.send_message(MESSAGES)
+
+        mock_model.return_value.start_chat.assert_not_called()
+        assert provider.prompt_cache.stats()["active"] == 1
@@ -113,6 +113,58 @@ class TestGeminiProvider:
             assert response["finish_reason"] == "stop"
 
 
+    @pytest.mark.asyncio
+    async def test_stream_message_mock(self):
+        """Test streaming : fragments retransmis puis fragment final avec finish_reason"""
+
+        def chunk(text):
+            return MagicMock(candidates=[MagicMock(content=MagicMock(parts=[MagicMock(text=text)]))])
+
+        async def fake_stream():
+            for text in ("Hel", "lo ", "Gemini"):
+                yield chunk(text)
+
+        with patch("google.generativeai.GenerativeModel") as mock_model:
+            mock_chat = AsyncMock()
+            mock_chat.send_message_async.return_value = fake_stream()
+            mock_model.return_value.start_chat.return_value = mock_chat
+
+            provider = GeminiProvider(api_key="test_key", model="gemini-1.5-flash")
+            with patch.object(provider.rate_limiter, "acquire", AsyncMock()):
+                chunks = [
+                    c async for c in provider.stream_message([{"role": "user", "content": "Hello"}])
+                ]
+
+            assert [c["content"] for c in chunks] == ["Hel", "lo ", "Gemini", ""]
+            assert chunks[-1]["finish_reason"] == "stop"
+            assert all(c["finish_reason"] is None for c in chunks[:-1])
+            assert mock_chat.send_message_async.call_args.kwargs["stream"] is True
+
+    @pytest.mark.asyncio
+    async def test_default_stream_message_wraps_send_message(self):
+        """Provider sans streaming natif : un seul fragment complet"""
+
+        class OneShotProvider(BaseProvider):
+            async def send_message(self, messages, functions=None, temperature=0.7, max_tokens=4096):
+                return {"content": "complet", "tool_calls": [], "finish_reason": "stop"}
+
+            def format_functions(self, functions):
+                return functions
+
+            def extract_tool_calls(self, response):
+                return []
+
+            def format_tool_result(self, tool_call_id, function_name, result):
+                return {}
+
+        provider = OneShotProvider(api_key="k", model="m")
+        chunks = [c async for c in provider.stream_message([{"role": "user", "content": "Hi"}])]
+
+        assert chunks == [
+            {"content": "complet", "tool_calls": [], "finish_reason": "stop", "usage": None}
+        ]
+
+
 class TestProviderFactory:
     """Tests de la factory"""
 
@@ -0,0 +1,144 @@
+"""
+Tests du limiteur de débit LLM (seaux à jetons par modèle, équité entre conversations)
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from backend.ia.rate_limiter import (
+    ModelRateLimiter,
+    RateLimiterRegistry,
+    TokenBucket,
+    model_env_prefix,
+    rate_limit_scope,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_refill_and_capacity():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1.0, capacity=2, clock=clock)
+
+    bucket.consume(2)
+    assert bucket.time_until(1) == pytest.approx(1.0)
+
+    clock.now = 10.0
+    assert bucket.available == 2  # plafonné à la capacité
+
+
+def test_token_bucket_oversized_request_is_clamped():
+    bucket = TokenBucket(rate=1.0, capacity=5, clock=FakeClock())
+    assert bucket.time_until(50) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_burst_then_spacing():
+    limiter = ModelRateLimiter("m", rpm=600, tpm=0, burst=3)  # 1 requête / 0.1s
+
+    start = time.monotonic()
+    for _ in range(3):
+        await limiter.acquire()
+    assert time.monotonic() - start < 0.05
+
+    await limiter.acquire()
+    assert time.monotonic() - start >= 0.08
+
+
+@pytest.mark.asyncio
+async def test_tpm_bucket_delays_large_requests():
+    limiter = ModelRateLimiter("m", rpm=6000, tpm=600, burst=10)  # 10 tokens/s
+
+    await limiter.acquire(tokens=600)
+    start = time.monotonic()
+    await limiter.acquire(tokens=2)
+    assert time.monotonic() - start >= 0.15
+
+
+@pytest.mark.asyncio
+async def test_fair_round_robin_between_conversations():
+    limiter = ModelRateLimiter("m", rpm=1200, tpm=0, burst=1)
+    order = []
+
+    async def call(key, label):
+        await limiter.acquire(key=key)
+        order.append(label)
+
+    # La conversation A enfile 3 requêtes avant que B n'arrive
+    tasks = [asyncio.create_task(call("A", f"A{i}")) for i in range(3)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(call("B", "B0")))
+    await asyncio.gather(*tasks)
+
+    assert order.index("B0") <= 2
+
+
+@pytest.mark.asyncio
+async def test_scope_sets_fairness_key():
+    limiter = ModelRateLimiter("m", rpm=6000, tpm=0, burst=5)
+    with rate_limit_scope("conv-1"):
+        await limiter.acquire()
+    assert limiter.stats()["requests"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_is_skipped():
+    limiter = ModelRateLimiter("m", rpm=600, tpm=0, burst=1)
+    await limiter.acquire()
+
+    waiter = asyncio.create_task(limiter.acquire(key="gone"))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await limiter.acquire(key="other")
+
+    stats = limiter.stats()
+    assert stats["requests"] == 2
+    assert stats["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_metrics():
+    limiter = ModelRateLimiter("m", rpm=600, tpm=0, burst=1)
+    await asyncio.gather(*(limiter.acquire(tokens=10, key=str(i)) for i in range(3)))
+
+    stats = limiter.stats()
+    assert stats["requests"] == 3
+    assert stats["tokens"] == 30
+    assert stats["max_queue_depth"] == 3
+    assert stats["waited"] >= 1
+    assert stats["max_wait_seconds"] > 0
+
+
+def test_record_usage_adjusts_tokens():
+    limiter = ModelRateLimiter("m", rpm=60, tpm=1000, clock=FakeClock())
+    limiter.record_usage(estimated=100, actual=400)
+    assert limiter.stats()["tokens"] == 300
+    assert limiter._tokens.available == 700
+
+
+def test_registry_reads_env(monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_RPM", "30")
+    monkeypatch.setenv("RATE_LIMIT_TPM", "5000")
+    monkeypatch.setenv("RATE_LIMIT_GEMINI_2_5_PRO_RPM", "150")
+    monkeypatch.setenv("RATE_LIMIT_GEMINI_2_5_PRO_BURST", "4")
+    registry = RateLimiterRegistry()
+
+    pro = registry.get("gemini-2.5-pro")
+    flash = registry.get("gemini-2.5-flash")
+
+    assert (pro.rpm, pro.tpm, pro.burst) == (150, 5000, 4)
+    assert (flash.rpm, flash.tpm, flash.burst) == (30, 5000, 1)
+    assert registry.get("gemini-2.5-pro") is pro
+    assert set(registry.stats()) == {"gemini-2.5-pro", "gemini-2.5-flash"}
+
+
+def test_model_env_prefix():
+    assert model_env_prefix("gemini-3.1-pro-preview") == "RATE_LIMIT_GEMINI_3_1_PRO_PREVIEW"
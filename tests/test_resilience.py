@@ -0,0 +1,257 @@
+"""
+Tests de la couche de résilience des providers (nouvels essais, disjoncteur, échéances)
+Exécutés contre un provider local qui injecte des pannes.
+"""
+
+import asyncio
+
+import pytest
+
+from backend.ia.providers.base_provider import BaseProvider
+from backend.ia.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceededError,
+    RetryPolicy,
+    classify_error,
+    deadline_scope,
+    get_circuit_breaker,
+    reset_circuit_breakers,
+    resilient,
+    resilient_stream,
+)
+
+
+class ApiError(Exception):
+    def __init__(self, code, message="erreur", retry_after=None):
+        super().__init__(message)
+        self.code = code
+        if retry_after is not None:
+            self.retry_after = retry_after
+
+
+class FaultyProvider(BaseProvider):
+    """Provider factice : consomme une liste de pannes avant de répondre."""
+
+    def __init__(self, faults=None, delay=0.0, model="fake-model"):
+        super().__init__(api_key="k", model=model)
+        self.faults = list(faults or [])
+        self.delay = delay
+        self.calls = 0
+        self.retry_policy = RetryPolicy(
+            max_attempts=4, base_delay=0.001, max_delay=0.01, attempt_timeout=1.0, deadline=5.0
+        )
+
+    @resilient
+    async def send_message(self, messages, functions=None, temperature=0.7, max_tokens=4096):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.faults:
+            raise self.faults.pop(0)
+        return {"content": f"ok après {self.calls} appel(s)", "tool_calls": [], "finish_reason": "stop"}
+
+    @resilient_stream
+    async def stream_message(self, messages, functions=None, temperature=0.7, max_tokens=4096):
+        self.calls += 1
+        if self.faults and not isinstance(self.faults[0], tuple):
+            raise self.faults.pop(0)
+        yield {"content": "a", "tool_calls": [], "finish_reason": None}
+        if self.faults:
+            raise self.faults.pop(0)[0]
+        yield {"content": "", "tool_calls": [], "finish_reason": "stop"}
+
+    def format_functions(self, functions):
+        return functions
+
+    def extract_tool_calls(self, response):
+        return []
+
+    def format_tool_result(self, tool_call_id, function_name, result):
+        return {}
+
+
+MESSAGES = [{"role": "user", "content": "Bonjour"}]
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers():
+    reset_circuit_breakers()
+    yield
+    reset_circuit_breakers()
+
+
+@pytest.mark.parametrize(
+    "error,expected",
+    [
+        (ApiError(429), True),
+        (ApiError(503), True),
+        (ApiError(400), False),
+        (TimeoutError(), True),
+        (ConnectionError(), True),
+        (ValueError("bad"), False),
+    ],
+)
+def test_classify_error(error, expected):
+    assert classify_error(error)[0] is expected
+
+
+def test_retry_after_hints():
+    assert classify_error(ApiError(429, retry_after=7))[1] == 7.0
+    assert classify_error(ApiError(429, "Quota exceeded. Please retry in 12.5s."))[1] == 12.5
+
+
+def test_backoff_honors_retry_after_and_cap():
+    policy = RetryPolicy(base_delay=1.0, max_delay=4.0)
+    assert all(0 <= policy.backoff(10) <= 4.0 for _ in range(50))
+    assert policy.backoff(1, retry_after=3.0) >= 3.0
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried():
+    provider = FaultyProvider(faults=[ApiError(429), ApiError(503)])
+    response = await provider.send_message(MESSAGES)
+
+    assert response["content"] == "ok après 3 appel(s)"
+    assert get_circuit_breaker("fake-model").state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_non_retryable_error_fails_immediately():
+    provider = FaultyProvider(faults=[ApiError(400)])
+    with pytest.raises(ApiError):
+        await provider.send_message(MESSAGES)
+    assert provider.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_attempts():
+    provider = FaultyProvider(faults=[ApiError(503)] * 10)
+    with pytest.raises(ApiError):
+        await provider.send_message(MESSAGES)
+    assert provider.calls == 4
+
+
+@pytest.mark.asyncio
+async def test_attempt_timeout_is_retried():
+    provider = FaultyProvider(delay=0.2)
+    provider.retry_policy.attempt_timeout = 0.05
+    provider.retry_policy.max_attempts = 2
+    with pytest.raises(TimeoutError):
+        await provider.send_message(MESSAGES)
+    assert provider.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_deadline_stops_retries():
+    provider = FaultyProvider(faults=[ApiError(429, retry_after=10)])
+    with deadline_scope(0.5):
+        with pytest.raises(DeadlineExceededError):
+            await provider.send_message(MESSAGES)
+    assert provider.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_opens_and_recovers():
+    provider = FaultyProvider(faults=[ApiError(503)] * 8)
+    provider.retry_policy.max_attempts = 1
+    breaker = get_circuit_breaker("fake-model")
+    breaker.failure_threshold = 2
+    breaker.reset_timeout = 0.05
+
+    for _ in range(2):
+        with pytest.raises(ApiError):
+            await provider.send_message(MESSAGES)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        await provider.send_message(MESSAGES)
+    assert provider.calls == 2
+
+    await asyncio.sleep(0.06)
+    provider.faults.clear()
+    await provider.send_message(MESSAGES)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_failure_reopens():
+    now = [0.0]
+    breaker = CircuitBreaker("m", failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    now[0] = 11
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # un seul appel de test à la fois
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+@pytest.mark.asyncio
+async def test_stream_retried_before_first_chunk():
+    provider = FaultyProvider(faults=[ApiError(503)])
+    chunks = [c async for c in provider.stream_message(MESSAGES)]
+    assert [c["content"] for c in chunks] == ["a", ""]
+    assert provider.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_stream_not_replayed_after_first_chunk():
+    provider = FaultyProvider(faults=[(ApiError(503),)])
+    received = []
+    with pytest.raises(ApiError):
+        async for chunk in provider.stream_message(MESSAGES):
+            received.append(chunk)
+    assert [c["content"] for c in received] == ["a"]
+    assert provider.calls == 1
+
+
+class SlowLimiter:
+    """Limiteur factice : chaque créneau est accordé après `wait` secondes."""
+
+    def __init__(self, wait):
+        self.wait = wait
+        self.acquired = []
+
+    async def acquire(self, tokens=1, key=None):
+        await asyncio.sleep(self.wait)
+        self.acquired.append(tokens)
+        return self.wait
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_wait_is_outside_attempt_timeout():
+    provider = FaultyProvider()
+    provider.rate_limiter = SlowLimiter(0.1)
+    provider.retry_policy.attempt_timeout = 0.05
+
+    results = await asyncio.gather(*(provider.send_message(MESSAGES) for _ in range(4)))
+
+    assert len(results) == 4
+    assert provider.calls == 4
+    assert get_circuit_breaker("fake-model").stats() == {"state": "closed", "consecutive_failures": 0}
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_slot_acquired_before_each_attempt():
+    provider = FaultyProvider(faults=[ApiError(503), ApiError(503)])
+    provider.rate_limiter = SlowLimiter(0)
+    await provider.send_message(MESSAGES)
+    assert len(provider.rate_limiter.acquired) == 3
+
+    provider = FaultyProvider(faults=[ApiError(503)])
+    provider.rate_limiter = SlowLimiter(0)
+    chunks = [c async for c in provider.stream_message(MESSAGES)]
+    assert len(chunks) == 2
+    assert len(provider.rate_limiter.acquired) == 2
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_wait_bounded_by_deadline_without_breaker_failure():
+    provider = FaultyProvider()
+    provider.rate_limiter = SlowLimiter(1.0)
+    with deadline_scope(0.05):
+        with pytest.raises(DeadlineExceededError):
+            await provider.send_message(MESSAGES)
+    assert provider.calls == 0
+    assert get_circuit_breaker("fake-model").failures == 0
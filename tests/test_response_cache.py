@@ -0,0 +1,141 @@
+"""
+Tests du cache de réponses LLM (clé par contenu, LRU mémoire, SQLite avec TTL et budget)
+"""
+
+import time
+
+import pytest
+
+from backend.ia.providers.base_provider import BaseProvider
+from backend.ia.response_cache import ResponseCache, cache_key, cached
+
+MESSAGES = [{"role": "user", "content": "Liste les fichiers écrits"}]
+
+
+class CountingProvider(BaseProvider):
+    """Provider factice : compte les appels réellement transmis."""
+
+    def __init__(self, response=None):
+        super().__init__(api_key="k", model="fake-model")
+        self.calls = 0
+        self.response = response or {"content": "COMPLET", "tool_calls": [], "finish_reason": "stop"}
+
+    @cached
+    async def send_message(self, messages, functions=None, temperature=0.7, max_tokens=4096):
+        self.calls += 1
+        return dict(self.response)
+
+    def format_functions(self, functions):
+        return functions
+
+    def extract_tool_calls(self, response):
+        return []
+
+    def format_tool_result(self, tool_call_id, function_name, result):
+        return {}
+
+
+@pytest.fixture
+async def cache(tmp_path):
+    cache = ResponseCache(db_path=str(tmp_path / "llm_cache.db"), memory_entries=2)
+    yield cache
+    await cache.close()
+
+
+def test_cache_key_normalizes_whitespace():
+    a = cache_key("m", 0.7, 4096, [{"role": "user", "content": "a  \r\nb\n"}])
+    b = cache_key("m", 0.7, 4096, [{"role": "user", "content": "a\nb"}])
+    assert a == b
+
+
+def test_cache_key_depends_on_parameters():
+    base = cache_key("m", 0.7, 4096, MESSAGES)
+    assert base != cache_key("other", 0.7, 4096, MESSAGES)
+    assert base != cache_key("m", 0.3, 4096, MESSAGES)
+    assert base != cache_key("m", 0.7, 4096, MESSAGES, functions=[{"name": "f"}])
+
+
+@pytest.mark.asyncio
+async def test_memory_lru_then_disk(cache):
+    for key in ("a", "b", "c"):
+        await cache.set(key, "m", {"content": key})
+
+    assert list(cache._memory) == ["b", "c"]  # "a" évincé de la mémoire…
+    assert await cache.get("a") == {"content": "a"}  # …mais servi par le disque
+    assert await cache.get("c") == {"content": "c"}
+
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 0)
+
+
+@pytest.mark.asyncio
+async def test_persists_across_instances(tmp_path):
+    path = str(tmp_path / "llm_cache.db")
+    first = ResponseCache(db_path=path)
+    await first.set("k", "m", {"content": "persisté"})
+    await first.close()
+
+    second = ResponseCache(db_path=path)
+    assert await second.get("k") == {"content": "persisté"}
+    await second.close()
+
+
+@pytest.mark.asyncio
+async def test_expired_entries_are_misses(cache):
+    cache.ttl_seconds = 0.05
+    await cache.set("k", "m", {"content": "x"})
+    time.sleep(0.06)
+
+    assert await cache.get("k") is None
+    assert cache.stats()["expired"] == 1
+
+
+@pytest.mark.asyncio
+async def test_size_budget_evicts_least_recently_used(cache):
+    cache.max_bytes = 250
+    for key in ("a", "b", "c"):
+        await cache.set(key, "m", {"content": key * 100})
+
+    stats = cache.stats()
+    assert stats["evicted"] >= 1
+    cache._memory.clear()
+    assert await cache.get("a") is None
+    assert await cache.get("c") is not None
+
+
+@pytest.mark.asyncio
+async def test_decorator_hit_and_miss(cache):
+    provider = CountingProvider()
+    provider.response_cache = cache
+
+    first = await provider.send_message(MESSAGES, temperature=0.7)
+    second = await provider.send_message(MESSAGES, temperature=0.7)
+
+    assert first == second
+    assert provider.calls == 1
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_decorator_skips_tools_and_disabled_cache(cache):
+    provider = CountingProvider()
+    await provider.send_message(MESSAGES)
+    await provider.send_message(MESSAGES)
+    assert provider.calls == 2  # response_cache absent
+
+    provider.response_cache = cache
+    functions = [{"name": "read_file"}]
+    await provider.send_message(MESSAGES, functions=functions)
+    await provider.send_message(MESSAGES, functions=functions)
+    assert provider.calls == 4
+    assert cache.stats()["stores"] == 0
+
+
+@pytest.mark.asyncio
+async def test_truncated_responses_not_stored(cache):
+    provider = CountingProvider({"content": "partiel", "tool_calls": [], "finish_reason": "length"})
+    provider.response_cache = cache
+
+    await provider.send_message(MESSAGES)
+    await provider.send_message(MESSAGES)
+    assert provider.calls == 2
@@ -0,0 +1,124 @@
+"""
+Tests de l'index des symboles (Python/JS/TS, rapport de code, mise à jour incrémentale)
+"""
+
+import pytest
+
+from backend.services.file_writer import write_files_to_project
+from backend.services.orchestration import SimpleOrchestrator
+from backend.services.symbol_index import (
+    SymbolIndexRegistry,
+    format_report,
+    get_symbol_index,
+    parse_python,
+    parse_script,
+)
+
+PYTHON_SOURCE = '''
+import os
+import requests
+from app.models import User
+
+
+class UserService(Base):
+    def __init__(self, db, retries: int = 3):
+        self.db = db
+
+    async def fetch(self, user_id: str) -> User:
+        return self.db.get(user_id)
+
+
+@router.get("/users/{user_id}")
+async def read_user(user_id: int) -> dict:
+    return {}
+'''
+
+TS_SOURCE = '''
+import { Router } from "express";
+import { helper } from "./utils";
+// class Commented {}
+export class UserView extends Base {
+  constructor(private api: Api) { super(); }
+  async load(id: string): Promise<User> {
+    if (id) { return this.api.get(id); }
+  }
+}
+export function mount(app: App) {
+  app.post("/login", login);
+}
+export const format = (user: User) => `${user.name}`;
+'''
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    monkeypatch.setattr("backend.services.symbol_index.symbol_indexes", SymbolIndexRegistry())
+
+
+def test_python_report():
+    report = format_report([parse_python("app/service.py", PYTHON_SOURCE)], {"app"})
+
+    assert report.splitlines() == [
+        "## app/service.py",
+        "- Classes : UserService(__init__(db, retries: int=3), fetch(user_id: str) -> User)",
+        "- Fonctions : read_user(user_id: int) -> dict",
+        "- Imports : os, requests, app.models",
+        "- Routes : GET /users/{user_id}",
+        "- Dépendances : requests",
+    ]
+
+
+def test_typescript_report():
+    report = format_report([parse_script("src/view.ts", TS_SOURCE)])
+
+    assert report.splitlines() == [
+        "## src/view.ts",
+        "- Classes : UserView(constructor(private api: Api), load(id: string))",
+        "- Fonctions : mount(app: App), format(user: User)",
+        "- Imports : express, ./utils",
+        "- Routes : POST /login",
+        "- Dépendances : express",
+    ]
+
+
+def test_syntax_error_reported():
+    assert parse_python("bad.py", "def broken(:\n").error == "syntaxe invalide ligne 1"
+
+
+def test_index_updated_by_writes_and_queried(tmp_path):
+    index = get_symbol_index(str(tmp_path))
+    assert index.find("run") == []
+
+    write_files_to_project(
+        str(tmp_path), [{"path": "jobs/runner.py", "content": "def run_job(x):\n    pass\n"}]
+    )
+    assert index._files["jobs/runner.py"][2].symbols[0].name == "run_job"  # sans relecture
+
+    runner = "class Runner:\n    def run(self):\n        pass\n"
+    write_files_to_project(str(tmp_path), [{"path": "jobs/runner.py", "content": runner}])
+    assert [(s["kind"], s["name"], s["parent"]) for s in index.find("run")] == [
+        ("class", "Runner", None),
+        ("method", "run", "Runner"),
+    ]
+    assert [s["name"] for s in index.find("", kind="class", path="jobs")] == ["Runner"]
+
+
+@pytest.mark.asyncio
+async def test_code_report_built_locally(tmp_path):
+    written = write_files_to_project(
+        str(tmp_path),
+        [
+            {"path": "main.py", "content": "def main() -> None:\n    pass\n"},
+            {"path": "README.md", "content": "# doc\n"},
+        ],
+    )
+
+    # main.py réécrit par une passe de correction : une seule section
+    report, files = await SimpleOrchestrator._build_code_report(str(tmp_path), written + written[:1])
+
+    assert report == "## main.py\n- Fonctions : main() -> None"
+    assert files == 2
+    followup = SimpleOrchestrator.build_followup_message(
+        "ok", [{"agent_name": "CODEUR", "success": True, "files_written": written}], report
+    )
+    assert "- Fonctions : main() -> None" in followup
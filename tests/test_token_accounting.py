@@ -0,0 +1,123 @@
+"""
+Tests de la comptabilité des tokens (enregistrement, persistance, budgets, estimation des passes)
+"""
+
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+
+from backend.agents.base_agent import BaseAgent
+from backend.db.database import Database
+from backend.ia.token_accounting import (
+    TokenBudgetExceededError,
+    TokenLedger,
+    delegation_scope,
+    usage_from_response,
+)
+from backend.services.orchestration import SimpleOrchestrator
+
+USAGE = {"prompt_tokens": 100, "completion_tokens": 50}
+
+
+class MeteredProvider:
+    """Provider factice retournant un usage fixe par appel."""
+
+    model = "metered-model"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def send_message(self, messages, functions=None, temperature=0.7, max_tokens=4096):
+        self.calls += 1
+        return {"content": "ok", "tool_calls": [], "finish_reason": "stop", "usage": dict(USAGE)}
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path):
+    database = Database(str(tmp_path / "tokens.db"))
+    await database.initialize()
+    yield database
+    await database.close()
+
+
+@pytest.fixture
+def agent(tmp_path):
+    with patch("backend.agents.base_agent.ProviderFactory") as MockFactory:
+        MockFactory.create.return_value = MeteredProvider()
+        a = BaseAgent(agent_id="ag_tokens", name="CODEUR", role="r", description="d")
+    a.log_file = tmp_path / "audit.log"
+    return a
+
+
+def test_usage_from_response():
+    assert usage_from_response({"usage": {"prompt_tokens": 3, "completion_tokens": 2}}) == {
+        "prompt_tokens": 3,
+        "completion_tokens": 2,
+    }
+    assert usage_from_response({"content": "x"}) is None
+    assert usage_from_response({"usage": {"prompt_tokens": 0, "completion_tokens": 0}}) is None
+
+
+@pytest.mark.asyncio
+async def test_usage_persisted_and_aggregated(db):
+    conversation = await db.create_conversation(agent_id="JARVIS_Maître")
+    ledger = TokenLedger(db=db, budget=0)
+
+    await ledger.record(conversation["id"], "JARVIS_Maître", "m", USAGE)
+    with delegation_scope("CODEUR") as delegation_id:
+        await ledger.record(conversation["id"], "CODEUR", "m", USAGE)
+        await ledger.record(conversation["id"], "BASE", "m", USAGE)
+
+    usage = await db.get_token_usage(conversation["id"])
+    assert usage["total_tokens"] == 450
+    assert usage["calls"] == 3
+    assert usage["by_agent"]["CODEUR"] == {"calls": 1, "prompt_tokens": 100, "completion_tokens": 50}
+    assert usage["by_delegation"] == {delegation_id: {"CODEUR": 150, "BASE": 150}}
+    assert ledger.release_delegation(delegation_id)["BASE"]["completion_tokens"] == 50
+
+
+@pytest.mark.asyncio
+async def test_total_reloaded_from_database(db):
+    conversation = await db.create_conversation(agent_id="BASE")
+    await TokenLedger(db=db).record(conversation["id"], "BASE", "m", USAGE)
+
+    restarted = TokenLedger(db=db, budget=100)
+    assert await restarted.used(conversation["id"]) == 150
+    with pytest.raises(TokenBudgetExceededError):
+        await restarted.check_budget(conversation["id"])
+
+
+@pytest.mark.asyncio
+async def test_usage_deleted_with_conversation(db):
+    conversation = await db.create_conversation(agent_id="BASE")
+    await db.record_token_usage([{"conversation_id": conversation["id"], "agent": "BASE", **USAGE}])
+    await db.delete_conversation(conversation["id"])
+    assert (await db.get_token_usage(conversation["id"]))["calls"] == 0
+
+
+@pytest.mark.asyncio
+async def test_agent_stops_when_budget_exhausted(agent):
+    ledger = TokenLedger(budget=300)
+    with patch("backend.agents.base_agent.token_ledger", ledger):
+        messages = [{"role": "user", "content": "Écris main.py"}]
+        await agent.handle(messages, session_id="conv-budget")
+        await agent.handle(messages, session_id="conv-budget")
+        with pytest.raises(TokenBudgetExceededError):
+            await agent.handle(messages, session_id="conv-budget")
+        # Autre conversation : budget indépendant
+        await agent.handle(messages, session_id="conv-other")
+
+    assert agent.provider.calls == 3
+    assert ledger.stats()["agents"]["CODEUR"]["calls"] == 3
+
+
+def test_estimate_passes_uses_measured_tokens_per_file():
+    ledger = TokenLedger()
+    instruction = "Créer : main.py, api.py, models.py, utils.py"
+    with patch("backend.services.orchestration.token_ledger", ledger):
+        assert SimpleOrchestrator.estimate_passes(instruction) == 1  # 4 × 800 / 4096
+
+        ledger.observe_tokens_per_file(completion_tokens=6000, files=2)
+        assert ledger.tokens_per_file(800) == 3000
+        assert SimpleOrchestrator.estimate_passes(instruction) == 3  # 4 × 3000 / 4096